@@ -12,6 +12,7 @@ import logging
 
 from app.config.database import get_db
 from app.models.database import Checkin, AsinBank
+from app.services import search, statistics_service
 
 router = APIRouter(prefix="/api/v1/checkin", tags=["Checkin"])
 logger = logging.getLogger(__name__)
@@ -99,12 +100,12 @@ def get_all_checkins(
     
     # Apply filters
     if order_number:
-        query = query.filter(Checkin.order_number.ilike(f"%{order_number}%"))
+        query = query.filter(search.contains(Checkin.order_number, order_number))
     
     if asin:
         # Join with asin_bank to filter by ASIN
         query = query.join(AsinBank, Checkin.asin_bank_id == AsinBank.id).filter(
-            AsinBank.asin.ilike(f"%{asin}%")
+            search.contains(AsinBank.asin, asin)
         )
     
     if start_date:
@@ -362,42 +363,9 @@ def bulk_delete_checkins(delete_data: CheckinBulkDeleteRequest, db: Session = De
 @router.get("/stats/summary")
 def get_checkin_summary(db: Session = Depends(get_db)):
     """
-    Get summary statistics for check-ins
+    Get summary statistics for check-ins (from the trigger-maintained stats_* tables, cached briefly)
     """
-    from sqlalchemy import func
-    
-    total_checkins = db.query(func.count(Checkin.id)).scalar()
-    total_quantity = db.query(func.sum(Checkin.quantity)).scalar() or 0
-    
-    # Check-ins today
-    from datetime import date
-    today_start = datetime.combine(date.today(), datetime.min.time())
-    checkins_today = db.query(func.count(Checkin.id)).filter(
-        Checkin.checked_in_at >= today_start
-    ).scalar()
-    
-    # By order number
-    by_order = db.query(
-        Checkin.order_number,
-        func.sum(Checkin.quantity).label('total_qty'),
-        func.count(Checkin.id).label('checkin_count')
-    ).group_by(Checkin.order_number).order_by(
-        func.sum(Checkin.quantity).desc()
-    ).limit(10).all()
-    
-    summary_data = {
-        "total_checkins": total_checkins,
-        "total_quantity_checked_in": int(total_quantity),
-        "checkins_today": checkins_today,
-        "top_orders": [
-            {
-                "order_number": order,
-                "total_quantity": int(qty),
-                "checkin_count": count
-            }
-            for order, qty, count in by_order if order
-        ]
-    }
+    summary_data = statistics_service.get_checkin_summary(db)
     
     return {
         "status": 200,
@@ -193,7 +193,7 @@ def resolve_manual_review(
     if entry.retailer == "snipes" and entry.email_type == "cancellation" and not items_payload:
         # Snipes full cancellation: order_number only, items=[] means cancel all
         cancellation_data = SnipesCancellationData(order_number=order_number, items=[])
-        success, error_msg = processor._process_snipes_cancellation_update(cancellation_data)
+        success, error_msg = processor._process_snipes_cancellation_update(cancellation_data, message_id=entry.gmail_message_id)
         action_msg = "Processed full cancellation"
     elif entry.retailer == "hibbett" and entry.email_type == "shipping":
         # Hibbett shipping: from user input or extracted_items (when data complete, no matching records)
@@ -215,7 +215,7 @@ def resolve_manual_review(
             for it in items_payload
         ]
         shipping_data = HibbettShippingData(order_number=order_number, items=hibbett_items)
-        success, error_msg = processor._process_hibbett_shipping_update(shipping_data)
+        success, error_msg = processor._process_hibbett_shipping_update(shipping_data, message_id=entry.gmail_message_id)
         action_msg = "Processed shipping update"
     elif entry.retailer == "shopwss" and entry.email_type == "cancellation":
         # ShopWSS partial cancellation: user supplies unique_id per item
@@ -229,7 +229,7 @@ def resolve_manual_review(
             for it in items_payload
         ]
         cancellation_data = ShopWSSCancellationData(order_number=order_number, items=shopwss_items)
-        success, error_msg = processor._process_shopwss_cancellation_update(cancellation_data)
+        success, error_msg = processor._process_shopwss_cancellation_update(cancellation_data, message_id=entry.gmail_message_id)
         action_msg = "Processed ShopWSS cancellation"
     elif entry.retailer == "shoepalace" and entry.email_type == "cancellation":
         # Shoe Palace cancellation: user supplies unique_id per item
@@ -243,7 +243,7 @@ def resolve_manual_review(
             for it in items_payload
         ]
         cancellation_data = ShoepalaceCancellationData(order_number=order_number, items=shoepalace_items)
-        success, error_msg = processor._process_shoepalace_cancellation_update(cancellation_data)
+        success, error_msg = processor._process_shoepalace_cancellation_update(cancellation_data, message_id=entry.gmail_message_id)
         action_msg = "Processed Shoe Palace cancellation"
     else:
         # Revolve cancellation (default)
@@ -257,11 +257,11 @@ def resolve_manual_review(
             for it in items_payload
         ]
         cancellation_data = RevolveCancellationData(order_number=order_number, items=items)
-        success, error_msg = processor._process_revolve_cancellation_update(cancellation_data)
+        success, error_msg = processor._process_revolve_cancellation_update(cancellation_data, message_id=entry.gmail_message_id)
         action_msg = "Processed cancellation"
 
     if success:
-        # Update Gmail label from Manual-Review/Error to Processed (also removes those labels)
+        # Mark the email processed in the registry; its Gmail label goes from Manual-Review/Error to Processed
         processor._add_processed_label(entry.gmail_message_id, entry.email_type)
         entry.status = "resolved"
         entry.resolved_at = datetime.utcnow()
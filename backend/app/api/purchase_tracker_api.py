@@ -4,14 +4,23 @@ FastAPI routes for accessing purchase tracker data
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Query  # pyright: ignore[reportMissingImports]
+from fastapi.responses import StreamingResponse  # pyright: ignore[reportMissingImports]
+from sqlalchemy import text  # pyright: ignore[reportMissingImports]
 from sqlalchemy.orm import Session, joinedload, selectinload  # pyright: ignore[reportMissingImports]
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional
 from datetime import date, datetime
 from pydantic import BaseModel, field_validator  # pyright: ignore[reportMissingImports]
+import csv
+import io
+import json
 import logging
 
-from app.config.database import get_db
+from app.config.database import SessionLocal, get_db
 from app.models.database import AsinBank, OASourcing, PurchaseTracker, Retailer
+from app.services import search, statistics_service
+from app.services import lead_asins
+from app.services.fulfillment_ledger import ledger_quantities, lock_record, rebuild_fulfillment_quantities, record_manual_adjustment
+from app.services.retailer_counters import track_retailer_counters
 
 router = APIRouter(prefix="/api/v1/purchase-tracker", tags=["Purchase Tracker"])
 logger = logging.getLogger(__name__)
@@ -155,68 +164,73 @@ def get_all_leads(
     limit: int = Query(100, ge=1, le=1000),
     retailer: Optional[str] = None,
     product_name: Optional[str] = None,
+    search_mode: str = Query("contains", pattern="^(contains|fulltext)$", description="product_name matching: contains (substring) or fulltext (all words, best match first)"),
     db: Session = Depends(get_db)
 ):
     """
     Get all OA sourcing leads with pagination and filters - includes all fields from CSV
+    
+    With search_mode=fulltext, leads matching every word of product_name are
+    returned best match first.
     """
     query = db.query(OASourcing)
     
     if retailer:
         # Filter by retailer through relationship
         query = query.join(Retailer, OASourcing.retailer_id == Retailer.id).filter(
-            Retailer.name.ilike(f"%{retailer}%")
+            search.contains(Retailer.name, retailer)
         )
     
     if product_name:
-        query = query.filter(OASourcing.product_name.ilike(f"%{product_name}%"))
+        query = query.filter(search.product_name_filter(OASourcing.product_name, product_name, search_mode))
     
     total = query.count()
-    leads = query.offset(skip).limit(limit).all()
-    
-    # Helper function to get ASINs - Two approaches:
-    # Approach 1: Via foreign key relationships (complex but uses DB relationships)
-    # Approach 2: Direct query by lead_id (simpler and more reliable)
-    
-    def get_lead_asins_via_relationships(lead):
-        """Get ASINs using foreign key relationships"""
-        asins = []
-        for i in range(1, 16):
-            asin_id = getattr(lead, f'asin{i}_id', None)
-            if asin_id:
-                # Query asin_bank directly using the foreign key ID
-                asin_record = db.query(AsinBank).filter_by(id=asin_id).first()
-                if asin_record:
-                    recommended_qty = getattr(lead, f'asin{i}_recommended_quantity', None)
-                    asins.append({
-                        "id": asin_record.id,
-                        "asin": asin_record.asin,
-                        "size": asin_record.size,
-                        "recommended_quantity": recommended_qty if recommended_qty else 1
-                    })
-        return asins
     
-    def get_lead_asins_via_query(lead_id):
-        """Get ASINs by querying asin_bank with lead_id (simpler approach)"""
-        asin_records = db.query(AsinBank).filter(AsinBank.lead_id == lead_id).all()
+    if product_name and search_mode == "fulltext":
+        query = query.order_by(search.product_name_rank(OASourcing.product_name, product_name).desc(), OASourcing.id)
+    leads = query.options(joinedload(OASourcing.retailer)).offset(skip).limit(limit).all()
+    
+    # ASINs for the whole page in at most two queries:
+    # 1. lead_asin links (with recommended quantities)
+    # 2. fallback for leads with no links: asin_bank rows by lead_id
+    links_by_lead = lead_asins.load_links(db, leads)
+    
+    def get_lead_asins_via_links(lead):
+        """ASINs linked to the lead, in position order"""
         return [
             {
+                "id": link.asin.id,
+                "asin": link.asin.asin,
+                "size": link.asin.size,
+                "recommended_quantity": link.recommended_quantity if link.recommended_quantity else 1
+            }
+            for link in links_by_lead[lead.id]
+        ]
+    
+    asins_by_lead = {lead.id: get_lead_asins_via_links(lead) for lead in leads}
+    
+    fallback_lead_ids = [lead.lead_id for lead in leads if not asins_by_lead[lead.id]]
+    if fallback_lead_ids:
+        asins_by_lead_id = {}
+        fallback_records = db.query(AsinBank)\
+            .filter(AsinBank.lead_id.in_(fallback_lead_ids))\
+            .order_by(AsinBank.id)\
+            .all()
+        for asin in fallback_records:
+            asins_by_lead_id.setdefault(asin.lead_id, []).append({
                 "id": asin.id,
                 "asin": asin.asin,
                 "size": asin.size,
                 "recommended_quantity": 1  # Default, since quantity is in oa_sourcing
-            }
-            for asin in asin_records
-        ]
+            })
+        for lead in leads:
+            if not asins_by_lead[lead.id]:
+                asins_by_lead[lead.id] = asins_by_lead_id.get(lead.lead_id, [])
     
-    # Use relationship-based approach (more complete data with quantities)
-    def get_lead_asins(lead):
-        asins = get_lead_asins_via_relationships(lead)
-        if not asins:
-            # Fallback to query-based approach if relationships don't work
-            asins = get_lead_asins_via_query(lead.lead_id)
-        logger.info(f"[OA-SOURCING] Lead {lead.lead_id} has {len(asins)} ASINs")
-        return asins
+    logger.debug(
+        f"[OA-SOURCING] Hydrated {sum(len(a) for a in asins_by_lead.values())} ASINs for {len(leads)} leads "
+        f"({len(fallback_lead_ids)} via lead_id fallback)"
+    )
     
     return {
         "status": 200,
@@ -261,7 +275,7 @@ def get_all_leads(
                     "total_fee": float(lead.total_fee) if lead.total_fee else None,
                     "margin_using_rsp": float(lead.margin_using_rsp) if lead.margin_using_rsp else None,
                     "monitored": lead.monitored,
-                    "asins": get_lead_asins(lead)
+                    "asins": asins_by_lead[lead.id]
                 }
                 for lead in leads
             ]
@@ -284,13 +298,13 @@ def get_asin_bank(
     query = db.query(AsinBank)
     
     if lead_id:
-        query = query.filter(AsinBank.lead_id.ilike(f"%{lead_id}%"))
+        query = query.filter(search.contains(AsinBank.lead_id, lead_id))
     
     if asin:
-        query = query.filter(AsinBank.asin.ilike(f"%{asin}%"))
+        query = query.filter(search.contains(AsinBank.asin, asin))
     
     if size:
-        query = query.filter(AsinBank.size.ilike(f"%{size}%"))
+        query = query.filter(search.contains(AsinBank.size, size))
     
     total = query.count()
     asins = query.offset(skip).limit(limit).all()
@@ -454,23 +468,7 @@ def get_lead_by_id(lead_id: str, db: Session = Depends(get_db)):
     Get detailed information for a specific lead including all ASINs
     """
     lead = db.query(OASourcing)\
-        .options(
-            joinedload(OASourcing.asin1_ref),
-            joinedload(OASourcing.asin2_ref),
-            joinedload(OASourcing.asin3_ref),
-            joinedload(OASourcing.asin4_ref),
-            joinedload(OASourcing.asin5_ref),
-            joinedload(OASourcing.asin6_ref),
-            joinedload(OASourcing.asin7_ref),
-            joinedload(OASourcing.asin8_ref),
-            joinedload(OASourcing.asin9_ref),
-            joinedload(OASourcing.asin10_ref),
-            joinedload(OASourcing.asin11_ref),
-            joinedload(OASourcing.asin12_ref),
-            joinedload(OASourcing.asin13_ref),
-            joinedload(OASourcing.asin14_ref),
-            joinedload(OASourcing.asin15_ref)
-        )\
+        .options(joinedload(OASourcing.retailer))\
         .filter_by(lead_id=lead_id)\
         .first()
     
@@ -482,17 +480,15 @@ def get_lead_by_id(lead_id: str, db: Session = Depends(get_db)):
         }
     
     # Collect ASINs (same structure as list endpoint)
-    asins = []
-    for i in range(1, 16):
-        asin_ref = getattr(lead, f'asin{i}_ref', None)
-        if asin_ref:
-            recommended_qty = getattr(lead, f'asin{i}_recommended_quantity', None)
-            asins.append({
-                "id": asin_ref.id,
-                "asin": asin_ref.asin,
-                "size": asin_ref.size,
-                "recommended_quantity": recommended_qty if recommended_qty is not None else 1
-            })
+    asins = [
+        {
+            "id": link.asin.id,
+            "asin": link.asin.asin,
+            "size": link.asin.size,
+            "recommended_quantity": link.recommended_quantity if link.recommended_quantity is not None else 1
+        }
+        for link in lead_asins.load_links(db, [lead])[lead.id]
+    ]
 
     # Return same structure as list endpoint for consistency (frontend Lead interface)
     return {
@@ -544,6 +540,7 @@ def update_lead(lead_id: str, update_data: LeadUpdateRequest, db: Session = Depe
     """
     Update an existing lead by lead_id
     """
+    track_retailer_counters(db)
     try:
         # Find the lead
         lead = db.query(OASourcing).filter_by(lead_id=lead_id).first()
@@ -709,7 +706,7 @@ def delete_lead(lead_id: str, db: Session = Depends(get_db)):
 @router.post("/leads/{lead_id}/asins")
 def add_asin_to_lead(lead_id: str, asin_data: AsinAddRequest, db: Session = Depends(get_db)):
     """
-    Add an ASIN to a lead at the next available position (1-15)
+    Add an ASIN to a lead at the next available position
     """
     try:
         # Find the lead
@@ -722,21 +719,6 @@ def add_asin_to_lead(lead_id: str, asin_data: AsinAddRequest, db: Session = Depe
                 "data": None
             }
         
-        # Find next available position (1-15)
-        position = None
-        for i in range(1, 16):
-            asin_id_field = getattr(lead, f'asin{i}_id', None)
-            if not asin_id_field:
-                position = i
-                break
-        
-        if not position:
-            return {
-                "status": -1,
-                "message": "Maximum 15 ASINs allowed per lead. Please delete an existing ASIN first.",
-                "data": None
-            }
-        
         # Check if (asin, size) exists: for this lead first, else globally (reuse)
         existing_for_lead = db.query(AsinBank).filter_by(
             lead_id=lead_id,
@@ -753,13 +735,13 @@ def add_asin_to_lead(lead_id: str, asin_data: AsinAddRequest, db: Session = Depe
         elif existing_global:
             asin_bank_id = existing_global.id
             # Skip if already linked to this lead (avoid duplicate linkage)
-            for j in range(1, 16):
-                if getattr(lead, f'asin{j}_id', None) == asin_bank_id:
-                    return {
-                        "status": 200,
-                        "message": f"ASIN {asin_data.asin} (size: {asin_data.size}) already linked to this lead at position {j}",
-                        "data": {"position": j, "asin": asin_data.asin, "size": asin_data.size}
-                    }
+            existing_link = lead_asins.find_link_to_asin(lead, asin_bank_id)
+            if existing_link:
+                return {
+                    "status": 200,
+                    "message": f"ASIN {asin_data.asin} (size: {asin_data.size}) already linked to this lead at position {existing_link.position}",
+                    "data": {"position": existing_link.position, "asin": asin_data.asin, "size": asin_data.size}
+                }
             logger.info(f"[REUSE] ASIN {asin_data.asin} (size: {asin_data.size}) already in bank, linking to lead {lead_id}")
         else:
             # Create new ASIN in asin_bank
@@ -772,9 +754,8 @@ def add_asin_to_lead(lead_id: str, asin_data: AsinAddRequest, db: Session = Depe
             db.flush()
             asin_bank_id = new_asin.id
         
-        # Set the ASIN at the found position
-        setattr(lead, f'asin{position}_id', asin_bank_id)
-        setattr(lead, f'asin{position}_recommended_quantity', asin_data.recommended_quantity)
+        # Link the ASIN at the next free position
+        position = lead_asins.link_asin(lead, asin_bank_id, asin_data.recommended_quantity).position
         
         db.commit()
         db.refresh(lead)
@@ -811,13 +792,13 @@ def update_asin_in_lead(
     db: Session = Depends(get_db)
 ):
     """
-    Update an ASIN at a specific position (1-15) in a lead
+    Update an ASIN at a specific position in a lead
     """
     try:
-        if position < 1 or position > 15:
+        if position < 1:
             return {
                 "status": -1,
-                "message": "Position must be between 1 and 15",
+                "message": "Position must be 1 or greater",
                 "data": None
             }
         
@@ -832,8 +813,7 @@ def update_asin_in_lead(
             }
         
         # Check if ASIN exists at this position
-        current_asin_id = getattr(lead, f'asin{position}_id', None)
-        if not current_asin_id:
+        if not lead_asins.get_link(lead, position):
             return {
                 "status": -1,
                 "message": f"No ASIN found at position {position}",
@@ -865,8 +845,7 @@ def update_asin_in_lead(
         # The old ASIN record remains in asin_bank table unchanged
         
         # Update position with new ASIN and quantity
-        setattr(lead, f'asin{position}_id', asin_bank_id)
-        setattr(lead, f'asin{position}_recommended_quantity', asin_data.recommended_quantity)
+        lead_asins.link_asin(lead, asin_bank_id, asin_data.recommended_quantity, position=position)
         
         db.commit()
         db.refresh(lead)
@@ -898,13 +877,13 @@ def update_asin_in_lead(
 @router.delete("/leads/{lead_id}/asins/{position}")
 def delete_asin_from_lead(lead_id: str, position: int, db: Session = Depends(get_db)):
     """
-    Delete an ASIN at a specific position (1-15) from a lead
+    Delete an ASIN at a specific position from a lead
     """
     try:
-        if position < 1 or position > 15:
+        if position < 1:
             return {
                 "status": -1,
-                "message": "Position must be between 1 and 15",
+                "message": "Position must be 1 or greater",
                 "data": None
             }
         
@@ -918,8 +897,8 @@ def delete_asin_from_lead(lead_id: str, position: int, db: Session = Depends(get
                 "data": None
             }
         
-        # Check if ASIN exists at this position
-        asin_id = getattr(lead, f'asin{position}_id', None)
+        # Clear the position
+        asin_id = lead_asins.unlink_asin(lead, position)
         if not asin_id:
             return {
                 "status": -1,
@@ -927,31 +906,10 @@ def delete_asin_from_lead(lead_id: str, position: int, db: Session = Depends(get
                 "data": None
             }
         
-        # Clear the position
-        setattr(lead, f'asin{position}_id', None)
-        setattr(lead, f'asin{position}_recommended_quantity', None)
-        
         # Check if this ASIN is used by other leads
         asin_bank = db.query(AsinBank).filter_by(id=asin_id).first()
         if asin_bank:
-            # Check if any other lead uses this ASIN
-            other_lead_uses = db.query(OASourcing).filter(
-                (OASourcing.asin1_id == asin_id) |
-                (OASourcing.asin2_id == asin_id) |
-                (OASourcing.asin3_id == asin_id) |
-                (OASourcing.asin4_id == asin_id) |
-                (OASourcing.asin5_id == asin_id) |
-                (OASourcing.asin6_id == asin_id) |
-                (OASourcing.asin7_id == asin_id) |
-                (OASourcing.asin8_id == asin_id) |
-                (OASourcing.asin9_id == asin_id) |
-                (OASourcing.asin10_id == asin_id) |
-                (OASourcing.asin11_id == asin_id) |
-                (OASourcing.asin12_id == asin_id) |
-                (OASourcing.asin13_id == asin_id) |
-                (OASourcing.asin14_id == asin_id) |
-                (OASourcing.asin15_id == asin_id)
-            ).filter(OASourcing.id != lead.id).first()
+            other_lead_uses = lead_asins.is_linked_elsewhere(db, asin_id, lead.id)
             
             # Delete ASIN from asin_bank if not used by other leads
             if not other_lead_uses:
@@ -1199,10 +1157,8 @@ def create_lead_submittal(lead_data: LeadSubmittalRequest, db: Session = Depends
             # Add quantity to total
             total_suggested_qty += (asin_data.recommendedQuantity or 0)
             
-            # Link ASIN to lead (up to 15 ASINs)
-            if idx < 15:
-                setattr(new_lead, f'asin{idx + 1}_id', asin_bank.id)
-                setattr(new_lead, f'asin{idx + 1}_recommended_quantity', asin_data.recommendedQuantity or 0)
+            # Link ASIN to lead
+            lead_asins.link_asin(new_lead, asin_bank.id, asin_data.recommendedQuantity or 0, position=idx + 1)
         
         # Set suggested total quantity
         new_lead.suggested_total_qty = total_suggested_qty
@@ -1244,10 +1200,23 @@ def create_lead_submittal(lead_data: LeadSubmittalRequest, db: Session = Depends
 # Purchase Tracker Endpoints
 # ========================
 
-@router.get("/purchases")
-def get_all_purchases(
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000),
+def _estimated_row_count(db: Session, table_name: str) -> Optional[int]:
+    """
+    Planner row estimate for a table (pg_class.reltuples, kept current by autovacuum/ANALYZE).
+    
+    Returns None when the table has never been analyzed (reltuples = -1), so the caller can count instead.
+    """
+    reltuples = db.execute(
+        text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:table_name)"),
+        {"table_name": table_name}
+    ).scalar()
+    if reltuples is None or reltuples < 0:
+        return None
+    return int(reltuples)
+
+
+def _filter_purchases(
+    query,
     platform: Optional[str] = None,
     status: Optional[str] = None,
     start_date: Optional[date] = None,
@@ -1256,19 +1225,13 @@ def get_all_purchases(
     asin: Optional[str] = None,
     order_number: Optional[str] = None,
     supplier: Optional[str] = None,
-    db: Session = Depends(get_db)
+    search_mode: str = "contains"
 ):
     """
-    Get all purchases with pagination and filters (ULTRA-OPTIMIZED SCHEMA)
+    Apply the purchase listing filters (shared by GET /purchases and GET /purchases/export)
     """
-    query = db.query(PurchaseTracker)\
-        .options(
-            joinedload(PurchaseTracker.oa_sourcing),
-            joinedload(PurchaseTracker.asin_bank_ref)
-        )
-    
     if platform:
-        query = query.filter(PurchaseTracker.platform.ilike(f"%{platform}%"))
+        query = query.filter(search.contains(PurchaseTracker.platform, platform))
     
     if status:
         query = query.filter(PurchaseTracker.status == status)
@@ -1285,100 +1248,240 @@ def get_all_purchases(
         # Join OASourcing when filtering by product_name or supplier (retailer)
         query = query.join(OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id)
     if product_name:
-        query = query.filter(OASourcing.product_name.ilike(f"%{product_name}%"))
+        query = query.filter(search.product_name_filter(OASourcing.product_name, product_name, search_mode))
     if supplier:
         query = query.join(Retailer, OASourcing.retailer_id == Retailer.id)\
-            .filter(Retailer.name.ilike(f"%{supplier}%"))
+            .filter(search.contains(Retailer.name, supplier))
     
     if asin:
         # Filter by asin from asin_bank relationship
         query = query.join(AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id)\
-            .filter(AsinBank.asin.ilike(f"%{asin}%"))
+            .filter(search.contains(AsinBank.asin, asin))
     
     if order_number:
-        query = query.filter(PurchaseTracker.order_number.ilike(f"%{order_number}%"))
+        query = query.filter(search.contains(PurchaseTracker.order_number, order_number))
+    
+    return query
+
+
+def _serialize_purchase(p: PurchaseTracker) -> dict:
+    """
+    Purchase listing row (GET /purchases items, GET /purchases/export rows)
+    """
+    return {
+        "id": p.id,
+        "date": p.date.isoformat() if p.date else None,
+        "created_at": p.created_at.isoformat() if p.created_at else None,
+        "lead_id": p.lead_id,
+        "platform": p.platform,
+        "brand": p.brand,  # From oa_sourcing via property
+        "product_name": p.product_name,  # From oa_sourcing via property
+        "size": p.size,  # From asin_bank via property
+        "asin": p.asin,  # From asin_bank via property
+        "order_number": p.order_number,
+        "sourced_by": p.sourced_by,  # From oa_sourcing via property
+        "supplier": p.supplier,  # From retailer via oa_sourcing
+        "unique_id": p.oa_sourcing.unique_id if p.oa_sourcing else None,  # Retailer product ID (e.g. style code)
+        
+        # Quantities
+        "og_qty": p.og_qty,
+        "final_qty": p.final_qty,
+        "cancelled_qty": p.cancelled_qty,
+        
+        # Pricing
+        "ppu": float(p.ppu) if p.ppu else None,  # From oa_sourcing via property
+        "rsp": float(p.rsp) if p.rsp else None,
+        "total_spend": p.total_spend,  # Calculated property
+        "profit": p.profit,  # Calculated property
+        "margin_percent": p.margin_percent,  # Calculated property
+        
+        # Fulfillment tracking (NUMBERS indicating stages)
+        "shipped_to_pw": p.shipped_to_pw if p.shipped_to_pw is not None else 0,
+        "arrived": p.arrived if p.arrived is not None else 0,
+        "checked_in": p.checked_in if p.checked_in is not None else 0,
+        "shipped_out": p.shipped_out if p.shipped_out is not None else 0,
+        "tracking": p.tracking,
+        "delivery_date": p.delivery_date.isoformat() if p.delivery_date else None,
+        "location": p.location,
+        "address": p.address,
+        "in_bound": p.in_bound,
+        
+        # FBA fields
+        "outbound_name": p.outbound_name,
+        "fba_shipment": p.fba_shipment,
+        "fba_msku": p.fba_msku,
+        
+        # Refund tracking
+        "amt_of_cancelled_qty_credit_card": p.amt_of_cancelled_qty_credit_card,
+        "amt_of_cancelled_qty_gift_card": p.amt_of_cancelled_qty_gift_card,
+        "expected_refund_amount": p.expected_refund_amount,
+        "amount_refunded": p.amount_refunded,
+        "refund_status": p.refund_status,
+        "refund_method": p.refund_method,
+        "date_of_refund": p.date_of_refund.isoformat() if p.date_of_refund else None,
+        
+        # Other
+        "status": p.status,
+        "audited": p.audited,
+        "notes": p.notes,
+        "validation_bank": p.validation_bank,
+        "concat": p.concat
+    }
+
+
+@router.get("/purchases")
+def get_all_purchases(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[int] = Query(None, ge=1, description="Keyset cursor: return purchases with id below this (next_cursor of the previous page); skip is ignored"),
+    total: str = Query("exact", pattern="^(exact|estimated|none)$", description="exact: COUNT(*); estimated: planner row estimate when no filters are set; none: skip counting"),
+    platform: Optional[str] = None,
+    status: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    product_name: Optional[str] = None,
+    asin: Optional[str] = None,
+    order_number: Optional[str] = None,
+    supplier: Optional[str] = None,
+    search_mode: str = Query("contains", pattern="^(contains|fulltext)$", description="product_name matching: contains (substring) or fulltext (all words)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get all purchases with pagination and filters (ULTRA-OPTIMIZED SCHEMA)
+    
+    Pages are ordered by id descending. Deep pages should use keyset pagination:
+    pass the previous page's next_cursor as cursor instead of increasing skip,
+    so the database seeks on the primary key instead of scanning skipped rows.
+    search_mode=fulltext matches product_name word by word but keeps that order.
+    """
+    query = _filter_purchases(
+        db.query(PurchaseTracker),
+        platform=platform, status=status, start_date=start_date, end_date=end_date,
+        product_name=product_name, asin=asin, order_number=order_number, supplier=supplier,
+        search_mode=search_mode
+    )
+    has_filters = any([platform, status, start_date, end_date, product_name, asin, order_number, supplier])
+    
+    # Estimates only cover the unfiltered table; filtered listings fall back to an exact count
+    total_count = None
+    total_is_estimate = False
+    if total == "estimated" and not has_filters:
+        total_count = _estimated_row_count(db, PurchaseTracker.__tablename__)
+        total_is_estimate = total_count is not None
+    if total != "none" and total_count is None:
+        total_count = query.count()
     
     # Order by id descending (newest first) to ensure stable ordering
     # This ensures records don't move between pages after updates since ID never changes
     # Using ID ensures consistent pagination even when other fields are updated
     query = query.order_by(PurchaseTracker.id.desc())
-    
-    total = query.count()
-    purchases = query.offset(skip).limit(limit).all()
+    if cursor is not None:
+        query = query.filter(PurchaseTracker.id < cursor)
+    else:
+        query = query.offset(skip)
+    
+    # Eager-load everything the serializer touches (supplier reads oa_sourcing.retailer)
+    # so a page costs the same number of queries regardless of its size.
+    # One extra row tells whether another page follows.
+    rows = query.options(
+        joinedload(PurchaseTracker.oa_sourcing).joinedload(OASourcing.retailer),
+        joinedload(PurchaseTracker.asin_bank_ref)
+    ).limit(limit + 1).all()
+    purchases = rows[:limit]
+    next_cursor = purchases[-1].id if len(rows) > limit else None
     
     return {
         "status": 200,
         "message": "Purchases retrieved successfully",
         "data": {
-            "total": total,
-            "skip": skip,
+            "total": total_count,
+            "total_is_estimate": total_is_estimate,
+            "skip": skip if cursor is None else None,
             "limit": limit,
-            "items": [
-                {
-                    "id": p.id,
-                    "date": p.date.isoformat() if p.date else None,
-                    "created_at": p.created_at.isoformat() if p.created_at else None,
-                    "lead_id": p.lead_id,
-                    "platform": p.platform,
-                    "brand": p.brand,  # From oa_sourcing via property
-                    "product_name": p.product_name,  # From oa_sourcing via property
-                    "size": p.size,  # From asin_bank via property
-                    "asin": p.asin,  # From asin_bank via property
-                    "order_number": p.order_number,
-                    "sourced_by": p.sourced_by,  # From oa_sourcing via property
-                    "supplier": p.supplier,  # From retailer via oa_sourcing
-                    "unique_id": p.oa_sourcing.unique_id if p.oa_sourcing else None,  # Retailer product ID (e.g. style code)
-                    
-                    # Quantities
-                    "og_qty": p.og_qty,
-                    "final_qty": p.final_qty,
-                    "cancelled_qty": p.cancelled_qty,
-                    
-                    # Pricing
-                    "ppu": float(p.ppu) if p.ppu else None,  # From oa_sourcing via property
-                    "rsp": float(p.rsp) if p.rsp else None,
-                    "total_spend": p.total_spend,  # Calculated property
-                    "profit": p.profit,  # Calculated property
-                    "margin_percent": p.margin_percent,  # Calculated property
-                    
-                    # Fulfillment tracking (NUMBERS indicating stages)
-                    "shipped_to_pw": p.shipped_to_pw if p.shipped_to_pw is not None else 0,
-                    "arrived": p.arrived if p.arrived is not None else 0,
-                    "checked_in": p.checked_in if p.checked_in is not None else 0,
-                    "shipped_out": p.shipped_out if p.shipped_out is not None else 0,
-                    "tracking": p.tracking,
-                    "delivery_date": p.delivery_date.isoformat() if p.delivery_date else None,
-                    "location": p.location,
-                    "address": p.address,
-                    "in_bound": p.in_bound,
-                    
-                    # FBA fields
-                    "outbound_name": p.outbound_name,
-                    "fba_shipment": p.fba_shipment,
-                    "fba_msku": p.fba_msku,
-                    
-                    # Refund tracking
-                    "amt_of_cancelled_qty_credit_card": p.amt_of_cancelled_qty_credit_card,
-                    "amt_of_cancelled_qty_gift_card": p.amt_of_cancelled_qty_gift_card,
-                    "expected_refund_amount": p.expected_refund_amount,
-                    "amount_refunded": p.amount_refunded,
-                    "refund_status": p.refund_status,
-                    "refund_method": p.refund_method,
-                    "date_of_refund": p.date_of_refund.isoformat() if p.date_of_refund else None,
-                    
-                    # Other
-                    "status": p.status,
-                    "audited": p.audited,
-                    "notes": p.notes,
-                    "validation_bank": p.validation_bank,
-                    "concat": p.concat
-                }
-                for p in purchases
-            ]
+            "cursor": cursor,
+            "next_cursor": next_cursor,
+            "items": [_serialize_purchase(p) for p in purchases]
         }
     }
 
 
+EXPORT_BATCH_SIZE = 1000
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _stream_purchases_export(format: str, filters: dict) -> Iterator[str]:
+    """
+    Yield the filtered purchases as NDJSON lines or CSV, EXPORT_BATCH_SIZE rows per chunk.
+    
+    Rows come from a server-side cursor (yield_per), so memory stays at one batch
+    whatever the table size. The generator owns its session because it runs after
+    the endpoint has returned.
+    """
+    db = SessionLocal()
+    try:
+        query = _filter_purchases(db.query(PurchaseTracker), **filters)\
+            .options(
+                joinedload(PurchaseTracker.oa_sourcing).joinedload(OASourcing.retailer),
+                joinedload(PurchaseTracker.asin_bank_ref)
+            )\
+            .order_by(PurchaseTracker.id.desc())\
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        
+        buffer = io.StringIO()
+        writer = None
+        rows = 0
+        for rows, purchase in enumerate(query, start=1):
+            row = _serialize_purchase(purchase)
+            if format == "csv":
+                if writer is None:
+                    writer = csv.DictWriter(buffer, fieldnames=list(row.keys()))
+                    writer.writeheader()
+                writer.writerow(row)
+            else:
+                buffer.write(json.dumps(row))
+                buffer.write("\n")
+            if rows % EXPORT_BATCH_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+        logger.info(f"[EXPORT] Streamed {rows} purchases as {format}")
+    finally:
+        db.close()
+
+
+@router.get("/purchases/export")
+def export_purchases(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    platform: Optional[str] = None,
+    status: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    product_name: Optional[str] = None,
+    asin: Optional[str] = None,
+    order_number: Optional[str] = None,
+    supplier: Optional[str] = None,
+    search_mode: str = Query("contains", pattern="^(contains|fulltext)$", description="product_name matching: contains (substring) or fulltext (all words)"),
+):
+    """
+    Stream every purchase matching the GET /purchases filters as NDJSON (one row per line) or CSV
+    
+    Rows have the same fields as GET /purchases items, newest first.
+    """
+    filters = {
+        "platform": platform, "status": status, "start_date": start_date, "end_date": end_date,
+        "product_name": product_name, "asin": asin, "order_number": order_number, "supplier": supplier,
+        "search_mode": search_mode
+    }
+    filename = f"purchases_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{format}"
+    return StreamingResponse(
+        _stream_purchases_export(format, filters),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
 @router.get("/purchases/{purchase_id}")
 def get_purchase_by_id(purchase_id: int, db: Session = Depends(get_db)):
     """
@@ -1470,6 +1573,7 @@ def update_purchase(
     """
     Update a purchase tracker record
     """
+    track_retailer_counters(db)
     purchase = db.query(PurchaseTracker).filter_by(id=purchase_id).first()
     
     if not purchase:
@@ -1479,6 +1583,16 @@ def update_purchase(
             "data": None
         }
     
+    # Quantities the fulfillment ledger feeds: lock the row, and record the edit below
+    # so a ledger rebuild keeps it
+    edits_quantities = any(
+        value is not None
+        for value in (update_data.og_qty, update_data.final_qty, update_data.cancelled_qty, update_data.shipped_to_pw)
+    )
+    if edits_quantities:
+        lock_record(db, purchase)
+        quantities_before = ledger_quantities(purchase)
+    
     # Update fields if provided
     if update_data.og_qty is not None:
         purchase.og_qty = update_data.og_qty
@@ -1539,6 +1653,8 @@ def update_purchase(
         purchase.location = location
     
     try:
+        if edits_quantities:
+            record_manual_adjustment(db, purchase, quantities_before)
         db.commit()
         db.refresh(purchase)
         
@@ -1565,6 +1681,7 @@ def delete_purchase(purchase_id: int, db: Session = Depends(get_db)):
     """
     Delete a purchase tracker record
     """
+    track_retailer_counters(db)
     purchase = db.query(PurchaseTracker).filter_by(id=purchase_id).first()
     
     if not purchase:
@@ -1608,6 +1725,7 @@ def bulk_delete_purchases(delete_data: PurchaseBulkDeleteRequest, db: Session =
     
     Request body should contain a list of purchase IDs to delete
     """
+    track_retailer_counters(db)
     try:
         if not delete_data.ids:
             return {
@@ -1675,6 +1793,7 @@ def create_manual_purchase(
     2. Look up the AsinBank record by lead_id (from OASourcing) + size
     3. Create a PurchaseTracker record with auto-filled fields
     """
+    track_retailer_counters(db)
     try:
         # 1. Look up OASourcing by unique_id
         oa_sourcing = db.query(OASourcing).filter_by(unique_id=purchase_data.unique_id).first()
@@ -1804,7 +1923,7 @@ def get_asins(
         query = query.filter(AsinBank.lead_id == lead_id)
     
     if asin:
-        query = query.filter(AsinBank.asin.ilike(f"%{asin}%"))
+        query = query.filter(search.contains(AsinBank.asin, asin))
     
     total = query.count()
     asins = query.offset(skip).limit(limit).all()
@@ -1836,94 +1955,67 @@ def get_asins(
 @router.get("/statistics/summary")
 def get_statistics_summary(db: Session = Depends(get_db)):
     """
-    Get overall statistics summary (ULTRA-OPTIMIZED SCHEMA)
-    """
-    from sqlalchemy import func
-    
-    total_leads = db.query(func.count(OASourcing.id)).scalar()
-    total_purchases = db.query(func.count(PurchaseTracker.id)).scalar()
-    total_asins = db.query(func.count(AsinBank.id)).scalar()
-    
-    # Calculate total spend: JOIN with oa_sourcing to get ppu, then multiply by final_qty
-    total_spend_result = db.query(
-        func.sum(OASourcing.ppu_including_ship * PurchaseTracker.final_qty)
-    )\
-    .join(OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id)\
-    .scalar()
-    
-    avg_ppu = db.query(func.avg(OASourcing.ppu_including_ship)).scalar()
-    
-    # Top platforms
-    top_platforms = db.query(
-        PurchaseTracker.platform,
-        func.count(PurchaseTracker.id).label('count')
-    )\
-    .group_by(PurchaseTracker.platform)\
-    .order_by(func.count(PurchaseTracker.id).desc())\
-    .limit(5)\
-    .all()
-    
-    # Top brands - from retailers via oa_sourcing JOIN
-    top_brands = db.query(
-        Retailer.name,
-        func.count(PurchaseTracker.id).label('count')
-    )\
-    .join(OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id)\
-    .join(Retailer, OASourcing.retailer_id == Retailer.id)\
-    .group_by(Retailer.name)\
-    .order_by(func.count(PurchaseTracker.id).desc())\
-    .limit(5)\
-    .all()
-    
+    Get overall statistics summary (from the trigger-maintained stats_* tables, cached briefly)
+    """
     return {
         "status": 200,
         "message": "Statistics retrieved successfully",
-        "data": {
-            "total_leads": total_leads,
-            "total_purchases": total_purchases,
-            "total_asins_in_bank": total_asins,
-            "total_spend": float(total_spend_result) if total_spend_result else 0,
-            "average_ppu": float(avg_ppu) if avg_ppu else 0,
-            "top_platforms": [{"platform": p, "count": c} for p, c in top_platforms if p],
-            "top_brands": [{"brand": b, "count": c} for b, c in top_brands if b]
-        }
+        "data": statistics_service.get_purchase_tracker_summary(db)
     }
 
 
 @router.get("/statistics/by-retailer")
 def get_statistics_by_retailer(db: Session = Depends(get_db)):
     """
-    Get statistics grouped by retailer
+    Get statistics grouped by retailer (from the trigger-maintained stats_* tables, cached briefly)
     """
-    from sqlalchemy import func
+    return {
+        "status": 200,
+        "message": "Retailer statistics retrieved successfully",
+        "data": statistics_service.get_statistics_by_retailer(db)
+    }
+
+
+@router.post("/statistics/refresh")
+def refresh_statistics(db: Session = Depends(get_db)):
+    """
+    Rebuild the dashboard statistics tables from scratch (repairs drift; blocks writes while it runs)
+    """
+    try:
+        result = statistics_service.refresh_statistics(db)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error refreshing statistics: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error refreshing statistics: {str(e)}")
     
-    stats = db.query(
-        Retailer.id,
-        Retailer.name,
-        func.count(OASourcing.id).label('lead_count'),
-        func.avg(OASourcing.ppu_including_ship).label('avg_ppu'),
-        func.avg(OASourcing.margin).label('avg_margin')
-    )\
-    .join(OASourcing, Retailer.id == OASourcing.retailer_id)\
-    .group_by(Retailer.id, Retailer.name)\
-    .order_by(func.count(OASourcing.id).desc())\
-    .all()
+    return {
+        "status": 200,
+        "message": "Statistics refreshed successfully",
+        "data": result
+    }
+
+
+@router.post("/purchases/fulfillment/rebuild")
+def rebuild_fulfillment(
+    apply: bool = Query(False, description="Write the ledger values for records that differ (default: report only)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Recompute shipped_to_pw / cancelled_qty / final_qty from the fulfillment event ledger
+    (one grouped query) and report the purchase records whose stored values differ
+    """
+    try:
+        result = rebuild_fulfillment_quantities(db, apply=apply)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error rebuilding fulfillment quantities: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error rebuilding fulfillment quantities: {str(e)}")
     
     return {
         "status": 200,
-        "message": "Retailer statistics retrieved successfully",
-        "data": {
-            "items": [
-                {
-                    "retailer_id": retailer_id,
-                    "retailer": retailer_name,
-                    "lead_count": count,
-                    "avg_ppu": float(avg_ppu) if avg_ppu else None,
-                    "avg_margin": float(avg_margin) if avg_margin else None
-                }
-                for retailer_id, retailer_name, count, avg_ppu, avg_margin in stats
-            ]
-        }
+        "message": f"{result['drifted']} of {result['records_checked']} records differ from the ledger"
+                   + (" (rebuilt)" if apply and result['drifted'] else ""),
+        "data": result
     }
 
 
@@ -9,6 +9,7 @@ from pydantic import BaseModel
 import logging
 
 from app.config.database import get_db
+from app.services import processed_messages
 from app.services.retailer_order_processor import RetailerOrderProcessor
 
 router = APIRouter(prefix="/api/v1/retailer-orders", tags=["Retailer Orders"])
@@ -84,82 +85,82 @@ def process_all_retailer_orders(
                 if retailer_name == "footlocker":
                     from_email = parser.order_from_email
                     subject_query = parser.order_subject_query
-                    query = f'from:{from_email} subject:"{subject_query}" -label:{processor.PROCESSED_LABEL}'
+                    query = f'from:{from_email} subject:"{subject_query}"'
                 elif retailer_name == "champs":
                     # Use environment-aware email address and subject pattern
                     from_email = processor.champs_parser.order_from_email
                     subject_query = processor.champs_parser.order_subject_query
-                    query = f'from:{from_email} subject:"{subject_query}" -label:{processor.PROCESSED_LABEL}'
+                    query = f'from:{from_email} subject:"{subject_query}"'
                 elif retailer_name == "dicks":
                     # Use environment-aware email address and subject pattern
                     from_email = processor.dicks_parser.order_from_email
                     subject_query = processor.dicks_parser.order_subject_query
-                    query = f'from:{from_email} subject:"{subject_query}" -label:{processor.PROCESSED_LABEL}'
+                    query = f'from:{from_email} subject:"{subject_query}"'
                 elif retailer_name == "hibbett":
                     # Use environment-aware email address and subject pattern
                     from_email = processor.hibbett_parser.order_from_email
                     subject_query = processor.hibbett_parser.order_subject_query
-                    query = f'from:{from_email} subject:"{subject_query}" -label:{processor.PROCESSED_LABEL}'
+                    query = f'from:{from_email} subject:"{subject_query}"'
                 elif retailer_name == "shoepalace":
                     # Use environment-aware email address and subject pattern
                     # Add "shopifyemail" to distinguish from other retailers using "confirmed"
                     from_email = processor.shoepalace_parser.order_from_email
                     subject_query = processor.shoepalace_parser.order_subject_query
-                    query = f'from:{from_email} subject:"{subject_query}" shopifyemail -label:{processor.PROCESSED_LABEL}'
+                    query = f'from:{from_email} subject:"{subject_query}" shopifyemail'
                 elif retailer_name == "snipes":
                     # Use environment-aware email address and subject pattern
                     from_email = processor.snipes_parser.order_from_email
                     subject_query = processor.snipes_parser.order_subject_query
-                    query = f'from:{from_email} subject:"{subject_query}" -label:{processor.PROCESSED_LABEL}'
+                    query = f'from:{from_email} subject:"{subject_query}"'
                 elif retailer_name == "finishline":
                     # Use environment-aware email address and subject pattern
                     from_email = processor.finishline_parser.order_from_email
                     subject_query = processor.finishline_parser.order_subject_query
-                    query = f'from:{from_email} subject:"{subject_query}" -label:{processor.PROCESSED_LABEL}'
+                    query = f'from:{from_email} subject:"{subject_query}"'
                 elif retailer_name == "shopsimon":
                     from app.services.shopsimon_parser import ShopSimonEmailParser
-                    query = f'from:{ShopSimonEmailParser.SHOPSIMON_FROM_EMAIL} subject:"{ShopSimonEmailParser.SUBJECT_ORDER_PATTERN}" -label:{processor.PROCESSED_LABEL}'
+                    query = f'from:{ShopSimonEmailParser.SHOPSIMON_FROM_EMAIL} subject:"{ShopSimonEmailParser.SUBJECT_ORDER_PATTERN}"'
                 elif retailer_name == "jdsports":
                     # Use environment-aware email address and subject pattern
                     from_email = processor.jdsports_parser.order_from_email
                     subject_query = processor.jdsports_parser.order_subject_query
-                    query = f'from:{from_email} subject:"{subject_query}" -label:{processor.PROCESSED_LABEL}'
+                    query = f'from:{from_email} subject:"{subject_query}"'
                 elif retailer_name == "revolve":
                     # Use environment-aware email address and subject pattern
                     from_email = processor.revolve_parser.order_from_email
                     subject_query = processor.revolve_parser.order_subject_query
-                    query = f'from:{from_email} subject:"{subject_query}" -label:{processor.PROCESSED_LABEL}'
+                    query = f'from:{from_email} subject:"{subject_query}"'
                 elif retailer_name == "asos":
                     # Use environment-aware email address and subject pattern
                     from_email = processor.asos_parser.order_from_email
                     subject_query = processor.asos_parser.order_subject_query
-                    query = f'from:{from_email} subject:"{subject_query}" -label:{processor.PROCESSED_LABEL}'
+                    query = f'from:{from_email} subject:"{subject_query}"'
                 elif retailer_name == "dtlr":
                     # Use environment-aware email address and subject pattern
                     from_email = processor.dtlr_parser.order_from_email
                     subject_query = processor.dtlr_parser.order_subject_query
-                    query = f'from:{from_email} subject:"{subject_query}" -label:{processor.PROCESSED_LABEL}'
+                    query = f'from:{from_email} subject:"{subject_query}"'
                 elif retailer_name == "endclothing":
                     # Use environment-aware email address and subject pattern
                     from_email = processor.endclothing_parser.order_from_email
                     subject_query = processor.endclothing_parser.order_subject_query
-                    query = f'from:{from_email} subject:"{subject_query}" -label:{processor.PROCESSED_LABEL}'
+                    query = f'from:{from_email} subject:"{subject_query}"'
                 elif retailer_name == "shopwss":
                     # Use environment-aware email address and subject pattern
                     from_email = processor.shopwss_parser.order_from_email
                     subject_query = processor.shopwss_parser.order_subject_query
-                    query = f'from:{from_email} subject:"{subject_query}" -label:{processor.PROCESSED_LABEL}'
+                    query = f'from:{from_email} subject:"{subject_query}"'
                 elif retailer_name == "on":
                     # Use environment-aware email address and subject pattern
                     from_email = processor.on_parser.order_from_email
                     subject_query = processor.on_parser.order_subject_query
-                    query = f'from:{from_email} subject:"{subject_query}" -label:{processor.PROCESSED_LABEL}'
+                    query = f'from:{from_email} subject:"{subject_query}"'
                 else:
                     continue
                 
                 # Get unprocessed emails from this retailer (get 50 to have a good pool)
-                message_ids = gmail_service.list_messages_with_query(
-                    query=query,
+                message_ids = processor.list_unprocessed_message_ids(
+                    query,
                     max_results=50  # Get more to have a good pool for sorting
                 )
                 
@@ -185,17 +186,20 @@ def process_all_retailer_orders(
         
         # Get message metadata to sort by date
         # Gmail API returns messages sorted by date, but we need to merge across retailers
-        # Get metadata for all messages to sort by internalDate
+        # Get metadata for all messages in batched round-trips to sort by internalDate
+        metadata = gmail_service.get_messages_batch(
+            [msg_id for msg_id, _ in all_message_ids_with_retailer],
+            format='metadata',
+            metadata_headers=['Date']
+        )
         messages_with_date = []
         for msg_id, retailer_name in all_message_ids_with_retailer:
-            try:
-                # Get message with metadata format (lightweight, just headers)
-                message = gmail_service.get_message(msg_id, format='metadata')
-                if message:
-                    internal_date = int(message.get('internalDate', 0))
-                    messages_with_date.append((msg_id, retailer_name, internal_date))
-            except Exception as e:
-                logger.warning(f"Error getting metadata for message {msg_id}: {e}")
+            message = metadata.responses.get(msg_id)
+            if message:
+                internal_date = int(message.get('internalDate', 0))
+                messages_with_date.append((msg_id, retailer_name, internal_date))
+            else:
+                logger.warning(f"Error getting metadata for message {msg_id}: {metadata.errors.get(msg_id)}")
                 # If we can't get date, use 0 (will be sorted last)
                 messages_with_date.append((msg_id, retailer_name, 0))
         
@@ -216,11 +220,14 @@ def process_all_retailer_orders(
             'error_messages': []
         }
         
+        # Fetch all full messages in batched round-trips
+        full_messages = gmail_service.get_messages_batch([msg_id for msg_id, _, _ in messages_to_process])
+        
         # Process each email
         for msg_id, retailer_name, _ in messages_to_process:
             try:
                 # Get full message
-                message = gmail_service.get_message(msg_id)
+                message = full_messages.responses.get(msg_id)
                 if not message:
                     logger.warning(f"Could not retrieve message {msg_id}")
                     total_results['errors'] += 1
@@ -261,39 +268,26 @@ def process_all_retailer_orders(
 
 
 @router.get("/processing-stats")
-def get_processing_stats():
+def get_processing_stats(db: Session = Depends(get_db)):
     """
     Get statistics about processed retailer order emails.
     
+    Counts come from the processed-message registry (one grouped query, no
+    Gmail calls and no cap on the number of messages).
+    
     Returns:
-        Statistics about labeled emails
+        Order confirmation counts, plus counts per email type and status
     """
     try:
-        from app.services.gmail_service import GmailService
-        
-        gmail_service = GmailService()
-        
-        # Get label stats
-        processed_label = gmail_service.get_or_create_label(RetailerOrderProcessor.PROCESSED_LABEL)
-        error_label = gmail_service.get_or_create_label(RetailerOrderProcessor.ERROR_LABEL)
-        
-        # Count emails with each label
-        processed_count = 0
-        error_count = 0
-        
-        if processed_label:
-            query = f'label:{processed_label["name"]}'
-            processed_count = len(gmail_service.list_messages_with_query(query, max_results=500))
-        
-        if error_label:
-            query = f'label:{error_label["name"]}'
-            error_count = len(gmail_service.list_messages_with_query(query, max_results=500))
+        stats = processed_messages.get_processing_stats(db)
+        confirmation = stats.get(processed_messages.TYPE_CONFIRMATION, {})
         
         return {
-            'processed_emails': processed_count,
-            'error_emails': error_count,
-            'processed_label': processed_label['name'] if processed_label else None,
-            'error_label': error_label['name'] if error_label else None
+            'processed_emails': confirmation.get(processed_messages.STATUS_PROCESSED, 0),
+            'error_emails': confirmation.get(processed_messages.STATUS_ERROR, 0),
+            'processed_label': RetailerOrderProcessor.PROCESSED_LABEL,
+            'error_label': RetailerOrderProcessor.ERROR_LABEL,
+            'by_type': stats
         }
     
     except Exception as e:
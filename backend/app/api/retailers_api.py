@@ -12,6 +12,8 @@ import logging
 
 from app.config.database import get_db
 from app.models.database import Retailer
+from app.services import statistics_service
+from app.services.retailer_counters import reconcile_retailer_counters
 
 router = APIRouter(prefix="/api/v1/retailers", tags=["Retailers"])
 logger = logging.getLogger(__name__)
@@ -418,34 +420,9 @@ def bulk_delete_retailers(delete_data: RetailerBulkDeleteRequest, db: Session =
 @router.get("/stats/summary")
 def get_retailers_summary(db: Session = Depends(get_db)):
     """
-    Get summary statistics for all retailers
+    Get summary statistics for all retailers (cached briefly)
     """
-    from sqlalchemy import func
-    
-    total_retailers = db.query(func.count(Retailer.id)).scalar()
-    total_spend = db.query(func.sum(Retailer.total_spend)).scalar() or 0.0
-    total_items = db.query(func.sum(Retailer.total_qty_of_items_ordered)).scalar() or 0
-    
-    # Count by location
-    location_counts = db.query(
-        Retailer.location, 
-        func.count(Retailer.id)
-    ).group_by(Retailer.location).all()
-    
-    # Count by wholesale status
-    wholesale_counts = db.query(
-        Retailer.wholesale, 
-        func.count(Retailer.id)
-    ).group_by(Retailer.wholesale).all()
-    
-    summary_data = {
-        "total_retailers": total_retailers,
-        "total_spend": float(total_spend),
-        "total_items_ordered": int(total_items),
-        "by_location": {loc: count for loc, count in location_counts if loc},
-        "by_wholesale": {ws: count for ws, count in wholesale_counts if ws},
-        "shopify_count": db.query(Retailer).filter(Retailer.shopify == True).count()
-    }
+    summary_data = statistics_service.get_retailers_summary(db)
     
     return {
         "status": 200,
@@ -453,3 +430,30 @@ def get_retailers_summary(db: Session = Depends(get_db)):
         "message": ""
     }
 
+
+@router.post("/stats/reconcile")
+def reconcile_retailer_stats(
+    apply: bool = Query(True, description="Write the recomputed values for retailers that drifted"),
+    db: Session = Depends(get_db)
+):
+    """
+    Recompute total_spend / total_qty_of_items_ordered / percent_of_cancelled_qty for every
+    retailer from purchase_tracker (one grouped query) and report the retailers that drifted
+    """
+    try:
+        result = reconcile_retailer_counters(db, apply=apply)
+    except Exception as e:
+        db.rollback()
+        error_msg = f"Error reconciling retailer counters: {str(e)}"
+        logger.error(error_msg, exc_info=True)
+        return {
+            "status": -1,
+            "data": None,
+            "message": error_msg
+        }
+    
+    return {
+        "status": 200,
+        "data": result,
+        "message": f"{result['drifted']} of {result['retailers_checked']} retailers drifted"
+    }
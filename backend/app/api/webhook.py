@@ -2,60 +2,42 @@
 Webhook endpoint for Gmail Pub/Sub notifications.
 """
 
+import asyncio
 import base64
 import json
 import logging
+import threading
+from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, Optional
 
 from fastapi import APIRouter, BackgroundTasks, HTTPException, Request, Query
-from googleapiclient.errors import HttpError
 
 from app.models.email import PubSubNotification
-from app.services.email_parser import EmailParser
+from app.config.database import SessionLocal
+from app.services import email_backfill, gmail_history_checkpoint, processed_messages
+from app.services.async_gmail_service import AsyncGmailError, get_async_gmail_service
+from app.services.email_worker_pool import EmailWorkerPool, SubmitResult
 from app.services.gmail_service import GmailService
-from app.services.footlocker_parser import FootlockerEmailParser
-from app.services.champs_parser import ChampsEmailParser
-from app.services.hibbett_parser import HibbettEmailParser
-from app.services.dicks_parser import DicksEmailParser
-from app.services.dtlr_parser import DTLREmailParser
-from app.services.finishline_parser import FinishLineEmailParser
-from app.services.jdsports_parser import JDSportsEmailParser
-from app.services.urban_parser import UrbanOutfittersEmailParser
-from app.services.bloomingdales_parser import BloomingdalesEmailParser
-from app.services.anthropologie_parser import AnthropologieEmailParser
-from app.services.nike_parser import NikeEmailParser
-from app.services.carbon38_parser import Carbon38EmailParser
-from app.services.gazelle_parser import GazelleEmailParser
-from app.services.netaporter_parser import NetAPorterEmailParser
-from app.services.fit2run_parser import Fit2RunEmailParser
-from app.services.sns_parser import SNSEmailParser
-from app.services.adidas_parser import AdidasEmailParser
-from app.services.concepts_parser import ConceptsEmailParser
-from app.services.sneaker_parser import SneakerPoliticsEmailParser
-from app.services.orleans_parser import OrleansEmailParser
-from app.services.snipes_parser import SnipesEmailParser
-from app.services.shoepalace_parser import ShoepalaceEmailParser
-from app.services.endclothing_parser import ENDClothingEmailParser
-from app.services.shopwss_parser import ShopWSSEmailParser
-from app.services.shopsimon_parser import ShopSimonEmailParser
+from app.services.parser_registry import get_gmail_service, get_parser
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/v1")
 
-# File path for persisting Gmail history ID (to process only new email arrivals)
+# Legacy file the history ID was kept in before gmail_history_checkpoint (imported once)
 _GMAIL_HISTORY_ID_FILE = "gmail_history_id"
 
 
 def _get_history_id_path() -> Path:
-    """Return path to the history ID storage file."""
+    """Return path to the legacy history ID file."""
     from app.config import get_settings
     return get_settings().base_dir / f".{_GMAIL_HISTORY_ID_FILE}"
 
 
-def _load_stored_history_id() -> Optional[str]:
-    """Load the last stored history ID from file. Returns None if file doesn't exist."""
+def _load_legacy_history_id() -> Optional[str]:
+    """Load the history ID of the legacy file. Returns None if file doesn't exist."""
     path = _get_history_id_path()
     try:
         if path.exists():
@@ -65,18 +47,107 @@ def _load_stored_history_id() -> Optional[str]:
     return None
 
 
-def _save_history_id(history_id: str) -> None:
-    """Save history ID to file for next webhook invocation."""
-    path = _get_history_id_path()
+def _load_stored_history_id(mailbox: str) -> Optional[str]:
+    """
+    Load the mailbox's history checkpoint from the database.
+    
+    The first time a mailbox has no row, the value of the legacy
+    .gmail_history_id file (if any) is imported so no range is skipped.
+    """
+    db = SessionLocal()
     try:
-        path.write_text(str(history_id))
-    except OSError as e:
-        logger.warning(f"Could not write history ID file: {e}")
+        stored = gmail_history_checkpoint.load_history_id(db, mailbox)
+        if stored is None:
+            legacy = _load_legacy_history_id()
+            if legacy:
+                gmail_history_checkpoint.advance_history_id(db, mailbox, legacy)
+                stored = gmail_history_checkpoint.load_history_id(db, mailbox)
+                logger.info(f"[AUTO-PROCESS] Imported history ID {stored} from {_get_history_id_path()}")
+        return stored
+    finally:
+        db.close()
+
+
+def _save_history_id(mailbox: str, history_id: str) -> None:
+    """Advance the mailbox's history checkpoint (never moves it backwards)."""
+    db = SessionLocal()
+    try:
+        gmail_history_checkpoint.advance_history_id(db, mailbox, history_id)
+    finally:
+        db.close()
+
+
+def _claim_history_range(mailbox: str, from_history_id: str, to_history_id: str) -> bool:
+    """Claim the history range read from from_history_id (compare-and-swap); False if another worker moved first."""
+    db = SessionLocal()
+    try:
+        return gmail_history_checkpoint.claim_history_range(db, mailbox, from_history_id, to_history_id)
+    finally:
+        db.close()
+
+
+def _release_history_range(mailbox: str, from_history_id: str, to_history_id: str) -> bool:
+    """Hand a claimed history range back; False if the checkpoint already moved on."""
+    db = SessionLocal()
+    try:
+        return gmail_history_checkpoint.release_history_range(db, mailbox, from_history_id, to_history_id)
+    finally:
+        db.close()
+
+
+# Times a notification re-reads the history after another worker claimed the range first
+_HISTORY_CLAIM_ATTEMPTS = 3
+
+
+# Worker pool that processes webhook message IDs off the event loop (created on first use)
+_email_worker_pool: Optional[EmailWorkerPool] = None
+_email_worker_pool_lock = threading.Lock()
+
+
+def get_email_worker_pool() -> EmailWorkerPool:
+    """Return the process-wide email worker pool, starting it on first use."""
+    global _email_worker_pool
+    with _email_worker_pool_lock:
+        if _email_worker_pool is None:
+            from app.config import get_settings
+            settings = get_settings()
+            _email_worker_pool = EmailWorkerPool(
+                handler=process_email_message,
+                worker_count=settings.email_worker_pool_size,
+                queue_size=settings.email_worker_queue_size,
+                gmail_service_factory=GmailService,
+            )
+        return _email_worker_pool
+
+
+def shutdown_email_worker_pool(wait: bool = True) -> None:
+    """Stop the email worker pool (if started), draining queued messages when wait=True."""
+    global _email_worker_pool
+    with _email_worker_pool_lock:
+        pool, _email_worker_pool = _email_worker_pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait)
 
 
 async def process_email_notification(message_id: str, gmail_service: GmailService = None) -> None:
     """
-    Background task to process email notification.
+    Process an email notification inline (kept for callers that await it).
+    
+    Blocks the calling event loop; webhook traffic goes through the worker pool instead.
+    
+    Args:
+        message_id: Gmail message ID to process
+        gmail_service: Optional pre-initialized Gmail service (to avoid re-initialization)
+    """
+    process_email_message(message_id, gmail_service)
+
+
+def process_email_message(message_id: str, gmail_service: GmailService = None) -> None:
+    """
+    Fetch, classify and process a single email (synchronous).
+    
+    Runs on an email worker thread for webhook traffic. Opens and closes its
+    own database session, so it is safe to run for several messages at once.
     
     Args:
         message_id: Gmail message ID to process
@@ -87,8 +158,19 @@ async def process_email_notification(message_id: str, gmail_service: GmailServic
         
         # Initialize services (reuse if provided)
         if gmail_service is None:
-            gmail_service = GmailService()
-        email_parser = EmailParser()
+            gmail_service = get_gmail_service()
+        email_parser = get_parser("email")
+        
+        from app.config.database import get_db
+        
+        # Skip messages the registry already has as processed, without fetching them
+        db = next(get_db())
+        try:
+            if processed_messages.is_processed(db, message_id):
+                logger.info(f"Skipped email {message_id}: already processed")
+                return
+        finally:
+            db.close()
         
         # Fetch the email
         message = gmail_service.get_message(message_id)
@@ -103,10 +185,9 @@ async def process_email_notification(message_id: str, gmail_service: GmailServic
         # ============================================================
         # CHECK FOR PREPWORX "INBOUND PROCESSED" EMAILS
         # ============================================================
-        from app.services.prepworx_parser import PrepWorxEmailParser, PrepWorxCheckinProcessor
-        from app.config.database import get_db
+        from app.services.prepworx_parser import PrepWorxCheckinProcessor
         
-        prepworx_parser = PrepWorxEmailParser()
+        prepworx_parser = get_parser("prepworx")
         
         if prepworx_parser.can_parse(email_data):
             logger.info(f"📦 Detected PrepWorx 'Inbound processed' email")
@@ -155,22 +236,26 @@ async def process_email_notification(message_id: str, gmail_service: GmailServic
         # Uses RetailerEmailClassifier for detection, registry for routing
         # ============================================================
         from app.services.retailer_email_classifier import (
-            RetailerEmailClassifier,
+            get_retailer_email_classifier,
             ClassificationResult,
             EmailType,
         )
+        from app.services.parse_pool import preparse
         from app.services.retailer_order_processor import RetailerOrderProcessor
         from app.services.retailer_order_update_processor import RetailerOrderUpdateProcessor
         
-        classifier = RetailerEmailClassifier()
+        classifier = get_retailer_email_classifier()
         classification = classifier.classify(email_data)
         
         if classification:
+            # Parse in the parse pool when enabled, so worker threads do not contend for the GIL
+            preparse(email_data, classification.retailer_id, classification.email_type)
+            
             db = next(get_db())
             try:
                 if classification.email_type == EmailType.SHIPPING:
                     logger.info(f"📦 Detected {classification.display_name} shipping notification email")
-                    update_processor = RetailerOrderUpdateProcessor(db)
+                    update_processor = RetailerOrderUpdateProcessor(db, gmail_service=gmail_service)
                     result = update_processor.process_single_shipping_email(
                         email_data=email_data,
                         message_id=message_id,
@@ -188,7 +273,7 @@ async def process_email_notification(message_id: str, gmail_service: GmailServic
                 
                 elif classification.email_type == EmailType.CANCELLATION:
                     logger.info(f"❌ Detected {classification.display_name} cancellation notification email")
-                    update_processor = RetailerOrderUpdateProcessor(db)
+                    update_processor = RetailerOrderUpdateProcessor(db, gmail_service=gmail_service)
                     result = update_processor.process_single_cancellation_email(
                         email_data=email_data,
                         message_id=message_id,
@@ -206,7 +291,7 @@ async def process_email_notification(message_id: str, gmail_service: GmailServic
                 
                 elif classification.email_type == EmailType.CONFIRMATION:
                     logger.info(f"🛒 Detected {classification.display_name} order confirmation email")
-                    processor = RetailerOrderProcessor(db)
+                    processor = RetailerOrderProcessor(db, gmail_service=gmail_service)
                     result = processor.process_single_email(
                         email_data=email_data,
                         message_id=message_id,
@@ -328,135 +413,195 @@ async def gmail_webhook(
         
         logger.info("[AUTO-PROCESS] Processing email...")
         
-        # Initialize Gmail service
-        gmail_service = GmailService()
-        
-        # Try history-based processing first (only new email arrivals, skip read/unread)
-        all_message_ids: list[str] = []
-        stored_history_id = _load_stored_history_id()
-        
-        if stored_history_id:
-            try:
-                new_message_ids, new_history_id = gmail_service.get_new_message_ids_from_history(
-                    stored_history_id
-                )
-                _save_history_id(new_history_id)
-                if not new_message_ids:
-                    logger.debug("[AUTO-PROCESS] No new emails (was likely read/unread) - skipped")
-                    return {"status": "200", "message": "No new emails, skipped"}
-
-                # Filter to known retailer/PrepWorx senders only.
-                # For each new message ID we do a cheap metadata-only fetch (From header only)
-                # so we never waste a full body fetch on unrelated personal/spam emails.
-                known_senders = _get_known_sender_addresses()
-                filtered_ids = []
-                for msg_id in new_message_ids:
-                    from_header = gmail_service.get_message_sender(msg_id) or ""
-                    if _is_known_sender(from_header, known_senders):
-                        filtered_ids.append(msg_id)
-                    else:
-                        logger.debug(
-                            f"[AUTO-PROCESS] Skipping unrelated message {msg_id} "
-                            f"from: {from_header!r}"
-                        )
+        # Gmail history lookups and sender checks go through the async client (no threadpool hop)
+        return await _process_history_notification(history_id, email_address)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error processing webhook: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
 
-                if not filtered_ids:
-                    logger.info(
-                        f"[AUTO-PROCESS] {len(new_message_ids)} new email(s) arrived but "
-                        f"none are from known retailers/PrepWorx — skipping"
+
+async def _process_history_notification(history_id: Optional[str], email_address: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Resolve new message IDs for a Pub/Sub notification and queue them for processing.
+    
+    Gmail calls are awaited on the shared AsyncGmailService, so the sender checks
+    for every new message run concurrently. The history checkpoint is shared by
+    every webhook worker and container (gmail_history_checkpoint). A range with
+    relevant messages is claimed with a compare-and-swap from the checkpoint it was
+    read from before anything is queued: only the worker whose claim succeeds
+    queues the messages, a worker that loses re-reads from the new checkpoint, and
+    a claim whose messages the worker pool rejects is handed back.
+    
+    Args:
+        history_id: History ID from the Pub/Sub notification (may be None)
+        email_address: Mailbox from the Pub/Sub notification (checkpoint key)
+    
+    Returns:
+        Webhook response payload
+    """
+    # Initialize Gmail service
+    gmail_service = get_async_gmail_service()
+    mailbox = gmail_history_checkpoint.mailbox_key(email_address)
+    stored_history_id = await asyncio.to_thread(_load_stored_history_id, mailbox)
+    
+    # No stored history (first run / after container restart) → just initialize
+    # the history ID from this notification and skip processing.
+    # This prevents a surprise backfill of old emails whenever the container
+    # restarts. Any emails missed during downtime can be caught up with
+    # POST /gmail/backfill.
+    if not stored_history_id:
+        if history_id:
+            await asyncio.to_thread(_save_history_id, mailbox, history_id)
+            logger.info(
+                "[AUTO-PROCESS] No stored history ID — initialized from notification, "
+                "skipping this notification to avoid backfill"
+            )
+        return {"status": "200", "message": "History ID initialized, skipping first notification"}
+    
+    # Try history-based processing (only new email arrivals, skip read/unread)
+    for _attempt in range(_HISTORY_CLAIM_ATTEMPTS):
+        try:
+            new_message_ids, new_history_id = await gmail_service.get_new_message_ids_from_history(
+                stored_history_id
+            )
+            if not new_message_ids:
+                await asyncio.to_thread(_save_history_id, mailbox, new_history_id)
+                logger.debug("[AUTO-PROCESS] No new emails (was likely read/unread) - skipped")
+                return {"status": "200", "message": "No new emails, skipped"}
+
+            # Filter to known retailer/PrepWorx senders only.
+            # All new message IDs get a cheap metadata-only fetch (From header only),
+            # issued concurrently, so we never waste a full body fetch on unrelated
+            # personal/spam emails.
+            known_senders = _get_known_sender_addresses()
+            senders = await gmail_service.get_message_senders(new_message_ids)
+            filtered_ids = []
+            for msg_id in new_message_ids:
+                from_header = senders.get(msg_id) or ""
+                if _is_known_sender(from_header, known_senders):
+                    filtered_ids.append(msg_id)
+                else:
+                    logger.debug(
+                        f"[AUTO-PROCESS] Skipping unrelated message {msg_id} "
+                        f"from: {from_header!r}"
                     )
-                    return {"status": "200", "message": "No relevant emails, skipped"}
 
+            if not filtered_ids:
+                await asyncio.to_thread(_save_history_id, mailbox, new_history_id)
                 logger.info(
-                    f"[AUTO-PROCESS] History: {len(new_message_ids)} new email(s), "
-                    f"{len(filtered_ids)} from known senders"
+                    f"[AUTO-PROCESS] {len(new_message_ids)} new email(s) arrived but "
+                    f"none are from known retailers/PrepWorx — skipping"
                 )
-                all_message_ids = filtered_ids
-            except HttpError as err:
-                status = getattr(getattr(err, "resp", None), "status", None)
-                if status == 404:
-                    logger.warning("[AUTO-PROCESS] History expired (404) - resyncing, skipping this notification")
-                    profile_hid = gmail_service.get_profile_history_id()
-                    if profile_hid:
-                        _save_history_id(profile_hid)
-                    return {"status": "200", "message": "History expired, resynced"}
-                raise
-        
-        # No stored history (first run / after container restart) → just initialize
-        # the history ID from this notification and skip processing.
-        # This prevents a surprise backfill of old emails whenever the container
-        # restarts. Any emails missed during downtime can be caught up via the
-        # manual processing endpoints.
-        if not stored_history_id:
-            if history_id:
-                _save_history_id(history_id)
-                logger.info(
-                    "[AUTO-PROCESS] No stored history ID — initialized from notification, "
-                    "skipping this notification to avoid backfill"
-                )
-            return {"status": "200", "message": "History ID initialized, skipping first notification"}
+                return {"status": "200", "message": "No relevant emails, skipped"}
+        except AsyncGmailError as err:
+            if err.status == 404:
+                logger.warning("[AUTO-PROCESS] History expired (404) - resyncing, skipping this notification")
+                profile_hid = await gmail_service.get_profile_history_id()
+                if profile_hid:
+                    await asyncio.to_thread(_save_history_id, mailbox, profile_hid)
+                return {"status": "200", "message": "History expired, resynced"}
+            raise
+
+        logger.info(
+            f"[AUTO-PROCESS] History: {len(new_message_ids)} new email(s), "
+            f"{len(filtered_ids)} from known senders"
+        )
 
-        if not all_message_ids:
-            logger.debug("No new emails to process")
-            return {"status": "200", "message": "No emails to process"}
-        
-        logger.info(f"Processing {len(all_message_ids)} new email(s)")
-        
-        for message_id in all_message_ids:
-            background_tasks.add_task(process_email_notification, message_id, gmail_service)
-        
-        return {"status": "200", "message": "Notification received", "processed": len(all_message_ids)}
+        # Only the worker whose compare-and-swap moves the checkpoint queues this range
+        if await asyncio.to_thread(_claim_history_range, mailbox, stored_history_id, new_history_id):
+            return await _submit_claimed_messages(mailbox, stored_history_id, new_history_id, filtered_ids)
+
+        # A concurrent notification (other worker / container) claimed an overlapping
+        # range: read what is left after its checkpoint
+        stored_history_id = await asyncio.to_thread(_load_stored_history_id, mailbox)
+        logger.info(
+            f"[AUTO-PROCESS] History range claimed by another worker - re-reading from {stored_history_id}"
+        )
+
+    logger.info("[AUTO-PROCESS] History ranges kept being claimed by other workers - skipped")
+    return {"status": "200", "message": "History range claimed by another worker, skipped"}
+
+
+async def _submit_claimed_messages(
+    mailbox: str, from_history_id: str, to_history_id: str, message_ids: list[str]
+) -> Dict[str, Any]:
+    """
+    Queue the messages of a claimed history range on the worker pool.
+
+    If the pool rejects any of them, the claim is handed back and Pub/Sub is
+    asked to redeliver (503); the redelivered notification re-reads the range.
+    """
+    logger.info(f"Processing {len(message_ids)} new email(s)")
     
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error processing webhook: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
+    # Hand message IDs to the worker pool. IDs already queued/running are skipped.
+    pool = get_email_worker_pool()
+    submit_results = {message_id: pool.submit(message_id) for message_id in message_ids}
+    rejected = [mid for mid, res in submit_results.items() if res == SubmitResult.REJECTED]
+    accepted = sum(1 for res in submit_results.values() if res == SubmitResult.ACCEPTED)
+    
+    if rejected:
+        # Backpressure: give the range back so the redelivered notification
+        # re-reads it; messages already queued are de-duplicated then.
+        if await asyncio.to_thread(_release_history_range, mailbox, from_history_id, to_history_id):
+            logger.warning(
+                f"[AUTO-PROCESS] Worker queue full - rejected {len(rejected)} of {len(message_ids)} "
+                f"email(s), asking Pub/Sub to redeliver ({pool.stats()})"
+            )
+        else:
+            logger.error(
+                f"[AUTO-PROCESS] Worker queue full - rejected {len(rejected)} of {len(message_ids)} "
+                f"email(s) and the history checkpoint already moved past {to_history_id}; "
+                f"recover them with POST /gmail/backfill: {', '.join(rejected[:20])}"
+            )
+        raise HTTPException(status_code=503, detail="Email worker queue is full, retry later")
+    
+    return {"status": "200", "message": "Notification received", "processed": accepted}
 
 
-def _get_known_sender_addresses() -> set[str]:
+@lru_cache(maxsize=1)
+def _get_known_sender_addresses() -> frozenset[str]:
     """
     Return a set of lowercase email addresses (or address fragments) that belong
     to known retailers or PrepWorx.
 
     Used to filter history-based message IDs before doing expensive full-body
     fetches — any message whose From header does not contain one of these strings
-    is silently dropped.
+    is silently dropped. Built once per process (parser sender addresses are fixed
+    at startup).
     """
-    from app.services.revolve_parser import RevolveEmailParser
-    from app.services.asos_parser import ASOSEmailParser
-    from app.services.on_parser import OnEmailParser
-    from app.services.prepworx_parser import PrepWorxEmailParser
-
-    footlocker_parser = FootlockerEmailParser()
-    champs_parser = ChampsEmailParser()
-    snipes_parser = SnipesEmailParser()
-    shoepalace_parser = ShoepalaceEmailParser()
-    endclothing_parser = ENDClothingEmailParser()
-    shopwss_parser = ShopWSSEmailParser()
-    dicks_parser = DicksEmailParser()
-    hibbett_parser = HibbettEmailParser()
-    dtlr_parser = DTLREmailParser()
-    finishline_parser = FinishLineEmailParser()
-    jdsports_parser = JDSportsEmailParser()
-    revolve_parser = RevolveEmailParser()
-    asos_parser = ASOSEmailParser()
-    shopsimon_parser = ShopSimonEmailParser()
-    anthropologie_parser = AnthropologieEmailParser()
-    nike_parser = NikeEmailParser()
-    urban_parser = UrbanOutfittersEmailParser()
-    bloomingdales_parser = BloomingdalesEmailParser()
-    carbon38_parser = Carbon38EmailParser()
-    gazelle_parser = GazelleEmailParser()
-    netaporter_parser = NetAPorterEmailParser()
-    fit2run_parser = Fit2RunEmailParser()
-    sns_parser = SNSEmailParser()
-    adidas_parser = AdidasEmailParser()
-    concepts_parser = ConceptsEmailParser()
-    sneaker_parser = SneakerPoliticsEmailParser()
-    orleans_parser = OrleansEmailParser()
-    on_parser = OnEmailParser()
-    prepworx_parser = PrepWorxEmailParser()
+
+    footlocker_parser = get_parser("footlocker")
+    champs_parser = get_parser("champs")
+    snipes_parser = get_parser("snipes")
+    shoepalace_parser = get_parser("shoepalace")
+    endclothing_parser = get_parser("endclothing")
+    shopwss_parser = get_parser("shopwss")
+    dicks_parser = get_parser("dicks")
+    hibbett_parser = get_parser("hibbett")
+    dtlr_parser = get_parser("dtlr")
+    finishline_parser = get_parser("finishline")
+    jdsports_parser = get_parser("jdsports")
+    revolve_parser = get_parser("revolve")
+    asos_parser = get_parser("asos")
+    shopsimon_parser = get_parser("shopsimon")
+    anthropologie_parser = get_parser("anthropologie")
+    nike_parser = get_parser("nike")
+    urban_parser = get_parser("urban")
+    bloomingdales_parser = get_parser("bloomingdales")
+    carbon38_parser = get_parser("carbon38")
+    gazelle_parser = get_parser("gazelle")
+    netaporter_parser = get_parser("netaporter")
+    fit2run_parser = get_parser("fit2run")
+    sns_parser = get_parser("sns")
+    adidas_parser = get_parser("adidas")
+    concepts_parser = get_parser("concepts")
+    sneaker_parser = get_parser("sneaker")
+    orleans_parser = get_parser("orleans")
+    on_parser = get_parser("on")
+    prepworx_parser = get_parser("prepworx")
 
     addresses: set[str] = set()
 
@@ -484,10 +629,10 @@ def _get_known_sender_addresses() -> set[str]:
     addresses.add(shopwss_parser.SHOPWSS_PARTIAL_CANCEL_FROM_EMAIL.lower())
     addresses.add(snipes_parser.SNIPES_SHIPPING_FROM_EMAIL.lower())
 
-    return addresses
+    return frozenset(addresses)
 
 
-def _is_known_sender(from_header: str, known_senders: set[str]) -> bool:
+def _is_known_sender(from_header: str, known_senders: frozenset[str]) -> bool:
     """Return True if the From header contains any known sender address."""
     from_lower = from_header.lower()
     return any(addr in from_lower for addr in known_senders)
@@ -495,35 +640,33 @@ def _is_known_sender(from_header: str, known_senders: set[str]) -> bool:
 
 def _get_interested_message_ids(gmail_service: GmailService) -> list[str]:
     """Get message IDs matching our processing criteria (search-based)."""
-    from app.services.revolve_parser import RevolveEmailParser
-    from app.services.asos_parser import ASOSEmailParser
-    footlocker_parser = FootlockerEmailParser()
-    champs_parser = ChampsEmailParser()
-    snipes_parser = SnipesEmailParser()
-    shoepalace_parser = ShoepalaceEmailParser()
-    endclothing_parser = ENDClothingEmailParser()
-    shopwss_parser = ShopWSSEmailParser()
-    dicks_parser = DicksEmailParser()
-    hibbett_parser = HibbettEmailParser()
-    dtlr_parser = DTLREmailParser()
-    finishline_parser = FinishLineEmailParser()
-    jdsports_parser = JDSportsEmailParser()
-    revolve_parser = RevolveEmailParser()
-    asos_parser = ASOSEmailParser()
-    shopsimon_parser = ShopSimonEmailParser()
-    anthropologie_parser = AnthropologieEmailParser()
-    nike_parser = NikeEmailParser()
-    urban_parser = UrbanOutfittersEmailParser()
-    bloomingdales_parser = BloomingdalesEmailParser()
-    carbon38_parser = Carbon38EmailParser()
-    gazelle_parser = GazelleEmailParser()
-    netaporter_parser = NetAPorterEmailParser()
-    fit2run_parser = Fit2RunEmailParser()
-    sns_parser = SNSEmailParser()
-    adidas_parser = AdidasEmailParser()
-    concepts_parser = ConceptsEmailParser()
-    sneaker_parser = SneakerPoliticsEmailParser()
-    orleans_parser = OrleansEmailParser()
+    footlocker_parser = get_parser("footlocker")
+    champs_parser = get_parser("champs")
+    snipes_parser = get_parser("snipes")
+    shoepalace_parser = get_parser("shoepalace")
+    endclothing_parser = get_parser("endclothing")
+    shopwss_parser = get_parser("shopwss")
+    dicks_parser = get_parser("dicks")
+    hibbett_parser = get_parser("hibbett")
+    dtlr_parser = get_parser("dtlr")
+    finishline_parser = get_parser("finishline")
+    jdsports_parser = get_parser("jdsports")
+    revolve_parser = get_parser("revolve")
+    asos_parser = get_parser("asos")
+    shopsimon_parser = get_parser("shopsimon")
+    anthropologie_parser = get_parser("anthropologie")
+    nike_parser = get_parser("nike")
+    urban_parser = get_parser("urban")
+    bloomingdales_parser = get_parser("bloomingdales")
+    carbon38_parser = get_parser("carbon38")
+    gazelle_parser = get_parser("gazelle")
+    netaporter_parser = get_parser("netaporter")
+    fit2run_parser = get_parser("fit2run")
+    sns_parser = get_parser("sns")
+    adidas_parser = get_parser("adidas")
+    concepts_parser = get_parser("concepts")
+    sneaker_parser = get_parser("sneaker")
+    orleans_parser = get_parser("orleans")
     
     # Order confirmation: use parser.order_from_email (env-aware) - must match classifier/processor
     order_confirmation_froms = [
@@ -560,18 +703,16 @@ def _get_interested_message_ids(gmail_service: GmailService) -> list[str]:
     search_queries = [
             # PrepWorx inbound processed emails
             {
-                'query': "from:beta@prepworx.io subject:(Inbound has been processed) -label:PrepWorx/Processed -label:PrepWorx/Error",
+                'query': "from:beta@prepworx.io subject:(Inbound has been processed)",
                 'exclude_label': None,
                 'max_results': 1
             },
             # Retailer order confirmation emails
-            # Exclude shipping/cancel labels so those emails are not misclassified as order confirmations
+            # Messages the registry has under any type are skipped, so shipping/cancel emails
+            # are not misclassified as order confirmations
             # Uses parser.order_from_email (identical to classifier/processor) - env-aware for dev/prod
             {
-                'query': f"({order_confirmation_from_query}) subject:(order OR confirmation) "
-                         "-label:Retailer-Order/Processed -label:Retailer-Order/Error "
-                         "-label:Retailer-Shipping/Processed -label:Retailer-Shipping/Error -label:Retailer-Shipping/Manual-Review "
-                         "-label:Retailer-Cancel/Processed -label:Retailer-Cancel/Error -label:Retailer-Cancel/Manual-Review",
+                'query': f"({order_confirmation_from_query}) subject:(order OR confirmation)",
                 'exclude_label': None,
                 'max_results': 1
             },
@@ -579,8 +720,7 @@ def _get_interested_message_ids(gmail_service: GmailService) -> list[str]:
             {
                 'query': (
                     f'from:{footlocker_parser.update_from_email} '
-                    f'{footlocker_parser.shipping_subject_query} '
-                    f'-label:Retailer-Shipping/Processed -label:Retailer-Shipping/Error -label:Retailer-Shipping/Manual-Review'
+                    f'{footlocker_parser.shipping_subject_query}'
                 ),
                 'exclude_label': None,
                 'max_results': 1
@@ -589,8 +729,7 @@ def _get_interested_message_ids(gmail_service: GmailService) -> list[str]:
             {
                 'query': (
                     f'from:{champs_parser.update_from_email} '
-                    f'{champs_parser.shipping_subject_query} '
-                    f'-label:Retailer-Shipping/Processed -label:Retailer-Shipping/Error -label:Retailer-Shipping/Manual-Review'
+                    f'{champs_parser.shipping_subject_query}'
                 ),
                 'exclude_label': None,
                 'max_results': 1
@@ -599,8 +738,7 @@ def _get_interested_message_ids(gmail_service: GmailService) -> list[str]:
             {
                 'query': (
                     f'from:{dicks_parser.shipping_from_email} '
-                    f'{dicks_parser.shipping_subject_query} '
-                    f'-label:Retailer-Shipping/Processed -label:Retailer-Shipping/Error -label:Retailer-Shipping/Manual-Review'
+                    f'{dicks_parser.shipping_subject_query}'
                 ),
                 'exclude_label': None,
                 'max_results': 1
@@ -609,8 +747,7 @@ def _get_interested_message_ids(gmail_service: GmailService) -> list[str]:
             {
                 'query': (
                     f'from:{hibbett_parser.update_from_email} '
-                    f'{hibbett_parser.shipping_subject_query} '
-                    f'-label:Retailer-Shipping/Processed -label:Retailer-Shipping/Error -label:Retailer-Shipping/Manual-Review'
+                    f'{hibbett_parser.shipping_subject_query}'
                 ),
                 'exclude_label': None,
                 'max_results': 1
@@ -619,8 +756,7 @@ def _get_interested_message_ids(gmail_service: GmailService) -> list[str]:
             {
                 'query': (
                     f'from:{dtlr_parser.update_from_email} '
-                    f'{dtlr_parser.shipping_subject_query} '
-                    f'-label:Retailer-Shipping/Processed -label:Retailer-Shipping/Error -label:Retailer-Shipping/Manual-Review'
+                    f'{dtlr_parser.shipping_subject_query}'
                 ),
                 'exclude_label': None,
                 'max_results': 1
@@ -629,8 +765,7 @@ def _get_interested_message_ids(gmail_service: GmailService) -> list[str]:
             {
                 'query': (
                     f'from:{finishline_parser.update_from_email} '
-                    f'{finishline_parser.shipping_subject_query} '
-                    f'-label:Retailer-Shipping/Processed -label:Retailer-Shipping/Error -label:Retailer-Shipping/Manual-Review'
+                    f'{finishline_parser.shipping_subject_query}'
                 ),
                 'exclude_label': None,
                 'max_results': 1
@@ -639,8 +774,7 @@ def _get_interested_message_ids(gmail_service: GmailService) -> list[str]:
             {
                 'query': (
                     f'from:{jdsports_parser.update_from_email} '
-                    f'{jdsports_parser.shipping_subject_query} '
-                    f'-label:Retailer-Shipping/Processed -label:Retailer-Shipping/Error -label:Retailer-Shipping/Manual-Review'
+                    f'{jdsports_parser.shipping_subject_query}'
                 ),
                 'exclude_label': None,
                 'max_results': 1
@@ -649,8 +783,7 @@ def _get_interested_message_ids(gmail_service: GmailService) -> list[str]:
             {
                 'query': (
                     f'from:{revolve_parser.update_from_email} '
-                    f'{revolve_parser.shipping_subject_query} '
-                    f'-label:Retailer-Shipping/Processed -label:Retailer-Shipping/Error -label:Retailer-Shipping/Manual-Review'
+                    f'{revolve_parser.shipping_subject_query}'
                 ),
                 'exclude_label': None,
                 'max_results': 1
@@ -659,8 +792,7 @@ def _get_interested_message_ids(gmail_service: GmailService) -> list[str]:
             {
                 'query': (
                     f'from:{asos_parser.update_from_email} '
-                    f'{asos_parser.shipping_subject_query} '
-                    f'-label:Retailer-Shipping/Processed -label:Retailer-Shipping/Error -label:Retailer-Shipping/Manual-Review'
+                    f'{asos_parser.shipping_subject_query}'
                 ),
                 'exclude_label': None,
                 'max_results': 1
@@ -669,8 +801,7 @@ def _get_interested_message_ids(gmail_service: GmailService) -> list[str]:
             {
                 'query': (
                     f'from:{snipes_parser.update_from_email} '
-                    f'{snipes_parser.shipping_subject_query} '
-                    f'-label:Retailer-Shipping/Processed -label:Retailer-Shipping/Error -label:Retailer-Shipping/Manual-Review'
+                    f'{snipes_parser.shipping_subject_query}'
                 ),
                 'exclude_label': None,
                 'max_results': 1
@@ -679,8 +810,7 @@ def _get_interested_message_ids(gmail_service: GmailService) -> list[str]:
             {
                 'query': (
                     f'from:{shoepalace_parser.update_from_email} '
-                    f'{shoepalace_parser.shipping_subject_query} '
-                    f'-label:Retailer-Shipping/Processed -label:Retailer-Shipping/Error -label:Retailer-Shipping/Manual-Review'
+                    f'{shoepalace_parser.shipping_subject_query}'
                 ),
                 'exclude_label': None,
                 'max_results': 1
@@ -689,8 +819,7 @@ def _get_interested_message_ids(gmail_service: GmailService) -> list[str]:
             {
                 'query': (
                     f'from:{endclothing_parser.update_from_email} '
-                    f'{endclothing_parser.shipping_subject_query} '
-                    f'-label:Retailer-Shipping/Processed -label:Retailer-Shipping/Error -label:Retailer-Shipping/Manual-Review'
+                    f'{endclothing_parser.shipping_subject_query}'
                 ),
                 'exclude_label': None,
                 'max_results': 1
@@ -699,8 +828,7 @@ def _get_interested_message_ids(gmail_service: GmailService) -> list[str]:
             {
                 'query': (
                     f'from:{shopwss_parser.update_from_email} '
-                    f'{shopwss_parser.shipping_subject_query} '
-                    f'-label:Retailer-Shipping/Processed -label:Retailer-Shipping/Error -label:Retailer-Shipping/Manual-Review'
+                    f'{shopwss_parser.shipping_subject_query}'
                 ),
                 'exclude_label': None,
                 'max_results': 1
@@ -709,8 +837,7 @@ def _get_interested_message_ids(gmail_service: GmailService) -> list[str]:
             {
                 'query': (
                     f'{shopwss_parser.cancellation_from_query} '
-                    f'{shopwss_parser.cancellation_subject_query} '
-                    f'-label:Retailer-Cancel/Processed -label:Retailer-Cancel/Error -label:Retailer-Cancel/Manual-Review'
+                    f'{shopwss_parser.cancellation_subject_query}'
                 ),
                 'exclude_label': None,
                 'max_results': 1
@@ -719,8 +846,7 @@ def _get_interested_message_ids(gmail_service: GmailService) -> list[str]:
             {
                 'query': (
                     f'from:{snipes_parser.update_from_email} '
-                    f'{snipes_parser.cancellation_subject_query} '
-                    f'-label:Retailer-Cancel/Processed -label:Retailer-Cancel/Error -label:Retailer-Cancel/Manual-Review'
+                    f'{snipes_parser.cancellation_subject_query}'
                 ),
                 'exclude_label': None,
                 'max_results': 1
@@ -729,8 +855,7 @@ def _get_interested_message_ids(gmail_service: GmailService) -> list[str]:
             {
                 'query': (
                     f'from:{snipes_parser.update_from_email} '
-                    f'{snipes_parser.full_cancellation_subject_query} '
-                    f'-label:Retailer-Cancel/Processed -label:Retailer-Cancel/Error -label:Retailer-Cancel/Manual-Review'
+                    f'{snipes_parser.full_cancellation_subject_query}'
                 ),
                 'exclude_label': None,
                 'max_results': 1
@@ -739,8 +864,7 @@ def _get_interested_message_ids(gmail_service: GmailService) -> list[str]:
             {
                 'query': (
                     f'from:{footlocker_parser.update_from_email} '
-                    f'{footlocker_parser.cancellation_subject_query} '
-                    f'-label:Retailer-Cancel/Processed -label:Retailer-Cancel/Error -label:Retailer-Cancel/Manual-Review'
+                    f'{footlocker_parser.cancellation_subject_query}'
                 ),
                 'exclude_label': None,
                 'max_results': 1
@@ -749,8 +873,7 @@ def _get_interested_message_ids(gmail_service: GmailService) -> list[str]:
             {
                 'query': (
                     f'from:{champs_parser.update_from_email} '
-                    f'{champs_parser.cancellation_subject_query} '
-                    f'-label:Retailer-Cancel/Processed -label:Retailer-Cancel/Error -label:Retailer-Cancel/Manual-Review'
+                    f'{champs_parser.cancellation_subject_query}'
                 ),
                 'exclude_label': None,
                 'max_results': 1
@@ -759,8 +882,7 @@ def _get_interested_message_ids(gmail_service: GmailService) -> list[str]:
             {
                 'query': (
                     f'from:{dicks_parser.cancellation_from_email} '
-                    f'{dicks_parser.cancellation_subject_query} '
-                    f'-label:Retailer-Cancel/Processed -label:Retailer-Cancel/Error -label:Retailer-Cancel/Manual-Review'
+                    f'{dicks_parser.cancellation_subject_query}'
                 ),
                 'exclude_label': None,
                 'max_results': 1
@@ -769,8 +891,7 @@ def _get_interested_message_ids(gmail_service: GmailService) -> list[str]:
             {
                 'query': (
                     f'from:{hibbett_parser.update_from_email} '
-                    f'{hibbett_parser.cancellation_subject_query} '
-                    f'-label:Retailer-Cancel/Processed -label:Retailer-Cancel/Error -label:Retailer-Cancel/Manual-Review'
+                    f'{hibbett_parser.cancellation_subject_query}'
                 ),
                 'exclude_label': None,
                 'max_results': 1
@@ -779,8 +900,7 @@ def _get_interested_message_ids(gmail_service: GmailService) -> list[str]:
             {
                 'query': (
                     f'from:{dtlr_parser.update_from_email} '
-                    f'{dtlr_parser.cancellation_subject_query} '
-                    f'-label:Retailer-Cancel/Processed -label:Retailer-Cancel/Error -label:Retailer-Cancel/Manual-Review'
+                    f'{dtlr_parser.cancellation_subject_query}'
                 ),
                 'exclude_label': None,
                 'max_results': 1
@@ -789,8 +909,7 @@ def _get_interested_message_ids(gmail_service: GmailService) -> list[str]:
             {
                 'query': (
                     f'from:{finishline_parser.update_from_email} '
-                    f'{finishline_parser.cancellation_subject_query} '
-                    f'-label:Retailer-Cancel/Processed -label:Retailer-Cancel/Error -label:Retailer-Cancel/Manual-Review'
+                    f'{finishline_parser.cancellation_subject_query}'
                 ),
                 'exclude_label': None,
                 'max_results': 1
@@ -799,8 +918,7 @@ def _get_interested_message_ids(gmail_service: GmailService) -> list[str]:
             {
                 'query': (
                     f'from:{jdsports_parser.update_from_email} '
-                    f'{jdsports_parser.cancellation_subject_query} '
-                    f'-label:Retailer-Cancel/Processed -label:Retailer-Cancel/Error -label:Retailer-Cancel/Manual-Review'
+                    f'{jdsports_parser.cancellation_subject_query}'
                 ),
                 'exclude_label': None,
                 'max_results': 1
@@ -809,8 +927,7 @@ def _get_interested_message_ids(gmail_service: GmailService) -> list[str]:
             {
                 'query': (
                     f'{revolve_parser.cancellation_from_query} '
-                    f'{revolve_parser.cancellation_subject_query} '
-                    f'-label:Retailer-Cancel/Processed -label:Retailer-Cancel/Error -label:Retailer-Cancel/Manual-Review'
+                    f'{revolve_parser.cancellation_subject_query}'
                 ),
                 'exclude_label': None,
                 'max_results': 5
@@ -819,8 +936,7 @@ def _get_interested_message_ids(gmail_service: GmailService) -> list[str]:
             {
                 'query': (
                     f'{shoepalace_parser.cancellation_from_query} '
-                    f'{shoepalace_parser.cancellation_subject_query} '
-                    f'-label:Retailer-Cancel/Processed -label:Retailer-Cancel/Error -label:Retailer-Cancel/Manual-Review'
+                    f'{shoepalace_parser.cancellation_subject_query}'
                 ),
                 'exclude_label': None,
                 'max_results': 1
@@ -836,26 +952,28 @@ def _get_interested_message_ids(gmail_service: GmailService) -> list[str]:
             seen_queries.add(query_key)
             unique_search_queries.append(search_config)
 
-    # Collect unprocessed message IDs from all search queries
+    # Collect unprocessed message IDs from all search queries (filtered through the registry)
     result = []
     seen = set()
-    for search_config in unique_search_queries:
-        message_ids = gmail_service.list_messages_with_query(
-            query=search_config['query'],
-            max_results=search_config['max_results'],
-            exclude_label=search_config['exclude_label']
-        )
-        # Debug: log Revolve cancellation search (helps diagnose "no signal" issues)
-        q = search_config['query']
-        if 'was cancelled' in q and 'is out of stock' in q:
-            logger.info(
-                f"[REVOLVE-CANCEL] Gmail search found {len(message_ids)} messages | "
-                f"from={revolve_parser.cancellation_from_query}"
+    db = SessionLocal()
+    try:
+        for search_config in unique_search_queries:
+            message_ids = processed_messages.list_unprocessed_message_ids(
+                db, gmail_service, search_config['query'], None, search_config['max_results']
             )
-        for mid in message_ids:
-            if mid not in seen:
-                seen.add(mid)
-                result.append(mid)
+            # Debug: log Revolve cancellation search (helps diagnose "no signal" issues)
+            q = search_config['query']
+            if 'was cancelled' in q and 'is out of stock' in q:
+                logger.info(
+                    f"[REVOLVE-CANCEL] Gmail search found {len(message_ids)} messages | "
+                    f"from={revolve_parser.cancellation_from_query}"
+                )
+            for mid in message_ids:
+                if mid not in seen:
+                    seen.add(mid)
+                    result.append(mid)
+    finally:
+        db.close()
     return result
 
 
@@ -868,7 +986,7 @@ async def process_prepworx_emails(
     Manually process unprocessed PrepWorx "Inbound processed" emails.
     
     This endpoint searches for PrepWorx emails that haven't been processed yet
-    (without the "PrepWorx/Processed" label) and processes them automatically.
+    (not in the processed-message registry) and processes them automatically.
     
     Args:
         max_emails: Maximum number of emails to process (default: 20, max: 100)
@@ -889,13 +1007,15 @@ async def process_prepworx_emails(
             try:
                 gmail_service = GmailService()
                 
-                # Search for unprocessed PrepWorx emails
+                # Search for PrepWorx emails the processed-message registry does not have yet
                 search_query = "from:beta@prepworx.io subject:(Inbound has been processed)"
-                message_ids = gmail_service.list_messages_with_query(
-                    query=search_query,
-                    max_results=max_emails,
-                    exclude_label="PrepWorx/Processed"
-                )
+                db = SessionLocal()
+                try:
+                    message_ids = processed_messages.list_unprocessed_message_ids(
+                        db, gmail_service, search_query, processed_messages.TYPE_CHECKIN, max_emails
+                    )
+                finally:
+                    db.close()
                 
                 logger.info(f"Found {len(message_ids)} unprocessed PrepWorx messages")
                 
@@ -908,8 +1028,7 @@ async def process_prepworx_emails(
                 # Process each message
                 for message_id in message_ids:
                     # Call the processing function directly (not as background task)
-                    import asyncio
-                    asyncio.run(process_email_notification(message_id, gmail_service))
+                    process_email_message(message_id, gmail_service)
                 
                 logger.info(f"✅ Completed background processing of {len(message_ids)} emails")
             except Exception as e:
@@ -934,6 +1053,192 @@ async def process_prepworx_emails(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/gmail/retry-failed")
+async def retry_failed_emails(
+    email_type: Optional[str] = Query(None, description="Only this email type: confirmation, shipping, cancellation or checkin"),
+    retailer: Optional[str] = Query(None, description="Only this retailer (classifier retailer ID)"),
+    max_attempts: Optional[int] = Query(None, description="Skip emails that already failed this many times", ge=1),
+    limit: int = Query(50, description="Maximum number of emails to retry", ge=1, le=500)
+) -> Dict[str, Any]:
+    """
+    Re-queue emails whose last processing attempt failed.
+    
+    Failed emails are selected from the processed-message registry (oldest
+    failure first) and handed to the email worker pool, which fetches,
+    classifies and processes them like webhook traffic.
+    
+    Returns:
+        Number of emails selected and how many the worker pool accepted
+    """
+    try:
+        db = SessionLocal()
+        try:
+            candidates = processed_messages.retry_candidates(
+                db, email_type=email_type, retailer=retailer, max_attempts=max_attempts, limit=limit
+            )
+            message_ids = [candidate.message_id for candidate in candidates]
+        finally:
+            db.close()
+        
+        pool = get_email_worker_pool()
+        submit_results = {message_id: pool.submit(message_id) for message_id in message_ids}
+        accepted = sum(1 for result in submit_results.values() if result == SubmitResult.ACCEPTED)
+        rejected = [message_id for message_id, result in submit_results.items() if result == SubmitResult.REJECTED]
+        if rejected:
+            logger.warning(f"Email worker pool full, {len(rejected)} failed email(s) not re-queued")
+        logger.info(f"Re-queued {accepted}/{len(message_ids)} failed email(s)")
+        
+        return {
+            "status": 200,
+            "message": f"Re-queued {accepted} of {len(message_ids)} failed emails",
+            "data": {
+                "selected": len(message_ids),
+                "queued": accepted,
+                "rejected": len(rejected)
+            }
+        }
+    
+    except Exception as e:
+        logger.error(f"Error re-queuing failed emails: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/gmail/backfill")
+async def start_email_backfill(
+    after: Optional[datetime] = Query(None, description="Start of the date range (ISO 8601; UTC unless an offset is given)"),
+    before: Optional[datetime] = Query(None, description="End of the date range (default: now)"),
+    start_history_id: Optional[int] = Query(None, description="Backfill the Gmail history from this ID instead of a date range", ge=1),
+    query: Optional[str] = Query(None, description="Extra Gmail search terms for a date range, e.g. in:inbox")
+) -> Dict[str, Any]:
+    """
+    Catch up on emails missed while the webhook was down.
+    
+    Walks a date range (or the Gmail history from start_history_id) across all
+    retailers known to RetailerEmailClassifier and PrepWorx, and queues every
+    email not yet in the processed-message registry on the email worker pool.
+    Runs in the background under a Gmail quota limit; progress is checkpointed,
+    so a paused or failed backfill resumes where it stopped.
+    
+    Returns:
+        The created backfill job (poll GET /gmail/backfill/{job_id})
+    """
+    try:
+        db = SessionLocal()
+        try:
+            job = email_backfill.create_job(
+                db, range_after=after, range_before=before, start_history_id=start_history_id, query=query
+            )
+        finally:
+            db.close()
+        
+        email_backfill.start_job(job.id, get_email_worker_pool())
+        logger.info(f"[BACKFILL] Started job {job.id} ({job.mode})")
+        
+        return {
+            "status": 200,
+            "message": f"Backfill job {job.id} started",
+            "data": email_backfill.job_to_dict(job)
+        }
+    
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error starting email backfill: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/gmail/backfill")
+async def list_email_backfills(
+    limit: int = Query(20, description="Maximum number of jobs", ge=1, le=100)
+) -> Dict[str, Any]:
+    """List the most recent backfill jobs with their progress."""
+    try:
+        db = SessionLocal()
+        try:
+            jobs = [email_backfill.job_to_dict(job) for job in email_backfill.list_jobs(db, limit=limit)]
+        finally:
+            db.close()
+        return {"status": 200, "message": f"{len(jobs)} backfill jobs", "data": jobs}
+    
+    except Exception as e:
+        logger.error(f"Error listing email backfills: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/gmail/backfill/{job_id}")
+async def get_email_backfill(job_id: int) -> Dict[str, Any]:
+    """Return a backfill job with its progress counters and checkpoint."""
+    try:
+        db = SessionLocal()
+        try:
+            job = email_backfill.get_job(db, job_id)
+            data = email_backfill.job_to_dict(job) if job else None
+        finally:
+            db.close()
+    except Exception as e:
+        logger.error(f"Error reading email backfill {job_id}: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    if data is None:
+        raise HTTPException(status_code=404, detail="Backfill job not found")
+    return {"status": 200, "message": f"Backfill job {job_id} is {data['status']}", "data": data}
+
+
+@router.post("/gmail/backfill/{job_id}/resume")
+async def resume_email_backfill(job_id: int) -> Dict[str, Any]:
+    """
+    Resume a paused or failed backfill job from its checkpoint.
+    
+    A job left running by a process that died is resumed once its row has not
+    been updated for 10 minutes.
+    """
+    try:
+        db = SessionLocal()
+        try:
+            job = email_backfill.get_job(db, job_id)
+        finally:
+            db.close()
+        if job is None:
+            raise HTTPException(status_code=404, detail="Backfill job not found")
+        
+        if email_backfill.start_job(job_id, get_email_worker_pool()) is None:
+            raise HTTPException(status_code=409, detail=f"Backfill job {job_id} is {job.status}, not resumable")
+        logger.info(f"[BACKFILL] Resumed job {job_id} at checkpoint {job.checkpoint!r}")
+        
+        return {
+            "status": 200,
+            "message": f"Backfill job {job_id} resumed",
+            "data": {"id": job_id, "checkpoint": job.checkpoint}
+        }
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error resuming email backfill {job_id}: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/gmail/backfill/{job_id}/pause")
+async def pause_email_backfill(job_id: int) -> Dict[str, Any]:
+    """Pause a backfill job; it stops after its current page and keeps its checkpoint."""
+    try:
+        db = SessionLocal()
+        try:
+            paused = email_backfill.pause_job(db, job_id)
+        finally:
+            db.close()
+        
+        if not paused:
+            raise HTTPException(status_code=409, detail=f"Backfill job {job_id} is not pending or running")
+        return {"status": 200, "message": f"Backfill job {job_id} paused", "data": {"id": job_id}}
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error pausing email backfill {job_id}: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/gmail/process-footlocker-shipping")
 async def process_footlocker_shipping_emails(
     max_emails: int = Query(20, description="Maximum number of emails to process", ge=1, le=100)
@@ -1338,12 +1643,12 @@ async def test_email_processing() -> Dict[str, Any]:
         logger.info("=" * 60)
         
         gmail_service = GmailService()
-        email_parser = EmailParser()
+        email_parser = get_parser("email")
         
         # Import PrepWorx parser
-        from app.services.prepworx_parser import PrepWorxEmailParser, PrepWorxCheckinProcessor
+        from app.services.prepworx_parser import PrepWorxCheckinProcessor
         from app.config.database import get_db
-        prepworx_parser = PrepWorxEmailParser()
+        prepworx_parser = get_parser("prepworx")
         
         # Fetch latest messages
         message_ids = gmail_service.list_messages(max_results=5)
@@ -67,6 +67,20 @@ def test_connection():
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Separate, smaller pool for scheduled background jobs so a long job cannot
+# exhaust the connections API requests need (no connections until first use)
+background_engine = create_engine(
+    DATABASE_URL,
+    poolclass=QueuePool,
+    pool_size=settings.scheduler_db_pool_size,
+    max_overflow=settings.scheduler_db_max_overflow,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=True,
+    echo=DB_ECHO
+)
+BackgroundSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=background_engine)
+
 
 def get_db() -> Generator[Session, None, None]:
     """
@@ -75,6 +75,37 @@ class Settings(BaseSettings):
     enable_gmail_watch: bool = True
     enable_auto_email_processing: bool = True
     
+    # Gmail label IDs are cached per process; labels are listed again after this many seconds
+    gmail_label_cache_ttl_seconds: int = 3600
+    # Max concurrent requests from the async Gmail client (webhook history/sender checks)
+    gmail_async_max_concurrency: int = 10
+    # Label changes waiting for the background Gmail labeler; more are dropped (the registry has the outcome)
+    gmail_label_queue_size: int = 1000
+    
+    # Webhook Email Processing Worker Pool
+    email_worker_pool_size: int = 4  # Worker threads processing webhook messages in parallel
+    email_worker_queue_size: int = 100  # Max messages waiting; more are rejected until the queue drains
+    
+    # Backfill of missed emails (POST /gmail/backfill): Gmail quota units per second it may use
+    # (Gmail allows 250 per user; the rest is left to webhook traffic), date-range window per
+    # checkpoint, and worker queue depth it leaves free for webhook messages
+    email_backfill_quota_units_per_second: int = 100
+    email_backfill_window_minutes: int = 60
+    email_backfill_max_pending: int = 50
+    
+    # Process pool for the CPU-bound parsing of classified retailer emails (0 = parse in-process)
+    parse_pool_workers: int = 0
+    parse_pool_timeout_seconds: float = 30.0
+    
+    # Dashboard statistics (stats_* summary tables) are cached per process for this many seconds
+    statistics_cache_ttl_seconds: int = 30
+    
+    # Scheduled background jobs (hourly retailer email run)
+    scheduler_job_executor: str = "thread"  # "thread" (dedicated thread pool) or "process" (worker process)
+    scheduler_max_workers: int = 1
+    scheduler_db_pool_size: int = 2  # Own DB pool, separate from the API pool
+    scheduler_db_max_overflow: int = 0
+    
     # Playwright Configuration
     playwright_headless: bool = True
     
@@ -139,6 +139,41 @@ async def lifespan(app: FastAPI):
         stop_scheduler()
     except Exception as e:
         logger.error(f"Error stopping background scheduler: {e}")
+    
+    # Pause running email backfills (they resume from their checkpoint)
+    try:
+        from app.services.email_backfill import shutdown_backfills
+        shutdown_backfills()
+    except Exception as e:
+        logger.error(f"Error pausing email backfills: {e}")
+    
+    # Drain webhook email workers (finishes messages already queued)
+    try:
+        from app.api.webhook import shutdown_email_worker_pool
+        shutdown_email_worker_pool()
+    except Exception as e:
+        logger.error(f"Error stopping email worker pool: {e}")
+    
+    # Apply the Gmail label changes still queued
+    try:
+        from app.services.gmail_labeler import shutdown_gmail_labeler
+        shutdown_gmail_labeler()
+    except Exception as e:
+        logger.error(f"Error stopping Gmail labeler: {e}")
+    
+    # Stop parse pool worker processes
+    try:
+        from app.services.parse_pool import shutdown_parse_pool
+        shutdown_parse_pool()
+    except Exception as e:
+        logger.error(f"Error stopping parse pool: {e}")
+    
+    # Close the shared async Gmail HTTP client
+    try:
+        from app.services.async_gmail_service import shutdown_async_gmail_service
+        await shutdown_async_gmail_service()
+    except Exception as e:
+        logger.error(f"Error closing async Gmail client: {e}")
 
 
 # Create FastAPI application
@@ -263,6 +298,17 @@ async def health_check():
     }
 
 
+@app.get("/health/scheduler", tags=["Health"])
+async def scheduler_health_check():
+    """Background scheduler status and per-job run metrics (duration, emails handled)"""
+    from app.services.background_scheduler import get_job_metrics, get_scheduler
+    scheduler = get_scheduler()
+    return {
+        "status": "running" if scheduler is not None and scheduler.running else "stopped",
+        "jobs": get_job_metrics()
+    }
+
+
 @app.get("/health/gmail", tags=["Health"])
 async def gmail_health_check():
     """Gmail authentication health check endpoint"""
@@ -1,12 +1,27 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Text, Date, Enum, JSON
+from sqlalchemy import BigInteger, Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Text, Date, Enum, JSON, Index, DDL, Computed, UniqueConstraint, event, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
+from pathlib import Path
 import enum
 
 Base = declarative_base()
 
 
+# pg_trgm backs the GIN trigram indexes that serve the list endpoints' "contains"
+# filters (ILIKE '%term%', see app/services/search.py)
+event.listen(
+    Base.metadata,
+    'before_create',
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect='postgresql'),
+)
+
+
+def _trigram_index(name: str, column_name: str) -> Index:
+    """GIN pg_trgm index on column_name (PostgreSQL only)."""
+    return Index(name, column_name, postgresql_using='gin', postgresql_ops={column_name: 'gin_trgm_ops'})
+
+
 # ============================================================================
 # AUTH MODELS
 # ============================================================================
@@ -110,9 +125,23 @@ class AsinBank(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     lead_id = Column(String(100), nullable=False, index=True)
     size = Column(String(50))
+    # Generated by the database from normalize_size(size) ("9.0" / "09" -> "9"); read-only
+    size_normalized = Column(String(50), Computed("normalize_size(size)", persisted=True))
     asin = Column(String(100), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
+    # Order-matching lookups: (asin, size) from PrepWorx check-ins, (lead_id, size) from
+    # confirmation emails; the size_normalized variants serve "9" vs "9.0" vs "09" matches
+    __table_args__ = (
+        Index('idx_asin_bank_asin_size', 'asin', 'size'),
+        Index('idx_asin_bank_lead_id_size', 'lead_id', 'size'),
+        Index('idx_asin_bank_asin_size_normalized', 'asin', 'size_normalized'),
+        Index('idx_asin_bank_lead_id_size_normalized', 'lead_id', 'size_normalized'),
+        # ASIN / lead ID search (GET /asin-bank, /asins, /purchases?asin=, /checkin?asin=)
+        _trigram_index('idx_asin_bank_asin_trgm', 'asin'),
+        _trigram_index('idx_asin_bank_lead_id_trgm', 'lead_id'),
+    )
+    
     # Relationships
     oa_sourcing_asin1 = relationship("OASourcing", foreign_keys="OASourcing.asin1_id", back_populates="asin1_ref")
     oa_sourcing_asin2 = relationship("OASourcing", foreign_keys="OASourcing.asin2_id", back_populates="asin2_ref")
@@ -129,11 +158,42 @@ class AsinBank(Base):
     oa_sourcing_asin13 = relationship("OASourcing", foreign_keys="OASourcing.asin13_id", back_populates="asin13_ref")
     oa_sourcing_asin14 = relationship("OASourcing", foreign_keys="OASourcing.asin14_id", back_populates="asin14_ref")
     oa_sourcing_asin15 = relationship("OASourcing", foreign_keys="OASourcing.asin15_id", back_populates="asin15_ref")
+    lead_links = relationship("LeadAsin", back_populates="asin", passive_deletes=True)
 
     def __repr__(self):
         return f"<AsinBank(id={self.id}, lead_id={self.lead_id}, size={self.size}, asin={self.asin})>"
 
 
+# SQL twin of purchase_item_matcher.normalize_size ("11.0" -> "11", "09.5" -> "9.5", "09" -> "9").
+# IMMUTABLE so it can back the generated size_normalized column; keep in sync with
+# migrations/add_order_matching_indexes.sql.
+NORMALIZE_SIZE_FUNCTION_SQL = r"""
+CREATE OR REPLACE FUNCTION normalize_size(size TEXT)
+RETURNS TEXT
+LANGUAGE sql
+IMMUTABLE STRICT PARALLEL SAFE
+AS $$
+    SELECT CASE
+        WHEN btrim(size, E' \t\r\n') ~ '^[0-9]{1,2}\.[0-9]$' THEN
+            CASE
+                WHEN btrim(size, E' \t\r\n')::numeric = trunc(btrim(size, E' \t\r\n')::numeric)
+                    THEN btrim(size, E' \t\r\n')::numeric::int::text
+                ELSE btrim(size, E' \t\r\n')::numeric::text
+            END
+        WHEN btrim(size, E' \t\r\n') ~ '^[0-9]{1,2}$' THEN btrim(size, E' \t\r\n')::int::text
+        ELSE btrim(size, E' \t\r\n')
+    END
+$$;
+"""
+
+# create_all() must create the function before asin_bank (generated column)
+event.listen(
+    AsinBank.__table__,
+    'before_create',
+    DDL(NORMALIZE_SIZE_FUNCTION_SQL).execute_if(dialect='postgresql'),
+)
+
+
 class OASourcing(Base):
     """
     OA Sourcing table - Lead Submittal data
@@ -153,7 +213,7 @@ class OASourcing(Base):
     product_sku = Column(String(200))
     retailer_link = Column(Text)
     amazon_link = Column(Text)
-    unique_id = Column(String(200))  # Product unique ID from retailer link (e.g., HJ7395 from FootLocker)
+    unique_id = Column(String(200), index=True)  # Product unique ID from retailer link (e.g., HJ7395 from FootLocker)
     purchased = Column(String(50))
     purchase_more_if_available = Column(String(50))
     pros = Column(Text)
@@ -227,6 +287,17 @@ class OASourcing(Base):
     sourcer = Column(String(100))
     status = Column(String(20), default='draft')  # 'draft' or 'complete'
     
+    # Product name search: trigram for "contains", to_tsvector for search_mode=fulltext
+    # (the expression must stay identical to the one app/services/search.py builds)
+    __table_args__ = (
+        _trigram_index('idx_oa_sourcing_product_name_trgm', 'product_name'),
+        Index(
+            'idx_oa_sourcing_product_name_fts',
+            text("to_tsvector('simple'::regconfig, COALESCE(product_name, ''::character varying))"),
+            postgresql_using='gin'
+        ),
+    )
+    
     # Relationships
     retailer = relationship("Retailer", back_populates="oa_sourcing_leads")
     
@@ -246,12 +317,51 @@ class OASourcing(Base):
     asin14_ref = relationship("AsinBank", foreign_keys=[asin14_id])
     asin15_ref = relationship("AsinBank", foreign_keys=[asin15_id])
     
+    # Linked ASINs in position order (lead_asin); the asinN_id / asinN_recommended_quantity
+    # columns above mirror positions 1-15 for older readers (see app/services/lead_asins.py)
+    asin_links = relationship(
+        "LeadAsin",
+        back_populates="lead",
+        order_by="LeadAsin.position",
+        cascade="all, delete-orphan"
+    )
+    
     purchase_trackers = relationship("PurchaseTracker", back_populates="oa_sourcing")
 
     def __repr__(self):
         return f"<OASourcing(id={self.id}, lead_id={self.lead_id}, product_name={self.product_name})>"
 
 
+class LeadAsin(Base):
+    """
+    Lead-to-ASIN links - the ASINs a lead buys, in display position order, with
+    the recommended quantity per ASIN. Replaces the asin1..asin15 columns of
+    oa_sourcing (no cap on the number of ASINs per lead).
+    """
+    __tablename__ = 'lead_asin'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    oa_sourcing_id = Column(Integer, ForeignKey('oa_sourcing.id', ondelete='CASCADE'), nullable=False)
+    asin_bank_id = Column(Integer, ForeignKey('asin_bank.id', ondelete='CASCADE'), nullable=False)
+    position = Column(Integer, nullable=False)  # 1-based
+    recommended_quantity = Column(Integer)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    # (oa_sourcing_id, position) serves "a lead's ASINs in order" and keeps positions unique;
+    # asin_bank_id serves "which leads use this ASIN"
+    __table_args__ = (
+        Index('idx_lead_asin_lead_position', 'oa_sourcing_id', 'position', unique=True),
+        Index('idx_lead_asin_asin_bank_id', 'asin_bank_id'),
+    )
+    
+    # Relationships
+    lead = relationship("OASourcing", back_populates="asin_links")
+    asin = relationship("AsinBank", back_populates="lead_links")
+    
+    def __repr__(self):
+        return f"<LeadAsin(oa_sourcing_id={self.oa_sourcing_id}, position={self.position}, asin_bank_id={self.asin_bank_id})>"
+
+
 class PurchaseTracker(Base):
     """
     Purchase Tracker table - tracks individual purchases
@@ -271,7 +381,7 @@ class PurchaseTracker(Base):
     # Purchase metadata
     date = Column(DateTime)  # Purchase date and time (when the order was placed)
     platform = Column(String(100))
-    order_number = Column(String(200))
+    order_number = Column(String(200), index=True)
     
     # Quantities
     og_qty = Column(Integer)       # Original Quantity - the quantity of the product for order confirmation
@@ -320,6 +430,11 @@ class PurchaseTracker(Base):
     # Metadata
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Order number search (GET /purchases?order_number=)
+    __table_args__ = (
+        _trigram_index('idx_purchase_tracker_order_number_trgm', 'order_number'),
+    )
 
     # Properties to access removed fields
     @property
@@ -411,6 +526,11 @@ class Checkin(Base):
     quantity = Column(Integer, nullable=False)  # Number of items checked in
     checked_in_at = Column(DateTime, default=datetime.utcnow, nullable=False)  # Date & time of check-in
     
+    # Order number search (GET /checkin?order_number=)
+    __table_args__ = (
+        _trigram_index('idx_checkin_order_number_trgm', 'order_number'),
+    )
+    
     # Relationship
     asin_bank_ref = relationship("AsinBank", backref="checkins")
     
@@ -628,3 +748,312 @@ class EmailManualReview(Base):
     def __repr__(self):
         return f"<EmailManualReview(id={self.id}, retailer={self.retailer}, status={self.status})>"
 
+
+class FulfillmentEvent(Base):
+    """
+    Fulfillment event ledger - one row per shipping/cancellation email line applied
+    to a purchase tracker record, with the quantity it added to shipped_to_pw or
+    cancelled_qty. The unique key makes re-applying an email a no-op, and
+    shipped_to_pw / cancelled_qty / final_qty can be rebuilt from the ledger
+    (see app/services/fulfillment_ledger.py).
+    """
+    __tablename__ = 'fulfillment_event'
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    message_id = Column(String(100), nullable=False)  # Gmail message ID ('manual:...' for PATCH edits)
+    event_type = Column(String(20), nullable=False)  # 'shipping', 'cancellation' or 'final_adjustment'
+    purchase_tracker_id = Column(Integer, ForeignKey('purchase_tracker.id', ondelete='CASCADE'), nullable=False)
+    line = Column(Integer, nullable=False, default=0)  # Item position in the parsed email
+    order_number = Column(String(200))
+    unique_id = Column(String(200))
+    size = Column(String(100))
+    qty = Column(Integer, nullable=False)  # Quantity applied (added to shipped_to_pw, cancelled_qty or final_qty)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # The unique key is the dedupe (INSERT ... ON CONFLICT DO NOTHING); its leading
+    # (message_id, event_type) also serves "was this email applied"
+    __table_args__ = (
+        UniqueConstraint('message_id', 'event_type', 'purchase_tracker_id', 'line', name='uq_fulfillment_event'),
+        Index('idx_fulfillment_event_purchase_tracker_id', 'purchase_tracker_id'),
+    )
+
+    def __repr__(self):
+        return f"<FulfillmentEvent(message_id={self.message_id}, type={self.event_type}, purchase_tracker_id={self.purchase_tracker_id}, qty={self.qty})>"
+
+
+class ProcessedMessage(Base):
+    """
+    Processed-message registry - one row per (Gmail message, email type) handled by
+    the order, update and PrepWorx check-in processors, with the outcome, attempts,
+    timings and last error. Duplicate checks, processing stats and retry selection
+    read this table instead of Gmail labels (see app/services/processed_messages.py).
+    """
+    __tablename__ = 'processed_message'
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    message_id = Column(String(100), nullable=False)  # Gmail message ID
+    email_type = Column(String(20), nullable=False)  # 'confirmation', 'shipping', 'cancellation' or 'checkin'
+    retailer = Column(String(50))
+    status = Column(String(20), nullable=False)  # 'processed', 'error' or 'manual_review'
+    attempts = Column(Integer, nullable=False, default=1)
+    error = Column(Text)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    duration_ms = Column(Integer)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    # The unique key is the upsert target; its leading message_id serves "was this message processed"
+    __table_args__ = (
+        UniqueConstraint('message_id', 'email_type', name='uq_processed_message'),
+        Index('idx_processed_message_type_status', 'email_type', 'status', 'updated_at'),
+    )
+
+    def __repr__(self):
+        return f"<ProcessedMessage(message_id={self.message_id}, type={self.email_type}, status={self.status})>"
+
+
+class GmailHistoryCheckpoint(Base):
+    """
+    Gmail history cursor per mailbox - the history ID up to which Pub/Sub
+    notifications were handled. Shared by every webhook worker; ranges are
+    claimed with a compare-and-swap (see app/services/gmail_history_checkpoint.py).
+    """
+    __tablename__ = 'gmail_history_checkpoint'
+
+    mailbox = Column(String(255), primary_key=True)  # Notification emailAddress (lower case)
+    history_id = Column(BigInteger, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<GmailHistoryCheckpoint(mailbox={self.mailbox}, history_id={self.history_id})>"
+
+
+class EmailBackfillJob(Base):
+    """
+    Backfill of retailer emails missed while the webhook was down - a date range
+    or a history ID range walked by app/services/email_backfill.py. checkpoint is
+    where the job resumes (start of the oldest date window, or the number of history
+    message IDs, not yet handled by the worker pool).
+    """
+    __tablename__ = 'email_backfill_job'
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    mode = Column(String(20), nullable=False)  # 'date' or 'history'
+    status = Column(String(20), nullable=False, default='pending')  # 'pending', 'running', 'paused', 'completed' or 'failed'
+    range_after = Column(DateTime)  # Date range (UTC), mode 'date'
+    range_before = Column(DateTime)
+    start_history_id = Column(BigInteger)  # mode 'history'
+    end_history_id = Column(BigInteger)
+    query = Column(Text)  # Extra Gmail search terms (e.g. 'in:inbox'), mode 'date'
+    checkpoint = Column(String(50))
+    scanned = Column(Integer, nullable=False, default=0)  # Message IDs listed
+    known = Column(Integer, nullable=False, default=0)  # Already in processed_message
+    unrelated = Column(Integer, nullable=False, default=0)  # Sender is not a retailer / PrepWorx
+    queued = Column(Integer, nullable=False, default=0)  # Accepted by the email worker pool
+    duplicates = Column(Integer, nullable=False, default=0)  # Already queued or running
+    error = Column(Text)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<EmailBackfillJob(id={self.id}, mode={self.mode}, status={self.status}, checkpoint={self.checkpoint})>"
+
+
+
+# ============================================================================
+# DASHBOARD STATISTICS (maintained by triggers, see migrations/create_statistics_tables.sql)
+#
+# Triggers only append to the stats_*_delta tables; fold_statistics_deltas()
+# adds the pending deltas to the summary tables below.
+# ============================================================================
+
+class StatsCounter(Base):
+    """
+    Named running totals: leads, purchases, asins, total_spend, ppu_sum, ppu_count,
+    checkins, checkin_quantity
+    """
+    __tablename__ = 'stats_counter'
+
+    name = Column(String(50), primary_key=True)
+    value = Column(Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<StatsCounter(name={self.name}, value={self.value})>"
+
+
+class StatsPlatform(Base):
+    """
+    Purchases per purchase_tracker.platform ('' = no platform)
+    """
+    __tablename__ = 'stats_platform'
+
+    platform = Column(String(100), primary_key=True)
+    purchase_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index('idx_stats_platform_purchase_count', purchase_count.desc()),
+    )
+
+    def __repr__(self):
+        return f"<StatsPlatform(platform={self.platform}, purchases={self.purchase_count})>"
+
+
+class StatsRetailer(Base):
+    """
+    Per-retailer lead count, PPU/margin sums and counts (for averages) and purchase count
+    """
+    __tablename__ = 'stats_retailer'
+
+    retailer_id = Column(Integer, primary_key=True)
+    lead_count = Column(Integer, nullable=False, default=0)
+    ppu_sum = Column(Float, nullable=False, default=0)
+    ppu_count = Column(Integer, nullable=False, default=0)
+    margin_sum = Column(Float, nullable=False, default=0)
+    margin_count = Column(Integer, nullable=False, default=0)
+    purchase_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index('idx_stats_retailer_lead_count', lead_count.desc()),
+        Index('idx_stats_retailer_purchase_count', purchase_count.desc()),
+    )
+
+    def __repr__(self):
+        return f"<StatsRetailer(retailer_id={self.retailer_id}, leads={self.lead_count}, purchases={self.purchase_count})>"
+
+
+class StatsCheckinOrder(Base):
+    """
+    Check-in quantity and count per order number ('' = no order number)
+    """
+    __tablename__ = 'stats_checkin_order'
+
+    order_number = Column(String(200), primary_key=True)
+    total_quantity = Column(BigInteger, nullable=False, default=0)
+    checkin_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index('idx_stats_checkin_order_total_quantity', total_quantity.desc()),
+    )
+
+    def __repr__(self):
+        return f"<StatsCheckinOrder(order={self.order_number}, qty={self.total_quantity})>"
+
+
+class StatsCheckinDay(Base):
+    """
+    Check-ins per day of checked_in_at
+    """
+    __tablename__ = 'stats_checkin_day'
+
+    day = Column(Date, primary_key=True)
+    checkin_count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<StatsCheckinDay(day={self.day}, checkins={self.checkin_count})>"
+
+
+class StatsCounterDelta(Base):
+    """
+    Pending stats_counter increment (insert-only)
+    """
+    __tablename__ = 'stats_counter_delta'
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    name = Column(String(50), nullable=False)
+    delta = Column(Float, nullable=False)
+
+
+class StatsPlatformDelta(Base):
+    """
+    Pending stats_platform increment (insert-only)
+    """
+    __tablename__ = 'stats_platform_delta'
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    platform = Column(String(100), nullable=False)
+    purchase_count = Column(Integer, nullable=False)
+
+
+class StatsRetailerDelta(Base):
+    """
+    Pending stats_retailer increment (insert-only)
+    """
+    __tablename__ = 'stats_retailer_delta'
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    retailer_id = Column(Integer, nullable=False)
+    lead_count = Column(Integer, nullable=False)
+    ppu_sum = Column(Float, nullable=False)
+    ppu_count = Column(Integer, nullable=False)
+    margin_sum = Column(Float, nullable=False)
+    margin_count = Column(Integer, nullable=False)
+    purchase_count = Column(Integer, nullable=False)
+
+
+class StatsCheckinOrderDelta(Base):
+    """
+    Pending stats_checkin_order increment (insert-only)
+    """
+    __tablename__ = 'stats_checkin_order_delta'
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    order_number = Column(String(200), nullable=False)
+    total_quantity = Column(BigInteger, nullable=False)
+    checkin_count = Column(Integer, nullable=False)
+
+
+class StatsCheckinDayDelta(Base):
+    """
+    Pending stats_checkin_day increment (insert-only)
+    """
+    __tablename__ = 'stats_checkin_day_delta'
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    day = Column(Date, nullable=False)
+    checkin_count = Column(Integer, nullable=False)
+
+
+STATISTICS_MIGRATION_PATH = Path(__file__).resolve().parents[2] / "migrations" / "create_statistics_tables.sql"
+
+
+def _install_statistics_triggers(target, connection, tables=(), **kw):
+    """
+    create_all(): add the statistics functions and triggers, and backfill, when stats_counter was just created.
+
+    Runs after the whole metadata (the triggers need the source tables), but only when this
+    create_all() created stats_counter: the backfill locks the source tables against writes,
+    so it must not run on every init_db().
+    """
+    if connection.dialect.name == 'postgresql' and StatsCounter.__table__ in tables:
+        # exec_driver_sql: the PL/pgSQL bodies must reach the driver without bind-parameter parsing
+        connection.exec_driver_sql(STATISTICS_MIGRATION_PATH.read_text())
+
+
+event.listen(Base.metadata, 'after_create', _install_statistics_triggers)
+
+
+LEAD_ASIN_MIGRATION_PATH = Path(__file__).resolve().parents[2] / "migrations" / "create_lead_asin_table.sql"
+
+
+def _backfill_lead_asin(target, connection, **kw):
+    """create_all(): fill a newly created lead_asin from the oa_sourcing asinN_id columns."""
+    if connection.dialect.name == 'postgresql':
+        connection.exec_driver_sql(LEAD_ASIN_MIGRATION_PATH.read_text())
+
+
+event.listen(LeadAsin.__table__, 'after_create', _backfill_lead_asin)
+
+
+FULFILLMENT_EVENT_MIGRATION_PATH = Path(__file__).resolve().parents[2] / "migrations" / "create_fulfillment_event_table.sql"
+
+
+def _seed_fulfillment_event(target, connection, **kw):
+    """create_all(): seed a newly created fulfillment_event with the current purchase quantities."""
+    if connection.dialect.name == 'postgresql':
+        connection.exec_driver_sql(FULFILLMENT_EVENT_MIGRATION_PATH.read_text())
+
+
+event.listen(FulfillmentEvent.__table__, 'after_create', _seed_fulfillment_event)
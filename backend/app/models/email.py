@@ -3,9 +3,13 @@ Email data models using Pydantic for validation and serialization.
 """
 
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from functools import cached_property
+from typing import Any, Dict, List, Optional, Tuple
 
-from pydantic import BaseModel, Field
+import lxml.html
+from bs4 import BeautifulSoup
+from bs4.element import PageElement
+from pydantic import BaseModel, Field, PrivateAttr
 
 
 class PubSubMessage(BaseModel):
@@ -24,6 +28,81 @@ class PubSubNotification(BaseModel):
     subscription: str
 
 
+class DocumentSoup(BeautifulSoup):
+    """
+    BeautifulSoup tree that memoizes whole-document get_text() / .text.
+    
+    Parsers call soup.get_text() on the full document many times per email
+    (up to 20 in hibbett_parser); the tree is treated as read-only, so the
+    text only has to be built once per (separator, strip) pair.
+    """
+    
+    def get_text(self, separator="", strip=False, types=PageElement.default):
+        if types is not PageElement.default:
+            return super().get_text(separator, strip, types)
+        cache = self.__dict__.setdefault("_text_cache", {})
+        key = (separator, strip)
+        if key not in cache:
+            cache[key] = super().get_text(separator, strip)
+        return cache[key]
+    
+    text = property(get_text)
+
+
+class EmailDocument:
+    """
+    Parse-once view of an email shared by the classifier and the retailer parsers.
+    
+    Every attribute is computed on first access and reused afterwards; parsers
+    must not modify `soup` (it is shared with every other reader of the email).
+    
+    Attributes:
+        soup: lxml-parsed HTML (DocumentSoup)
+        tree: Plain lxml.html tree of the HTML, for precompiled XPath extraction specs
+        text: Full text of the HTML document (soup.get_text())
+        html_lower / subject_lower / sender_lower: Lowercased HTML, subject and sender
+        image_srcs: src attribute of every <img> in document order
+        parse_results: Parser results computed ahead of time (e.g. by the parse
+            pool), keyed by (parser class name, method name)
+    """
+    
+    def __init__(self, email_data: "EmailData"):
+        self._email_data = email_data
+        self.parse_results: Dict[Tuple[str, str], Any] = {}
+    
+    @cached_property
+    def soup(self) -> DocumentSoup:
+        return DocumentSoup(self._email_data.html_content or "", 'lxml')
+    
+    @cached_property
+    def tree(self) -> lxml.html.HtmlElement:
+        html = self._email_data.html_content or ""
+        if not html.strip():
+            return lxml.html.Element("html")
+        # Parse UTF-8 bytes: str input is rejected when the HTML carries an XML encoding declaration
+        return lxml.html.document_fromstring(html.encode("utf-8"), parser=lxml.html.HTMLParser(encoding="utf-8"))
+    
+    @cached_property
+    def text(self) -> str:
+        return self.soup.get_text()
+    
+    @cached_property
+    def html_lower(self) -> str:
+        return (self._email_data.html_content or "").lower()
+    
+    @cached_property
+    def subject_lower(self) -> str:
+        return (self._email_data.subject or "").lower()
+    
+    @cached_property
+    def sender_lower(self) -> str:
+        return (self._email_data.sender or "").lower()
+    
+    @cached_property
+    def image_srcs(self) -> List[str]:
+        return [img['src'] for img in self.soup.find_all('img', src=True)]
+
+
 class EmailData(BaseModel):
     """Structured email data."""
     message_id: str
@@ -38,6 +117,22 @@ class EmailData(BaseModel):
     text_content: Optional[str] = None
     snippet: Optional[str] = None
     labels: List[str] = Field(default_factory=list)
+    
+    _document: Optional[EmailDocument] = PrivateAttr(default=None)
+    
+    @property
+    def document(self) -> EmailDocument:
+        """Lazily parsed view of this email (built on first access, then shared)."""
+        if self._document is None or self._document._email_data is not self:
+            # model_copy() shares private attributes; never reuse another instance's document
+            self._document = EmailDocument(self)
+        return self._document
+    
+    def __getstate__(self) -> Dict[Any, Any]:
+        # The parsed document is rebuilt on demand; never pickle lxml trees (parse pool workers)
+        state = super().__getstate__()
+        state['__pydantic_private__'] = {**(state.get('__pydantic_private__') or {}), '_document': None}
+        return state
 
 
 class ExtractedInfo(BaseModel):
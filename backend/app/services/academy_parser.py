@@ -174,12 +174,12 @@ class AcademyEmailParser:
 
     def is_academy_email(self, email_data: EmailData) -> bool:
         """Check if email is from Academy Sports."""
-        sender = (email_data.sender or "").lower()
+        sender = email_data.document.sender_lower
 
         if self.settings.is_development:
             if self.DEV_ACADEMY_FROM_EMAIL.lower() in sender:
-                html = email_data.html_content or ""
-                if "academy" in html.lower() or "e.academy.com" in html.lower():
+                html = email_data.document.html_lower
+                if "academy" in html or "e.academy.com" in html:
                     return True
             return False
 
@@ -264,7 +264,7 @@ class AcademyEmailParser:
                 logger.warning("Academy order confirmation email has empty body")
                 return None
 
-            soup = BeautifulSoup(body, 'lxml')
+            soup = email_data.document.soup
 
             order_number = self._extract_order_number(soup, body)
             if not order_number:
@@ -428,7 +428,7 @@ class AcademyEmailParser:
                 logger.warning("Academy shipping email has empty body")
                 return None
 
-            soup = BeautifulSoup(body, 'lxml')
+            soup = email_data.document.soup
 
             order_number = self._extract_order_number(soup, body)
             if not order_number:
@@ -106,8 +106,8 @@ class AdidasEmailParser:
         Returns:
             True if the email is from Adidas, False otherwise
         """
-        sender_lower = email_data.sender.lower()
-        subject = email_data.subject.lower() if email_data.subject else ""
+        sender_lower = email_data.document.sender_lower
+        subject = email_data.document.subject_lower if email_data.subject else ""
         
         # Check production email
         if self.ADIDAS_FROM_EMAIL.lower() in sender_lower:
@@ -133,7 +133,7 @@ class AdidasEmailParser:
         if not self.is_adidas_email(email_data):
             return False
         
-        subject = email_data.subject.lower() if email_data.subject else ""
+        subject = email_data.document.subject_lower if email_data.subject else ""
         
         # Check subject pattern
         if re.search(self.order_subject_pattern, subject, re.IGNORECASE):
@@ -141,7 +141,7 @@ class AdidasEmailParser:
         
         # Also check HTML content for order confirmation indicators
         if email_data.html_content:
-            html_lower = email_data.html_content.lower()
+            html_lower = email_data.document.html_lower
             if "order number" in html_lower or "thanks for your order" in html_lower:
                 return True
         
@@ -137,8 +137,8 @@ class ASOSEmailParser:
         For SHIPPING emails ("Your order's on its way!"): subject is ASOS-specific, so accept
         glenallagroupc without HTML check - prevents Carbon38/others from stealing via broad "order" match.
         """
-        sender_lower = email_data.sender.lower()
-        subject_lower = (email_data.subject or "").lower()
+        sender_lower = email_data.document.sender_lower
+        subject_lower = email_data.document.subject_lower
         
         # Shipping subject "Your order's on its way!" is unique to ASOS - accept without HTML check
         if re.search(r"your order'?s?\s+on its way", subject_lower):
@@ -150,7 +150,7 @@ class ASOSEmailParser:
         # In development, order confirmation: both ASOS and Nike use glenallagroupc - check HTML
         if self.settings.is_development:
             if self.DEV_ASOS_ORDER_FROM_EMAIL.lower() in sender_lower:
-                html = (email_data.html_content or "").lower()
+                html = email_data.document.html_lower
                 if "asos.com" in html or "images.asos-media.com" in html:
                     return True
                 return False
@@ -160,7 +160,7 @@ class ASOSEmailParser:
 
     def is_order_confirmation_email(self, email_data: EmailData) -> bool:
         """Check if email is an order confirmation"""
-        subject_lower = email_data.subject.lower()
+        subject_lower = email_data.document.subject_lower
         pattern = self.order_subject_pattern
         
         # Use regex matching for subject pattern
@@ -168,7 +168,7 @@ class ASOSEmailParser:
     
     def is_shipping_email(self, email_data: EmailData) -> bool:
         """Check if email is a shipping notification (Your order's on its way!)."""
-        subject_lower = email_data.subject.lower()
+        subject_lower = email_data.document.subject_lower
         pattern = self.DEV_SUBJECT_SHIPPING_PATTERN if self.settings.is_development else self.SUBJECT_SHIPPING_PATTERN
         return bool(re.search(pattern, subject_lower, re.IGNORECASE))
 
@@ -189,7 +189,7 @@ class ASOSEmailParser:
                 logger.error("No HTML content in ASOS email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Extract order number from email content
             order_number = self._extract_order_number(soup)
@@ -236,7 +236,7 @@ class ASOSEmailParser:
                 logger.error("No HTML content in ASOS shipping email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             order_number = self._extract_order_number(soup)
             if not order_number:
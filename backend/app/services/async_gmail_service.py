@@ -0,0 +1,370 @@
+"""
+Asynchronous Gmail client for code running on the event loop.
+
+GmailService wraps the blocking googleapiclient, so the webhook has to hop to
+a threadpool for every Gmail call. AsyncGmailService talks to the Gmail REST
+API directly over one shared httpx.AsyncClient (connection pooling, HTTP/2
+when the `h2` package is installed), so many calls can be awaited at once
+without holding a thread each.
+
+It reuses the OAuth token written by GmailService / authenticate.py and
+refreshes it when it expires; it never runs the interactive OAuth flow.
+"""
+
+import asyncio
+import importlib.util
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+
+from app.config import get_settings
+from app.services.gmail_service import (
+    GmailBatchResult,
+    GmailService,
+    _BATCH_MAX_RETRIES,
+    _BATCH_RETRY_BACKOFF_SECONDS,
+    _RETRYABLE_BATCH_STATUSES,
+    _is_missing_label_error,
+)
+
+logger = logging.getLogger(__name__)
+
+GMAIL_API_BASE_URL = "https://gmail.googleapis.com/gmail/v1/users/me"
+
+# HTTP/2 needs the optional `h2` package (httpx[http2]); fall back to HTTP/1.1 without it
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class AsyncGmailError(Exception):
+    """A Gmail API call failed; `status` is the HTTP status (None for transport errors)."""
+
+    def __init__(self, status: Optional[int], message: str):
+        super().__init__(f"Gmail API error {status}: {message}")
+        self.status = status
+
+
+class AsyncGmailService:
+    """
+    Async counterpart of GmailService for the calls made from the event loop.
+
+    Args:
+        client: Shared httpx.AsyncClient (one is created if omitted)
+        max_concurrency: Maximum number of Gmail requests in flight from this
+            instance (fan-out helpers such as get_messages() respect it)
+    """
+
+    # Same parser as the blocking client, so both paths produce identical EmailData
+    parse_message_to_email_data = staticmethod(GmailService.parse_message_to_email_data)
+
+    def __init__(self, client: Optional[httpx.AsyncClient] = None, max_concurrency: Optional[int] = None):
+        self.settings = get_settings()
+        max_concurrency = max_concurrency or self.settings.gmail_async_max_concurrency
+        self.client = client or httpx.AsyncClient(
+            http2=_HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(30.0, connect=10.0),
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+        )
+        self.creds = self._load_credentials()
+        self._refresh_lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    def _load_credentials(self) -> Credentials:
+        """Load the OAuth token saved by GmailService (run authenticate.py if it is missing)."""
+        token_path = self.settings.base_dir / self.settings.gmail_token_path
+        if not token_path.exists():
+            raise FileNotFoundError(
+                f"Gmail token file not found at {token_path}. Run: python authenticate.py"
+            )
+        return Credentials.from_authorized_user_file(str(token_path), self.settings.gmail_scopes_list)
+
+    async def _refresh_credentials(self, force: bool = False) -> None:
+        """Refresh the access token (once, even if several requests notice it expired)."""
+        async with self._refresh_lock:
+            if self.creds.valid and not force:
+                return
+            if not self.creds.refresh_token:
+                raise AsyncGmailError(401, "Gmail credentials expired and have no refresh token")
+            logger.debug("⟳ Refreshing Gmail credentials (async client)...")
+            # google-auth refresh is blocking; keep it off the event loop
+            await asyncio.to_thread(self.creds.refresh, Request())
+            token_path = self.settings.base_dir / self.settings.gmail_token_path
+            await asyncio.to_thread(token_path.write_text, self.creds.to_json())
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        json: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Send one Gmail API request and return the decoded JSON body.
+
+        Retries 429/5xx responses with the same backoff as GmailService batches and
+        refreshes the token once on a 401.
+
+        Raises:
+            AsyncGmailError: On any non-2xx response or transport failure
+        """
+        refreshed = False
+        attempt = 0
+        while True:
+            if not self.creds.valid:
+                await self._refresh_credentials()
+            headers = {"Authorization": f"Bearer {self.creds.token}"}
+            try:
+                async with self._semaphore:
+                    response = await self.client.request(
+                        method, f"{GMAIL_API_BASE_URL}/{path}", params=params, json=json, headers=headers
+                    )
+            except httpx.HTTPError as e:
+                raise AsyncGmailError(None, str(e)) from e
+
+            if response.status_code == 401 and not refreshed:
+                refreshed = True
+                await self._refresh_credentials(force=True)
+                continue
+            if response.status_code in _RETRYABLE_BATCH_STATUSES and attempt < _BATCH_MAX_RETRIES:
+                attempt += 1
+                await asyncio.sleep(_BATCH_RETRY_BACKOFF_SECONDS * attempt)
+                continue
+            if response.is_error:
+                raise AsyncGmailError(response.status_code, response.text[:500])
+            return response.json() if response.content else {}
+
+    async def get_message(self, message_id: str, format: str = 'full') -> Optional[Dict[str, Any]]:
+        """
+        Retrieve a specific email message.
+
+        Args:
+            message_id: The ID of the message to retrieve
+            format: The format of the message ('full', 'raw', 'metadata', 'minimal')
+
+        Returns:
+            Message data dictionary or None if failed
+        """
+        try:
+            return await self._request("GET", f"messages/{message_id}", params={"format": format})
+        except AsyncGmailError as error:
+            logger.error(f"Error fetching message {message_id}: {error}")
+            return None
+
+    async def get_messages(
+        self,
+        message_ids: List[str],
+        format: str = 'full',
+        metadata_headers: Optional[List[str]] = None
+    ) -> GmailBatchResult:
+        """
+        Retrieve many messages concurrently (at most max_concurrency in flight).
+
+        Args:
+            message_ids: IDs of the messages to retrieve (duplicates are ignored)
+            format: The format of the messages ('full', 'raw', 'metadata', 'minimal')
+            metadata_headers: Headers to include when format is 'metadata'
+
+        Returns:
+            GmailBatchResult with per-message responses and errors
+        """
+        params: Dict[str, Any] = {"format": format}
+        if metadata_headers:
+            params["metadataHeaders"] = list(metadata_headers)
+        unique_ids = list(dict.fromkeys(mid for mid in message_ids if mid))
+
+        responses = await asyncio.gather(
+            *(self._request("GET", f"messages/{message_id}", params=params) for message_id in unique_ids),
+            return_exceptions=True,
+        )
+        result = GmailBatchResult()
+        for message_id, response in zip(unique_ids, responses):
+            if isinstance(response, AsyncGmailError):
+                result.errors[message_id] = str(response)
+            elif isinstance(response, BaseException):
+                raise response
+            else:
+                result.responses[message_id] = response
+        if result.errors:
+            logger.warning(f"Gmail fetch: {len(result.responses)} succeeded, {len(result.errors)} failed")
+        return result
+
+    async def get_message_senders(self, message_ids: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Fetch only the From header of many messages concurrently.
+
+        Returns:
+            Dictionary mapping message ID to its From header (None if the fetch failed)
+        """
+        result = await self.get_messages(message_ids, format='metadata', metadata_headers=['From'])
+        senders: Dict[str, Optional[str]] = {message_id: None for message_id in message_ids}
+        for message_id, message in result.responses.items():
+            for header in message.get('payload', {}).get('headers', []):
+                if header.get('name', '').lower() == 'from':
+                    senders[message_id] = header.get('value', '')
+                    break
+        for message_id, error in result.errors.items():
+            logger.error(f"Error fetching sender for message {message_id}: {error}")
+        return senders
+
+    async def list_messages_with_query(
+        self,
+        query: str,
+        max_results: int = 10,
+        exclude_label: Optional[str] = None
+    ) -> List[str]:
+        """
+        Search for messages using a Gmail query.
+
+        Args:
+            query: Gmail search query
+            max_results: Maximum number of results
+            exclude_label: Optional label name to exclude (e.g., "PrepWorx/Processed")
+
+        Returns:
+            List of message IDs
+        """
+        if exclude_label:
+            query = f"{query} -label:{exclude_label}"
+        try:
+            results = await self._request("GET", "messages", params={"q": query, "maxResults": max_results})
+        except AsyncGmailError as error:
+            logger.error(f"Error searching messages: {error}")
+            return []
+        return [msg['id'] for msg in results.get('messages', [])]
+
+    async def get_new_message_ids_from_history(
+        self,
+        start_history_id: str,
+        label_id: Optional[str] = None,
+    ) -> Tuple[List[str], str]:
+        """
+        Fetch history and return message IDs from messagesAdded events only.
+
+        Args:
+            start_history_id: History ID to start from (from previous notification)
+            label_id: Optional label filter (default: INBOX to match watch scope)
+
+        Returns:
+            Tuple of (list of new message IDs, new history ID to store)
+
+        Raises:
+            AsyncGmailError: On API errors (status 404 when history expired)
+        """
+        all_message_ids: List[str] = []
+        latest_history_id = start_history_id
+        params: Dict[str, Any] = {
+            'startHistoryId': start_history_id,
+            'historyTypes': 'messageAdded',
+            'labelId': label_id or 'INBOX',
+        }
+
+        while True:
+            response = await self._request("GET", "history", params=params)
+            for record in response.get('history', []):
+                for msg_added in record.get('messagesAdded', []):
+                    msg = msg_added.get('message', {})
+                    if msg.get('id'):
+                        all_message_ids.append(msg['id'])
+
+            latest_history_id = response.get('historyId', latest_history_id)
+            if not response.get('nextPageToken'):
+                break
+            params['pageToken'] = response['nextPageToken']
+
+        return all_message_ids, latest_history_id
+
+    async def get_profile_history_id(self) -> Optional[str]:
+        """Get current history ID from user profile (for resync after expiration)."""
+        try:
+            profile = await self._request("GET", "profile")
+            return profile.get('historyId')
+        except AsyncGmailError as error:
+            logger.error(f"Error getting profile historyId: {error}")
+            return None
+
+    async def modify_labels(
+        self,
+        message_id: str,
+        add_label_ids: Optional[List[str]] = None,
+        remove_label_ids: Optional[List[str]] = None
+    ) -> bool:
+        """
+        Add and/or remove labels on one message.
+
+        A missing-label error invalidates the shared GmailService label cache.
+
+        Returns:
+            True if successful, False otherwise
+        """
+        body: Dict[str, List[str]] = {}
+        if add_label_ids:
+            body['addLabelIds'] = list(add_label_ids)
+        if remove_label_ids:
+            body['removeLabelIds'] = list(remove_label_ids)
+        if not body:
+            return True
+        try:
+            await self._request("POST", f"messages/{message_id}/modify", json=body)
+            return True
+        except AsyncGmailError as error:
+            logger.error(f"Error modifying labels on message {message_id}: {error}")
+            if error.status == 404 or _is_missing_label_error(error):
+                GmailService._label_cache.invalidate()
+            return False
+
+    async def add_label_to_message(self, message_id: str, label_id: str) -> bool:
+        """Add a label to a Gmail message."""
+        return await self.modify_labels(message_id, add_label_ids=[label_id])
+
+    async def remove_label_from_message(self, message_id: str, label_id: str) -> bool:
+        """Remove a label from a Gmail message."""
+        return await self.modify_labels(message_id, remove_label_ids=[label_id])
+
+    async def modify_labels_batch(
+        self,
+        message_ids: List[str],
+        add_label_ids: Optional[List[str]] = None,
+        remove_label_ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """
+        Modify labels on many messages concurrently.
+
+        Returns:
+            Message IDs whose labels could not be modified
+        """
+        unique_ids = list(dict.fromkeys(mid for mid in message_ids if mid))
+        results = await asyncio.gather(
+            *(self.modify_labels(message_id, add_label_ids, remove_label_ids) for message_id in unique_ids)
+        )
+        return [message_id for message_id, ok in zip(unique_ids, results) if not ok]
+
+    async def aclose(self) -> None:
+        """Close the underlying HTTP client."""
+        await self.client.aclose()
+
+
+# Shared async client for the event loop (created on first use)
+_async_gmail_service: Optional[AsyncGmailService] = None
+_async_gmail_service_lock = threading.Lock()
+
+
+def get_async_gmail_service() -> AsyncGmailService:
+    """Return the process-wide AsyncGmailService, creating it on first use."""
+    global _async_gmail_service
+    with _async_gmail_service_lock:
+        if _async_gmail_service is None:
+            _async_gmail_service = AsyncGmailService()
+            logger.info(f"Async Gmail client started (HTTP/2: {_HTTP2_AVAILABLE})")
+        return _async_gmail_service
+
+
+async def shutdown_async_gmail_service() -> None:
+    """Close the shared AsyncGmailService (if started)."""
+    global _async_gmail_service
+    with _async_gmail_service_lock:
+        service, _async_gmail_service = _async_gmail_service, None
+    if service is not None:
+        await service.aclose()
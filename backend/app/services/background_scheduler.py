@@ -3,24 +3,91 @@ Background scheduler service for periodic tasks.
 """
 
 import logging
-from typing import Optional
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+from apscheduler.events import (
+    EVENT_JOB_ERROR,
+    EVENT_JOB_EXECUTED,
+    EVENT_JOB_MAX_INSTANCES,
+    EVENT_JOB_MISSED,
+    JobEvent,
+)
+from apscheduler.executors.asyncio import AsyncIOExecutor
+from apscheduler.executors.pool import ProcessPoolExecutor, ThreadPoolExecutor
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 
 from app.config import get_settings
-from app.config.database import SessionLocal
 
 logger = logging.getLogger(__name__)
 
+# Executor for jobs doing blocking Gmail / DB work. Those jobs must never run on
+# the event loop (AsyncIOExecutor), or every API request stalls while they run.
+BACKGROUND_EXECUTOR = "background"
+
 # Global scheduler instance
 _scheduler: Optional[AsyncIOScheduler] = None
 
+# Last-run metrics per job ID (recorded from scheduler events in this process)
+_job_metrics: Dict[str, Dict[str, Any]] = {}
+_job_metrics_lock = threading.Lock()
+
 
 def get_scheduler() -> Optional[AsyncIOScheduler]:
     """Get the global scheduler instance."""
     return _scheduler
 
 
+def get_job_metrics() -> Dict[str, Dict[str, Any]]:
+    """Return a copy of the per-job run metrics (duration, emails handled, failures)."""
+    with _job_metrics_lock:
+        return {job_id: dict(metrics) for job_id, metrics in _job_metrics.items()}
+
+
+def _on_job_event(event: JobEvent) -> None:
+    """
+    Record the outcome of a job run.
+
+    Jobs return a summary dict (see process_retailer_emails_periodic); it is
+    read from the event so metrics work for thread and process executors alike.
+    """
+    with _job_metrics_lock:
+        metrics = _job_metrics.setdefault(
+            event.job_id,
+            {'runs': 0, 'failures': 0, 'skipped': 0, 'total_duration_seconds': 0.0, 'total_emails_handled': 0},
+        )
+        if event.code == EVENT_JOB_EXECUTED:
+            summary = event.retval if isinstance(event.retval, dict) else {}
+            duration = summary.get('duration_seconds', 0.0)
+            emails_handled = summary.get('emails_handled', 0)
+            metrics['runs'] += 1
+            metrics['total_duration_seconds'] += duration
+            metrics['total_emails_handled'] += emails_handled
+            metrics['last_run_at'] = datetime.now().isoformat()
+            metrics['last_duration_seconds'] = duration
+            metrics['last_emails_handled'] = emails_handled
+            metrics['last_summary'] = summary
+            if summary.get('error'):
+                metrics['failures'] += 1
+        elif event.code == EVENT_JOB_ERROR:
+            metrics['runs'] += 1
+            metrics['failures'] += 1
+            metrics['last_run_at'] = datetime.now().isoformat()
+            metrics['last_error'] = str(getattr(event, 'exception', ''))
+        else:
+            # Missed or skipped because the previous run was still going
+            metrics['skipped'] += 1
+
+
+def _create_background_executor(settings):
+    """Dedicated executor for blocking jobs: a thread pool, or worker processes if configured."""
+    if settings.scheduler_job_executor == "process":
+        return ProcessPoolExecutor(max_workers=settings.scheduler_max_workers)
+    return ThreadPoolExecutor(max_workers=settings.scheduler_max_workers)
+
+
 def start_scheduler():
     """Start the background scheduler."""
     global _scheduler
@@ -36,7 +103,14 @@ def start_scheduler():
         logger.info("Retailer Orders API is disabled - skipping scheduler startup")
         return
     
-    _scheduler = AsyncIOScheduler()
+    _scheduler = AsyncIOScheduler(executors={
+        'default': AsyncIOExecutor(),
+        BACKGROUND_EXECUTOR: _create_background_executor(settings),
+    })
+    _scheduler.add_listener(
+        _on_job_event,
+        EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES,
+    )
     
     # Schedule periodic email processing job
     # Run every hour at minute 0 (e.g., 1:00, 2:00, 3:00, etc.)
@@ -46,14 +120,32 @@ def start_scheduler():
         id='process_retailer_emails',
         name='Process Retailer Order Emails',
         replace_existing=True,
+        executor=BACKGROUND_EXECUTOR,  # Blocking Gmail/DB work - keep it off the event loop
         max_instances=1,  # Only one instance can run at a time
         misfire_grace_time=300  # 5 minutes grace time if job is delayed
     )
     
+    # Nightly check that the incrementally maintained Retailer counters match purchase_tracker
+    _scheduler.add_job(
+        reconcile_retailer_counters_periodic,
+        trigger=CronTrigger(hour=3, minute=30),
+        id='reconcile_retailer_counters',
+        name='Reconcile Retailer Counters',
+        replace_existing=True,
+        executor=BACKGROUND_EXECUTOR,
+        max_instances=1,
+        misfire_grace_time=3600
+    )
+    
     _scheduler.start()
     logger.info("✅ Background scheduler started")
     logger.info("   - Retailer email processing: Every hour (at :00 minutes)")
     logger.info("   - Processing 20 emails per run")
+    logger.info("   - Retailer counter reconciliation: Daily at 03:30")
+    logger.info(
+        f"   - Executor: {settings.scheduler_job_executor} "
+        f"({settings.scheduler_max_workers} worker(s), DB pool {settings.scheduler_db_pool_size})"
+    )
 
 
 def stop_scheduler():
@@ -68,21 +160,61 @@ def stop_scheduler():
     logger.info("Background scheduler stopped")
 
 
-def process_retailer_emails_periodic():
+def reconcile_retailer_counters_periodic() -> Dict[str, Any]:
+    """
+    Nightly job: recompute Retailer.total_spend / total_qty_of_items_ordered /
+    percent_of_cancelled_qty from purchase_tracker and correct any drift.
+    
+    Returns:
+        Run summary (duration_seconds, retailers_checked, drifted, error if the run failed)
+    """
+    started = time.monotonic()
+    summary: Dict[str, Any] = {'retailers_checked': 0, 'drifted': 0}
+    try:
+        from app.config.database import BackgroundSessionLocal
+        from app.services.retailer_counters import reconcile_retailer_counters
+        
+        db = BackgroundSessionLocal()
+        try:
+            result = reconcile_retailer_counters(db, apply=True)
+            summary['retailers_checked'] = result['retailers_checked']
+            summary['drifted'] = result['drifted']
+        finally:
+            db.close()
+    except Exception as e:
+        logger.error(f"❌ [PERIODIC JOB] Retailer counter reconciliation failed: {e}", exc_info=True)
+        summary['error'] = str(e)
+    summary['duration_seconds'] = round(time.monotonic() - started, 3)
+    return summary
+
+
+def process_retailer_emails_periodic() -> Dict[str, Any]:
     """
     Periodic background job to process retailer order confirmation emails.
     Runs every hour and processes up to 20 unprocessed emails.
+    
+    Runs on the scheduler's background executor with its own DB pool
+    (BackgroundSessionLocal).
+    
+    Returns:
+        Run summary (duration_seconds, emails_found, emails_handled, processed,
+        duplicates, errors and error if the run failed)
     """
+    started = time.monotonic()
+    summary: Dict[str, Any] = {
+        'emails_found': 0, 'emails_handled': 0, 'processed': 0, 'duplicates': 0, 'errors': 0,
+    }
     try:
         logger.info("=" * 70)
         logger.info("🔄 [PERIODIC JOB] Starting retailer email processing...")
         logger.info("=" * 70)
         
-        # Get database session using context manager pattern
-        from app.config.database import SessionLocal
-        db = SessionLocal()
+        # Background jobs use their own connection pool, not the API's
+        from app.config.database import BackgroundSessionLocal
+        db = BackgroundSessionLocal()
         
         try:
+            from app.services.parse_pool import preparse_many
             from app.services.retailer_order_processor import RetailerOrderProcessor
             
             processor = RetailerOrderProcessor(db)
@@ -124,116 +256,116 @@ def process_retailer_emails_periodic():
                     if retailer_name == "footlocker":
                         from_email = parser.order_from_email
                         subject_query = parser.order_subject_query
-                        query = f'from:{from_email} subject:"{subject_query}" -label:{processor.PROCESSED_LABEL}'
+                        query = f'from:{from_email} subject:"{subject_query}"'
                     elif retailer_name == "champs":
                         # Use environment-aware email address and subject pattern
                         from_email = processor.champs_parser.order_from_email
                         subject_query = processor.champs_parser.order_subject_query
-                        query = f'from:{from_email} subject:"{subject_query}" -label:{processor.PROCESSED_LABEL}'
+                        query = f'from:{from_email} subject:"{subject_query}"'
                     elif retailer_name == "dicks":
                         # Use environment-aware email address and subject pattern
                         from_email = processor.dicks_parser.order_from_email
                         subject_query = processor.dicks_parser.order_subject_query
-                        query = f'from:{from_email} subject:"{subject_query}" -label:{processor.PROCESSED_LABEL}'
+                        query = f'from:{from_email} subject:"{subject_query}"'
                     elif retailer_name == "hibbett":
                         # Use environment-aware email address and subject pattern
                         from_email = processor.hibbett_parser.order_from_email
                         subject_query = processor.hibbett_parser.order_subject_query
-                        query = f'from:{from_email} subject:"{subject_query}" -label:{processor.PROCESSED_LABEL}'
+                        query = f'from:{from_email} subject:"{subject_query}"'
                     elif retailer_name == "shoepalace":
                         # Use environment-aware email address and subject pattern
                         # Add "shopifyemail" to distinguish from other retailers using "confirmed"
                         from_email = processor.shoepalace_parser.order_from_email
                         subject_query = processor.shoepalace_parser.order_subject_query
-                        query = f'from:{from_email} subject:"{subject_query}" shopifyemail -label:{processor.PROCESSED_LABEL}'
+                        query = f'from:{from_email} subject:"{subject_query}" shopifyemail'
                     elif retailer_name == "snipes":
                         # Use environment-aware email address and subject pattern
                         from_email = processor.snipes_parser.order_from_email
                         subject_query = processor.snipes_parser.order_subject_query
-                        query = f'from:{from_email} subject:"{subject_query}" -label:{processor.PROCESSED_LABEL}'
+                        query = f'from:{from_email} subject:"{subject_query}"'
                     elif retailer_name == "finishline":
                         # Use environment-aware email address and subject pattern
                         from_email = processor.finishline_parser.order_from_email
                         subject_query = processor.finishline_parser.order_subject_query
-                        query = f'from:{from_email} subject:"{subject_query}" -label:{processor.PROCESSED_LABEL}'
+                        query = f'from:{from_email} subject:"{subject_query}"'
                     elif retailer_name == "shopsimon":
                         from app.services.shopsimon_parser import ShopSimonEmailParser
-                        query = f'from:{ShopSimonEmailParser.SHOPSIMON_FROM_EMAIL} subject:"{ShopSimonEmailParser.SUBJECT_ORDER_PATTERN}" -label:{processor.PROCESSED_LABEL}'
+                        query = f'from:{ShopSimonEmailParser.SHOPSIMON_FROM_EMAIL} subject:"{ShopSimonEmailParser.SUBJECT_ORDER_PATTERN}"'
                     elif retailer_name == "jdsports":
                         # Use environment-aware email address and subject pattern
                         from_email = processor.jdsports_parser.order_from_email
                         subject_query = processor.jdsports_parser.order_subject_query
-                        query = f'from:{from_email} subject:"{subject_query}" -label:{processor.PROCESSED_LABEL}'
+                        query = f'from:{from_email} subject:"{subject_query}"'
                     elif retailer_name == "revolve":
                         # Use environment-aware email address and subject pattern
                         from_email = processor.revolve_parser.order_from_email
                         subject_query = processor.revolve_parser.order_subject_query
-                        query = f'from:{from_email} subject:"{subject_query}" -label:{processor.PROCESSED_LABEL}'
+                        query = f'from:{from_email} subject:"{subject_query}"'
                     elif retailer_name == "asos":
                         # Use environment-aware email address and subject pattern
                         from_email = processor.asos_parser.order_from_email
                         subject_query = processor.asos_parser.order_subject_query
-                        query = f'from:{from_email} subject:"{subject_query}" -label:{processor.PROCESSED_LABEL}'
+                        query = f'from:{from_email} subject:"{subject_query}"'
                     elif retailer_name == "dtlr":
                         # Use environment-aware email address and subject pattern
                         from_email = processor.dtlr_parser.order_from_email
                         subject_query = processor.dtlr_parser.order_subject_query
-                        query = f'from:{from_email} subject:"{subject_query}" -label:{processor.PROCESSED_LABEL}'
+                        query = f'from:{from_email} subject:"{subject_query}"'
                     elif retailer_name == "endclothing":
                         # Use environment-aware email address and subject pattern
                         from_email = processor.endclothing_parser.order_from_email
                         subject_query = processor.endclothing_parser.order_subject_query
-                        query = f'from:{from_email} subject:"{subject_query}" -label:{processor.PROCESSED_LABEL}'
+                        query = f'from:{from_email} subject:"{subject_query}"'
                     elif retailer_name == "shopwss":
                         # Use environment-aware email address and subject pattern
                         from_email = processor.shopwss_parser.order_from_email
                         subject_query = processor.shopwss_parser.order_subject_query
-                        query = f'from:{from_email} subject:"{subject_query}" -label:{processor.PROCESSED_LABEL}'
+                        query = f'from:{from_email} subject:"{subject_query}"'
                     elif retailer_name == "on":
                         # Use environment-aware email address and subject pattern
                         from_email = processor.on_parser.order_from_email
                         subject_query = processor.on_parser.order_subject_query
-                        query = f'from:{from_email} subject:"{subject_query}" -label:{processor.PROCESSED_LABEL}'
+                        query = f'from:{from_email} subject:"{subject_query}"'
                     elif retailer_name == "urban":
                         # Use environment-aware email address and subject pattern
                         from_email = processor.urban_parser.order_from_email
                         subject_query = processor.urban_parser.order_subject_query
-                        query = f'from:{from_email} subject:"{subject_query}" -label:{processor.PROCESSED_LABEL}'
+                        query = f'from:{from_email} subject:"{subject_query}"'
                     elif retailer_name == "bloomingdales":
                         # Use environment-aware email address and subject pattern
                         from_email = processor.bloomingdales_parser.order_from_email
                         subject_query = processor.bloomingdales_parser.order_subject_query
                         # For development, use a more flexible pattern without quotes
                         if processor.bloomingdales_parser.settings.is_development:
-                            query = f'from:{from_email} subject:order -label:{processor.PROCESSED_LABEL}'
+                            query = f'from:{from_email} subject:order'
                         else:
-                            query = f'from:{from_email} subject:"{subject_query}" -label:{processor.PROCESSED_LABEL}'
+                            query = f'from:{from_email} subject:"{subject_query}"'
                     elif retailer_name == "carbon38":
                         # Use environment-aware email address and subject pattern
                         from_email = processor.carbon38_parser.order_from_email
                         subject_query = processor.carbon38_parser.order_subject_query
-                        query = f'from:{from_email} subject:"{subject_query}" -label:{processor.PROCESSED_LABEL}'
+                        query = f'from:{from_email} subject:"{subject_query}"'
                     elif retailer_name == "gazelle":
                         # Use environment-aware email address and subject pattern
                         from_email = processor.gazelle_parser.order_from_email
                         subject_query = processor.gazelle_parser.order_subject_query
-                        query = f'from:{from_email} subject:"{subject_query}" -label:{processor.PROCESSED_LABEL}'
+                        query = f'from:{from_email} subject:"{subject_query}"'
                     elif retailer_name == "netaporter":
                         # Use environment-aware email address and subject pattern
                         from_email = processor.netaporter_parser.order_from_email
                         subject_query = processor.netaporter_parser.order_subject_query
-                        query = f'from:{from_email} subject:"{subject_query}" -label:{processor.PROCESSED_LABEL}'
+                        query = f'from:{from_email} subject:"{subject_query}"'
                     elif retailer_name == "fit2run":
                         # Use environment-aware email address and subject pattern
                         from_email = processor.fit2run_parser.order_from_email
                         subject_query = processor.fit2run_parser.order_subject_query
-                        query = f'from:{from_email} subject:"{subject_query}" -label:{processor.PROCESSED_LABEL}'
+                        query = f'from:{from_email} subject:"{subject_query}"'
                     else:
                         continue
                     
                     # Get unprocessed emails from this retailer (get 50 to have a good pool)
-                    message_ids = gmail_service.list_messages_with_query(
-                        query=query,
+                    message_ids = processor.list_unprocessed_message_ids(
+                        query,
                         max_results=50  # Get more to have a good pool for sorting
                     )
                     
@@ -251,21 +383,25 @@ def process_retailer_emails_periodic():
                     logger.error(f"Error collecting {retailer_name} emails: {e}", exc_info=True)
                     continue
             
+            summary['emails_found'] = len(all_message_ids_with_retailer)
             if not all_message_ids_with_retailer:
                 logger.info("No unprocessed emails found from any retailer")
-                return
+                return summary
             
-            # Get message metadata to sort by date
+            # Get message metadata to sort by date (batched, lightweight - just headers)
+            metadata = gmail_service.get_messages_batch(
+                [msg_id for msg_id, _ in all_message_ids_with_retailer],
+                format='metadata',
+                metadata_headers=['Date']
+            )
             messages_with_date = []
             for msg_id, retailer_name in all_message_ids_with_retailer:
-                try:
-                    # Get message with metadata format (lightweight, just headers)
-                    message = gmail_service.get_message(msg_id, format='metadata')
-                    if message:
-                        internal_date = int(message.get('internalDate', 0))
-                        messages_with_date.append((msg_id, retailer_name, internal_date))
-                except Exception as e:
-                    logger.warning(f"Error getting metadata for message {msg_id}: {e}")
+                message = metadata.responses.get(msg_id)
+                if message:
+                    internal_date = int(message.get('internalDate', 0))
+                    messages_with_date.append((msg_id, retailer_name, internal_date))
+                else:
+                    logger.warning(f"Error getting metadata for message {msg_id}: {metadata.errors.get(msg_id)}")
                     # If we can't get date, use 0 (will be sorted last)
                     messages_with_date.append((msg_id, retailer_name, 0))
             
@@ -284,23 +420,38 @@ def process_retailer_emails_periodic():
             error_count = 0
             retailer_stats = {}  # Track stats per retailer
             
+            # Fetch all full messages in batched round-trips
+            full_messages = gmail_service.get_messages_batch([msg_id for msg_id, _, _ in messages_to_process])
+            
+            # Parse every email up front, in parallel when the parse pool is enabled
+            email_datas = {}
+            for msg_id, retailer_name, _ in messages_to_process:
+                message = full_messages.responses.get(msg_id)
+                if message:
+                    try:
+                        email_datas[msg_id] = gmail_service.parse_message_to_email_data(message)
+                    except Exception as e:
+                        logger.error(f"Error reading {retailer_name} email {msg_id}: {e}", exc_info=True)
+            preparse_many(
+                (email_datas[msg_id], retailer_name, 'confirmation')
+                for msg_id, retailer_name, _ in messages_to_process
+                if msg_id in email_datas
+            )
+            
             for msg_id, retailer_name, _ in messages_to_process:
                 try:
                     # Initialize retailer stats if not exists
                     if retailer_name not in retailer_stats:
                         retailer_stats[retailer_name] = {'processed': 0, 'duplicates': 0, 'errors': 0}
                     
-                    # Get full message
-                    message = gmail_service.get_message(msg_id)
-                    if not message:
+                    # Get parsed message
+                    email_data = email_datas.get(msg_id)
+                    if not email_data:
                         logger.warning(f"Could not retrieve message {msg_id}")
                         error_count += 1
                         retailer_stats[retailer_name]['errors'] += 1
                         continue
                     
-                    # Parse to EmailData
-                    email_data = gmail_service.parse_message_to_email_data(message)
-                    
                     # Process the email using the single email processor
                     result = processor.process_single_email(email_data, msg_id, retailer_name)
                     
@@ -324,6 +475,13 @@ def process_retailer_emails_periodic():
                     if retailer_name in retailer_stats:
                         retailer_stats[retailer_name]['errors'] += 1
             
+            summary.update(
+                emails_handled=len(messages_to_process),
+                processed=processed_count,
+                duplicates=skipped_duplicate_count,
+                errors=error_count,
+            )
+            
             logger.info("=" * 70)
             logger.info(f"✅ [PERIODIC JOB] Completed retailer email processing")
             logger.info(f"   Total Processed: {processed_count}")
@@ -348,4 +506,13 @@ def process_retailer_emails_periodic():
             
     except Exception as e:
         logger.error(f"Error in periodic retailer email processing job: {e}", exc_info=True)
+        summary['error'] = str(e)
+    finally:
+        summary['duration_seconds'] = round(time.monotonic() - started, 3)
+        logger.info(
+            f"[PERIODIC JOB] process_retailer_emails: {summary['emails_handled']} email(s) handled "
+            f"in {summary['duration_seconds']:.1f}s"
+        )
+    
+    return summary
 
@@ -104,14 +104,14 @@ class BloomingdalesEmailParser:
 
     def is_bloomingdales_email(self, email_data: EmailData) -> bool:
         """Check if email is from Bloomingdale's"""
-        sender_lower = email_data.sender.lower()
+        sender_lower = email_data.document.sender_lower
         
         # In development, check for forwarded emails from dev email address
         if self.settings.is_development:
             if self.DEV_BLOOMINGDALES_ORDER_FROM_EMAIL.lower() in sender_lower:
                 # Also check HTML content for Bloomingdale's indicators
                 if email_data.html_content:
-                    html_lower = email_data.html_content.lower()
+                    html_lower = email_data.document.html_lower
                     # Check for Bloomingdale's-specific content
                     if ('bloomingdale' in html_lower or 
                         'emails.bloomingdales.com' in html_lower or
@@ -125,7 +125,7 @@ class BloomingdalesEmailParser:
         
         # Fallback: check HTML content for Bloomingdale's indicators
         if email_data.html_content:
-            html_lower = email_data.html_content.lower()
+            html_lower = email_data.document.html_lower
             if ('bloomingdale' in html_lower and 
                 'emails.bloomingdales.com' in html_lower):
                 return True
@@ -134,7 +134,7 @@ class BloomingdalesEmailParser:
 
     def is_order_confirmation_email(self, email_data: EmailData) -> bool:
         """Check if email is an order confirmation"""
-        subject_lower = email_data.subject.lower()
+        subject_lower = email_data.document.subject_lower
         pattern = self.order_subject_pattern
         
         # Check subject pattern
@@ -143,7 +143,7 @@ class BloomingdalesEmailParser:
         
         # Also check HTML content for order confirmation indicators
         if email_data.html_content:
-            html_lower = email_data.html_content.lower()
+            html_lower = email_data.document.html_lower
             # Check for "We received your order" text in HTML
             if re.search(r'we\s+received\s+your\s+order', html_lower, re.IGNORECASE):
                 # Also check for order number pattern (Order #: followed by digits)
@@ -169,7 +169,7 @@ class BloomingdalesEmailParser:
                 logger.error("No HTML content in Bloomingdale's email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Extract order number from HTML
             order_number = self._extract_order_number(soup)
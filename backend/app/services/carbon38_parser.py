@@ -105,17 +105,17 @@ class Carbon38EmailParser:
         Differentiate: Carbon38 has "carbon38" or "looking good" in subject/HTML.
         If subject is "Your order's on its way!" -> ASOS shipping, not Carbon38.
         """
-        sender_lower = email_data.sender.lower()
+        sender_lower = email_data.document.sender_lower
         
         # ASOS shipping subject is unique - don't claim it's Carbon38
-        subject_lower = (email_data.subject or "").lower()
+        subject_lower = email_data.document.subject_lower
         if re.search(r"your order'?s?\s+on its way", subject_lower):
             return False
         
         # In development, check for forwarded emails from dev email address
         if self.settings.is_development:
             if self.DEV_CARBON38_ORDER_FROM_EMAIL.lower() in sender_lower:
-                html = (email_data.html_content or "").lower()
+                html = email_data.document.html_lower
                 # Require carbon38 or "looking good" in content - avoid claiming ASOS/Nike forwards
                 if "carbon38" in html or "looking good" in html or "c38-" in html:
                     return True
@@ -126,7 +126,7 @@ class Carbon38EmailParser:
 
     def is_order_confirmation_email(self, email_data: EmailData) -> bool:
         """Check if email is an order confirmation"""
-        subject_lower = email_data.subject.lower()
+        subject_lower = email_data.document.subject_lower
         pattern = self.order_subject_pattern
         
         # Use regex matching for subject pattern
@@ -135,7 +135,7 @@ class Carbon38EmailParser:
         
         # For forwarded emails in dev mode, also check HTML content for Carbon38 confirmation indicators
         if self.settings.is_development and email_data.html_content:
-            html_lower = email_data.html_content.lower()
+            html_lower = email_data.document.html_lower
             # Check for "Thanks for your order" or order confirmation indicators
             has_confirmation_text = (
                 'thanks for your order' in html_lower or
@@ -165,7 +165,7 @@ class Carbon38EmailParser:
                 logger.error("No HTML content in Carbon38 email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Extract order number from HTML
             order_number = self._extract_order_number(soup)
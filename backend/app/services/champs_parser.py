@@ -148,12 +148,12 @@ class ChampsEmailParser:
         In dev mode, Champs and Footlocker both forward from glenallagroupc with same subjects.
         Differentiate via HTML content (champssports vs footlocker).
         """
-        sender_lower = email_data.sender.lower()
+        sender_lower = email_data.document.sender_lower
         
         # In development, both use same dev email - require champssports in HTML
         if self.settings.is_development:
             if self.DEV_CHAMPS_ORDER_FROM_EMAIL.lower() in sender_lower:
-                html = (email_data.html_content or "").lower()
+                html = email_data.document.html_lower
                 if "champssports" in html:
                     return True
                 return False
@@ -169,7 +169,7 @@ class ChampsEmailParser:
     
     def is_order_confirmation_email(self, email_data: EmailData) -> bool:
         """Check if email is an order confirmation"""
-        subject_lower = email_data.subject.lower()
+        subject_lower = email_data.document.subject_lower
         
         # Use environment-aware subject pattern
         if re.search(self.order_subject_pattern, subject_lower, re.IGNORECASE):
@@ -183,7 +183,7 @@ class ChampsEmailParser:
     
     def is_shipping_email(self, email_data: EmailData) -> bool:
         """Check if email is a shipping notification"""
-        subject_lower = email_data.subject.lower()
+        subject_lower = email_data.document.subject_lower
         
         if re.search(self.SUBJECT_SHIPPING_PATTERN, subject_lower, re.IGNORECASE):
             return True
@@ -193,7 +193,7 @@ class ChampsEmailParser:
     
     def is_cancellation_email(self, email_data: EmailData) -> bool:
         """Check if email is a cancellation notification"""
-        subject_lower = email_data.subject.lower()
+        subject_lower = email_data.document.subject_lower
         
         if re.search(self.SUBJECT_CANCELLATION_PATTERN, subject_lower, re.IGNORECASE):
             return True
@@ -218,7 +218,7 @@ class ChampsEmailParser:
                 logger.error("No HTML content in Champs email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Extract order number
             order_number = self._extract_order_number(soup)
@@ -834,7 +834,7 @@ class ChampsEmailParser:
                 logger.error("No HTML content in Champs shipping email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Extract order number
             order_number = self._extract_order_number(soup)
@@ -888,7 +888,7 @@ class ChampsEmailParser:
                 logger.error("No HTML content in Champs cancellation email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Extract order number
             order_number = self._extract_order_number(soup)
@@ -107,8 +107,8 @@ class ConceptsEmailParser:
         Returns:
             True if the email is from CNCPTS, False otherwise
         """
-        sender_lower = email_data.sender.lower()
-        subject = email_data.subject.lower() if email_data.subject else ""
+        sender_lower = email_data.document.sender_lower
+        subject = email_data.document.subject_lower if email_data.subject else ""
         
         # Check production email
         if self.CONCEPTS_FROM_EMAIL.lower() in sender_lower:
@@ -134,7 +134,7 @@ class ConceptsEmailParser:
         if not self.is_concepts_email(email_data):
             return False
         
-        subject = email_data.subject.lower() if email_data.subject else ""
+        subject = email_data.document.subject_lower if email_data.subject else ""
         
         # Check subject pattern
         if re.search(self.order_subject_pattern, subject, re.IGNORECASE):
@@ -142,7 +142,7 @@ class ConceptsEmailParser:
         
         # Also check HTML content for order confirmation indicators
         if email_data.html_content:
-            html_lower = email_data.html_content.lower()
+            html_lower = email_data.document.html_lower
             if "order confirmation" in html_lower or "order no" in html_lower:
                 return True
         
@@ -174,13 +174,13 @@ class DicksEmailParser:
     
     def is_dicks_email(self, email_data: EmailData) -> bool:
         """Check if email is from Dick's Sporting Goods"""
-        sender_lower = email_data.sender.lower()
+        sender_lower = email_data.document.sender_lower
         
         # In development, check for forwarded emails from dev email address
         # Must also verify content to avoid misclassifying other retailers' forwarded emails
         if self.settings.is_development:
             if self.DEV_DICKS_ORDER_FROM_EMAIL.lower() in sender_lower:
-                html = (email_data.html_content or "").lower()
+                html = email_data.document.html_lower
                 # Dick's emails contain dcsg.com or dickssportinggoods in URLs/content
                 if "dcsg" in html or "dickssportinggoods" in html:
                     return True
@@ -197,7 +197,7 @@ class DicksEmailParser:
     
     def is_order_confirmation_email(self, email_data: EmailData) -> bool:
         """Check if email is an order confirmation"""
-        subject_lower = email_data.subject.lower()
+        subject_lower = email_data.document.subject_lower
         
         # Use environment-aware subject pattern
         if re.search(self.order_subject_pattern, subject_lower, re.IGNORECASE):
@@ -214,8 +214,8 @@ class DicksEmailParser:
     
     def is_shipping_email(self, email_data: EmailData) -> bool:
         """Check if email is a shipping notification"""
-        sender_lower = email_data.sender.lower()
-        subject_lower = email_data.subject.lower()
+        sender_lower = email_data.document.sender_lower
+        subject_lower = email_data.document.subject_lower
         
         # Check if sender matches Dick's shipping email address
         if self.DICKS_SHIPPING_FROM_EMAIL.lower() in sender_lower:
@@ -230,8 +230,8 @@ class DicksEmailParser:
     
     def is_cancellation_email(self, email_data: EmailData) -> bool:
         """Check if email is a cancellation notification"""
-        sender_lower = email_data.sender.lower()
-        subject_lower = email_data.subject.lower()
+        sender_lower = email_data.document.sender_lower
+        subject_lower = email_data.document.subject_lower
         
         # Check if sender matches Dick's cancellation email address
         if self.DICKS_CANCELLATION_FROM_EMAIL.lower() in sender_lower:
@@ -240,7 +240,7 @@ class DicksEmailParser:
                 return True
             # Also check body text for cancellation indicators
             if email_data.html_content:
-                html_lower = email_data.html_content.lower()
+                html_lower = email_data.document.html_lower
                 if any(phrase in html_lower for phrase in [
                     "we're sorry, one or more items are not available",
                     "your order has been canceled",
@@ -255,7 +255,7 @@ class DicksEmailParser:
                 return True
             # Check body text as fallback
             if email_data.html_content:
-                html_lower = email_data.html_content.lower()
+                html_lower = email_data.document.html_lower
                 if any(phrase in html_lower for phrase in [
                     "we're sorry, one or more items are not available",
                     "your order has been canceled",
@@ -283,7 +283,7 @@ class DicksEmailParser:
                 logger.error("No HTML content in Dick's email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Extract order number
             order_number = self._extract_order_number(soup)
@@ -791,7 +791,7 @@ class DicksEmailParser:
                 logger.error("No HTML content in Dick's shipping email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Extract order number
             order_number = self._extract_order_number_from_shipping_email(soup)
@@ -1130,7 +1130,7 @@ class DicksEmailParser:
                 logger.error("No HTML content in Dick's cancellation email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Extract order number
             order_number = self._extract_order_number_from_cancellation_email(soup)
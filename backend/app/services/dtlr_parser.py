@@ -6,7 +6,7 @@ Parses shipping order emails from DTLR
 import re
 import logging
 from typing import List, Optional, Tuple
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, NavigableString
 from pydantic import BaseModel, Field
 
 from app.models.email import EmailData
@@ -157,13 +157,13 @@ class DTLREmailParser:
     
     def is_dtlr_email(self, email_data: EmailData) -> bool:
         """Check if email is from DTLR"""
-        sender_lower = email_data.sender.lower()
+        sender_lower = email_data.document.sender_lower
         
         # In development, check for forwarded emails from dev email address
         # Must also verify content to avoid misclassifying other retailers' forwarded emails
         if self.settings.is_development:
             if self.DEV_DTLR_ORDER_FROM_EMAIL.lower() in sender_lower:
-                html = (email_data.html_content or "").lower()
+                html = email_data.document.html_lower
                 if "dtlr" in html:
                     return True
                 return False
@@ -215,7 +215,7 @@ class DTLREmailParser:
                 logger.error("No HTML content in DTLR email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Extract order number from subject or HTML
             order_number = self._extract_order_number_from_subject(email_data.subject, soup)
@@ -456,12 +456,13 @@ class DTLREmailParser:
                     # Find the next <p> tag which contains the address
                     address_p = header.find_next_sibling('p')
                     if address_p:
-                        # Replace <br> tags with newlines before extracting text
-                        for br in address_p.find_all('br'):
-                            br.replace_with('\n')
-                        
-                        # Get address text with line breaks preserved
-                        address_text = address_p.get_text()
+                        # Get address text with <br> tags as line breaks (without
+                        # modifying the soup, which is shared via email_data.document)
+                        address_text = ''.join(
+                            '\n' if getattr(node, 'name', None) == 'br' else str(node)
+                            for node in address_p.descendants
+                            if getattr(node, 'name', None) == 'br' or type(node) is NavigableString
+                        )
                         
                         # Parse address lines
                         lines = [line.strip() for line in address_text.split('\n') if line.strip()]
@@ -508,7 +509,7 @@ class DTLREmailParser:
         if re.search(self.SUBJECT_CANCELLATION_PATTERN, email_data.subject, re.IGNORECASE):
             return True
         # Also check for "change to your order" in body text
-        if email_data.html_content and "change to your order" in email_data.html_content.lower():
+        if email_data.html_content and "change to your order" in email_data.document.html_lower:
             return True
         return False
     
@@ -533,7 +534,7 @@ class DTLREmailParser:
                 logger.error("No HTML content in DTLR shipping email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Extract order number (try HTML first, then subject as fallback)
             order_number = self._extract_order_number(soup)
@@ -896,7 +897,7 @@ class DTLREmailParser:
                 logger.error("No HTML content in DTLR cancellation email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Extract order number
             order_number = self._extract_order_number_from_cancellation_email(soup)
@@ -0,0 +1,589 @@
+"""
+Backfill of retailer emails missed while the webhook was down.
+
+The webhook reads the Gmail history from its stored checkpoint and skips the
+first notification when there is none, so emails that arrive during a deploy
+or an outage are never seen by it. A backfill job (email_backfill_job) walks a
+range of the mailbox instead and hands every missed retailer / PrepWorx email
+to the email worker pool, which fetches, classifies and processes it exactly
+like webhook traffic, several messages in parallel:
+
+- mode 'date': the range is split into windows of email_backfill_window_minutes,
+  oldest first; each window is one paged search (after:<epoch> before:<epoch>).
+- mode 'history': history.list from start_history_id (messages added to INBOX,
+  as the webhook reads it), handled in chunks of 500 message IDs.
+
+Each page of IDs is filtered with one registry query (processed_messages) and
+one batched From-header fetch (RetailerEmailClassifier.is_retailer_sender), so
+only candidate emails cost a full fetch.
+
+Gmail calls are charged to a token bucket of Gmail quota units
+(GmailQuotaLimiter, email_backfill_quota_units_per_second) that leaves part of
+the per-user quota to the webhook, and submission waits while the worker queue
+holds email_backfill_max_pending messages.
+
+The job row is the checkpoint: counters are written after every page (which
+doubles as a heartbeat and notices a pause requested by another process) and
+the checkpoint after every window / chunk. Submitted messages are only in the
+worker pool's memory until a worker has handled them, so the checkpoint stays
+at the oldest window / chunk with a message still queued or running, and a job
+only completes once all of its messages were handled. A paused, failed or
+abandoned job resumes from its checkpoint; messages seen again are
+deduplicated by the registry and the worker pool.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from googleapiclient.errors import HttpError
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.config.database import SessionLocal
+from app.models.database import EmailBackfillJob
+from app.services import processed_messages
+from app.services.email_worker_pool import SubmitResult
+from app.services.gmail_service import GMAIL_BATCH_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+MODE_DATE = "date"
+MODE_HISTORY = "history"
+
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_PAUSED = "paused"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+
+# Gmail quota units per call (Gmail API usage limits)
+QUOTA_UNITS_LIST = 5      # messages.list
+QUOTA_UNITS_HISTORY = 2   # history.list
+QUOTA_UNITS_GET = 5       # messages.get (From header check)
+# Charged per submitted message: the worker's full messages.get and its label change
+QUOTA_UNITS_PROCESS = 10
+
+# Message IDs per search page / history chunk
+_PAGE_SIZE = 500
+
+# A running job whose row was not updated for this long is treated as abandoned
+_STALE_AFTER_SECONDS = 600
+
+# Seconds between checks while the worker queue is above email_backfill_max_pending
+_QUEUE_POLL_SECONDS = 0.5
+
+_COUNTERS = ("scanned", "known", "unrelated", "queued", "duplicates")
+
+_CLAIM_SQL = text("""
+    UPDATE email_backfill_job SET
+        status = 'running',
+        error = NULL,
+        started_at = COALESCE(started_at, now()),
+        finished_at = NULL,
+        updated_at = now()
+    WHERE id = :job_id
+      AND (status IN ('pending', 'paused', 'failed')
+           OR (status = 'running' AND updated_at < now() - make_interval(secs => :stale_seconds)))
+    RETURNING id
+""")
+
+_PROGRESS_SQL = text("""
+    UPDATE email_backfill_job SET
+        scanned = scanned + :scanned,
+        known = known + :known,
+        unrelated = unrelated + :unrelated,
+        queued = queued + :queued,
+        duplicates = duplicates + :duplicates,
+        checkpoint = COALESCE(:checkpoint, checkpoint),
+        end_history_id = COALESCE(:end_history_id, end_history_id),
+        updated_at = now()
+    WHERE id = :job_id AND status = 'running'
+    RETURNING id
+""")
+
+_FINISH_SQL = text("""
+    UPDATE email_backfill_job SET
+        status = :status,
+        error = :error,
+        finished_at = CASE WHEN :status = 'completed' THEN now() ELSE finished_at END,
+        updated_at = now()
+    WHERE id = :job_id AND status = 'running'
+""")
+
+_PAUSE_SQL = text("""
+    UPDATE email_backfill_job SET status = 'paused', updated_at = now()
+    WHERE id = :job_id AND status IN ('pending', 'running')
+    RETURNING id
+""")
+
+
+class GmailQuotaLimiter:
+    """
+    Thread-safe token bucket of Gmail quota units.
+
+    A call larger than the bucket is let through once the bucket is full and
+    leaves it in debt, so its whole cost is still paid before the next call.
+
+    Args:
+        units_per_second: Quota units added per second
+        burst: Bucket size (default: one second of units)
+    """
+
+    def __init__(self, units_per_second: float, burst: Optional[float] = None):
+        self._rate = max(1.0, float(units_per_second))
+        self._capacity = max(1.0, float(burst or self._rate))
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, units: float, stop_event: Optional[threading.Event] = None) -> bool:
+        """
+        Wait until the call can be made and charge its quota units.
+
+        Returns:
+            False if stop_event was set while waiting (nothing is charged)
+        """
+        needed = min(float(units), self._capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= needed:
+                    self._tokens -= units
+                    return True
+                wait = (needed - self._tokens) / self._rate
+            if stop_event is None:
+                time.sleep(wait)
+            elif stop_event.wait(wait):
+                return False
+
+
+_limiter: Optional[GmailQuotaLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_backfill_quota_limiter() -> GmailQuotaLimiter:
+    """Return the process-wide limiter shared by all backfill jobs of this process."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = GmailQuotaLimiter(get_settings().email_backfill_quota_units_per_second)
+        return _limiter
+
+
+def is_relevant_sender(from_header: Optional[str]) -> bool:
+    """True if the From header belongs to a retailer the classifier knows, or to PrepWorx."""
+    from app.services.parser_registry import get_parser
+    from app.services.retailer_email_classifier import get_retailer_email_classifier
+
+    if get_parser("prepworx").PREPWORX_FROM_EMAIL.lower() in (from_header or "").lower():
+        return True
+    return get_retailer_email_classifier().is_retailer_sender(from_header)
+
+
+def _to_utc(value: datetime) -> datetime:
+    """Naive UTC datetime (aware values are converted, naive ones are taken as UTC)."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _epoch(value: datetime) -> int:
+    """Unix timestamp of a naive UTC datetime (Gmail after:/before: accept epoch seconds)."""
+    return int(value.replace(tzinfo=timezone.utc).timestamp())
+
+
+def create_job(
+    db: Session,
+    range_after: Optional[datetime] = None,
+    range_before: Optional[datetime] = None,
+    start_history_id: Optional[int] = None,
+    query: Optional[str] = None
+) -> EmailBackfillJob:
+    """
+    Create a pending backfill job for a date range or a history ID range.
+
+    Args:
+        db: Database session
+        range_after: Start of the date range
+        range_before: End of the date range (default: now)
+        start_history_id: Backfill the history from this ID instead of a date range
+        query: Extra Gmail search terms for a date range (e.g. 'in:inbox')
+
+    Raises:
+        ValueError: If the range is missing, empty or both kinds are given
+    """
+    if start_history_id is not None:
+        if range_after or range_before:
+            raise ValueError("Pass either a date range or a start history ID, not both")
+        job = EmailBackfillJob(mode=MODE_HISTORY, status=STATUS_PENDING, start_history_id=start_history_id)
+    else:
+        if range_after is None:
+            raise ValueError("Pass the start of the date range ('after') or a start history ID")
+        range_after = _to_utc(range_after)
+        range_before = _to_utc(range_before) if range_before else datetime.utcnow()
+        if range_before <= range_after:
+            raise ValueError("The end of the date range must be after its start")
+        job = EmailBackfillJob(
+            mode=MODE_DATE,
+            status=STATUS_PENDING,
+            range_after=range_after,
+            range_before=range_before,
+            query=(query or "").strip() or None
+        )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def get_job(db: Session, job_id: int) -> Optional[EmailBackfillJob]:
+    """Return the backfill job, or None."""
+    return db.get(EmailBackfillJob, job_id)
+
+
+def list_jobs(db: Session, limit: int = 20) -> List[EmailBackfillJob]:
+    """Most recent backfill jobs first."""
+    return db.query(EmailBackfillJob).order_by(EmailBackfillJob.id.desc()).limit(limit).all()
+
+
+def job_to_dict(job: EmailBackfillJob) -> Dict[str, Any]:
+    """API representation of a backfill job."""
+    return {
+        "id": job.id,
+        "mode": job.mode,
+        "status": job.status,
+        "after": job.range_after.isoformat() if job.range_after else None,
+        "before": job.range_before.isoformat() if job.range_before else None,
+        "start_history_id": job.start_history_id,
+        "end_history_id": job.end_history_id,
+        "query": job.query,
+        "checkpoint": job.checkpoint,
+        "scanned": job.scanned,
+        "known": job.known,
+        "unrelated": job.unrelated,
+        "queued": job.queued,
+        "duplicates": job.duplicates,
+        "error": job.error,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "updated_at": job.updated_at.isoformat() if job.updated_at else None,
+    }
+
+
+def claim_job(db: Session, job_id: int) -> bool:
+    """
+    Mark the job running if it is pending, paused, failed or abandoned (one statement,
+    so two processes can never both run it).
+
+    Returns:
+        True if this caller may run the job
+    """
+    row = db.execute(_CLAIM_SQL, {"job_id": job_id, "stale_seconds": _STALE_AFTER_SECONDS}).first()
+    db.commit()
+    return row is not None
+
+
+class EmailBackfillRunner:
+    """
+    Runs one claimed backfill job on its own thread until it completes, fails or is stopped.
+
+    Args:
+        job_id: Claimed email_backfill_job row (claim_job())
+        pool: Email worker pool the missed messages are submitted to
+        limiter: Gmail quota limiter (default: get_backfill_quota_limiter())
+    """
+
+    def __init__(self, job_id: int, pool: Any, limiter: Optional[GmailQuotaLimiter] = None):
+        settings = get_settings()
+        self.job_id = job_id
+        self._pool = pool
+        self._limiter = limiter or get_backfill_quota_limiter()
+        self._window = timedelta(minutes=max(1, settings.email_backfill_window_minutes))
+        self._max_pending = max(1, settings.email_backfill_max_pending)
+        self._stop = threading.Event()
+        self._gmail_service = None
+        # IDs submitted in the current window / chunk, and per finished window / chunk
+        # (oldest first) its resume checkpoint and the IDs it submitted
+        self._submitted: List[str] = []
+        self._outstanding: Deque[Tuple[str, List[str]]] = deque()
+        self._done_up_to: Optional[str] = None
+        self._thread = threading.Thread(target=self.run, name=f"email-backfill-{job_id}", daemon=True)
+
+    def start(self) -> None:
+        """Run the job on the runner's thread."""
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Ask the job to pause after the current call."""
+        self._stop.set()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """Wait for the runner's thread."""
+        self._thread.join(timeout)
+
+    def is_alive(self) -> bool:
+        """True while the job is running."""
+        return self._thread.is_alive()
+
+    def run(self) -> str:
+        """
+        Run the job from its checkpoint.
+
+        Returns:
+            Final status: completed, paused or failed
+        """
+        from app.services.parser_registry import get_gmail_service
+
+        db = SessionLocal()
+        try:
+            job = get_job(db, self.job_id)
+            if job is None or job.status != STATUS_RUNNING:
+                logger.warning(f"[BACKFILL] Job {self.job_id} is not claimed, not running it")
+                return job.status if job else STATUS_FAILED
+            logger.info(f"[BACKFILL] Job {self.job_id} ({job.mode}) started at checkpoint {job.checkpoint!r}")
+
+            self._gmail_service = get_gmail_service()
+            if job.mode == MODE_HISTORY:
+                finished = self._run_history(db, job)
+            else:
+                finished = self._run_dates(db, job)
+
+            # Completed only once the worker pool has handled every submitted message
+            finished = finished and self._wait_for_outstanding(db)
+            status = STATUS_COMPLETED if finished else STATUS_PAUSED
+            self._finish(db, status)
+            logger.info(f"[BACKFILL] Job {self.job_id} {status}")
+            return status
+        except Exception as e:
+            logger.error(f"[BACKFILL] Job {self.job_id} failed: {e}", exc_info=True)
+            db.rollback()
+            self._finish(db, STATUS_FAILED, str(e))
+            return STATUS_FAILED
+        finally:
+            db.close()
+            with _runners_lock:
+                if _runners.get(self.job_id) is self:
+                    del _runners[self.job_id]
+
+    def _run_dates(self, db: Session, job: EmailBackfillJob) -> bool:
+        """Search the date range window by window, oldest first. False if stopped."""
+        window_start = datetime.utcfromtimestamp(int(job.checkpoint)) if job.checkpoint else job.range_after
+        while window_start < job.range_before:
+            window_end = min(window_start + self._window, job.range_before)
+            query = f"after:{_epoch(window_start)} before:{_epoch(window_end)}"
+            if job.query:
+                query = f"{query} {job.query}"
+
+            pages = self._gmail_service.iter_message_id_pages(query, page_size=_PAGE_SIZE, raise_errors=True)
+            while True:
+                if not self._limiter.acquire(QUOTA_UNITS_LIST, self._stop):
+                    return False
+                page = next(pages, None)
+                if page is None:
+                    break
+                if not self._handle_page(db, page):
+                    return False
+
+            checkpoint = self._safe_checkpoint(str(_epoch(window_start)), str(_epoch(window_end)))
+            if not self._update_progress(db, checkpoint=checkpoint):
+                return False
+            logger.info(f"[BACKFILL] Job {self.job_id}: searched up to {window_end.isoformat()}")
+            window_start = window_end
+        return True
+
+    def _run_history(self, db: Session, job: EmailBackfillJob) -> bool:
+        """Handle the messages added since start_history_id, chunk by chunk. False if stopped."""
+        if not self._limiter.acquire(QUOTA_UNITS_HISTORY, self._stop):
+            return False
+        try:
+            message_ids, latest_history_id = self._gmail_service.get_new_message_ids_from_history(
+                str(job.start_history_id)
+            )
+        except HttpError as error:
+            if error.resp.status == 404:
+                raise ValueError(
+                    f"Gmail history from {job.start_history_id} has expired; backfill a date range instead"
+                ) from error
+            raise
+
+        # Same order on every run (history records are ordered), so the checkpoint is an offset
+        message_ids = list(dict.fromkeys(message_ids))
+        end_history_id = int(latest_history_id) if latest_history_id else None
+        for offset in range(int(job.checkpoint or 0), len(message_ids), _PAGE_SIZE):
+            chunk = message_ids[offset:offset + _PAGE_SIZE]
+            if not self._handle_page(db, chunk):
+                return False
+            checkpoint = self._safe_checkpoint(str(offset), str(offset + len(chunk)))
+            if not self._update_progress(db, checkpoint=checkpoint, end_history_id=end_history_id):
+                return False
+        return self._update_progress(db, end_history_id=end_history_id)
+
+    def _handle_page(self, db: Session, message_ids: List[str]) -> bool:
+        """Filter one page of message IDs and submit the missed ones. False if stopped."""
+        counts = dict.fromkeys(_COUNTERS, 0)
+        try:
+            finished = self._submit_missed(db, message_ids, counts)
+        finally:
+            alive = self._update_progress(db, counts)
+        return finished and alive
+
+    def _submit_missed(self, db: Session, message_ids: List[str], counts: Dict[str, int]) -> bool:
+        """Drop handled and unrelated messages, submit the rest to the worker pool."""
+        counts["scanned"] += len(message_ids)
+        known = processed_messages.known_message_ids(db, message_ids)
+        counts["known"] += len(known)
+        missed = [message_id for message_id in message_ids if message_id not in known]
+
+        for start in range(0, len(missed), GMAIL_BATCH_CHUNK_SIZE):
+            chunk = missed[start:start + GMAIL_BATCH_CHUNK_SIZE]
+            if not self._limiter.acquire(QUOTA_UNITS_GET * len(chunk), self._stop):
+                return False
+            senders = self._gmail_service.get_message_senders_batch(chunk)
+            for message_id in chunk:
+                sender = senders.get(message_id)
+                # A failed header fetch is no reason to skip: the worker fetches the full message
+                if sender is not None and not is_relevant_sender(sender):
+                    counts["unrelated"] += 1
+                    continue
+                result = self._submit(message_id)
+                if result is None:
+                    return False
+                self._submitted.append(message_id)
+                counts["queued" if result == SubmitResult.ACCEPTED else "duplicates"] += 1
+        return True
+
+    def _submit(self, message_id: str) -> Optional[SubmitResult]:
+        """Submit once the worker queue has room. None if stopped while waiting."""
+        if not self._limiter.acquire(QUOTA_UNITS_PROCESS, self._stop):
+            return None
+        while True:
+            if self._pool.stats()["queued"] < self._max_pending:
+                result = self._pool.submit(message_id)
+                if result != SubmitResult.REJECTED:
+                    return result
+            if self._stop.wait(_QUEUE_POLL_SECONDS):
+                return None
+
+    def _safe_checkpoint(self, resume_from: str, done_up_to: str) -> str:
+        """
+        Checkpoint to store after a window / chunk: done_up_to, or the resume checkpoint
+        of the oldest window / chunk whose submitted messages are still queued or running.
+
+        Args:
+            resume_from: Checkpoint that re-scans the window / chunk just finished
+            done_up_to: Checkpoint after it
+        """
+        if self._submitted:
+            self._outstanding.append((resume_from, self._submitted))
+            self._submitted = []
+        self._done_up_to = done_up_to
+        while self._outstanding and not self._pool.in_flight(self._outstanding[0][1]):
+            self._outstanding.popleft()
+        return self._outstanding[0][0] if self._outstanding else done_up_to
+
+    def _wait_for_outstanding(self, db: Session) -> bool:
+        """
+        Wait until the worker pool has handled every submitted message, moving the checkpoint as it drains.
+
+        Returns:
+            False if stopped or paused first (the checkpoint re-scans what is left)
+        """
+        checkpoint = None
+        while self._outstanding:
+            if self._stop.wait(_QUEUE_POLL_SECONDS):
+                return False
+            previous = checkpoint
+            checkpoint = self._safe_checkpoint(self._outstanding[0][0], self._done_up_to)
+            if checkpoint != previous and not self._update_progress(db, checkpoint=checkpoint):
+                return False
+        return True
+
+    def _update_progress(
+        self,
+        db: Session,
+        counts: Optional[Dict[str, int]] = None,
+        checkpoint: Optional[str] = None,
+        end_history_id: Optional[int] = None
+    ) -> bool:
+        """
+        Add the counters and move the checkpoint.
+
+        Returns:
+            False if the job is no longer running (paused through the API)
+        """
+        params = {name: (counts or {}).get(name, 0) for name in _COUNTERS}
+        params.update(job_id=self.job_id, checkpoint=checkpoint, end_history_id=end_history_id)
+        row = db.execute(_PROGRESS_SQL, params).first()
+        db.commit()
+        if row is None:
+            logger.info(f"[BACKFILL] Job {self.job_id} was paused, stopping")
+            return False
+        return True
+
+    def _finish(self, db: Session, status: str, error: Optional[str] = None) -> None:
+        """Record the final status (unless the job was paused in the meantime)."""
+        try:
+            db.execute(_FINISH_SQL, {"job_id": self.job_id, "status": status, "error": error})
+            db.commit()
+        except Exception as e:
+            logger.error(f"[BACKFILL] Could not record status {status} for job {self.job_id}: {e}")
+            db.rollback()
+
+
+# Jobs running in this process
+_runners: Dict[int, EmailBackfillRunner] = {}
+_runners_lock = threading.Lock()
+
+
+def start_job(job_id: int, pool: Any) -> Optional[EmailBackfillRunner]:
+    """
+    Claim the job and run it on a background thread.
+
+    Returns:
+        The runner, or None if the job is already running (here or in another process) or completed
+    """
+    db = SessionLocal()
+    try:
+        if not claim_job(db, job_id):
+            return None
+    finally:
+        db.close()
+
+    runner = EmailBackfillRunner(job_id, pool)
+    with _runners_lock:
+        _runners[job_id] = runner
+    runner.start()
+    return runner
+
+
+def pause_job(db: Session, job_id: int) -> bool:
+    """
+    Pause a pending or running job (a runner in another process stops at its next page).
+
+    Returns:
+        True if the job was pending or running
+    """
+    row = db.execute(_PAUSE_SQL, {"job_id": job_id}).first()
+    db.commit()
+    with _runners_lock:
+        runner = _runners.get(job_id)
+    if runner is not None:
+        runner.stop()
+    return row is not None
+
+
+def shutdown_backfills(timeout: Optional[float] = 30.0) -> None:
+    """Pause the jobs running in this process (they resume from their checkpoint)."""
+    with _runners_lock:
+        runners = list(_runners.values())
+    for runner in runners:
+        runner.stop()
+    for runner in runners:
+        runner.join(timeout)
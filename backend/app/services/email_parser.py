@@ -49,7 +49,7 @@ class EmailParser:
             
             # Parse HTML content
             if email_data.html_content:
-                soup = BeautifulSoup(email_data.html_content, 'lxml')
+                soup = email_data.document.soup
                 extracted_info.extracted_data = self._extract_from_html(soup, email_data)
                 
                 # Try to extract purchase-specific information
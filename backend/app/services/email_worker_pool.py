@@ -0,0 +1,178 @@
+"""
+Bounded worker pool for processing Gmail messages off the event loop.
+
+The Gmail webhook hands message IDs to this pool instead of queuing one
+FastAPI background task per message. Each worker thread runs the blocking
+Google API / SQLAlchemy processing code, so the uvicorn event loop stays
+responsive and a burst of emails is processed in parallel.
+
+Guarantees:
+- At most `queue_size` messages wait in the queue; submit() never blocks and
+  reports REJECTED when the queue is full (backpressure for the caller).
+- A message ID that is already queued or running is never enqueued again,
+  so the same message never runs twice at the same time.
+- Each worker thread owns its own GmailService (the googleapiclient/httplib2
+  transport is not thread-safe); DB sessions are opened per message by the
+  handler itself.
+"""
+
+import logging
+import queue
+import threading
+import time
+from enum import Enum
+from typing import Any, Callable, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Sentinel placed on the queue to stop a worker thread
+_STOP = object()
+
+
+class SubmitResult(str, Enum):
+    """Outcome of EmailWorkerPool.submit()."""
+    ACCEPTED = "accepted"
+    DUPLICATE = "duplicate"   # Same message ID is already queued or running
+    REJECTED = "rejected"     # Queue is full (or pool is shut down)
+
+
+class EmailWorkerPool:
+    """
+    Fixed-size thread pool with a bounded queue and per-message-ID deduplication.
+
+    Args:
+        handler: Called as handler(message_id, gmail_service) for every message
+        worker_count: Number of worker threads
+        queue_size: Maximum number of messages waiting to be processed
+        gmail_service_factory: Creates the per-thread Gmail client (lazily, on
+            the first message a worker handles)
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[str, Any], None],
+        worker_count: int = 4,
+        queue_size: int = 100,
+        gmail_service_factory: Optional[Callable[[], Any]] = None,
+    ):
+        self._handler = handler
+        self._gmail_service_factory = gmail_service_factory
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, queue_size))
+        self._in_flight: Set[str] = set()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._shutdown = False
+        self._stats = {'processed': 0, 'failed': 0, 'rejected': 0, 'duplicates': 0}
+
+        self._threads = []
+        for i in range(max(1, worker_count)):
+            thread = threading.Thread(
+                target=self._worker_loop,
+                name=f"email-worker-{i + 1}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+        logger.info(
+            f"Email worker pool started: {len(self._threads)} workers, queue size {self._queue.maxsize}"
+        )
+
+    def submit(self, message_id: str) -> SubmitResult:
+        """
+        Queue a message ID for processing without blocking.
+
+        Returns:
+            ACCEPTED if queued, DUPLICATE if the ID is already queued or running,
+            REJECTED if the queue is full or the pool is shutting down
+        """
+        with self._lock:
+            if self._shutdown:
+                self._stats['rejected'] += 1
+                return SubmitResult.REJECTED
+            if message_id in self._in_flight:
+                self._stats['duplicates'] += 1
+                return SubmitResult.DUPLICATE
+            try:
+                self._queue.put_nowait(message_id)
+            except queue.Full:
+                self._stats['rejected'] += 1
+                return SubmitResult.REJECTED
+            self._in_flight.add(message_id)
+        return SubmitResult.ACCEPTED
+
+    def stats(self) -> Dict[str, int]:
+        """Return queue depth, in-flight count and lifetime counters."""
+        with self._lock:
+            return {
+                'workers': len(self._threads),
+                'queued': self._queue.qsize(),
+                'in_flight': len(self._in_flight),
+                **self._stats,
+            }
+
+    def in_flight(self, message_ids) -> Set[str]:
+        """Return the given message IDs that are still queued or running."""
+        with self._lock:
+            return {message_id for message_id in message_ids if message_id in self._in_flight}
+
+    def shutdown(self, wait: bool = True, timeout: Optional[float] = None) -> None:
+        """
+        Stop accepting messages and let workers drain the queue.
+
+        Args:
+            wait: Wait for worker threads to finish
+            timeout: Maximum seconds to wait per worker thread
+        """
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+
+        # Stop sentinels go after the queued messages so the backlog is drained first
+        for _ in self._threads:
+            self._queue.put(_STOP)
+
+        if wait:
+            for thread in self._threads:
+                thread.join(timeout)
+        logger.info("Email worker pool stopped")
+
+    def _get_gmail_service(self) -> Any:
+        """Return this worker thread's Gmail client, creating it on first use."""
+        if self._gmail_service_factory is None:
+            return None
+        service = getattr(self._local, 'gmail_service', None)
+        if service is None:
+            service = self._gmail_service_factory()
+            self._local.gmail_service = service
+        return service
+
+    def _worker_loop(self) -> None:
+        """Take message IDs off the queue until a stop sentinel arrives."""
+        while True:
+            message_id = self._queue.get()
+            try:
+                if message_id is _STOP:
+                    return
+                self._run(message_id)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, message_id: str) -> None:
+        """Process one message and release its in-flight slot."""
+        started = time.monotonic()
+        try:
+            self._handler(message_id, self._get_gmail_service())
+            with self._lock:
+                self._stats['processed'] += 1
+            logger.debug(f"Worker processed message {message_id} in {time.monotonic() - started:.2f}s")
+        except Exception as e:
+            with self._lock:
+                self._stats['failed'] += 1
+            # Drop the cached client in case its connection is in a bad state
+            self._local.gmail_service = None
+            logger.error(f"Worker failed to process message {message_id}: {e}", exc_info=True)
+        finally:
+            with self._lock:
+                self._in_flight.discard(message_id)
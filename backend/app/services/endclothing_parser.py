@@ -121,12 +121,12 @@ class ENDClothingEmailParser:
         to contain "endclothing" or "end." (brand) to uniquely filter END Clothing
         and avoid claiming other retailers' forwarded emails.
         """
-        sender_lower = email_data.sender.lower()
+        sender_lower = email_data.document.sender_lower
         
         # In development, check for forwarded emails from dev email address
         if self.settings.is_development:
             if self.DEV_ENDCLOTHING_ORDER_FROM_EMAIL.lower() in sender_lower:
-                html = (email_data.html_content or "").lower()
+                html = email_data.document.html_lower
                 # END Clothing branding: media.endclothing.com, email.orders.endclothing.com
                 if "endclothing" in html:
                     return True
@@ -139,7 +139,7 @@ class ENDClothingEmailParser:
         """Check if email is a END Clothing shipping notification."""
         if not self.is_endclothing_email(email_data):
             return False
-        subject_lower = (email_data.subject or "").lower()
+        subject_lower = email_data.document.subject_lower
         if re.search(self.SUBJECT_SHIPPING_PATTERN, subject_lower, re.IGNORECASE):
             return True
         if self.settings.is_development and re.search(self.DEV_SUBJECT_SHIPPING_PATTERN, subject_lower, re.IGNORECASE):
@@ -170,7 +170,7 @@ class ENDClothingEmailParser:
                 logger.error("No HTML content in END Clothing email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Extract order number
             order_number = self._extract_order_number(soup)
@@ -219,7 +219,7 @@ class ENDClothingEmailParser:
                 logger.error("No HTML content in END Clothing shipping email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             order_number = self._extract_order_number(soup)
             if not order_number:
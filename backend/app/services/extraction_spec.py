@@ -0,0 +1,183 @@
+"""
+Declarative extraction specs evaluated with precompiled lxml XPath.
+
+Parsers for retailers that send the stock Shopify notification template
+(Sneaker Politics, Orleans Shoe Co, Gazelle Sports) used to walk a
+BeautifulSoup tree with find_all() loops and inline re.search() calls. With
+an ExtractionSpec they declare what to extract instead:
+
+- FieldSpec: XPath candidates (tried in order) plus optional regexes. The
+  first XPath result whose text matches (or is non-empty) wins.
+- ItemSpec: repeated records (order items). `anchors` selects one node per
+  record (e.g. product images), `scope` the node the record's fields are
+  evaluated against (e.g. the image's table row), `where` filters records
+  and `unique` drops records whose key fields were already seen.
+
+XPath expressions and regexes are compiled once, when the parser module is
+imported. Expressions may use EXSLT regular expressions (re:test, re:match)
+and the $anchor variable (the record's anchor node inside an ItemSpec).
+Specs run against EmailData.document.tree, a plain lxml.html tree, so no
+BeautifulSoup tree is built for these emails.
+
+Text follows BeautifulSoup get_text(): script/style contents are skipped,
+and strip=True strips every text fragment and drops empty ones before
+joining them with `separator`.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from lxml import etree
+
+XPATH_NAMESPACES = {"re": "http://exslt.org/regular-expressions"}
+
+_TEXT_NODES = etree.XPath("descendant-or-self::text()[not(parent::script or parent::style)]")
+
+
+def compile_xpath(expression: str) -> etree.XPath:
+    """Compile an XPath expression with the EXSLT regex namespace bound to re:."""
+    return etree.XPath(expression, namespaces=XPATH_NAMESPACES)
+
+
+def node_text(node: Any, strip: bool = True, separator: str = "") -> str:
+    """
+    Text of an XPath result (element, text/attribute string, number or boolean).
+
+    Args:
+        node: XPath result item
+        strip: Strip every text fragment and drop empty ones (get_text(strip=True))
+        separator: String placed between text fragments
+    """
+    if isinstance(node, etree._Element):
+        fragments = _TEXT_NODES(node)
+        if strip:
+            return separator.join(text for text in (fragment.strip() for fragment in fragments) if text)
+        return separator.join(fragments)
+    if isinstance(node, bool) or node is None:
+        return ""
+    text = str(node)
+    return text.strip() if strip else text
+
+
+class FieldSpec:
+    """
+    One extracted value.
+
+    Args:
+        *xpaths: XPath expressions tried in order; every result of each is checked
+        pattern: Regex (or regexes, tried in order) searched in each result's text;
+            the first match wins
+        flags: Regex flags
+        group: Regex group returned (0 for the whole match)
+        strip: Text mode of node_text()
+        separator: Separator of node_text()
+    """
+
+    def __init__(
+        self,
+        *xpaths: str,
+        pattern: Union[str, Sequence[str], None] = None,
+        flags: int = 0,
+        group: int = 1,
+        strip: bool = True,
+        separator: str = "",
+    ):
+        self.xpaths = [compile_xpath(xpath) for xpath in xpaths]
+        if isinstance(pattern, str):
+            pattern = (pattern,)
+        self.patterns = [re.compile(p, flags) for p in pattern or ()]
+        self.group = group
+        self.strip = strip
+        self.separator = separator
+
+    def extract(self, context: Any, **variables: Any) -> Optional[str]:
+        """First matching value below context, or None."""
+        for xpath in self.xpaths:
+            results = xpath(context, **variables)
+            if not isinstance(results, list):
+                results = [results]
+            for result in results:
+                text = node_text(result, self.strip, self.separator)
+                if not self.patterns:
+                    if text:
+                        return text
+                    continue
+                for pattern in self.patterns:
+                    match = pattern.search(text)
+                    if match:
+                        return match.group(self.group)
+        return None
+
+
+class ItemSpec:
+    """
+    Repeated records, one per anchor node.
+
+    Args:
+        anchors: XPath selecting one node per record, in document order
+        fields: FieldSpec per record key, evaluated against the scope node ($anchor is the anchor)
+        scope: XPaths relative to the anchor; the first that finds a node is the
+            record's scope (records with no scope are skipped). Default: the anchor.
+        where: XPath boolean evaluated against the scope; false skips the record
+        unique: Field names forming the dedupe key; later records with a seen key are skipped
+    """
+
+    def __init__(
+        self,
+        anchors: str,
+        fields: Dict[str, FieldSpec],
+        scope: Sequence[str] = (),
+        where: Optional[str] = None,
+        unique: Sequence[str] = (),
+    ):
+        self.anchors = compile_xpath(anchors)
+        self.fields = fields
+        self.scope = [compile_xpath(xpath) for xpath in scope]
+        self.where = compile_xpath(where) if where else None
+        self.unique = tuple(unique)
+
+    def _scope_of(self, anchor: Any) -> Any:
+        if not self.scope:
+            return anchor
+        for xpath in self.scope:
+            nodes = xpath(anchor)
+            if nodes:
+                return nodes[0]
+        return None
+
+    def extract(self, root: Any) -> List[Dict[str, Optional[str]]]:
+        """Records (field name -> value) for every anchor below root."""
+        records = []
+        seen = set()
+        for anchor in self.anchors(root):
+            scope = self._scope_of(anchor)
+            if scope is None:
+                continue
+            if self.where is not None and not self.where(scope, anchor=anchor):
+                continue
+            record = {name: field.extract(scope, anchor=anchor) for name, field in self.fields.items()}
+            if self.unique:
+                key = tuple(record[name] for name in self.unique)
+                if key in seen:
+                    continue
+                seen.add(key)
+            records.append(record)
+        return records
+
+
+class ExtractionSpec:
+    """
+    Document-level fields plus (optionally) a list of items.
+
+    extract() returns {field name: value, ..., "items": [record, ...]}.
+    """
+
+    def __init__(self, fields: Optional[Dict[str, FieldSpec]] = None, items: Optional[ItemSpec] = None):
+        self.fields = fields or {}
+        self.items = items
+
+    def extract(self, root: Any) -> Dict[str, Any]:
+        values: Dict[str, Any] = {name: field.extract(root, anchor=root) for name, field in self.fields.items()}
+        if self.items is not None:
+            values["items"] = self.items.extract(root)
+        return values
@@ -163,7 +163,7 @@ class FinishLineEmailParser:
 
     def is_finishline_email(self, email_data: EmailData) -> bool:
         """Check if email is from Finish Line"""
-        sender_lower = email_data.sender.lower()
+        sender_lower = email_data.document.sender_lower
         
         # In development, check for forwarded emails from dev email address
         if self.settings.is_development:
@@ -181,7 +181,7 @@ class FinishLineEmailParser:
         if self.is_shipping_email(email_data):
             return False
         
-        subject_lower = email_data.subject.lower()
+        subject_lower = email_data.document.subject_lower
         pattern = self.order_subject_pattern
         
         # Use regex matching for subject pattern
@@ -192,7 +192,7 @@ class FinishLineEmailParser:
         """Check if email is a shipping/order update notification."""
         if not self.is_finishline_email(email_data):
             return False
-        subject_lower = email_data.subject.lower()
+        subject_lower = email_data.document.subject_lower
         if self.settings.is_development:
             return bool(re.search(self.DEV_SUBJECT_SHIPPING_PATTERN, subject_lower, re.IGNORECASE))
         return bool(re.search(self.SUBJECT_SHIPPING_PATTERN, subject_lower, re.IGNORECASE))
@@ -206,8 +206,8 @@ class FinishLineEmailParser:
         if self.is_shipping_email(email_data):
             return False
         
-        subject_lower = email_data.subject.lower()
-        body_lower = email_data.html_content.lower() if email_data.html_content else ""
+        subject_lower = email_data.document.subject_lower
+        body_lower = email_data.document.html_lower
         
         # Check subject for cancellation keywords
         if self.settings.is_development:
@@ -260,7 +260,7 @@ class FinishLineEmailParser:
                 logger.error("No HTML content in Finish Line email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Extract order number from email content
             order_number = self._extract_order_number(soup, email_data.subject)
@@ -320,7 +320,7 @@ class FinishLineEmailParser:
             # Detect if it's full or partial cancellation
             # Emails with subject "Sorry, but we had to cancel your order" are always full order cancellation
             # (this is the only subject that triggers the cancellation query)
-            subject_lower = (email_data.subject or "").lower()
+            subject_lower = email_data.document.subject_lower
             if re.search(self.SUBJECT_CANCELLATION_PATTERN, subject_lower) or \
                (self.settings.is_development and re.search(self.DEV_SUBJECT_CANCELLATION_PATTERN, subject_lower)):
                 is_full_cancellation = True
@@ -365,7 +365,7 @@ class FinishLineEmailParser:
                 logger.error("No HTML content in Finish Line shipping email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             order_number = self._extract_order_number(soup, email_data.subject)
             if not order_number:
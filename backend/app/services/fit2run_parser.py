@@ -98,7 +98,7 @@ class Fit2RunEmailParser:
 
     def is_fit2run_email(self, email_data: EmailData) -> bool:
         """Check if email is from Fit2Run"""
-        sender_lower = email_data.sender.lower()
+        sender_lower = email_data.document.sender_lower
         
         # In development, check for forwarded emails from dev email address
         if self.settings.is_development:
@@ -110,7 +110,7 @@ class Fit2RunEmailParser:
 
     def is_order_confirmation_email(self, email_data: EmailData) -> bool:
         """Check if email is an order confirmation"""
-        subject_lower = email_data.subject.lower()
+        subject_lower = email_data.document.subject_lower
         pattern = self.order_subject_pattern
         
         # Use regex matching for subject pattern
@@ -119,7 +119,7 @@ class Fit2RunEmailParser:
         
         # For forwarded emails in dev mode, also check HTML content for Fit2Run confirmation indicators
         if self.settings.is_development and email_data.html_content:
-            html_lower = email_data.html_content.lower()
+            html_lower = email_data.document.html_lower
             # Check for "Thank you for your purchase" or order confirmation indicators
             has_confirmation_text = (
                 'thank you for your purchase' in html_lower or
@@ -149,7 +149,7 @@ class Fit2RunEmailParser:
                 logger.error("No HTML content in Fit2Run email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Extract order number from HTML
             order_number = self._extract_order_number(soup)
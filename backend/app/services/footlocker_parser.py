@@ -166,12 +166,12 @@ class FootlockerEmailParser:
         Returns:
             True if email is from Footlocker or Kids Foot Locker, False otherwise
         """
-        sender_lower = email_data.sender.lower()
+        sender_lower = email_data.document.sender_lower
         
         # In development, both Footlocker and Champs forward from glenallagroupc - check HTML content
         if self.settings.is_development:
             if self.DEV_FOOTLOCKER_ORDER_FROM_EMAIL.lower() in sender_lower:
-                html = (email_data.html_content or "").lower()
+                html = email_data.document.html_lower
                 # Champs has champssports in HTML; Footlocker has footlocker
                 if "champssports" in html:
                     return False  # This is Champs, not Footlocker
@@ -210,7 +210,7 @@ class FootlockerEmailParser:
         Returns:
             True if email is from Kids Foot Locker, False otherwise
         """
-        sender_lower = email_data.sender.lower()
+        sender_lower = email_data.document.sender_lower
         
         # Check for Kids Foot Locker direct email addresses
         if self.KIDS_FOOTLOCKER_ORDER_FROM_EMAIL.lower() in sender_lower:
@@ -235,7 +235,7 @@ class FootlockerEmailParser:
         Returns:
             True if this is an order confirmation email
         """
-        subject_lower = email_data.subject.lower()
+        subject_lower = email_data.document.subject_lower
         
         # Use environment-aware subject pattern
         if re.search(self.order_subject_pattern, subject_lower, re.IGNORECASE):
@@ -257,7 +257,7 @@ class FootlockerEmailParser:
         Returns:
             True if this is a shipping notification email
         """
-        subject_lower = email_data.subject.lower()
+        subject_lower = email_data.document.subject_lower
         
         # Check for production shipping pattern
         if re.search(self.SUBJECT_SHIPPING_PATTERN, subject_lower, re.IGNORECASE):
@@ -280,7 +280,7 @@ class FootlockerEmailParser:
         Returns:
             True if this is a cancellation notification email
         """
-        subject_lower = email_data.subject.lower()
+        subject_lower = email_data.document.subject_lower
         
         # Check for production cancellation pattern
         if re.search(self.SUBJECT_CANCELLATION_PATTERN, subject_lower, re.IGNORECASE):
@@ -310,7 +310,7 @@ class FootlockerEmailParser:
                 logger.error("No HTML content in email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Extract order number
             order_number = self._extract_order_number(soup)
@@ -1005,7 +1005,7 @@ class FootlockerEmailParser:
                 logger.error("No HTML content in email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Extract order number
             order_number = self._extract_order_number(soup)
@@ -1059,7 +1059,7 @@ class FootlockerEmailParser:
                 logger.error("No HTML content in email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Extract order number
             order_number = self._extract_order_number(soup)
@@ -0,0 +1,260 @@
+"""
+Fulfillment event ledger (fulfillment_event) for shipping and cancellation emails.
+
+Shipping and cancellation updates add to purchase_tracker.shipped_to_pw and
+cancelled_qty (and take from final_qty) cumulatively. Every line of an email
+applied to a purchase record is first recorded with record_event():
+
+    INSERT INTO fulfillment_event ... ON CONFLICT DO NOTHING RETURNING id
+
+keyed by (message_id, event_type, purchase_tracker_id, line). Only when the row
+is new does the caller apply the increment, in the same transaction, so an
+email applied again (webhook retry, a second worker, a batch run racing the
+webhook, a manual review resolved twice) changes nothing. lock_record() takes
+the purchase row lock before the caller reads the current quantities, so
+concurrent emails for the same record do not overwrite each other's increments.
+
+Manual edits (PATCH /purchases/{id}) go through record_manual_adjustment(),
+which records the change of each ledger-fed quantity as a 'manual:' event.
+final_qty is og_qty - cancelled_qty plus the record's final_adjustment events,
+so a hand-set final_qty (or og_qty) survives a rebuild.
+
+rebuild_fulfillment_quantities() recomputes shipped_to_pw, cancelled_qty and
+final_qty from the ledger in bulk and reports (and optionally writes) the
+records that drifted.
+"""
+
+import logging
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models.database import PurchaseTracker
+from app.services.retailer_counters import track_retailer_counters
+from app.utils.purchase_status import calculate_status_and_location
+
+logger = logging.getLogger(__name__)
+
+EVENT_SHIPPING = "shipping"
+EVENT_CANCELLATION = "cancellation"
+# final_qty set apart from og_qty - cancelled_qty (manual edits only)
+EVENT_FINAL_ADJUSTMENT = "final_adjustment"
+
+MANUAL_MESSAGE_PREFIX = "manual:"
+
+# PurchaseTracker attributes the ledger feeds (reloaded under the row lock)
+_QUANTITY_ATTRIBUTES = ("og_qty", "final_qty", "shipped_to_pw", "cancelled_qty")
+
+_RECORD_EVENT_SQL = text("""
+    INSERT INTO fulfillment_event
+        (message_id, event_type, purchase_tracker_id, line, order_number, unique_id, size, qty, created_at)
+    VALUES
+        (:message_id, :event_type, :purchase_tracker_id, :line, :order_number, :unique_id, :size, :qty, now())
+    ON CONFLICT ON CONSTRAINT uq_fulfillment_event DO NOTHING
+    RETURNING id
+""")
+
+_HAS_EVENTS_SQL = text("""
+    SELECT 1 FROM fulfillment_event
+    WHERE message_id = :message_id AND event_type = :event_type
+    LIMIT 1
+""")
+
+# Ledger totals of every record that has events, next to the stored values
+_RECOMPUTE_SQL = text("""
+    SELECT
+        p.id,
+        p.shipped_to_pw,
+        p.cancelled_qty,
+        p.final_qty,
+        p.og_qty,
+        e.shipped,
+        e.cancelled,
+        e.final_adjustment
+    FROM (
+        SELECT
+            purchase_tracker_id,
+            COALESCE(sum(qty) FILTER (WHERE event_type = 'shipping'), 0) AS shipped,
+            COALESCE(sum(qty) FILTER (WHERE event_type = 'cancellation'), 0) AS cancelled,
+            COALESCE(sum(qty) FILTER (WHERE event_type = 'final_adjustment'), 0) AS final_adjustment
+        FROM fulfillment_event
+        GROUP BY purchase_tracker_id
+    ) e
+    JOIN purchase_tracker p ON p.id = e.purchase_tracker_id
+""")
+
+
+def lock_record(db: Session, record: PurchaseTracker) -> None:
+    """
+    Lock the record's row (SELECT ... FOR UPDATE) and reload it before its quantities are read.
+
+    Pending changes are flushed first so the reload does not discard them.
+    """
+    db.flush()
+    db.refresh(record, attribute_names=list(_QUANTITY_ATTRIBUTES), with_for_update=True)
+
+
+def record_event(
+    db: Session,
+    message_id: str,
+    event_type: str,
+    record: PurchaseTracker,
+    line: int,
+    qty: int,
+    order_number: Optional[str] = None,
+    unique_id: Optional[str] = None,
+    size: Optional[str] = None
+) -> bool:
+    """
+    Record that an email line was applied to a purchase record.
+
+    Args:
+        db: Database session (the event commits or rolls back with the caller's update)
+        message_id: Gmail message ID
+        event_type: EVENT_SHIPPING or EVENT_CANCELLATION
+        record: PurchaseTracker record the line applies to
+        line: Position of the item in the parsed email
+        qty: Quantity applied (added to shipped_to_pw or cancelled_qty)
+        order_number / unique_id / size: Item as read from the email
+
+    Returns:
+        True if the event is new (apply the update), False if this line was already applied
+    """
+    row = db.execute(_RECORD_EVENT_SQL, {
+        "message_id": message_id,
+        "event_type": event_type,
+        "purchase_tracker_id": record.id,
+        "line": line,
+        "order_number": order_number,
+        "unique_id": unique_id,
+        "size": size,
+        "qty": qty,
+    }).first()
+    if row is None:
+        logger.info(
+            f"[FULFILLMENT LEDGER] {event_type} line {line} of message {message_id} "
+            f"already applied to purchase tracker ID {record.id}, skipping"
+        )
+        return False
+    return True
+
+
+def has_events(db: Session, message_id: str, event_type: str) -> bool:
+    """True if any line of the email was applied as event_type (one index lookup)."""
+    return db.execute(_HAS_EVENTS_SQL, {"message_id": message_id, "event_type": event_type}).first() is not None
+
+
+def ledger_quantities(record: PurchaseTracker) -> Dict[str, Optional[int]]:
+    """
+    The record's quantities as the ledger sums them, per event type.
+
+    final_adjustment is final_qty - (og_qty - cancelled_qty), or None without og_qty.
+    """
+    cancelled = record.cancelled_qty or 0
+    return {
+        EVENT_SHIPPING: record.shipped_to_pw or 0,
+        EVENT_CANCELLATION: cancelled,
+        EVENT_FINAL_ADJUSTMENT: (record.final_qty or 0) - (record.og_qty - cancelled) if record.og_qty is not None else None,
+    }
+
+
+def record_manual_adjustment(db: Session, record: PurchaseTracker, before: Dict[str, Optional[int]]) -> List[str]:
+    """
+    Record a manual edit of the record's quantities as ledger events, so a rebuild keeps it.
+
+    Args:
+        db: Database session (the events commit or roll back with the edit)
+        record: Edited PurchaseTracker record (locked with lock_record() before `before` was read)
+        before: ledger_quantities(record) before the edit
+
+    Returns:
+        Event types recorded (one 'manual:' event per quantity that changed)
+    """
+    after = ledger_quantities(record)
+    message_id = f"{MANUAL_MESSAGE_PREFIX}{uuid.uuid4().hex}"
+    recorded = []
+    for event_type, qty in after.items():
+        if qty is None:
+            continue
+        delta = qty - (before[event_type] or 0)
+        if delta:
+            record_event(db, message_id, event_type, record, 0, delta, order_number=record.order_number)
+            recorded.append(event_type)
+    if recorded:
+        logger.info(
+            f"[FULFILLMENT LEDGER] Manual edit of purchase tracker ID {record.id} recorded "
+            f"as {message_id} ({', '.join(recorded)})"
+        )
+    return recorded
+
+
+def rebuild_fulfillment_quantities(db: Session, apply: bool = False) -> Dict[str, Any]:
+    """
+    Recompute shipped_to_pw, cancelled_qty and final_qty of every record in the ledger and report drift.
+
+    shipped_to_pw is the sum of the record's shipping events, cancelled_qty the sum
+    of its cancellation events and final_qty is og_qty - cancelled_qty plus its
+    final_adjustment events (not below 0). Manual edits are in the ledger too (see
+    record_manual_adjustment()). Records without ledger events are left alone.
+
+    Args:
+        db: Database session
+        apply: Write the recomputed values (and recalculated status/location) for
+            the records that drifted, and commit
+
+    Returns:
+        Summary with the number of records checked and the drifted ones
+        (stored vs recomputed values)
+    """
+    started = time.perf_counter()
+    rows = db.execute(_RECOMPUTE_SQL).all()
+
+    drift = []
+    for row in rows:
+        shipped = int(row.shipped)
+        cancelled = int(row.cancelled)
+        final_qty = max(0, row.og_qty - cancelled + int(row.final_adjustment)) if row.og_qty is not None else row.final_qty
+        if (row.shipped_to_pw or 0) == shipped and (row.cancelled_qty or 0) == cancelled and row.final_qty == final_qty:
+            continue
+        drift.append({
+            "purchase_tracker_id": row.id,
+            "stored": {"shipped_to_pw": row.shipped_to_pw, "cancelled_qty": row.cancelled_qty, "final_qty": row.final_qty},
+            "actual": {"shipped_to_pw": shipped, "cancelled_qty": cancelled, "final_qty": final_qty},
+        })
+
+    if apply and drift:
+        track_retailer_counters(db)
+        actual_by_id = {d["purchase_tracker_id"]: d["actual"] for d in drift}
+        records = db.query(PurchaseTracker).filter(PurchaseTracker.id.in_(list(actual_by_id))).all()
+        for record in records:
+            actual = actual_by_id[record.id]
+            record.shipped_to_pw = actual["shipped_to_pw"]
+            record.cancelled_qty = actual["cancelled_qty"]
+            record.final_qty = actual["final_qty"]
+            record.status, record.location = calculate_status_and_location(
+                shipped_to_pw=record.shipped_to_pw,
+                checked_in=record.checked_in,
+                shipped_out=record.shipped_out,
+                final_qty=record.final_qty
+            )
+        db.commit()
+
+    elapsed = time.perf_counter() - started
+    if drift:
+        logger.warning(
+            f"[FULFILLMENT LEDGER] {len(drift)} of {len(rows)} record(s) differ from the ledger"
+            f"{' (rebuilt)' if apply else ''}: " + ", ".join(str(d["purchase_tracker_id"]) for d in drift[:10])
+        )
+    else:
+        logger.info(f"[FULFILLMENT LEDGER] All {len(rows)} records match the ledger ({elapsed:.2f}s)")
+
+    return {
+        "records_checked": len(rows),
+        "drifted": len(drift),
+        "applied": apply,
+        "duration_seconds": round(elapsed, 3),
+        "drift": drift,
+    }
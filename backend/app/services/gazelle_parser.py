@@ -1,6 +1,7 @@
 """
 Gazelle Sports Email Parser
-Parses order confirmation emails from Gazelle Sports using BeautifulSoup
+Parses order confirmation emails from Gazelle Sports using precompiled
+lxml XPath extraction specs (app.services.extraction_spec)
 
 Email Format:
 - From: customercare@gazellesports.com (production)
@@ -26,10 +27,10 @@ Unique ID Extraction:
 import re
 import logging
 from typing import List, Optional
-from bs4 import BeautifulSoup
 from pydantic import BaseModel, Field
 
 from app.models.email import EmailData
+from app.services.extraction_spec import ExtractionSpec, FieldSpec, ItemSpec
 from app.utils.address_utils import normalize_shipping_address
 from app.config.settings import get_settings
 
@@ -70,6 +71,34 @@ class GazelleEmailParser:
     DEV_GAZELLE_ORDER_FROM_EMAIL = "glenallagroupc@gmail.com"
     # Must match Gazelle-specific - avoid broad "order" which matches ASOS shipping, etc.
     DEV_SUBJECT_ORDER_PATTERN = r"(?:Fwd:\s*)?(?:thank\s+you\s+for\s+shopping|gazelle)"
+    
+    # Order confirmation (Shopify notification template). Each product row holds a
+    # cdn.shopify.com/.../products/ image, a "Name × qty" span (font-size:16px;
+    # font-weight:600) and a size span (font-size:14px;color:#999).
+    ORDER_SPEC = ExtractionSpec(
+        fields={
+            # "Order GS169837" anywhere in the text, else the first GS number
+            "order_number": FieldSpec("/*", pattern=(r'Order\s+(GS\d+)', r'(GS\d+)'), flags=re.IGNORECASE, strip=False),
+            "order_summary_heading": FieldSpec("//h3[re:test(., 'Order\\s+summary', 'i')]"),
+            # First <p> after the "Shipping address" heading
+            "shipping_address": FieldSpec(
+                "(//h4[re:test(., 'Shipping\\s+address', 'i')])[1]/descendant::p"
+                " | (//h4[re:test(., 'Shipping\\s+address', 'i')])[1]/following::p",
+                separator=" ",
+            ),
+        },
+        items=ItemSpec(
+            anchors="//img[re:test(@src, 'cdn\\.shopify\\.com.*products/')]",
+            scope=("ancestor::tr[1]",),
+            fields={
+                "image": FieldSpec("$anchor/@src"),
+                "name": FieldSpec(".//span[contains(@style, 'font-size:16px') and contains(@style, 'font-weight:600')]"),
+                "size": FieldSpec(".//span[contains(@style, 'font-size:14px') and contains(@style, 'color:#999')]"),
+            },
+        ),
+    )
+    QUANTITY = re.compile(r'×\s*(\d+)')
+    QUANTITY_SUFFIX = re.compile(r'\s*×\s*\d+\s*$')
 
     def __init__(self):
         """Initialize the Gazelle email parser."""
@@ -98,8 +127,8 @@ class GazelleEmailParser:
 
     def is_gazelle_email(self, email_data: EmailData) -> bool:
         """Check if email is from Gazelle Sports. Exclude ASOS shipping (subject "on its way")."""
-        sender_lower = email_data.sender.lower()
-        subject_lower = (email_data.subject or "").lower()
+        sender_lower = email_data.document.sender_lower
+        subject_lower = email_data.document.subject_lower
         if "on its way" in subject_lower:
             return False
         
@@ -113,7 +142,7 @@ class GazelleEmailParser:
 
     def is_order_confirmation_email(self, email_data: EmailData) -> bool:
         """Check if email is an order confirmation"""
-        subject_lower = email_data.subject.lower()
+        subject_lower = email_data.document.subject_lower
         pattern = self.order_subject_pattern
         
         # Use regex matching for subject pattern
@@ -122,7 +151,7 @@ class GazelleEmailParser:
         
         # For forwarded emails in dev mode, also check HTML content for Gazelle confirmation indicators
         if self.settings.is_development and email_data.html_content:
-            html_lower = email_data.html_content.lower()
+            html_lower = email_data.document.html_lower
             # Check for "Thank you for shopping" or order confirmation indicators
             has_confirmation_text = (
                 'thank you for shopping' in html_lower or
@@ -152,30 +181,38 @@ class GazelleEmailParser:
                 logger.error("No HTML content in Gazelle email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            values = self.ORDER_SPEC.extract(email_data.document.tree)
             
             # Extract order number from HTML
-            order_number = self._extract_order_number(soup)
+            order_number = values["order_number"]
             if not order_number:
                 logger.error("Failed to extract order number from Gazelle email")
                 return None
+            order_number = order_number.upper()
             
             logger.info(f"Extracted Gazelle order number: {order_number}")
             
-            # Extract items using BeautifulSoup
-            items = self._extract_items(soup)
+            # Extract items (product rows in the "Order summary" section)
+            items = []
+            if values["order_summary_heading"]:
+                items = [item for item in map(self._build_item, values["items"]) if item]
+            else:
+                logger.warning("Order summary section not found")
             
             if not items:
                 logger.error("Failed to extract any items from Gazelle email")
                 return None
             
+            items_summary = [f"(ID: {item.unique_id}, Size: {item.size}, Qty: {item.quantity})" for item in items]
+            logger.info(f"[Gazelle] Extracted {len(items)} items: {', '.join(items_summary)}")
             logger.info(f"Successfully extracted {len(items)} items from Gazelle order {order_number}")
             for item in items:
                 logger.debug(f"  - {item}")
             
             # Extract shipping address
-            shipping_address = self._extract_shipping_address(soup)
-            if shipping_address:
+            shipping_address = ""
+            if values["shipping_address"]:
+                shipping_address = normalize_shipping_address(values["shipping_address"])
                 logger.info(f"Extracted shipping address: {shipping_address}")
             
             return GazelleOrderData(order_number=order_number, items=items, shipping_address=shipping_address)
@@ -184,172 +221,43 @@ class GazelleEmailParser:
             logger.error(f"Error parsing Gazelle email: {e}", exc_info=True)
             return None
 
-    def _extract_order_number(self, soup: BeautifulSoup) -> Optional[str]:
-        """
-        Extract order number from Gazelle email HTML.
-        
-        HTML format: 
-        - <span style="font-size:16px"> Order GS169837 </span>
-        
-        Extract: GS169837
-        
-        Args:
-            soup: BeautifulSoup object of email HTML
-        
-        Returns:
-            Order number or None
-        """
-        try:
-            # Method 1: Look for "Order GS" pattern
-            text_content = soup.get_text()
-            match = re.search(r'Order\s+(GS\d+)', text_content, re.IGNORECASE)
-            if match:
-                order_number = match.group(1).upper()
-                logger.debug(f"Found Gazelle order number: {order_number}")
-                return order_number
-            
-            # Method 2: Look for GS pattern directly
-            match = re.search(r'(GS\d+)', text_content, re.IGNORECASE)
-            if match:
-                order_number = match.group(1).upper()
-                logger.debug(f"Found Gazelle order number (fallback): {order_number}")
-                return order_number
-            
-            logger.warning("Order number not found in Gazelle email")
-            return None
-        
-        except Exception as e:
-            logger.error(f"Error extracting Gazelle order number: {e}")
-            return None
-
-    def _extract_items(self, soup: BeautifulSoup) -> List[GazelleOrderItem]:
+    def _build_item(self, record: dict) -> Optional[GazelleOrderItem]:
         """
-        Extract order items from Gazelle email.
-        
-        Gazelle email structure:
-        - Products are in table rows within "Order summary" section
-        - Each product row has:
-          - Image with product ID in URL
-          - Product name with quantity (× 1, × 4, etc.)
-          - Size in a span tag
-        
-        Args:
-            soup: BeautifulSoup object of email HTML
-        
-        Returns:
-            List of GazelleOrderItem objects
-        """
-        items = []
-        
-        try:
-            # Find the "Order summary" section
-            order_summary_header = soup.find('h3', string=re.compile(r'Order\s+summary', re.IGNORECASE))
-            
-            if not order_summary_header:
-                logger.warning("Order summary section not found")
-                return []
-            
-            # Find all product rows - look for table rows with images
-            # Product rows are in tables with product images
-            product_rows = []
-            
-            # Find all images with Shopify CDN URLs (product images)
-            product_images = soup.find_all('img', src=re.compile(r'cdn\.shopify\.com.*products/'))
-            
-            for img in product_images:
-                # Find the parent row (tr) that contains this image
-                row = img.find_parent('tr')
-                if row:
-                    product_rows.append((row, img))
-            
-            # Process each product row
-            for row, img in product_rows:
-                try:
-                    product_details = self._extract_gazelle_product_details(row, img)
-                    
-                    if product_details:
-                        items.append(product_details)
-                
-                except Exception as e:
-                    logger.error(f"Error processing Gazelle product row: {e}")
-                    continue
-            
-            # Log items with ID, size, and quantity
-            if items:
-                items_summary = [f"(ID: {item.unique_id}, Size: {item.size}, Qty: {item.quantity})" for item in items]
-                logger.info(f"[Gazelle] Extracted {len(items)} items: {', '.join(items_summary)}")
-            
-            return items
-        
-        except Exception as e:
-            logger.error(f"Error extracting Gazelle items: {e}", exc_info=True)
-            return []
-
-    def _extract_gazelle_product_details(self, row, img) -> Optional[GazelleOrderItem]:
-        """
-        Extract product details from a Gazelle product row.
+        Build an order item from an ORDER_SPEC item record.
         
         Returns:
             GazelleOrderItem object or None
         """
         try:
-            details = {}
-            
             # Extract unique ID from image URL
             # Pattern: .../products/110395_405_L_Levitate_6_compact_cropped.jpg
             # Extract: 110395_405
-            img_src = img.get('src', '')
+            img_src = record["image"] or ""
             unique_id = self._extract_unique_id_from_image(img_src)
             
             if not unique_id:
                 logger.warning(f"Unique ID not found in image URL: {img_src[:100]}")
                 return None
             
-            details['unique_id'] = unique_id
-            logger.debug(f"Found unique ID: {unique_id}")
-            
-            # Extract product name and quantity
             # Product name format: "Men's Levitate 6 Running Shoe - Classic Blue/Orange - Regular (D) × 1"
-            row_text = row.get_text()
-            
-            # Find product name span (font-size:16px, font-weight:600)
-            product_name_span = row.find('span', style=lambda x: x and 'font-size:16px' in str(x) and 'font-weight:600' in str(x))
-            if product_name_span:
-                product_name_with_qty = product_name_span.get_text(strip=True)
-                
-                # Extract quantity from product name (× 1, × 4, etc.)
-                qty_match = re.search(r'×\s*(\d+)', product_name_with_qty)
-                if qty_match:
-                    quantity = int(qty_match.group(1))
-                else:
-                    quantity = 1
-                    logger.debug("Quantity not found in product name, defaulting to 1")
-                
-                # Remove quantity from product name
-                product_name = re.sub(r'\s*×\s*\d+\s*$', '', product_name_with_qty).strip()
-                details['product_name'] = product_name
-                details['quantity'] = quantity
-                logger.debug(f"Found product name: {product_name}, quantity: {quantity}")
-            else:
+            product_name_with_qty = record["name"]
+            if not product_name_with_qty:
                 logger.warning("Product name not found in row")
                 return None
             
-            # Extract size
-            # Size is in a span with font-size:14px and color:#999
-            size_span = row.find('span', style=lambda x: x and 'font-size:14px' in str(x) and 'color:#999' in str(x))
-            if size_span:
-                size = size_span.get_text(strip=True)
-                details['size'] = size
-                logger.debug(f"Found size: {size}")
-            else:
+            qty_match = self.QUANTITY.search(product_name_with_qty)
+            quantity = int(qty_match.group(1)) if qty_match else 1
+            product_name = self.QUANTITY_SUFFIX.sub('', product_name_with_qty).strip()
+            
+            if not record["size"]:
                 logger.warning("Size not found in row")
                 return None
             
             return GazelleOrderItem(
-                unique_id=details['unique_id'],
-                size=details['size'],
-                quantity=details['quantity'],
-                product_name=details['product_name']
+                unique_id=unique_id,
+                size=record["size"],
+                quantity=quantity,
+                product_name=product_name
             )
             
         except Exception as e:
@@ -388,35 +296,3 @@ class GazelleEmailParser:
         except Exception as e:
             logger.error(f"Error extracting unique ID from URL: {e}")
             return None
-    
-    def _extract_shipping_address(self, soup: BeautifulSoup) -> str:
-        """
-        Extract shipping address from email and normalize it.
-        
-        Args:
-            soup: BeautifulSoup object of email HTML
-        
-        Returns:
-            Normalized shipping address or empty string
-        """
-        try:
-            # Look for "Shipping address" header
-            shipping_header = soup.find('h4', string=re.compile(r'Shipping\s+address', re.IGNORECASE))
-            
-            if shipping_header:
-                # Find the address text in the next p tag
-                address_p = shipping_header.find_next('p')
-                if address_p:
-                    # Get address text, handling <br> tags
-                    address_text = address_p.get_text(separator=' ', strip=True)
-                    
-                    if address_text:
-                        normalized = normalize_shipping_address(address_text)
-                        logger.debug(f"Extracted shipping address: {normalized}")
-                        return normalized
-            
-            return ""
-        
-        except Exception as e:
-            logger.error(f"Error extracting shipping address: {e}", exc_info=True)
-            return ""
@@ -0,0 +1,139 @@
+"""
+Gmail history checkpoint (gmail_history_checkpoint) shared by the webhook workers.
+
+A Pub/Sub notification is handled by listing the mailbox history from the
+stored history ID. The cursor lives in Postgres, one row per mailbox, so every
+uvicorn worker and container reads and advances the same value.
+
+advance_history_id() is a single compare-and-swap statement:
+
+    INSERT ... ON CONFLICT (mailbox) DO UPDATE ... WHERE stored < new
+
+It only ever moves the cursor forward: a worker finishing a shorter history
+range after another one finished a longer range cannot move it back (which
+would make the next notification read the range again), and no lock is held
+while Gmail is called. It is used when a range holds nothing to queue.
+
+A range with messages to queue is claimed with claim_history_range(), a
+compare-and-swap on the exact value the range was read from:
+
+    UPDATE ... SET history_id = :to WHERE mailbox = :mailbox AND history_id = :from
+
+Of two workers (or containers) that read overlapping ranges from the same
+checkpoint, only the one whose claim succeeds queues the messages; the other
+re-reads the history from the new checkpoint. A worker that cannot queue its
+claimed messages hands the range back with release_history_range().
+"""
+
+import logging
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Mailbox key when a notification carries no emailAddress (the token's own mailbox)
+DEFAULT_MAILBOX = "me"
+
+_LOAD_SQL = text("""
+    SELECT history_id FROM gmail_history_checkpoint WHERE mailbox = :mailbox
+""")
+
+_ADVANCE_SQL = text("""
+    INSERT INTO gmail_history_checkpoint (mailbox, history_id, updated_at)
+    VALUES (:mailbox, :history_id, now())
+    ON CONFLICT (mailbox) DO UPDATE SET
+        history_id = EXCLUDED.history_id,
+        updated_at = now()
+    WHERE gmail_history_checkpoint.history_id < EXCLUDED.history_id
+    RETURNING history_id
+""")
+
+
+_CLAIM_SQL = text("""
+    UPDATE gmail_history_checkpoint
+    SET history_id = :to_history_id, updated_at = now()
+    WHERE mailbox = :mailbox AND history_id = :from_history_id
+    RETURNING history_id
+""")
+
+
+def mailbox_key(email_address: Optional[str]) -> str:
+    """Checkpoint key of a mailbox (notification emailAddress, lower case)."""
+    return (email_address or DEFAULT_MAILBOX).strip().lower()
+
+
+def load_history_id(db: Session, mailbox: str) -> Optional[str]:
+    """Return the stored history ID of the mailbox, or None if there is none yet."""
+    row = db.execute(_LOAD_SQL, {"mailbox": mailbox}).first()
+    return str(row.history_id) if row else None
+
+
+def advance_history_id(db: Session, mailbox: str, history_id) -> bool:
+    """
+    Store history_id for the mailbox if it is newer than the stored one, and commit.
+
+    Args:
+        db: Database session
+        mailbox: Checkpoint key (mailbox_key())
+        history_id: Gmail history ID (str or int)
+
+    Returns:
+        True if the checkpoint moved (or was created), False if the stored value
+        was already at or past history_id
+    """
+    try:
+        value = int(history_id)
+    except (TypeError, ValueError):
+        logger.warning(f"[HISTORY CHECKPOINT] Ignoring invalid history ID {history_id!r} for {mailbox}")
+        return False
+    row = db.execute(_ADVANCE_SQL, {"mailbox": mailbox, "history_id": value}).first()
+    db.commit()
+    if row is None:
+        logger.debug(f"[HISTORY CHECKPOINT] {mailbox} already at or past {value}, not moved")
+        return False
+    return True
+
+
+def claim_history_range(db: Session, mailbox: str, from_history_id, to_history_id) -> bool:
+    """
+    Move the checkpoint from from_history_id to to_history_id if it is still at from_history_id, and commit.
+
+    Args:
+        db: Database session
+        mailbox: Checkpoint key (mailbox_key())
+        from_history_id: Stored history ID the range was read from
+        to_history_id: History ID at the end of the range
+
+    Returns:
+        True if this caller claimed the range (queue its messages), False if
+        another worker moved the checkpoint first (re-read from the stored value)
+    """
+    try:
+        params = {"mailbox": mailbox, "from_history_id": int(from_history_id), "to_history_id": int(to_history_id)}
+    except (TypeError, ValueError):
+        logger.warning(
+            f"[HISTORY CHECKPOINT] Ignoring invalid history range {from_history_id!r}..{to_history_id!r} for {mailbox}"
+        )
+        return False
+    row = db.execute(_CLAIM_SQL, params).first()
+    db.commit()
+    if row is None:
+        logger.info(
+            f"[HISTORY CHECKPOINT] {mailbox} moved past {from_history_id} before the claim "
+            f"of ..{to_history_id}, not claimed"
+        )
+        return False
+    return True
+
+
+def release_history_range(db: Session, mailbox: str, from_history_id, to_history_id) -> bool:
+    """
+    Hand back a claimed range: move the checkpoint from to_history_id back to from_history_id.
+
+    Returns:
+        False if another worker already claimed the following range; the messages
+        of the released range are then only picked up by a backfill
+    """
+    return claim_history_range(db, mailbox, to_history_id, from_history_id)
@@ -0,0 +1,163 @@
+"""
+Best-effort Gmail labeling off the email processing path.
+
+Which emails were processed is recorded in the processed_message table
+(app/services/processed_messages.py); the Gmail labels (Retailer-Order/Processed,
+Retailer-Shipping/Error, ...) are only there for people looking at the mailbox.
+The processors therefore hand label changes to this queue instead of calling
+Gmail themselves:
+
+- submit() never blocks; when the queue is full the change is dropped and
+  logged (the registry already holds the outcome).
+- A single daemon thread drains the queue and applies the changes with the
+  Gmail HTTP batch endpoint, grouping messages that get the same labels, so a
+  burst of emails costs a few batch calls instead of one or two calls each.
+- The thread owns its own GmailService (the googleapiclient transport is not
+  thread-safe).
+"""
+
+import logging
+import queue
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Sentinel placed on the queue to stop the labeling thread
+_STOP = object()
+
+# Label changes applied per round (one modify_labels_batch call per distinct change)
+_MAX_CHANGES_PER_ROUND = 500
+
+
+class GmailLabeler:
+    """
+    Background queue of Gmail label changes.
+
+    Args:
+        queue_size: Maximum number of label changes waiting to be applied
+    """
+
+    def __init__(self, queue_size: int = 1000):
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, queue_size))
+        self._lock = threading.Lock()
+        self._shutdown = False
+        self._stats = {'labeled': 0, 'failed': 0, 'dropped': 0}
+        self._thread = threading.Thread(target=self._worker_loop, name="gmail-labeler", daemon=True)
+        self._thread.start()
+
+    def submit(
+        self,
+        message_id: str,
+        add_label_ids: Optional[Sequence[str]] = None,
+        remove_label_ids: Optional[Sequence[str]] = None
+    ) -> bool:
+        """
+        Queue a label change for a message without blocking.
+
+        Returns:
+            True if queued, False if the queue is full or the labeler is stopped
+        """
+        add = tuple(label_id for label_id in (add_label_ids or ()) if label_id)
+        remove = tuple(label_id for label_id in (remove_label_ids or ()) if label_id)
+        if not add and not remove:
+            return True
+        with self._lock:
+            if not self._shutdown:
+                try:
+                    self._queue.put_nowait((message_id, add, remove))
+                    return True
+                except queue.Full:
+                    pass
+            self._stats['dropped'] += 1
+        logger.warning(f"Gmail label queue full or stopped, not labeling message {message_id}")
+        return False
+
+    def stats(self) -> Dict[str, int]:
+        """Return the queue depth and lifetime counters."""
+        with self._lock:
+            return {'queued': self._queue.qsize(), **self._stats}
+
+    def shutdown(self, wait: bool = True, timeout: Optional[float] = None) -> None:
+        """
+        Stop accepting label changes and apply the ones already queued.
+
+        Args:
+            wait: Wait for the labeling thread to finish
+            timeout: Maximum seconds to wait
+        """
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+        self._queue.put(_STOP)
+        if wait:
+            self._thread.join(timeout)
+        logger.info("Gmail labeler stopped")
+
+    def _worker_loop(self) -> None:
+        """Apply queued label changes in rounds until the stop sentinel arrives."""
+        while True:
+            changes = [self._queue.get()]
+            # Drain what is already waiting so it goes out in the same batch calls
+            while len(changes) < _MAX_CHANGES_PER_ROUND:
+                try:
+                    changes.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = any(change is _STOP for change in changes)
+            try:
+                self._apply([change for change in changes if change is not _STOP])
+            except Exception as e:
+                logger.error(f"Error applying Gmail labels: {e}", exc_info=True)
+            finally:
+                for _ in changes:
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _apply(self, changes: List[Tuple[str, Tuple[str, ...], Tuple[str, ...]]]) -> None:
+        """Apply one round of label changes, one batch call per distinct (add, remove) pair."""
+        if not changes:
+            return
+        from app.services.parser_registry import get_gmail_service
+
+        groups: Dict[Tuple[Tuple[str, ...], Tuple[str, ...]], List[str]] = {}
+        for message_id, add, remove in changes:
+            message_ids = groups.setdefault((add, remove), [])
+            if message_id not in message_ids:
+                message_ids.append(message_id)
+
+        gmail_service = get_gmail_service()
+        for (add, remove), message_ids in groups.items():
+            result = gmail_service.modify_labels_batch(
+                message_ids,
+                add_label_ids=list(add) or None,
+                remove_label_ids=list(remove) or None
+            )
+            with self._lock:
+                self._stats['labeled'] += len(result.responses)
+                self._stats['failed'] += len(result.errors)
+
+
+_labeler: Optional[GmailLabeler] = None
+_labeler_lock = threading.Lock()
+
+
+def get_gmail_labeler() -> GmailLabeler:
+    """Return the process-wide Gmail labeler, starting it on first use."""
+    global _labeler
+    with _labeler_lock:
+        if _labeler is None:
+            from app.config import get_settings
+            _labeler = GmailLabeler(queue_size=get_settings().gmail_label_queue_size)
+        return _labeler
+
+
+def shutdown_gmail_labeler(wait: bool = True, timeout: Optional[float] = 30.0) -> None:
+    """Stop the Gmail labeler (if started), applying the label changes already queued."""
+    global _labeler
+    with _labeler_lock:
+        labeler, _labeler = _labeler, None
+    if labeler is not None:
+        labeler.shutdown(wait=wait, timeout=timeout)
@@ -5,7 +5,10 @@ Gmail API service for interacting with Gmail.
 import base64
 import logging
 import os.path
-from typing import Any, Dict, List, Optional
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
 
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
@@ -18,10 +21,95 @@ from app.models.email import EmailData
 
 logger = logging.getLogger(__name__)
 
+# Gmail accepts up to 100 calls per HTTP batch, but recommends staying at or
+# below 50 to avoid per-user rate limiting (429) on the sub-requests.
+GMAIL_BATCH_CHUNK_SIZE = 50
+
+# Sub-request statuses that are worth retrying in a follow-up batch
+_RETRYABLE_BATCH_STATUSES = {429, 500, 503}
+_BATCH_MAX_RETRIES = 2
+_BATCH_RETRY_BACKOFF_SECONDS = 1.0
+
+_NEW_LABEL_BODY = {
+    'messageListVisibility': 'show',
+    'labelListVisibility': 'labelShow'
+}
+
+
+@dataclass
+class GmailBatchResult:
+    """
+    Result of a batched Gmail call.
+
+    Attributes:
+        responses: Successful responses keyed by message ID
+        errors: Error description keyed by message ID for failed sub-requests
+    """
+    responses: Dict[str, Any] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def succeeded(self) -> List[str]:
+        """Message IDs whose sub-request succeeded."""
+        return list(self.responses.keys())
+
+    @property
+    def failed(self) -> List[str]:
+        """Message IDs whose sub-request failed."""
+        return list(self.errors.keys())
+
+
+def _chunked(items: List[str], size: int) -> List[List[str]]:
+    """Split a list into consecutive chunks of at most `size` items."""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _is_missing_label_error(error: Any) -> bool:
+    """True if a Gmail error says a label ID no longer exists (deleted or renamed label)."""
+    text = str(error)
+    return "HttpError 404" in text or "invalid label" in text.lower()
+
+
+class GmailLabelCache:
+    """
+    Label name -> label dict map for the mailbox, shared by every GmailService.
+
+    Loaded with a single labels.list call and reloaded once older than the TTL
+    (settings.gmail_label_cache_ttl_seconds) or after invalidate().
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self._labels: Dict[str, Dict[str, Any]] = {}
+        self._loaded_at: Optional[float] = None
+
+    def is_fresh(self, ttl_seconds: float) -> bool:
+        """True if the labels were loaded less than ttl_seconds ago."""
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < ttl_seconds
+
+    def get(self, label_name: str) -> Optional[Dict[str, Any]]:
+        return self._labels.get(label_name)
+
+    def replace(self, labels: List[Dict[str, Any]]) -> None:
+        """Replace the cached labels with a fresh labels.list result."""
+        self._labels = {label['name']: label for label in labels}
+        self._loaded_at = time.monotonic()
+
+    def add(self, label: Dict[str, Any]) -> None:
+        """Record a label created after the last load."""
+        self._labels[label['name']] = label
+
+    def invalidate(self) -> None:
+        """Force a reload on the next lookup."""
+        self._loaded_at = None
+
 
 class GmailService:
     """Service class for Gmail API operations."""
     
+    # One mailbox per process (settings.gmail_token_path), so every instance shares the labels
+    _label_cache = GmailLabelCache()
+    
     def __init__(self):
         """Initialize Gmail service with authentication."""
         self.settings = get_settings()
@@ -185,7 +273,162 @@ class GmailService:
             logger.error(f"Error fetching sender for message {message_id}: {error}")
             return None
 
-    def parse_message_to_email_data(self, message: Dict[str, Any]) -> EmailData:
+    def _execute_batch(self, message_ids: List[str], build_request) -> GmailBatchResult:
+        """
+        Run one Gmail call per message ID through the HTTP batch endpoint.
+
+        IDs are sent in chunks of GMAIL_BATCH_CHUNK_SIZE. Sub-requests that fail
+        with a retryable status (429/5xx) are retried in a follow-up batch with
+        a short backoff; every other failure is reported per message ID.
+
+        Args:
+            message_ids: Message IDs to operate on (duplicates are ignored)
+            build_request: Callable taking a message ID and returning an
+                unexecuted googleapiclient request
+
+        Returns:
+            GmailBatchResult with per-message responses and errors
+        """
+        result = GmailBatchResult()
+        pending = list(dict.fromkeys(mid for mid in message_ids if mid))
+
+        for attempt in range(_BATCH_MAX_RETRIES + 1):
+            if not pending:
+                break
+            if attempt > 0:
+                time.sleep(_BATCH_RETRY_BACKOFF_SECONDS * attempt)
+                logger.debug(f"Retrying {len(pending)} rate-limited Gmail batch sub-request(s) (attempt {attempt + 1})")
+
+            retry: List[str] = []
+
+            def _callback(request_id, response, exception):
+                if exception is None:
+                    result.responses[request_id] = response
+                    result.errors.pop(request_id, None)
+                    return
+                status = getattr(getattr(exception, "resp", None), "status", None)
+                if status in _RETRYABLE_BATCH_STATUSES and attempt < _BATCH_MAX_RETRIES:
+                    retry.append(request_id)
+                result.errors[request_id] = str(exception)
+
+            for chunk in _chunked(pending, GMAIL_BATCH_CHUNK_SIZE):
+                batch = self.service.new_batch_http_request(callback=_callback)
+                for message_id in chunk:
+                    batch.add(build_request(message_id), request_id=message_id)
+                try:
+                    batch.execute()
+                except HttpError as error:
+                    # The whole batch request failed (not an individual sub-request)
+                    logger.error(f"Gmail batch request failed for {len(chunk)} message(s): {error}")
+                    for message_id in chunk:
+                        result.errors[message_id] = str(error)
+
+            pending = retry
+
+        if result.errors:
+            logger.warning(f"Gmail batch: {len(result.responses)} succeeded, {len(result.errors)} failed")
+        return result
+
+    def get_messages_batch(
+        self,
+        message_ids: List[str],
+        format: str = 'full',
+        metadata_headers: Optional[List[str]] = None
+    ) -> GmailBatchResult:
+        """
+        Retrieve many messages using the Gmail HTTP batch endpoint.
+
+        Args:
+            message_ids: IDs of the messages to retrieve
+            format: The format of the messages ('full', 'raw', 'metadata', 'minimal')
+            metadata_headers: Headers to include when format is 'metadata'
+
+        Returns:
+            GmailBatchResult mapping message ID to message dict (or error)
+        """
+        messages = self.service.users().messages()
+
+        def _build(message_id: str):
+            params: Dict[str, Any] = {'userId': 'me', 'id': message_id, 'format': format}
+            if format == 'metadata' and metadata_headers:
+                params['metadataHeaders'] = metadata_headers
+            return messages.get(**params)
+
+        result = self._execute_batch(message_ids, _build)
+        logger.debug(f"Batch-retrieved {len(result.responses)}/{len(message_ids)} messages (format={format})")
+        return result
+
+    def get_message_senders_batch(self, message_ids: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Fetch only the From header for many messages (metadata-only, batched).
+
+        Args:
+            message_ids: IDs of the messages to inspect
+
+        Returns:
+            Dict of message ID -> raw 'From' header ('' if missing, None on error)
+        """
+        result = self.get_messages_batch(message_ids, format='metadata', metadata_headers=['From'])
+        senders: Dict[str, Optional[str]] = {}
+        for message_id in message_ids:
+            message = result.responses.get(message_id)
+            if message is None:
+                senders[message_id] = None
+                continue
+            headers = {
+                h['name']: h['value']
+                for h in message.get('payload', {}).get('headers', [])
+            }
+            senders[message_id] = headers.get('From', '')
+        for message_id, error in result.errors.items():
+            logger.error(f"Error fetching sender for message {message_id}: {error}")
+        return senders
+
+    def modify_labels_batch(
+        self,
+        message_ids: List[str],
+        add_label_ids: Optional[List[str]] = None,
+        remove_label_ids: Optional[List[str]] = None
+    ) -> GmailBatchResult:
+        """
+        Add and/or remove labels on many messages using the Gmail HTTP batch endpoint.
+
+        Unlike users.messages.batchModify, each message is modified by its own
+        sub-request so failures are reported per message ID.
+
+        Args:
+            message_ids: Gmail message IDs to modify
+            add_label_ids: Label IDs to add
+            remove_label_ids: Label IDs to remove
+
+        Returns:
+            GmailBatchResult with the modified message IDs and per-message errors
+        """
+        body: Dict[str, List[str]] = {}
+        if add_label_ids:
+            body['addLabelIds'] = list(add_label_ids)
+        if remove_label_ids:
+            body['removeLabelIds'] = list(remove_label_ids)
+        if not body or not message_ids:
+            return GmailBatchResult()
+
+        messages = self.service.users().messages()
+        result = self._execute_batch(
+            message_ids,
+            lambda message_id: messages.modify(userId='me', id=message_id, body=body),
+        )
+        for message_id, error in result.errors.items():
+            logger.error(f"Error modifying labels on message {message_id}: {error}")
+        if any(_is_missing_label_error(error) for error in result.errors.values()):
+            self.invalidate_label_cache()
+        logger.debug(
+            f"Batch-modified labels on {len(result.responses)}/{len(message_ids)} messages "
+            f"(add={add_label_ids or []}, remove={remove_label_ids or []})"
+        )
+        return result
+
+    @staticmethod
+    def parse_message_to_email_data(message: Dict[str, Any]) -> EmailData:
         """
         Parse Gmail API message format to EmailData model.
         
@@ -201,8 +444,8 @@ class GmailService:
         }
         
         # Extract HTML and text content
-        html_content = self._extract_html_content(message.get('payload', {}))
-        text_content = self._extract_text_content(message.get('payload', {}))
+        html_content = GmailService._extract_html_content(message.get('payload', {}))
+        text_content = GmailService._extract_text_content(message.get('payload', {}))
         
         return EmailData(
             message_id=message['id'],
@@ -219,7 +462,8 @@ class GmailService:
             labels=message.get('labelIds', [])
         )
     
-    def _extract_html_content(self, payload: Dict[str, Any]) -> Optional[str]:
+    @staticmethod
+    def _extract_html_content(payload: Dict[str, Any]) -> Optional[str]:
         """
         Extract HTML content from message payload.
         
@@ -238,7 +482,7 @@ class GmailService:
                 
                 # Check nested parts (multipart messages)
                 if 'parts' in part:
-                    html = self._extract_html_content(part)
+                    html = GmailService._extract_html_content(part)
                     if html:
                         return html
         
@@ -250,7 +494,8 @@ class GmailService:
         
         return None
     
-    def _extract_text_content(self, payload: Dict[str, Any]) -> Optional[str]:
+    @staticmethod
+    def _extract_text_content(payload: Dict[str, Any]) -> Optional[str]:
         """
         Extract plain text content from message payload.
         
@@ -269,7 +514,7 @@ class GmailService:
                 
                 # Check nested parts
                 if 'parts' in part:
-                    text = self._extract_text_content(part)
+                    text = GmailService._extract_text_content(part)
                     if text:
                         return text
         
@@ -423,36 +668,69 @@ class GmailService:
         Returns:
             Label dictionary with 'id' and 'name' keys, or None if failed
         """
-        try:
-            # List all labels
-            results = self.service.users().labels().list(userId='me').execute()
-            labels = results.get('labels', [])
-            
-            # Check if label exists
-            for label in labels:
-                if label['name'] == label_name:
-                    logger.debug(f"Label '{label_name}' already exists")
-                    return label
-            
-            # Create label if it doesn't exist
-            label_object = {
-                'name': label_name,
-                'messageListVisibility': 'show',
-                'labelListVisibility': 'labelShow'
-            }
+        return self.get_or_create_labels([label_name])[label_name]
+    
+    def get_or_create_labels(self, label_names: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Get or create several Gmail labels, resolving names from the shared label cache.
+        
+        The mailbox's labels are listed once per TTL (settings.gmail_label_cache_ttl_seconds)
+        instead of on every lookup; only names missing from the listing are created.
+        
+        Args:
+            label_names: Label names (can include "/" for nested labels)
+        
+        Returns:
+            Dictionary mapping each name to its label dictionary ('id', 'name'), or None if failed
+        """
+        cache = self._label_cache
+        resolved: Dict[str, Optional[Dict[str, Any]]] = {}
+        with cache.lock:
+            if not cache.is_fresh(self.settings.gmail_label_cache_ttl_seconds):
+                try:
+                    results = self.service.users().labels().list(userId='me').execute()
+                    cache.replace(results.get('labels', []))
+                    logger.debug(f"Loaded {len(results.get('labels', []))} Gmail labels")
+                except HttpError as error:
+                    logger.error(f"Error listing Gmail labels: {error}")
+                    return {name: None for name in label_names}
             
+            for label_name in label_names:
+                label = cache.get(label_name)
+                if label is None:
+                    label = self._create_label(label_name)
+                    if label is not None:
+                        cache.add(label)
+                resolved[label_name] = label
+        return resolved
+    
+    def _create_label(self, label_name: str) -> Optional[Dict[str, Any]]:
+        """Create a label (or fetch it if another process created it since the last listing)."""
+        try:
             created_label = self.service.users().labels().create(
                 userId='me',
-                body=label_object
+                body={'name': label_name, **_NEW_LABEL_BODY}
             ).execute()
             
             logger.info(f"Created label: {label_name} (ID: {created_label['id']})")
             return created_label
         
         except HttpError as error:
+            if getattr(error.resp, 'status', None) == 409:
+                # Label already exists: created elsewhere after our listing
+                try:
+                    results = self.service.users().labels().list(userId='me').execute()
+                    self._label_cache.replace(results.get('labels', []))
+                    return self._label_cache.get(label_name)
+                except HttpError as list_error:
+                    error = list_error
             logger.error(f"Error creating/getting label '{label_name}': {error}")
             return None
     
+    def invalidate_label_cache(self) -> None:
+        """Drop the cached labels so the next lookup lists them again."""
+        self._label_cache.invalidate()
+    
     def add_label_to_message(self, message_id: str, label_id: str) -> bool:
         """
         Add a label to a Gmail message.
@@ -476,6 +754,8 @@ class GmailService:
         
         except HttpError as error:
             logger.error(f"Error adding label to message: {error}")
+            if _is_missing_label_error(error):
+                self.invalidate_label_cache()
             return False
     
     def remove_label_from_message(self, message_id: str, label_id: str) -> bool:
@@ -501,6 +781,8 @@ class GmailService:
         
         except HttpError as error:
             logger.error(f"Error removing label from message: {error}")
+            if _is_missing_label_error(error):
+                self.invalidate_label_cache()
             return False
     
     def list_messages_with_query(
@@ -543,3 +825,44 @@ class GmailService:
             logger.error(f"Error searching messages: {error}")
             return []
 
+    def iter_message_id_pages(
+        self,
+        query: str,
+        page_size: int = 100,
+        raise_errors: bool = False
+    ) -> Iterator[List[str]]:
+        """
+        Page through the message IDs matching a Gmail search query, newest first.
+        
+        Yields one list of IDs per messages.list page until the results (or the
+        caller) run out, so callers filtering the IDs can keep reading past
+        messages they skip.
+        
+        Args:
+            query: Gmail search query
+            page_size: Messages per page (Gmail allows up to 500)
+            raise_errors: Raise HttpError instead of logging it and stopping
+                (for callers that must tell "no more results" from a failure)
+        """
+        page_token = None
+        while True:
+            try:
+                results = self.service.users().messages().list(
+                    userId='me',
+                    q=query,
+                    maxResults=min(max(1, page_size), 500),
+                    pageToken=page_token
+                ).execute()
+            except HttpError as error:
+                if raise_errors:
+                    raise
+                logger.error(f"Error searching messages: {error}")
+                return
+            
+            message_ids = [msg['id'] for msg in results.get('messages', [])]
+            if message_ids:
+                yield message_ids
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                return
+
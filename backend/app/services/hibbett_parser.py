@@ -128,13 +128,13 @@ class HibbettEmailParser:
 
     def is_hibbett_email(self, email_data: EmailData) -> bool:
         """Check if email is from Hibbett"""
-        sender_lower = email_data.sender.lower()
+        sender_lower = email_data.document.sender_lower
         
         # In development, check for forwarded emails from dev email address
         # Must also verify content to avoid misclassifying other retailers' forwarded emails
         if self.settings.is_development:
             if self.DEV_HIBBETT_ORDER_FROM_EMAIL.lower() in sender_lower:
-                html = (email_data.html_content or "").lower()
+                html = email_data.document.html_lower
                 if "hibbett" in html:
                     return True
                 return False
@@ -147,7 +147,7 @@ class HibbettEmailParser:
 
     def is_order_confirmation_email(self, email_data: EmailData) -> bool:
         """Check if email is an order confirmation"""
-        subject_lower = email_data.subject.lower()
+        subject_lower = email_data.document.subject_lower
         
         # Use environment-aware subject pattern
         if re.search(self.order_subject_pattern, subject_lower, re.IGNORECASE):
@@ -161,14 +161,14 @@ class HibbettEmailParser:
 
     def is_shipping_email(self, email_data: EmailData) -> bool:
         """Check if email is a shipping notification (handles dev Fwd: prefix)"""
-        subject_lower = (email_data.subject or "").lower()
+        subject_lower = email_data.document.subject_lower
         if self.settings.is_development and re.search(self.DEV_SUBJECT_SHIPPING_PATTERN, subject_lower, re.IGNORECASE):
             return True
         return self.SUBJECT_SHIPPING_PATTERN.lower() in subject_lower
 
     def is_cancellation_email(self, email_data: EmailData) -> bool:
         """Check if email is a cancellation notification"""
-        subject_lower = email_data.subject.lower()
+        subject_lower = email_data.document.subject_lower
         
         # Check subject patterns (handle both "cancelled" and "canceled" spellings)
         cancellation_patterns = [
@@ -193,7 +193,7 @@ class HibbettEmailParser:
         # Also check email body content for cancellation indicators
         # This helps when the subject might be different (e.g., forwarded emails)
         if email_data.html_content:
-            html_lower = email_data.html_content.lower()
+            html_lower = email_data.document.html_lower
             cancellation_indicators = [
                 "your recent order has been cancelled",
                 "your order has been cancelled",
@@ -228,7 +228,7 @@ class HibbettEmailParser:
                 logger.error("No HTML content in Hibbett email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Extract order number
             order_number = self._extract_order_number(soup)
@@ -553,7 +553,7 @@ class HibbettEmailParser:
                 logger.error("No HTML content in Hibbett shipping email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Extract order number
             order_number = self._extract_order_number(soup)
@@ -594,7 +594,7 @@ class HibbettEmailParser:
             html_content = email_data.html_content
             if not html_content:
                 return None
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             order_number = self._extract_order_number(soup)
             if not order_number:
                 return None
@@ -669,7 +669,7 @@ class HibbettEmailParser:
                 logger.error("No HTML content in Hibbett cancellation email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Extract order number
             order_number = self._extract_order_number(soup)
@@ -130,7 +130,7 @@ class JDSportsEmailParser:
 
     def is_jdsports_email(self, email_data: EmailData) -> bool:
         """Check if email is from JD Sports"""
-        sender_lower = email_data.sender.lower()
+        sender_lower = email_data.document.sender_lower
         
         # In development, check for forwarded emails from dev email address
         if self.settings.is_development:
@@ -144,14 +144,14 @@ class JDSportsEmailParser:
         """Check if email is an order confirmation"""
         if self.is_shipping_email(email_data) or self.is_cancellation_email(email_data):
             return False
-        subject_lower = email_data.subject.lower()
+        subject_lower = email_data.document.subject_lower
         return bool(re.search(self.order_subject_pattern, subject_lower, re.IGNORECASE))
 
     def is_shipping_email(self, email_data: EmailData) -> bool:
         """Check if email is a shipping/order update (same template as Finish Line)."""
         if not self.is_jdsports_email(email_data):
             return False
-        subject_lower = email_data.subject.lower()
+        subject_lower = email_data.document.subject_lower
         if self.settings.is_development:
             return bool(re.search(self.DEV_SUBJECT_SHIPPING_PATTERN, subject_lower, re.IGNORECASE))
         return bool(re.search(self.SUBJECT_SHIPPING_PATTERN, subject_lower, re.IGNORECASE))
@@ -162,7 +162,7 @@ class JDSportsEmailParser:
             return False
         if self.is_shipping_email(email_data):
             return False
-        subject_lower = email_data.subject.lower()
+        subject_lower = email_data.document.subject_lower
         if self.settings.is_development:
             return bool(re.search(self.DEV_SUBJECT_CANCELLATION_PATTERN, subject_lower, re.IGNORECASE))
         return bool(re.search(self.SUBJECT_CANCELLATION_PATTERN, subject_lower, re.IGNORECASE))
@@ -200,7 +200,7 @@ class JDSportsEmailParser:
                 logger.error("No HTML content in JD Sports email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Extract order number from email content
             order_number = self._extract_order_number(soup, email_data.subject)
@@ -0,0 +1,148 @@
+"""
+Lead-to-ASIN links (lead_asin) and the compatibility layer for the old
+oa_sourcing.asin1_id..asin15_id columns.
+
+lead_asin is the source of truth for which ASINs a lead buys: one row per
+link with its 1-based display position and recommended quantity, and no cap
+on the number of links. Writes go through link_asin() / unlink_asin(), which
+also mirror positions 1-15 into the asinN_id / asinN_recommended_quantity
+columns so that scripts and reports still reading those keep working until
+the columns are dropped. Rows written straight to the wide columns (CSV
+import) are picked up by rerunning migrations/create_lead_asin_table.sql.
+"""
+
+import logging
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session, joinedload
+
+from app.models.database import AsinBank, LeadAsin, OASourcing
+
+logger = logging.getLogger(__name__)
+
+# Positions mirrored into oa_sourcing.asinN_id / asinN_recommended_quantity
+LEGACY_ASIN_SLOTS = range(1, 16)
+
+
+def _mirror_slot(lead: OASourcing, position: int, asin_bank_id: Optional[int], recommended_quantity: Optional[int]) -> None:
+    """Write a position to the legacy asinN columns (positions past 15 have none)."""
+    if position in LEGACY_ASIN_SLOTS:
+        setattr(lead, f'asin{position}_id', asin_bank_id)
+        setattr(lead, f'asin{position}_recommended_quantity', recommended_quantity)
+
+
+def get_link(lead: OASourcing, position: int) -> Optional[LeadAsin]:
+    """The lead's link at position, if any."""
+    for link in lead.asin_links:
+        if link.position == position:
+            return link
+    return None
+
+
+def find_link_to_asin(lead: OASourcing, asin_bank_id: int) -> Optional[LeadAsin]:
+    """The lead's link to an AsinBank row, if any."""
+    for link in lead.asin_links:
+        if link.asin_bank_id == asin_bank_id:
+            return link
+    return None
+
+
+def next_free_position(lead: OASourcing) -> int:
+    """Lowest position without a link (gaps left by unlink_asin are reused first)."""
+    taken = {link.position for link in lead.asin_links}
+    position = 1
+    while position in taken:
+        position += 1
+    return position
+
+
+def link_asin(
+    lead: OASourcing,
+    asin_bank_id: int,
+    recommended_quantity: Optional[int],
+    position: Optional[int] = None
+) -> LeadAsin:
+    """
+    Link an AsinBank row to a lead (or replace the link at `position`).
+
+    Args:
+        lead: Lead to link to
+        asin_bank_id: AsinBank.id to link
+        recommended_quantity: Recommended quantity for this ASIN
+        position: 1-based position; defaults to next_free_position()
+
+    Returns:
+        The new or updated LeadAsin
+    """
+    if position is None:
+        position = next_free_position(lead)
+    link = get_link(lead, position)
+    if link is None:
+        link = LeadAsin(position=position)
+        lead.asin_links.append(link)
+    link.asin_bank_id = asin_bank_id
+    link.recommended_quantity = recommended_quantity
+    _mirror_slot(lead, position, asin_bank_id, recommended_quantity)
+    return link
+
+
+def unlink_asin(lead: OASourcing, position: int) -> Optional[int]:
+    """
+    Remove the lead's link at position.
+
+    Returns:
+        The AsinBank.id that was linked there, or None if the position was empty
+    """
+    link = get_link(lead, position)
+    if link is None:
+        return None
+    lead.asin_links.remove(link)
+    _mirror_slot(lead, position, None, None)
+    return link.asin_bank_id
+
+
+def is_linked_elsewhere(db: Session, asin_bank_id: int, oa_sourcing_id: int) -> bool:
+    """True if a lead other than oa_sourcing_id links to the AsinBank row."""
+    return db.query(LeadAsin.id).filter(
+        LeadAsin.asin_bank_id == asin_bank_id,
+        LeadAsin.oa_sourcing_id != oa_sourcing_id
+    ).first() is not None
+
+
+def load_links(db: Session, leads: List[OASourcing]) -> Dict[int, List[LeadAsin]]:
+    """
+    Links (with their AsinBank rows) of every lead in `leads`, by OASourcing.id, in position order.
+
+    One query for the whole list.
+    """
+    lead_ids = sorted({lead.id for lead in leads})
+    links: Dict[int, List[LeadAsin]] = {lead_id: [] for lead_id in lead_ids}
+    if not lead_ids:
+        return links
+    rows = db.query(LeadAsin)\
+        .options(joinedload(LeadAsin.asin))\
+        .filter(LeadAsin.oa_sourcing_id.in_(lead_ids))\
+        .order_by(LeadAsin.oa_sourcing_id, LeadAsin.position)\
+        .all()
+    for link in rows:
+        links[link.oa_sourcing_id].append(link)
+    return links
+
+
+def find_linked_asin_for_size(db: Session, oa_sourcing_id: int, normalized_size: str) -> Optional[AsinBank]:
+    """
+    The lead's linked AsinBank row whose size normalizes to normalized_size (lowest position wins).
+
+    One indexed join: lead_asin (oa_sourcing_id, position) -> asin_bank primary key.
+    """
+    if not normalized_size:
+        return None
+    return db.query(AsinBank)\
+        .join(LeadAsin, LeadAsin.asin_bank_id == AsinBank.id)\
+        .filter(
+            LeadAsin.oa_sourcing_id == oa_sourcing_id,
+            AsinBank.size_normalized == normalized_size
+        )\
+        .order_by(LeadAsin.position)\
+        .first()
+
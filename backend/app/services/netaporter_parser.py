@@ -99,7 +99,7 @@ class NetAPorterEmailParser:
 
     def is_netaporter_email(self, email_data: EmailData) -> bool:
         """Check if email is from NET-A-PORTER"""
-        sender_lower = email_data.sender.lower()
+        sender_lower = email_data.document.sender_lower
         
         # In development, check for forwarded emails from dev email address
         if self.settings.is_development:
@@ -111,7 +111,7 @@ class NetAPorterEmailParser:
 
     def is_order_confirmation_email(self, email_data: EmailData) -> bool:
         """Check if email is an order confirmation"""
-        subject_lower = email_data.subject.lower()
+        subject_lower = email_data.document.subject_lower
         pattern = self.order_subject_pattern
         
         # Use regex matching for subject pattern
@@ -120,7 +120,7 @@ class NetAPorterEmailParser:
         
         # For forwarded emails in dev mode, also check HTML content for NET-A-PORTER confirmation indicators
         if self.settings.is_development and email_data.html_content:
-            html_lower = email_data.html_content.lower()
+            html_lower = email_data.document.html_lower
             # Check for "Thank you for shopping" or order confirmation indicators
             has_confirmation_text = (
                 'thank you for shopping' in html_lower or
@@ -150,7 +150,7 @@ class NetAPorterEmailParser:
                 logger.error("No HTML content in NET-A-PORTER email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Extract order number from HTML
             order_number = self._extract_order_number(soup)
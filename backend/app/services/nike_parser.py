@@ -106,12 +106,12 @@ class NikeEmailParser:
         In dev mode, both ASOS and Nike forward from glenallagroupc with "Thanks for your order".
         Differentiate via HTML: Nike has nike.com; ASOS has asos.com or images.asos-media.com.
         """
-        sender_lower = email_data.sender.lower()
+        sender_lower = email_data.document.sender_lower
         
         # In development, both ASOS and Nike forward from glenallagroupc - check HTML content
         if self.settings.is_development:
             if self.DEV_NIKE_ORDER_FROM_EMAIL.lower() in sender_lower:
-                html = (email_data.html_content or "").lower()
+                html = email_data.document.html_lower
                 # ASOS has asos.com or asos-media - don't claim it's Nike
                 if "asos.com" in html or "images.asos-media.com" in html:
                     return False
@@ -122,7 +122,7 @@ class NikeEmailParser:
 
     def is_order_confirmation_email(self, email_data: EmailData) -> bool:
         """Check if email is an order confirmation"""
-        subject_lower = email_data.subject.lower()
+        subject_lower = email_data.document.subject_lower
         pattern = self.order_subject_pattern
         
         # Use regex matching for subject pattern
@@ -131,7 +131,7 @@ class NikeEmailParser:
         
         # For forwarded emails in dev mode, also check HTML content for Nike confirmation indicators
         if self.settings.is_development and email_data.html_content:
-            html_lower = email_data.html_content.lower()
+            html_lower = email_data.document.html_lower
             # Check for "Thanks for your order" or order confirmation indicators
             has_confirmation_text = (
                 'thanks for your order' in html_lower or
@@ -160,7 +160,7 @@ class NikeEmailParser:
                 logger.error("No HTML content in Nike email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Extract order number from HTML
             order_number = self._extract_order_number(soup)
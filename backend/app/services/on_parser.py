@@ -90,7 +90,7 @@ class OnEmailParser:
     
     def is_on_email(self, email_data: EmailData) -> bool:
         """Check if email is from On"""
-        sender_lower = email_data.sender.lower()
+        sender_lower = email_data.document.sender_lower
         
         # In development, check for forwarded emails from dev email address
         if self.settings.is_development:
@@ -124,7 +124,7 @@ class OnEmailParser:
                 logger.error("No HTML content in On email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Extract order number
             order_number = self._extract_order_number(soup)
@@ -1,6 +1,7 @@
 """
 Orleans Shoe Co Email Parser
-Parses order confirmation emails from Orleans Shoe Co using BeautifulSoup
+Parses order confirmation and cancellation emails from Orleans Shoe Co
+using precompiled lxml XPath extraction specs (app.services.extraction_spec)
 
 Email Format:
 - From: tore+15639833@t.shopifyemail.com (production)
@@ -25,10 +26,10 @@ Unique ID Extraction:
 import re
 import logging
 from typing import List, Optional
-from bs4 import BeautifulSoup
 from pydantic import BaseModel, Field
 
 from app.models.email import EmailData
+from app.services.extraction_spec import ExtractionSpec, FieldSpec, ItemSpec
 from app.utils.address_utils import normalize_shipping_address
 from app.config.settings import get_settings
 
@@ -81,6 +82,69 @@ class OrleansEmailParser:
     DEV_ORLEANS_ORDER_FROM_EMAIL = "glenallagroupc@gmail.com"
     DEV_SUBJECT_ORDER_PATTERN = r"(?:Fwd:\s*)?(?:order\s+confirmation|order|orleans|orleans\s+shoe)"
     DEV_SUBJECT_CANCELLATION_PATTERN = r"(?:Fwd:\s*)?(?:order.*cancel|your\s+order\s+has\s+been\s+cancel)"
+    
+    # Shopify notification template. Product rows hold a cdn.shopify.com image,
+    # a "Name - 6.5 M × qty" span (font-size:16px;font-weight:600), a size span
+    # (color:#999) and a link to orleansshoes.com/products/<handle>.
+    _PRODUCT_IMAGE = (
+        "re:test(@src, 'cdn\\.shopify\\.com.*(?:files|products)')"
+        " and not(re:test(@src, 'logo|spacer|icon|arrow|facebook|twitter|instagram|discounttag|email_settings', 'i'))"
+    )
+    _PRODUCT_ROW_TEXT = "re:test(string(.), '×\\s*\\d+|\\b\\d+(?:\\.\\d+)?\\s*[MW]?\\b')"
+    _ORDER_NUMBER = FieldSpec(
+        "//span[re:test(., 'Order\\s+#\\s*\\d+', 'i')]",
+        "//text()[re:test(., 'Order\\s+#', 'i')]",
+        pattern=r'Order\s+#\s*(\d+)', flags=re.IGNORECASE, strip=False,
+    )
+    _ITEM_FIELDS = {
+        "anchor": FieldSpec("$anchor/@src"),
+        "image": FieldSpec(".//img[re:test(@src, 'cdn\\.shopify\\.com')]/@src"),
+        "name": FieldSpec(".//span[contains(@style, 'font-size:16px') and contains(@style, 'font-weight:600') and contains(., '×')]"),
+        "link": FieldSpec(".//a[re:test(@href, 'orleansshoes\\.com.*products')]/@href"),
+        "size": FieldSpec(".//span[contains(@style, 'color:#999')]", pattern=r'^(\d+(?:\.\d+)?)\s*[MW]?'),
+    }
+    # Order confirmation: every product image row, deduplicated by image + size
+    ORDER_SPEC = ExtractionSpec(
+        fields={
+            "order_number": _ORDER_NUMBER,
+            "shipping_address": FieldSpec(
+                "//h4[re:test(., 'Shipping\\s+address', 'i')]/ancestor::*[self::td or self::tr][1]//p",
+                separator=" ",
+            ),
+        },
+        items=ItemSpec(
+            anchors=f"//img[{_PRODUCT_IMAGE}]",
+            scope=("ancestor::tr[1]", "ancestor::td[1]"),
+            where=_PRODUCT_ROW_TEXT,
+            fields=_ITEM_FIELDS,
+            unique=("anchor", "size"),
+        ),
+    )
+    # Cancellation: product images from the "Removed Items" section on, in rows saying "Refunded"
+    _REMOVED_ITEMS_SECTION = "(//h3[re:test(., 'Removed\\s+Items', 'i')])[1]/ancestor::*[self::td or self::table][1]"
+    CANCELLATION_SPEC = ExtractionSpec(
+        fields={
+            "order_number": _ORDER_NUMBER,
+            "removed_items_heading": FieldSpec("//h3[re:test(., 'Removed\\s+Items', 'i')]"),
+        },
+        items=ItemSpec(
+            anchors=f"({_REMOVED_ITEMS_SECTION}//img | {_REMOVED_ITEMS_SECTION}/following::img)[{_PRODUCT_IMAGE}]",
+            scope=("ancestor::tr[1]", "ancestor::td[1]"),
+            where=f"{_PRODUCT_ROW_TEXT} and re:test(string(.), 'refunded', 'i')",
+            fields=_ITEM_FIELDS,
+            unique=("anchor", "size"),
+        ),
+    )
+    # Cancellation without a "Removed Items" heading: rows with a "Refunded" span and a "× qty"
+    REFUNDED_ITEMS = ItemSpec(
+        anchors="//span[re:test(., 'Refunded', 'i')]",
+        scope=("ancestor::tr[1]",),
+        where="re:test(string(.), '×\\s*\\d+')",
+        fields=_ITEM_FIELDS,
+    )
+    QUANTITY = re.compile(r'×\s*(\d+)')
+    SIZE_QUANTITY_SUFFIX = re.compile(r'\s*-\s*\d+(?:\.\d+)?\s*[MW]?\s*×\s*\d+\s*$')
+    SIZE_SUFFIX = re.compile(r'\s*-\s*\d+(?:\.\d+)?\s*[MW]?\s*$')
 
     def __init__(self):
         """Initialize the Orleans Shoe Co email parser."""
@@ -117,8 +181,8 @@ class OrleansEmailParser:
         Returns:
             True if the email is from Orleans Shoe Co, False otherwise
         """
-        sender_lower = email_data.sender.lower()
-        subject = email_data.subject.lower() if email_data.subject else ""
+        sender_lower = email_data.document.sender_lower
+        subject = email_data.document.subject_lower if email_data.subject else ""
         
         # Check production email
         if self.ORLEANS_FROM_EMAIL.lower() in sender_lower:
@@ -148,7 +212,7 @@ class OrleansEmailParser:
         if self.is_cancellation_email(email_data):
             return False
         
-        subject = email_data.subject.lower() if email_data.subject else ""
+        subject = email_data.document.subject_lower if email_data.subject else ""
         
         # Check subject pattern
         if re.search(self.order_subject_pattern, subject, re.IGNORECASE):
@@ -156,7 +220,7 @@ class OrleansEmailParser:
         
         # Also check HTML content for order confirmation indicators
         if email_data.html_content:
-            html_lower = email_data.html_content.lower()
+            html_lower = email_data.document.html_lower
             if "order confirmation" in html_lower or ("order #" in html_lower and "cancel" not in html_lower):
                 return True
         
@@ -175,7 +239,7 @@ class OrleansEmailParser:
         if not self.is_orleans_email(email_data):
             return False
         
-        subject = email_data.subject.lower() if email_data.subject else ""
+        subject = email_data.document.subject_lower if email_data.subject else ""
         
         # Check subject pattern
         pattern = self.DEV_SUBJECT_CANCELLATION_PATTERN if self.settings.is_development else self.SUBJECT_CANCELLATION_PATTERN
@@ -184,7 +248,7 @@ class OrleansEmailParser:
         
         # Also check HTML content for cancellation indicators
         if email_data.html_content:
-            html_lower = email_data.html_content.lower()
+            html_lower = email_data.document.html_lower
             if any(phrase in html_lower for phrase in [
                 "your order has been canceled",
                 "your order has been cancelled",
@@ -251,88 +315,44 @@ class OrleansEmailParser:
             logger.error(f"Error extracting unique ID: {e}", exc_info=True)
             return None
     
-    def _extract_orleans_product_details(self, product_row) -> Optional[OrleansOrderItem]:
+    def _build_item(self, record: dict) -> Optional[OrleansOrderItem]:
         """
-        Extract product details from an Orleans Shoe Co product row.
+        Build an order item from an item record of ORDER_SPEC / CANCELLATION_SPEC / REFUNDED_ITEMS.
         
         Args:
-            product_row: BeautifulSoup element containing product information
+            record: Values extracted for one product row
         
         Returns:
             OrleansOrderItem object or None
         """
         try:
-            # Find product image
-            img = product_row.find('img', src=re.compile(r'cdn\.shopify\.com'))
-            
-            if not img:
+            if not record["image"]:
                 logger.warning("Could not find product image")
                 return None
             
-            img_src = img.get('src', '')
-            
-            # Find product name - look for span with font-size:16px and font-weight:600
+            # Product name format: "On Women's Cloudgo Rose Magnet - 6.5 M × 2"
+            # Remove quantity part (× 2 or × 1) and size info
             product_name = None
-            product_name_span = None
-            
-            # Try multiple patterns to find product name span
-            spans = product_row.find_all('span')
-            for span in spans:
-                style = span.get('style', '')
-                if 'font-size:16px' in style and 'font-weight:600' in style:
-                    span_text = span.get_text(strip=True)
-                    # Check if it contains the product name pattern (has × symbol)
-                    if '×' in span_text:
-                        product_name_span = span
-                        break
-            
-            if product_name_span:
-                raw_product_name = product_name_span.get_text(strip=True)
-                # Extract product name and quantity
-                # Format: "On Women's Cloudgo Rose Magnet - 6.5 M × 2"
-                # Remove quantity part (× 2 or × 1) and size info
-                product_name = re.sub(r'\s*-\s*\d+(?:\.\d+)?\s*[MW]?\s*×\s*\d+\s*$', '', raw_product_name).strip()
+            quantity = 1
+            raw_product_name = record["name"]
+            if raw_product_name:
+                product_name = self.SIZE_QUANTITY_SUFFIX.sub('', raw_product_name).strip()
                 # Also remove standalone size at the end if present
-                product_name = re.sub(r'\s*-\s*\d+(?:\.\d+)?\s*[MW]?\s*$', '', product_name).strip()
-            
-            # Find product link - look for link with orleansshoes.com/products
-            product_link_url = None
-            product_link = product_row.find('a', href=re.compile(r'orleansshoes\.com.*products'))
-            if product_link:
-                product_link_url = product_link.get('href', '')
+                product_name = self.SIZE_SUFFIX.sub('', product_name).strip()
+                qty_match = self.QUANTITY.search(raw_product_name)
+                if qty_match:
+                    quantity = int(qty_match.group(1))
             
             # Extract unique ID from product link or product name
-            unique_id = self._extract_unique_id_from_product_link(product_link_url, product_name)
+            unique_id = self._extract_unique_id_from_product_link(record["link"], product_name)
             
             if not unique_id:
                 logger.warning(f"Could not extract unique ID from product link or name")
                 return None
             
-            # Find size - look for span with color:#999
-            size = None
-            size_spans = product_row.find_all('span', style=re.compile(r'color:#999'))
-            for span in size_spans:
-                span_text = span.get_text(strip=True)
-                # Size format: "6.5 M" - extract just the number part
-                size_match = re.match(r'^(\d+(?:\.\d+)?)\s*[MW]?', span_text)
-                if size_match:
-                    size = size_match.group(1)
-                    break
-            
-            if not size:
-                size = "Unknown"
-            
-            # Find quantity - extract from product name if available, otherwise default to 1
-            quantity = 1
-            if product_name_span:
-                raw_product_name = product_name_span.get_text(strip=True)
-                qty_match = re.search(r'×\s*(\d+)', raw_product_name)
-                if qty_match:
-                    quantity = int(qty_match.group(1))
-            
             return OrleansOrderItem(
                 unique_id=unique_id,
-                size=size,
+                size=record["size"] or "Unknown",
                 quantity=quantity,
                 product_name=product_name
             )
@@ -341,174 +361,6 @@ class OrleansEmailParser:
             logger.error(f"Error extracting Orleans product details: {e}", exc_info=True)
             return None
     
-    def _extract_order_number(self, soup: BeautifulSoup) -> Optional[str]:
-        """
-        Extract order number from HTML.
-        
-        Args:
-            soup: BeautifulSoup object
-        
-        Returns:
-            Order number string or None
-        """
-        try:
-            # Look for "Order #" followed by number
-            # Format: <span style="font-size:16px"> Order #103812 </span>
-            order_spans = soup.find_all('span', string=re.compile(r'Order\s+#\s*\d+', re.IGNORECASE))
-            
-            for span in order_spans:
-                text = span.get_text()
-                match = re.search(r'Order\s+#\s*(\d+)', text, re.IGNORECASE)
-                if match:
-                    order_number = match.group(1)
-                    logger.debug(f"Extracted order number: {order_number}")
-                    return order_number
-            
-            # Fallback: Look for text containing "Order #"
-            order_text = soup.find(string=re.compile(r'Order\s+#', re.IGNORECASE))
-            if order_text:
-                match = re.search(r'Order\s+#\s*(\d+)', order_text, re.IGNORECASE)
-                if match:
-                    order_number = match.group(1)
-                    logger.debug(f"Extracted order number (fallback): {order_number}")
-                    return order_number
-            
-            logger.warning("Could not extract order number")
-            return None
-            
-        except Exception as e:
-            logger.error(f"Error extracting order number: {e}", exc_info=True)
-            return None
-    
-    def _extract_products(self, soup: BeautifulSoup) -> List[OrleansOrderItem]:
-        """
-        Extract products from HTML.
-        
-        Args:
-            soup: BeautifulSoup object
-        
-        Returns:
-            List of OrleansOrderItem objects
-        """
-        items = []
-        
-        try:
-            # Find all product images from shopify
-            product_images = soup.find_all('img', src=re.compile(r'cdn\.shopify\.com.*(?:files|products)'))
-            
-            logger.debug(f"Found {len(product_images)} Shopify images")
-            
-            seen_products = set()
-            
-            for img in product_images:
-                # Exclude non-product images
-                img_src = img.get('src', '')
-                if any(exclude in img_src.lower() for exclude in ['logo', 'spacer', 'icon', 'arrow', 'facebook', 'twitter', 'instagram', 'discounttag', 'email_settings']):
-                    logger.debug(f"Skipping non-product image: {img_src[:100]}")
-                    continue
-                
-                # Check if this is a product image (has product name nearby)
-                parent = img.find_parent(['td', 'tr'])
-                if not parent:
-                    logger.debug(f"No parent found for image: {img_src[:100]}")
-                    continue
-                
-                # Find the containing table row
-                product_row = img.find_parent('tr')
-                if not product_row:
-                    product_row = parent.find_parent('tr')
-                if not product_row:
-                    product_row = parent
-                
-                # Check if this row contains product information
-                # Look for product name span with × symbol or size span
-                row_text = product_row.get_text()
-                has_product_name = bool(re.search(r'×\s*\d+', row_text))
-                has_size = bool(re.search(r'\b\d+(?:\.\d+)?\s*[MW]?\b', row_text))
-                
-                if not (has_product_name or has_size):
-                    logger.debug(f"No product indicators found in row text for image: {img_src[:100]}")
-                    continue
-                
-                logger.debug(f"Processing product image: {img_src[:100]}")
-                
-                # Try to extract size from nearby spans for uniqueness
-                size_key = "unknown"
-                size_spans = product_row.find_all('span', style=re.compile(r'color:#999'))
-                for span in size_spans:
-                    span_text = span.get_text(strip=True)
-                    size_match = re.match(r'^(\d+(?:\.\d+)?)\s*[MW]?', span_text)
-                    if size_match:
-                        size_key = size_match.group(1)
-                        break
-                
-                product_id = f"{img_src}_{size_key}"
-                
-                if product_id in seen_products:
-                    continue
-                seen_products.add(product_id)
-                
-                try:
-                    # Extract product details from the product row
-                    product_details = self._extract_orleans_product_details(product_row)
-                    
-                    if product_details:
-                        items.append(product_details)
-                        logger.debug(f"Successfully extracted product: {product_details.product_name}, unique_id: {product_details.unique_id}")
-                    else:
-                        logger.debug(f"Failed to extract product details from row")
-                
-                except Exception as e:
-                    logger.error(f"Error extracting product details: {e}", exc_info=True)
-                    import traceback
-                    logger.debug(traceback.format_exc())
-                    continue
-            
-            logger.info(f"Extracted {len(items)} products from Orleans Shoe Co email")
-            return items
-            
-        except Exception as e:
-            logger.error(f"Error extracting Orleans products: {e}", exc_info=True)
-            return []
-    
-    def _extract_shipping_address(self, soup: BeautifulSoup) -> str:
-        """
-        Extract shipping address from HTML.
-        
-        Args:
-            soup: BeautifulSoup object
-        
-        Returns:
-            Normalized shipping address string
-        """
-        try:
-            # Look for "Shipping address" heading
-            shipping_heading = soup.find('h4', string=re.compile(r'Shipping\s+address', re.IGNORECASE))
-            
-            if shipping_heading:
-                # Find the parent table/row
-                parent = shipping_heading.find_parent(['td', 'tr'])
-                
-                if parent:
-                    # Look for paragraph containing address information
-                    address_p = parent.find('p')
-                    
-                    if address_p:
-                        # Get text and clean it up
-                        address_text = address_p.get_text(separator=' ', strip=True)
-                        
-                        # Normalize the address
-                        normalized = normalize_shipping_address(address_text)
-                        logger.debug(f"Extracted shipping address: {normalized}")
-                        return normalized
-            
-            logger.warning("Could not extract shipping address")
-            return ""
-            
-        except Exception as e:
-            logger.error(f"Error extracting shipping address: {e}", exc_info=True)
-            return ""
-    
     def parse_email(self, email_data: EmailData):
         """
         Generic parse method that routes to the appropriate parser based on email type.
@@ -544,22 +396,27 @@ class OrleansEmailParser:
                 logger.warning("No HTML content found in email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'html.parser')
+            values = self.ORDER_SPEC.extract(email_data.document.tree)
             
             # Extract order number
-            order_number = self._extract_order_number(soup)
+            order_number = values["order_number"]
             if not order_number:
                 logger.warning("Could not extract order number")
                 return None
             
             # Extract products
-            items = self._extract_products(soup)
+            items = [item for item in map(self._build_item, values["items"]) if item]
+            logger.info(f"Extracted {len(items)} products from Orleans Shoe Co email")
             if not items:
                 logger.warning("Could not extract any products")
                 return None
             
             # Extract shipping address
-            shipping_address = self._extract_shipping_address(soup)
+            shipping_address = ""
+            if values["shipping_address"]:
+                shipping_address = normalize_shipping_address(values["shipping_address"])
+            else:
+                logger.warning("Could not extract shipping address")
             
             return OrleansOrderData(
                 order_number=order_number,
@@ -575,6 +432,10 @@ class OrleansEmailParser:
         """
         Parse an Orleans Shoe Co cancellation notification email.
         
+        Cancelled items are the products after the "Removed Items" heading whose
+        row says "Refunded"; without that heading, every product row with a
+        "Refunded" span is used.
+        
         Args:
             email_data: Email data to parse
         
@@ -588,16 +449,22 @@ class OrleansEmailParser:
                 logger.warning("No HTML content found in cancellation email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'html.parser')
+            tree = email_data.document.tree
+            values = self.CANCELLATION_SPEC.extract(tree)
             
             # Extract order number
-            order_number = self._extract_order_number(soup)
+            order_number = values["order_number"]
             if not order_number:
                 logger.warning("Could not extract order number from cancellation email")
                 return None
             
             # Extract cancelled items from "Removed Items" section
-            items = self._extract_cancellation_items(soup)
+            if values["removed_items_heading"]:
+                records = values["items"]
+            else:
+                logger.warning("Could not find 'Removed Items' heading in cancellation email")
+                records = self.REFUNDED_ITEMS.extract(tree)
+            items = [item for item in map(self._build_item, records) if item]
             if not items:
                 logger.warning(f"No cancelled items found in cancellation email for order {order_number}")
                 return None
@@ -611,150 +478,3 @@ class OrleansEmailParser:
         except Exception as e:
             logger.error(f"Error parsing Orleans Shoe Co cancellation email: {e}", exc_info=True)
             return None
-    def _extract_cancellation_items(self, soup: BeautifulSoup) -> List[OrleansOrderItem]:
-        """
-        Extract cancelled items from Orleans Shoe Co cancellation email.
-        
-        Cancellation email structure:
-        - "Removed Items" heading
-        - Products are in similar structure to order confirmation
-        - Product name format: "On Women's Cloudgo Black Eclipse × 2"
-        - Size format: "6 M" in a span with color:#999
-        
-        Args:
-            soup: BeautifulSoup object of email HTML
-        
-        Returns:
-            List of OrleansOrderItem objects
-        """
-        items = []
-        
-        try:
-            # Find "Removed Items" heading
-            removed_items_heading = soup.find('h3', string=re.compile(r'Removed\s+Items', re.IGNORECASE))
-            
-            if not removed_items_heading:
-                logger.warning("Could not find 'Removed Items' heading in cancellation email")
-                # Fallback: look for products with "Refunded" text
-                return self._extract_products_from_refunded_section(soup)
-            
-            # Find all product images after the "Removed Items" heading
-            # Get the parent container
-            container = removed_items_heading.find_parent(['td', 'table'])
-            if not container:
-                container = soup
-            
-            # Find all product images in this section
-            product_images = container.find_all_next('img', src=re.compile(r'cdn\.shopify\.com.*(?:files|products)'))
-            
-            logger.debug(f"Found {len(product_images)} Shopify images in cancellation section")
-            
-            seen_products = set()
-            
-            for img in product_images:
-                # Exclude non-product images
-                img_src = img.get('src', '')
-                if any(exclude in img_src.lower() for exclude in ['logo', 'spacer', 'icon', 'arrow', 'facebook', 'twitter', 'instagram', 'discounttag', 'email_settings']):
-                    continue
-                
-                # Find the containing table row
-                product_row = img.find_parent('tr')
-                if not product_row:
-                    product_row = img.find_parent('td')
-                
-                if not product_row:
-                    continue
-                
-                # Check if this row contains product information
-                row_text = product_row.get_text()
-                has_product_name = bool(re.search(r'×\s*\d+', row_text))
-                has_size = bool(re.search(r'\b\d+(?:\.\d+)?\s*[MW]?\b', row_text))
-                has_refunded = 'refunded' in row_text.lower()
-                
-                # In cancellation emails, products should have "Refunded" text
-                if not (has_product_name or has_size) or not has_refunded:
-                    continue
-                
-                logger.debug(f"Processing cancellation product image: {img_src[:100]}")
-                
-                # Try to extract size from nearby spans for uniqueness
-                size_key = "unknown"
-                size_spans = product_row.find_all('span', style=re.compile(r'color:#999'))
-                for span in size_spans:
-                    span_text = span.get_text(strip=True)
-                    size_match = re.match(r'^(\d+(?:\.\d+)?)\s*[MW]?', span_text)
-                    if size_match:
-                        size_key = size_match.group(1)
-                        break
-                
-                product_id = f"{img_src}_{size_key}"
-                
-                if product_id in seen_products:
-                    continue
-                seen_products.add(product_id)
-                
-                try:
-                    # Extract product details from the product row (reuse existing method)
-                    product_details = self._extract_orleans_product_details(product_row)
-                    
-                    if product_details:
-                        items.append(product_details)
-                        logger.debug(f"Successfully extracted cancellation product: {product_details.product_name}, unique_id: {product_details.unique_id}")
-                
-                except Exception as e:
-                    logger.error(f"Error extracting cancellation product details: {e}", exc_info=True)
-                    continue
-            
-            logger.info(f"Extracted {len(items)} cancelled items from Orleans Shoe Co cancellation email")
-            return items
-            
-        except Exception as e:
-            logger.error(f"Error extracting Orleans cancellation items: {e}", exc_info=True)
-            return []
-    
-    def _extract_products_from_refunded_section(self, soup: BeautifulSoup) -> List[OrleansOrderItem]:
-        """
-        Fallback method to extract products from refunded section if "Removed Items" heading not found.
-        
-        Args:
-            soup: BeautifulSoup object of email HTML
-        
-        Returns:
-            List of OrleansOrderItem objects
-        """
-        items = []
-        
-        try:
-            # Find all spans with "Refunded" text
-            refunded_spans = soup.find_all('span', string=re.compile(r'Refunded', re.IGNORECASE))
-            
-            for refunded_span in refunded_spans:
-                # Find the parent row containing this refunded span
-                product_row = refunded_span.find_parent('tr')
-                if not product_row:
-                    continue
-                
-                # Check if this row contains product information
-                row_text = product_row.get_text()
-                has_product_name = bool(re.search(r'×\s*\d+', row_text))
-                
-                if not has_product_name:
-                    continue
-                
-                try:
-                    # Extract product details from the product row
-                    product_details = self._extract_orleans_product_details(product_row)
-                    
-                    if product_details:
-                        items.append(product_details)
-                        logger.debug(f"Successfully extracted cancellation product (fallback): {product_details.product_name}")
-                
-                except Exception as e:
-                    logger.error(f"Error extracting cancellation product details (fallback): {e}", exc_info=True)
-                    continue
-            
-            return items
-            
-        except Exception as e:
-            logger.error(f"Error extracting products from refunded section: {e}", exc_info=True)
-            return []
\ No newline at end of file
@@ -0,0 +1,202 @@
+"""
+Optional process pool for the CPU-bound parsing stage of retailer emails.
+
+BeautifulSoup/lxml parsing of large retailer emails holds the GIL, so a burst
+of emails handled by the webhook worker threads or the periodic job parses on
+a single core. When `parse_pool_workers` is set, the (retailer_id, email_type,
+EmailData) of each classified email is sent to a pool of worker processes:
+
+- Workers are started with the "spawn" context and pre-import every parser
+  from the parser registry, so the first email of a burst does not pay for it.
+- A worker runs the parse method for the email type (and the `_partial`
+  fallback when the parser has one and the full parse failed) and returns
+  the picklable result objects.
+- Results are stored on the email's document (EmailDocument.parse_results).
+  The DB stage of RetailerOrderProcessor / RetailerOrderUpdateProcessor calls
+  parse_with(), which returns a precomputed result or parses in-process.
+
+With the pool disabled (the default), timed out, or broken, parse_with()
+simply parses in the calling thread, so behaviour is the same either way.
+"""
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from app.config import get_settings
+from app.models.email import EmailData
+from app.services.parser_registry import PARSER_CLASSES, get_parser
+
+logger = logging.getLogger(__name__)
+
+# Email type (EmailType value) -> parser method the processors call for it
+PARSE_METHODS: Dict[str, str] = {
+    "confirmation": "parse_email",
+    "shipping": "parse_shipping_email",
+    "cancellation": "parse_cancellation_email",
+}
+
+# Classifier retailer IDs that differ from the parser registry key
+RETAILER_PARSER_KEYS: Dict[str, str] = {
+    "urbanoutfitters": "urban",
+    "kidsfootlocker": "footlocker",
+}
+
+
+def _warm_worker() -> None:
+    """Pool initializer: import and build every parser once per worker process."""
+    logging.disable(logging.INFO)
+    for key in PARSER_CLASSES:
+        try:
+            get_parser(key)
+        except ImportError as e:
+            logger.warning(f"Parse worker could not load parser {key}: {e}")
+
+
+def _ping() -> bool:
+    return True
+
+
+def _parse_in_worker(parser_key: str, method: str, email_data: EmailData) -> Dict[str, Any]:
+    """Run one parse method in a worker; returns {method name: result}."""
+    parser = get_parser(parser_key)
+    results = {method: getattr(parser, method)(email_data)}
+    partial_method = f"{method}_partial"
+    if results[method] is None and hasattr(parser, partial_method):
+        results[partial_method] = getattr(parser, partial_method)(email_data)
+    return results
+
+
+def parser_key_for_retailer(retailer_id: str) -> Optional[str]:
+    """Parser registry key for a classifier retailer ID (None if there is no parser)."""
+    key = RETAILER_PARSER_KEYS.get(retailer_id, retailer_id)
+    return key if key in PARSER_CLASSES else None
+
+
+def parse_with(parser: Any, method: str, email_data: EmailData) -> Any:
+    """
+    Return parser.<method>(email_data), using the parse pool's result when there is one.
+
+    Args:
+        parser: Parser instance (e.g. self.hibbett_parser)
+        method: Parse method name (e.g. "parse_shipping_email")
+        email_data: Email being processed
+    """
+    results = email_data.document.parse_results
+    key = (type(parser).__name__, method)
+    if key in results:
+        return results[key]
+    return getattr(parser, method)(email_data)
+
+
+class ParsePool:
+    """
+    Warm ProcessPoolExecutor running parser methods for classified emails.
+
+    Args:
+        workers: Number of worker processes
+        timeout: Seconds to wait for one email's parse before parsing in-process
+    """
+
+    def __init__(self, workers: int, timeout: float):
+        self.workers = workers
+        self.timeout = timeout
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_worker,
+        )
+        # Start every worker now (interpreter start + parser imports) instead of on the first burst
+        for _ in range(workers):
+            self._executor.submit(_ping)
+        logger.info(f"Parse pool started with {workers} worker processes")
+
+    def submit(self, email_data: EmailData, retailer_id: str, email_type: str) -> Optional[Tuple[str, Future]]:
+        """Queue the parse of one email; returns (parser class name, future), None if there is no parser."""
+        parser_key = parser_key_for_retailer(retailer_id)
+        method = PARSE_METHODS.get(getattr(email_type, "value", email_type))
+        if parser_key is None or method is None:
+            return None
+        future = self._executor.submit(_parse_in_worker, parser_key, method, email_data)
+        return PARSER_CLASSES[parser_key][1], future
+
+    def collect(self, email_data: EmailData, job: Optional[Tuple[str, Future]]) -> bool:
+        """Wait for a submitted parse and store its results on the email's document."""
+        if job is None:
+            return False
+        parser_class, future = job
+        try:
+            results = future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            logger.warning(f"Parse pool timed out on message {email_data.message_id}; parsing in-process")
+            return False
+        except Exception as e:
+            logger.warning(f"Parse pool failed on message {email_data.message_id} ({e}); parsing in-process")
+            return False
+        parse_results = email_data.document.parse_results
+        for method, result in results.items():
+            parse_results[(parser_class, method)] = result
+        return True
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_parse_pool: Optional[ParsePool] = None
+_parse_pool_lock = threading.Lock()
+
+
+def get_parse_pool() -> Optional[ParsePool]:
+    """Return the process-wide parse pool, or None when parse_pool_workers is 0."""
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            settings = get_settings()
+            if settings.parse_pool_workers <= 0:
+                return None
+            _parse_pool = ParsePool(settings.parse_pool_workers, settings.parse_pool_timeout_seconds)
+        return _parse_pool
+
+
+def shutdown_parse_pool(wait: bool = True) -> None:
+    """Stop the parse pool worker processes (if started)."""
+    global _parse_pool
+    with _parse_pool_lock:
+        pool, _parse_pool = _parse_pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait)
+
+
+def preparse(email_data: EmailData, retailer_id: str, email_type: str) -> bool:
+    """
+    Parse one classified email in the parse pool (no-op when the pool is disabled).
+
+    Returns:
+        True if results were stored for parse_with() to use
+    """
+    return preparse_many([(email_data, retailer_id, email_type)]) == 1
+
+
+def preparse_many(emails: Iterable[Tuple[EmailData, str, str]]) -> int:
+    """
+    Parse a batch of (email_data, retailer_id, email_type) in parallel in the parse pool.
+
+    Returns:
+        Number of emails whose results were stored (0 when the pool is disabled)
+    """
+    pool = get_parse_pool()
+    if pool is None:
+        return 0
+    try:
+        submitted = [(email_data, pool.submit(email_data, retailer_id, email_type))
+                     for email_data, retailer_id, email_type in emails]
+    except Exception as e:
+        # BrokenProcessPool etc.: drop the pool so the next call starts a fresh one
+        logger.error(f"Parse pool unavailable ({e}); parsing in-process")
+        shutdown_parse_pool(wait=False)
+        return 0
+    return sum(pool.collect(email_data, job) for email_data, job in submitted)
@@ -0,0 +1,104 @@
+"""
+Process-wide registry of email parsers and Gmail clients.
+
+Processors, the classifier and the webhook used to build their own 20-30
+parser objects and a fresh GmailService (token read + discovery build) for
+every email. The registry builds each of those once:
+
+- Parsers: imported on first use and shared by every caller. Parsers only
+  hold configuration, so one instance is safe to use from several threads.
+- Gmail client: one GmailService per thread (httplib2 is not thread-safe).
+  Label IDs are cached by GmailService itself (GmailLabelCache).
+"""
+
+import importlib
+import logging
+import threading
+from typing import Any, Dict, Tuple
+
+from app.services.gmail_service import GmailService
+
+logger = logging.getLogger(__name__)
+
+# Parser key -> (module, class name); modules are imported on first get_parser()
+PARSER_CLASSES: Dict[str, Tuple[str, str]] = {
+    "academy": ("app.services.academy_parser", "AcademyEmailParser"),
+    "adidas": ("app.services.adidas_parser", "AdidasEmailParser"),
+    "als": ("app.services.als_parser", "AlsEmailParser"),
+    "anthropologie": ("app.services.anthropologie_parser", "AnthropologieEmailParser"),
+    "asos": ("app.services.asos_parser", "ASOSEmailParser"),
+    "bloomingdales": ("app.services.bloomingdales_parser", "BloomingdalesEmailParser"),
+    "carbon38": ("app.services.carbon38_parser", "Carbon38EmailParser"),
+    "champs": ("app.services.champs_parser", "ChampsEmailParser"),
+    "concepts": ("app.services.concepts_parser", "ConceptsEmailParser"),
+    "dicks": ("app.services.dicks_parser", "DicksEmailParser"),
+    "dtlr": ("app.services.dtlr_parser", "DTLREmailParser"),
+    "email": ("app.services.email_parser", "EmailParser"),
+    "endclothing": ("app.services.endclothing_parser", "ENDClothingEmailParser"),
+    "finishline": ("app.services.finishline_parser", "FinishLineEmailParser"),
+    "fit2run": ("app.services.fit2run_parser", "Fit2RunEmailParser"),
+    "footlocker": ("app.services.footlocker_parser", "FootlockerEmailParser"),
+    "fwrd": ("app.services.fwrd_parser", "FwrdEmailParser"),
+    "gazelle": ("app.services.gazelle_parser", "GazelleEmailParser"),
+    "hibbett": ("app.services.hibbett_parser", "HibbettEmailParser"),
+    "jdsports": ("app.services.jdsports_parser", "JDSportsEmailParser"),
+    "netaporter": ("app.services.netaporter_parser", "NetAPorterEmailParser"),
+    "nike": ("app.services.nike_parser", "NikeEmailParser"),
+    "on": ("app.services.on_parser", "OnEmailParser"),
+    "orleans": ("app.services.orleans_parser", "OrleansEmailParser"),
+    "prepworx": ("app.services.prepworx_parser", "PrepWorxEmailParser"),
+    "revolve": ("app.services.revolve_parser", "RevolveEmailParser"),
+    "scheels": ("app.services.scheels_parser", "SceelsEmailParser"),
+    "shoepalace": ("app.services.shoepalace_parser", "ShoepalaceEmailParser"),
+    "shopsimon": ("app.services.shopsimon_parser", "ShopSimonEmailParser"),
+    "shopwss": ("app.services.shopwss_parser", "ShopWSSEmailParser"),
+    "sneaker": ("app.services.sneaker_parser", "SneakerPoliticsEmailParser"),
+    "snipes": ("app.services.snipes_parser", "SnipesEmailParser"),
+    "sns": ("app.services.sns_parser", "SNSEmailParser"),
+    "urban": ("app.services.urban_parser", "UrbanOutfittersEmailParser"),
+}
+
+_parsers: Dict[str, Any] = {}
+_parsers_lock = threading.Lock()
+
+_thread_local = threading.local()
+
+
+def get_parser(key: str) -> Any:
+    """
+    Return the shared parser instance for key, importing its module on first use.
+
+    Args:
+        key: Parser key from PARSER_CLASSES (e.g. "footlocker", "prepworx")
+
+    Raises:
+        KeyError: If key is not registered
+    """
+    parser = _parsers.get(key)
+    if parser is not None:
+        return parser
+
+    module_name, class_name = PARSER_CLASSES[key]
+    with _parsers_lock:
+        parser = _parsers.get(key)
+        if parser is None:
+            parser_cls = getattr(importlib.import_module(module_name), class_name)
+            parser = parser_cls()
+            _parsers[key] = parser
+            logger.debug(f"Loaded parser {key} ({class_name})")
+    return parser
+
+
+def get_gmail_service() -> GmailService:
+    """Return this thread's GmailService, authenticating on first use in the thread."""
+    service = getattr(_thread_local, "gmail_service", None)
+    if service is None:
+        service = GmailService()
+        _thread_local.gmail_service = service
+    return service
+
+
+def clear_registry() -> None:
+    """Forget cached parsers (e.g. after settings changes)."""
+    with _parsers_lock:
+        _parsers.clear()
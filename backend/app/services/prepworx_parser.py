@@ -13,6 +13,7 @@ from bs4 import BeautifulSoup
 from sqlalchemy import and_, or_, func
 
 from app.models.email import EmailData
+from app.services.purchase_item_matcher import normalize_size
 
 logger = logging.getLogger(__name__)
 
@@ -136,7 +137,7 @@ class PrepWorxEmailParser:
         Returns:
             True if email is from PrepWorx, False otherwise
         """
-        sender_lower = email_data.sender.lower()
+        sender_lower = email_data.document.sender_lower
         
         # Check for direct email or "PrepWorx" in sender name
         if self.PREPWORX_FROM_EMAIL.lower() in sender_lower:
@@ -721,17 +722,6 @@ class PrepWorxCheckinProcessor:
         self.db = db_session
         self.gmail_service = gmail_service
     
-    def _normalize_size(self, size: Optional[str]) -> str:
-        """
-        Normalize size for comparison (handles "11.0" vs "11", "09.5" vs "9.5" etc.)
-        """
-        if not size:
-            return size or ""
-        if re.match(r'^\d{1,2}\.\d$', str(size)):
-            num = float(size)
-            return str(int(num)) if num % 1 == 0 else str(num)
-        return str(size)
-    
     def _recalculate_status_and_location(self, record) -> None:
         """Recalculate status and location for a PurchaseTracker record."""
         from app.utils.purchase_status import calculate_status_and_location
@@ -760,15 +750,15 @@ class PrepWorxCheckinProcessor:
         if item.quantity <= 0:
             return 0
         
-        normalized_size = self._normalize_size(item.size)
+        normalized_size = normalize_size(item.size)
         
-        # Find all AsinBank records matching (asin, size)
+        # Find all AsinBank records matching (asin, size) - exact or normalized format
         asin_query = self.db.query(AsinBank).filter(AsinBank.asin == item.asin)
-        if item.size or normalized_size:
+        if normalized_size:
             asin_query = asin_query.filter(
                 or_(
                     AsinBank.size == item.size,
-                    AsinBank.size == normalized_size
+                    AsinBank.size_normalized == normalized_size
                 )
             )
         asin_records = asin_query.all()
@@ -784,21 +774,22 @@ class PrepWorxCheckinProcessor:
         asin_bank_ids = [r.id for r in asin_records]
         
         # Find PurchaseTracker records: shipped to PW but not fully checked in, FIFO
-        candidates = self.db.query(PurchaseTracker).filter(
+        candidate_query = self.db.query(PurchaseTracker).join(
+            AsinBank, AsinBank.id == PurchaseTracker.asin_bank_id
+        ).filter(
             PurchaseTracker.asin_bank_id.in_(asin_bank_ids),
             func.coalesce(PurchaseTracker.shipped_to_pw, 0) > func.coalesce(PurchaseTracker.checked_in, 0)
-        ).order_by(PurchaseTracker.date.asc(), PurchaseTracker.id.asc()).all()
-        
-        # Filter by size if we have it (manual check for records where AsinBank.size matches)
-        if item.size or normalized_size:
-            filtered = []
-            for rec in candidates:
-                db_size = rec.asin_bank_ref.size if rec.asin_bank_ref else None
-                if not db_size:
-                    filtered.append(rec)
-                elif self._normalize_size(db_size) == normalized_size or db_size == item.size:
-                    filtered.append(rec)
-            candidates = filtered
+        )
+        # Keep records whose ASIN has no size or the item's size (size_normalized is generated by the DB)
+        if normalized_size:
+            candidate_query = candidate_query.filter(
+                or_(
+                    func.coalesce(AsinBank.size, '') == '',
+                    AsinBank.size == item.size,
+                    AsinBank.size_normalized == normalized_size
+                )
+            )
+        candidates = candidate_query.order_by(PurchaseTracker.date.asc(), PurchaseTracker.id.asc()).all()
         
         if not candidates:
             logger.info(
@@ -836,13 +827,13 @@ class PrepWorxCheckinProcessor:
     
     def apply_gmail_label(self, message_id: str) -> bool:
         """
-        Apply Gmail label to processed email.
+        Queue the Gmail label for a processed email.
         
         Args:
             message_id: Gmail message ID
         
         Returns:
-            True if label was applied successfully
+            True if the label change was queued
         """
         if not self.gmail_service:
             logger.debug("Gmail service not provided, skipping label")
@@ -855,10 +846,12 @@ class PrepWorxCheckinProcessor:
                 logger.warning(f"Could not create/get label: {self.PREPWORX_LABEL}")
                 return False
             
-            # Apply label to message
-            self.gmail_service.add_label_to_message(message_id, label['id'])
-            logger.info(f"Applied label '{self.PREPWORX_LABEL}' to message {message_id}")
-            return True
+            # Queue the label change (applied in the background, best effort)
+            from app.services.gmail_labeler import get_gmail_labeler
+            queued = get_gmail_labeler().submit(message_id, add_label_ids=[label['id']])
+            if queued:
+                logger.info(f"Queued label '{self.PREPWORX_LABEL}' for message {message_id}")
+            return queued
         
         except Exception as e:
             logger.error(f"Error applying Gmail label: {e}")
@@ -870,12 +863,15 @@ class PrepWorxCheckinProcessor:
         
         Args:
             shipment_data: PrepWorxShipmentData object
+            message_id: Gmail message ID, recorded in the processed-message registry
         
         Returns:
             Dictionary with processing results
         """
         from app.models.database import Checkin, AsinBank
+        from app.services import processed_messages
         
+        started_at = datetime.utcnow()
         try:
             stored_count = 0
             skipped_count = 0
@@ -996,6 +992,12 @@ class PrepWorxCheckinProcessor:
                 f"PurchaseTracker updated {pt_updated_count}, Errors {len(errors)}"
             )
             
+            if message_id:
+                processed_messages.record(
+                    self.db, message_id, processed_messages.TYPE_CHECKIN, processed_messages.STATUS_PROCESSED,
+                    retailer="prepworx", started_at=started_at
+                )
+            
             # Apply Gmail label if message_id provided
             if message_id and stored_count > 0:
                 label_applied = self.apply_gmail_label(message_id)
@@ -1006,6 +1008,11 @@ class PrepWorxCheckinProcessor:
         except Exception as e:
             self.db.rollback()
             logger.error(f"Error processing PrepWorx shipment data: {e}", exc_info=True)
+            if message_id:
+                processed_messages.record(
+                    self.db, message_id, processed_messages.TYPE_CHECKIN, processed_messages.STATUS_ERROR,
+                    retailer="prepworx", error=str(e), started_at=started_at
+                )
             return {
                 "success": False,
                 "error": str(e),
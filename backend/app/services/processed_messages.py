@@ -0,0 +1,250 @@
+"""
+Processed-message registry (processed_message) for the email processors.
+
+Every Gmail message handled by RetailerOrderProcessor, RetailerOrderUpdateProcessor
+and PrepWorxCheckinProcessor is recorded with record():
+
+    INSERT INTO processed_message ... ON CONFLICT DO UPDATE (attempts + 1)
+
+keyed by (message_id, email_type), with the outcome (processed / error /
+manual_review), the retailer, timings and the last error. That makes
+
+- duplicate checks one indexed lookup (is_processed()) instead of a full
+  get_message call to read the message's labels,
+- searches plain sender/subject queries: list_unprocessed_message_ids() pages
+  through the Gmail results and drops the IDs the registry already has, instead
+  of every query carrying 6-8 -label: exclusions,
+- processing stats a grouped count (get_processing_stats()) instead of listing
+  up to 500 messages per label, and
+- retry selection (retry_candidates()) a range scan of the failed messages.
+
+Gmail labels are still applied, asynchronously and best effort
+(app/services/gmail_labeler.py).
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from app.models.database import ProcessedMessage
+
+logger = logging.getLogger(__name__)
+
+TYPE_CONFIRMATION = "confirmation"
+TYPE_SHIPPING = "shipping"
+TYPE_CANCELLATION = "cancellation"
+TYPE_CHECKIN = "checkin"
+
+STATUS_PROCESSED = "processed"
+STATUS_ERROR = "error"
+STATUS_MANUAL_REVIEW = "manual_review"
+
+# Statuses a search skips by default (the update processors never retried errors
+# or manual-review emails automatically: their searches excluded those labels)
+SETTLED_STATUSES = (STATUS_PROCESSED, STATUS_ERROR, STATUS_MANUAL_REVIEW)
+
+# Longest error text stored per message
+_MAX_ERROR_LENGTH = 2000
+
+_RECORD_SQL = text("""
+    INSERT INTO processed_message
+        (message_id, email_type, retailer, status, attempts, error, started_at, finished_at, duration_ms, created_at, updated_at)
+    VALUES
+        (:message_id, :email_type, :retailer, :status, 1, :error, :started_at, :finished_at, :duration_ms, now(), now())
+    ON CONFLICT ON CONSTRAINT uq_processed_message DO UPDATE SET
+        retailer = COALESCE(EXCLUDED.retailer, processed_message.retailer),
+        status = EXCLUDED.status,
+        attempts = processed_message.attempts + 1,
+        error = EXCLUDED.error,
+        started_at = EXCLUDED.started_at,
+        finished_at = EXCLUDED.finished_at,
+        duration_ms = EXCLUDED.duration_ms,
+        updated_at = now()
+""")
+
+
+def record(
+    db: Session,
+    message_id: str,
+    email_type: str,
+    status: str,
+    retailer: Optional[str] = None,
+    error: Optional[str] = None,
+    started_at: Optional[datetime] = None
+) -> bool:
+    """
+    Record the outcome of processing a message and commit.
+
+    Called once the processor has committed or rolled back its own changes.
+    A failure is logged and rolled back, never raised: the outcome of the
+    email itself is already settled.
+
+    Args:
+        db: Database session
+        message_id: Gmail message ID
+        email_type: TYPE_CONFIRMATION, TYPE_SHIPPING, TYPE_CANCELLATION or TYPE_CHECKIN
+        status: STATUS_PROCESSED, STATUS_ERROR or STATUS_MANUAL_REVIEW
+        retailer: Retailer ID (classifier / parser registry key), if known
+        error: Error message for STATUS_ERROR / STATUS_MANUAL_REVIEW
+        started_at: When processing of the message started (UTC), for the duration
+
+    Returns:
+        True if the row was written
+    """
+    finished_at = datetime.utcnow()
+    started_at = started_at or finished_at
+    try:
+        db.execute(_RECORD_SQL, {
+            "message_id": message_id,
+            "email_type": email_type,
+            "retailer": retailer,
+            "status": status,
+            "error": error[:_MAX_ERROR_LENGTH] if error else None,
+            "started_at": started_at,
+            "finished_at": finished_at,
+            "duration_ms": int((finished_at - started_at).total_seconds() * 1000),
+        })
+        db.commit()
+        return True
+    except Exception as e:
+        logger.error(f"[PROCESSED MESSAGES] Could not record {email_type} message {message_id} as {status}: {e}")
+        db.rollback()
+        return False
+
+
+def is_processed(db: Session, message_id: str, email_type: Optional[str] = None) -> bool:
+    """True if the message was processed successfully (as email_type, or as any type when None)."""
+    query = db.query(ProcessedMessage.id).filter(
+        ProcessedMessage.message_id == message_id,
+        ProcessedMessage.status == STATUS_PROCESSED
+    )
+    if email_type:
+        query = query.filter(ProcessedMessage.email_type == email_type)
+    return query.first() is not None
+
+
+def known_message_ids(
+    db: Session,
+    message_ids: Iterable[str],
+    email_type: Optional[str] = None,
+    statuses: Iterable[str] = SETTLED_STATUSES
+) -> Set[str]:
+    """
+    Return the IDs among message_ids that the registry has (one query).
+
+    Args:
+        db: Database session
+        message_ids: Gmail message IDs to look up
+        email_type: Only count rows of this type (any type when None)
+        statuses: Only count rows with one of these statuses
+    """
+    message_ids = list(message_ids)
+    if not message_ids:
+        return set()
+    query = db.query(ProcessedMessage.message_id).filter(
+        ProcessedMessage.message_id.in_(message_ids),
+        ProcessedMessage.status.in_(list(statuses))
+    )
+    if email_type:
+        query = query.filter(ProcessedMessage.email_type == email_type)
+    return {message_id for (message_id,) in query.distinct()}
+
+
+def list_unprocessed_message_ids(
+    db: Session,
+    gmail_service: Any,
+    query: str,
+    email_type: Optional[str],
+    max_results: int,
+    statuses: Iterable[str] = SETTLED_STATUSES,
+    max_scanned: Optional[int] = None
+) -> List[str]:
+    """
+    Search Gmail and return up to max_results matching messages the registry does not have yet.
+
+    Pages through the search results newest first and filters each page with one
+    registry query, so processed messages do not use up the page.
+
+    Args:
+        db: Database session
+        gmail_service: GmailService used for the search
+        query: Gmail search query (sender / subject only, no -label: exclusions)
+        email_type: Registry type to filter on (any type when None)
+        max_results: Number of unprocessed message IDs wanted
+        statuses: Registry statuses that count as handled (see SETTLED_STATUSES)
+        max_scanned: Stop after this many search results (default: 10x max_results, at least 500)
+
+    Returns:
+        Unprocessed message IDs, newest first
+    """
+    statuses = tuple(statuses)
+    max_scanned = max_scanned or max(max_results * 10, 500)
+    page_size = min(max(max_results * 2, 50), 500)
+    unprocessed: List[str] = []
+    scanned = 0
+    for page in gmail_service.iter_message_id_pages(query, page_size=page_size):
+        known = known_message_ids(db, page, email_type, statuses)
+        unprocessed.extend(message_id for message_id in page if message_id not in known)
+        scanned += len(page)
+        if len(unprocessed) >= max_results or scanned >= max_scanned:
+            break
+    return unprocessed[:max_results]
+
+
+def get_processing_stats(db: Session, email_type: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Count the registry by email type and status (one grouped query).
+
+    Returns:
+        {email_type: {status: count, ..., 'total': n, 'avg_duration_ms': ms}}
+    """
+    query = db.query(
+        ProcessedMessage.email_type,
+        ProcessedMessage.status,
+        func.count(ProcessedMessage.id),
+        func.avg(ProcessedMessage.duration_ms)
+    )
+    if email_type:
+        query = query.filter(ProcessedMessage.email_type == email_type)
+    rows = query.group_by(ProcessedMessage.email_type, ProcessedMessage.status).all()
+
+    stats: Dict[str, Dict[str, Any]] = {}
+    durations: Dict[str, float] = {}
+    for row_type, status, count, avg_duration in rows:
+        type_stats = stats.setdefault(row_type, {STATUS_PROCESSED: 0, STATUS_ERROR: 0, STATUS_MANUAL_REVIEW: 0, 'total': 0})
+        type_stats[status] = count
+        type_stats['total'] += count
+        durations[row_type] = durations.get(row_type, 0) + float(avg_duration or 0) * count
+    for row_type, type_stats in stats.items():
+        type_stats['avg_duration_ms'] = round(durations[row_type] / type_stats['total'], 1) if type_stats['total'] else None
+    return stats
+
+
+def retry_candidates(
+    db: Session,
+    email_type: Optional[str] = None,
+    retailer: Optional[str] = None,
+    max_attempts: Optional[int] = None,
+    limit: int = 100
+) -> List[ProcessedMessage]:
+    """
+    Messages whose last attempt failed, oldest failure first.
+
+    Args:
+        db: Database session
+        email_type: Only this type (any type when None)
+        retailer: Only this retailer
+        max_attempts: Skip messages that already failed this many times
+        limit: Maximum number of messages
+    """
+    query = db.query(ProcessedMessage).filter(ProcessedMessage.status == STATUS_ERROR)
+    if email_type:
+        query = query.filter(ProcessedMessage.email_type == email_type)
+    if retailer:
+        query = query.filter(ProcessedMessage.retailer == retailer)
+    if max_attempts:
+        query = query.filter(ProcessedMessage.attempts < max_attempts)
+    return query.order_by(ProcessedMessage.updated_at).limit(limit).all()
@@ -0,0 +1,405 @@
+"""
+Shared matcher that resolves email line items to PurchaseTracker records.
+
+Confirmation, shipping and cancellation handlers all look up the purchase
+record(s) for an item by order number (+ unique_id) + size. Retailer emails
+and the ASIN bank use different size formats ("11" vs "11.0", "09" vs "9"),
+so a match covers both the size as written and asin_bank.size_normalized
+(generated by the database from normalize_size(size)) - in a single query.
+
+While a processor handles one parsed order (see preloads_order_items), the
+matcher preloads the order's OASourcing leads, their AsinBank rows and the
+existing PurchaseTracker rows in four queries and answers the per-item
+lookups from memory. Anything the preload does not cover (other order
+numbers, unique_ids that were not on the order) still goes to the database.
+"""
+
+import functools
+import logging
+import re
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session, contains_eager, joinedload, selectinload
+
+from app.models.database import AsinBank, OASourcing, PurchaseTracker
+
+logger = logging.getLogger(__name__)
+
+def normalize_size(size: Optional[str]) -> str:
+    """
+    Normalize size for comparison - Python twin of the normalize_size() SQL function.
+
+    Converts "11.0" to "11", "09.5" to "9.5" and "09" to "9"; anything else is
+    returned stripped and unchanged.
+
+    Args:
+        size: Size string (e.g., "11.0", "11", "9.5", "M")
+
+    Returns:
+        Normalized size string ("" for None)
+    """
+    if size is None:
+        return ""
+    size = str(size).strip()
+    if not size:
+        return size
+
+    if re.match(r'^[0-9]{1,2}\.[0-9]$', size):
+        num = float(size)
+        return str(int(num)) if num % 1 == 0 else str(num)
+    if re.match(r'^[0-9]{1,2}$', size):
+        return str(int(size))
+
+    return size
+
+
+def _order_numbers(order_number: Union[str, Sequence[str]]) -> List[str]:
+    """Accept a single order number or several spellings of it."""
+    return [order_number] if isinstance(order_number, str) else list(order_number)
+
+
+def _pick_size_matches(size: Optional[str], candidates: List[Tuple[PurchaseTracker, Optional[str]]]) -> List[PurchaseTracker]:
+    """
+    Apply the size rule to (record, stored size) pairs.
+
+    Records whose stored size equals the email size (or its normalized form)
+    win; otherwise records whose stored size normalizes to the same value.
+    """
+    if size is None:
+        return [record for record, stored in candidates if stored is None]
+
+    normalized = normalize_size(size)
+    exact_sizes = {size, normalized}
+    exact = [record for record, stored in candidates if stored in exact_sizes]
+    if exact:
+        return exact
+    return [
+        record for record, stored in candidates
+        if stored is not None and normalize_size(stored) == normalized
+    ]
+
+
+class OrderItemResolution:
+    """
+    In-memory lookups for one parsed order (built by PurchaseItemMatcher.preload_order).
+
+    Holds the OASourcing leads for the order's unique_ids, every AsinBank row
+    linked to or owned by those leads, and the order's PurchaseTracker rows.
+    """
+
+    def __init__(
+        self,
+        order_numbers: Set[str],
+        unique_ids: Set[str],
+        leads: List[OASourcing],
+        asins: List[AsinBank],
+        records: List[PurchaseTracker]
+    ):
+        self.order_numbers = order_numbers
+        self.unique_ids = unique_ids
+        self.lead_ids: Set[str] = {lead.lead_id for lead in leads}
+
+        self._leads_by_unique_id: Dict[str, List[OASourcing]] = defaultdict(list)
+        for lead in sorted(leads, key=lambda l: l.id):
+            self._leads_by_unique_id[lead.unique_id].append(lead)
+
+        self._asins_by_id: Dict[int, AsinBank] = {asin.id: asin for asin in asins}
+        self._asins_by_lead: Dict[str, List[AsinBank]] = defaultdict(list)
+        for asin in sorted(asins, key=lambda a: a.id):
+            self._asins_by_lead[asin.lead_id].append(asin)
+
+        # (record, unique_id of its lead, its AsinBank row)
+        self._entries: List[Tuple[PurchaseTracker, Optional[str], Optional[AsinBank]]] = [
+            (record, record.oa_sourcing.unique_id if record.oa_sourcing else None, record.asin_bank_ref)
+            for record in sorted(records, key=lambda r: r.id)
+        ]
+
+    def covers_orders(self, order_number: Union[str, Sequence[str]]) -> bool:
+        """True if every given order number was preloaded."""
+        return all(o in self.order_numbers for o in _order_numbers(order_number))
+
+    def get_oa_sourcing(self, unique_id: str, retailer_id: Optional[int] = None) -> Optional[OASourcing]:
+        """First lead for unique_id, optionally restricted to one retailer."""
+        for lead in self._leads_by_unique_id.get(unique_id, []):
+            if retailer_id is None or lead.retailer_id == retailer_id:
+                return lead
+        return None
+
+    def get_asin(self, oa_sourcing: OASourcing, size: Optional[str]) -> Optional[AsinBank]:
+        """Same priority as RetailerOrderProcessor._get_asin_for_lead_and_size."""
+        normalized_input = normalize_size(str(size) if size is not None else "")
+
+        # 1. OASourcing's linked ASINs (lead_asin, loaded with the lead)
+        for link in oa_sourcing.asin_links:
+            asin = self._asins_by_id.get(link.asin_bank_id)
+            if asin and asin.size and normalize_size(str(asin.size)) == normalized_input:
+                return asin
+
+        lead_asins = self._asins_by_lead.get(oa_sourcing.lead_id, [])
+
+        # 2. Lead's ASINs, exact size
+        for asin in lead_asins:
+            if size is None or asin.size == str(size):
+                return asin
+
+        # 3. Lead's ASINs, normalized size
+        for asin in lead_asins:
+            if asin.size is not None and normalize_size(asin.size) == normalized_input:
+                return asin
+        return None
+
+    def count_asins(self, lead_id: str) -> int:
+        """Number of AsinBank rows owned by lead_id."""
+        return len(self._asins_by_lead.get(lead_id, []))
+
+    def match(
+        self,
+        order_number: Union[str, Sequence[str]],
+        size: Optional[str],
+        unique_id: Optional[str] = None,
+        by_unique_id: bool = False
+    ) -> List[PurchaseTracker]:
+        """In-memory equivalent of PurchaseItemMatcher.match_item / match_order_size."""
+        orders = set(_order_numbers(order_number))
+        candidates = [
+            (record, asin.size)
+            for record, record_unique_id, asin in self._entries
+            if record.order_number in orders
+            and asin is not None
+            and (not by_unique_id or record_unique_id == unique_id)
+        ]
+        return _pick_size_matches(size, candidates)
+
+    def match_unique_id(self, order_number: Union[str, Sequence[str]], unique_id: Optional[str]) -> List[PurchaseTracker]:
+        """Records for order_number + unique_id, any size."""
+        orders = set(_order_numbers(order_number))
+        return [
+            record for record, record_unique_id, _ in self._entries
+            if record.order_number in orders and record_unique_id == unique_id
+        ]
+
+    def add_record(self, record: PurchaseTracker, oa_sourcing: OASourcing, asin: Optional[AsinBank]) -> None:
+        """Track a record created while the order is being processed."""
+        self._entries.append((record, oa_sourcing.unique_id, asin))
+
+
+class PurchaseItemMatcher:
+    """
+    Resolves (order_number, [unique_id,] size) to PurchaseTracker records.
+
+    Records whose stored size equals the email size (or its normalized form)
+    win; records that only match after normalizing the stored size are
+    returned when there is no such exact match. Both come from one query,
+    with asin_bank_ref already loaded - or from memory while an order is
+    preloaded.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.resolution: Optional[OrderItemResolution] = None
+
+    def preload_order(self, order_number: Union[str, Sequence[str]], items: Iterable[Any]) -> OrderItemResolution:
+        """
+        Load what the order's items need in four queries (leads, their lead_asin links,
+        AsinBank rows, purchase records) and keep it until clear_order().
+
+        Args:
+            order_number: Order number (or spellings of it) of the parsed order
+            items: Parsed items (anything with a unique_id attribute)
+
+        Returns:
+            The active OrderItemResolution
+        """
+        order_numbers = {o for o in _order_numbers(order_number) if o}
+        unique_ids = {getattr(item, 'unique_id', None) for item in items} - {None, ''}
+
+        leads = self.db.query(OASourcing).options(
+            selectinload(OASourcing.asin_links)
+        ).filter(
+            OASourcing.unique_id.in_(sorted(unique_ids))
+        ).all() if unique_ids else []
+
+        linked_ids = {link.asin_bank_id for lead in leads for link in lead.asin_links}
+        lead_ids = {lead.lead_id for lead in leads}
+        asins = self.db.query(AsinBank).filter(
+            or_(AsinBank.id.in_(sorted(linked_ids)), AsinBank.lead_id.in_(sorted(lead_ids)))
+        ).all() if leads else []
+
+        records = self.db.query(PurchaseTracker).options(
+            joinedload(PurchaseTracker.oa_sourcing),
+            joinedload(PurchaseTracker.asin_bank_ref)
+        ).filter(
+            PurchaseTracker.order_number.in_(sorted(order_numbers))
+        ).all() if order_numbers else []
+
+        logger.debug(
+            f"Preloaded order {sorted(order_numbers)}: {len(leads)} lead(s), "
+            f"{len(asins)} ASIN(s), {len(records)} purchase record(s)"
+        )
+        self.resolution = OrderItemResolution(order_numbers, unique_ids, leads, asins, records)
+        return self.resolution
+
+    def clear_order(self) -> None:
+        """Drop the preloaded order."""
+        self.resolution = None
+
+    def register_record(self, record: PurchaseTracker, oa_sourcing: OASourcing, asin: Optional[AsinBank]) -> None:
+        """Make a record created for the preloaded order visible to later matches."""
+        if self.resolution is not None and record.order_number in self.resolution.order_numbers:
+            self.resolution.add_record(record, oa_sourcing, asin)
+
+    def find_oa_sourcing(self, unique_id: str, retailer_id: Optional[int] = None) -> Optional[OASourcing]:
+        """
+        Find the OASourcing lead for a unique_id.
+
+        Args:
+            unique_id: Product unique ID from the email
+            retailer_id: Only consider this retailer's leads (optional)
+
+        Returns:
+            OASourcing record or None
+        """
+        if self.resolution is not None and unique_id in self.resolution.unique_ids:
+            return self.resolution.get_oa_sourcing(unique_id, retailer_id)
+
+        query = self.db.query(OASourcing).filter(OASourcing.unique_id == unique_id)
+        if retailer_id is not None:
+            query = query.filter(OASourcing.retailer_id == retailer_id)
+        return query.first()
+
+    def count_asins_for_lead(self, lead_id: str) -> int:
+        """Number of AsinBank rows owned by lead_id."""
+        if self.resolution is not None and lead_id in self.resolution.lead_ids:
+            return self.resolution.count_asins(lead_id)
+        return self.db.query(AsinBank).filter(AsinBank.lead_id == lead_id).count()
+
+    def match_item(self, order_number: str, unique_id: Optional[str], size: Optional[str]) -> List[PurchaseTracker]:
+        """
+        Find records by order_number + unique_id (via OASourcing) + size.
+
+        Args:
+            order_number: Retailer order number
+            unique_id: Product unique ID (OASourcing.unique_id)
+            size: Size as written in the email
+
+        Returns:
+            Matching PurchaseTracker records (may be empty)
+        """
+        if self.resolution is not None and self.resolution.covers_orders(order_number):
+            return self.resolution.match(order_number, size, unique_id=unique_id, by_unique_id=True)
+
+        query = self.db.query(PurchaseTracker).join(
+            OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
+        ).filter(
+            OASourcing.unique_id == unique_id
+        )
+        return self._match(query, order_number, size)
+
+    def match_order_size(
+        self,
+        order_number: Union[str, Sequence[str]],
+        size: Optional[str]
+    ) -> List[PurchaseTracker]:
+        """
+        Find records by order_number + size (for retailers without reliable unique_ids).
+
+        Args:
+            order_number: Retailer order number, or several spellings of it
+                (e.g. with and without a retailer prefix)
+            size: Size as written in the email
+
+        Returns:
+            Matching PurchaseTracker records (may be empty)
+        """
+        if self.resolution is not None and self.resolution.covers_orders(order_number):
+            return self.resolution.match(order_number, size)
+
+        return self._match(self.db.query(PurchaseTracker), order_number, size)
+
+    def match_unique_id(
+        self,
+        order_number: Union[str, Sequence[str]],
+        unique_id: Optional[str]
+    ) -> List[PurchaseTracker]:
+        """
+        Find records by order_number + unique_id, whatever their size.
+
+        Args:
+            order_number: Retailer order number, or several spellings of it
+            unique_id: Product unique ID (OASourcing.unique_id)
+
+        Returns:
+            Matching PurchaseTracker records (may be empty)
+        """
+        if self.resolution is not None and self.resolution.covers_orders(order_number):
+            return self.resolution.match_unique_id(order_number, unique_id)
+
+        return self.db.query(PurchaseTracker).join(
+            OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
+        ).filter(
+            PurchaseTracker.order_number.in_(_order_numbers(order_number)),
+            OASourcing.unique_id == unique_id
+        ).order_by(PurchaseTracker.id).all()
+
+    def _match(self, query, order_number: Union[str, Sequence[str]], size: Optional[str]) -> List[PurchaseTracker]:
+        """Apply the order/size filters to query and pick exact matches first."""
+        if isinstance(order_number, str):
+            order_filter = PurchaseTracker.order_number == order_number
+        else:
+            order_filter = PurchaseTracker.order_number.in_(list(order_number))
+
+        query = query.join(
+            AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
+        ).options(
+            contains_eager(PurchaseTracker.asin_bank_ref)
+        ).filter(order_filter)
+
+        if size is None:
+            return query.filter(AsinBank.size.is_(None)).order_by(PurchaseTracker.id).all()
+
+        normalized = normalize_size(size)
+        exact_sizes = {size, normalized}
+        records = query.filter(
+            or_(
+                AsinBank.size.in_(sorted(exact_sizes)),
+                AsinBank.size_normalized == normalized
+            )
+        ).order_by(PurchaseTracker.id).all()
+
+        exact = [r for r in records if r.asin_bank_ref.size in exact_sizes]
+        if records and not exact:
+            logger.debug(
+                f"Matched order {order_number} size {size!r} on normalized size {normalized!r} "
+                f"({len(records)} record(s))"
+            )
+        return exact or records
+
+
+def preloads_order_items(method):
+    """
+    Decorator for processor methods that take a parsed order / update object.
+
+    Preloads the object's order through self.item_matcher for the duration of
+    the call. If preloading fails the method still runs with per-item queries.
+    """
+    @functools.wraps(method)
+    def wrapper(self, order_data, *args, **kwargs):
+        matcher = self.item_matcher
+        order_number = getattr(order_data, 'order_number', None)
+        if matcher.resolution is not None or not order_number:
+            return method(self, order_data, *args, **kwargs)
+
+        try:
+            matcher.preload_order(order_number, getattr(order_data, 'items', None) or [])
+        except Exception as e:
+            logger.warning(f"Could not preload order {order_number}, using per-item queries: {e}")
+            self.db.rollback()
+            matcher.clear_order()
+
+        try:
+            return method(self, order_data, *args, **kwargs)
+        finally:
+            matcher.clear_order()
+    return wrapper
@@ -0,0 +1,311 @@
+"""
+Incrementally maintained Retailer spend / quantity / cancellation counters.
+
+Retailer.total_spend, total_qty_of_items_ordered and percent_of_cancelled_qty
+summarize the retailer's purchases:
+
+- total_spend: sum of lead PPU (oa_sourcing.ppu_including_ship) x final_qty
+- total_qty_of_items_ordered: sum of og_qty
+- percent_of_cancelled_qty: sum of cancelled_qty / sum of og_qty x 100
+
+track_retailer_counters(session) makes a session keep them current: before
+every flush, the PurchaseTracker rows the session creates, changes
+(og_qty, final_qty, cancelled_qty, oa_sourcing_id) or deletes are turned into
+per-retailer deltas and added to the session's pending deltas. So are leads
+whose ppu_including_ship or retailer_id changes: their stored purchases are
+taken off the old retailer at the old PPU and added to the new retailer at the
+new PPU (purchase changes in the same flush are then counted at the new lead
+values). At commit they
+are applied with one atomic UPDATE retailers SET x = x + :delta per retailer,
+in the same transaction as the purchase changes, so concurrent processors never
+overwrite each other's counts. Applying them only at commit, in retailer id
+order, keeps the retailer row locks short and taken in the same order by every
+transaction (no deadlocks); a rollback discards them.
+
+reconcile_retailer_counters() recomputes all three values with one grouped
+query, reports the retailers whose stored values drifted and (by default)
+writes the recomputed values. When writing, it locks the retailer rows (in id
+order, like the deltas) before the grouped query, so a delta committed
+concurrently is either already in the recomputed values or applied after them.
+"""
+
+import logging
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, func, inspect, select, text
+from sqlalchemy.orm import Session
+
+from app.models.database import OASourcing, PurchaseTracker, Retailer
+
+logger = logging.getLogger(__name__)
+
+# PurchaseTracker attributes that feed the counters
+COUNTED_ATTRIBUTES = ("oa_sourcing_id", "og_qty", "final_qty", "cancelled_qty")
+
+# OASourcing attributes that feed the counters of the lead's purchases
+LEAD_COUNTED_ATTRIBUTES = ("retailer_id", "ppu_including_ship")
+
+# session.info keys: sessions that already track the counters, and their
+# deltas not applied yet (retailer_id -> [spend, qty, cancelled])
+_TRACKING_KEY = "retailer_counters_tracked"
+_PENDING_KEY = "retailer_counters_pending"
+
+# Absolute differences below these are float noise, not drift
+SPEND_TOLERANCE = 0.01
+PERCENT_TOLERANCE = 0.01
+
+# percent_of_cancelled_qty is stored as a percentage, so the cancelled sum is
+# recovered as percent x qty / 100, adjusted, and divided by the new qty
+_APPLY_DELTA_SQL = text("""
+    UPDATE retailers SET
+        total_spend = COALESCE(total_spend, 0) + :spend,
+        percent_of_cancelled_qty = CASE
+            WHEN COALESCE(total_qty_of_items_ordered, 0) + :qty > 0 THEN
+                GREATEST(0, COALESCE(percent_of_cancelled_qty, 0) * COALESCE(total_qty_of_items_ordered, 0) / 100.0 + :cancelled)
+                * 100.0 / (COALESCE(total_qty_of_items_ordered, 0) + :qty)
+            ELSE 0
+        END,
+        total_qty_of_items_ordered = COALESCE(total_qty_of_items_ordered, 0) + :qty,
+        updated_at = now()
+    WHERE id = :retailer_id
+""")
+
+_LOCK_RETAILERS_SQL = text("""
+    SELECT id FROM retailers ORDER BY id FOR UPDATE
+""")
+
+_RECOMPUTE_SQL = text("""
+    SELECT
+        o.retailer_id,
+        COALESCE(sum(o.ppu_including_ship * p.final_qty), 0) AS total_spend,
+        COALESCE(sum(p.og_qty), 0) AS total_qty,
+        COALESCE(sum(p.cancelled_qty), 0) AS cancelled_qty
+    FROM purchase_tracker p
+    JOIN oa_sourcing o ON o.id = p.oa_sourcing_id
+    WHERE o.retailer_id IS NOT NULL
+    GROUP BY o.retailer_id
+""")
+
+
+def track_retailer_counters(session: Session) -> None:
+    """Keep Retailer counters current for every flush of this session (safe to call repeatedly)."""
+    if session.info.get(_TRACKING_KEY):
+        return
+    session.info[_TRACKING_KEY] = True
+    event.listen(session, "before_flush", _collect_pending_deltas)
+    event.listen(session, "before_commit", _apply_pending_deltas)
+    event.listen(session, "after_rollback", _discard_pending_deltas)
+
+
+def _lead_values(session: Session, oa_sourcing_id: Optional[int]) -> Tuple[Optional[int], float]:
+    """(retailer_id, ppu_including_ship) of a lead, from the identity map when possible."""
+    if oa_sourcing_id is None:
+        return None, 0.0
+    lead = session.get(OASourcing, oa_sourcing_id)
+    if lead is None:
+        return None, 0.0
+    return lead.retailer_id, lead.ppu_including_ship or 0.0
+
+
+def _stored_values(session: Session, obj, attributes: Tuple[str, ...] = COUNTED_ATTRIBUTES) -> Dict[str, Any]:
+    """
+    Attribute values of a PurchaseTracker (or OASourcing) row as last flushed to the database.
+
+    Taken from attribute history; attributes that were assigned without being
+    loaded first (no previous value in the history) are read from the row.
+    """
+    state = inspect(obj)
+    model = type(obj)
+    values: Dict[str, Any] = {}
+    missing = []
+    for key in attributes:
+        history = state.attrs[key].history
+        if history.deleted:
+            values[key] = history.deleted[0]
+        elif history.unchanged:
+            values[key] = history.unchanged[0]
+        elif not history.added:
+            values[key] = getattr(obj, key)
+        else:
+            missing.append(key)
+    if missing:
+        row = session.execute(
+            select(*[getattr(model, key) for key in missing])
+            .where(model.id == obj.id)
+        ).one()
+        values.update(zip(missing, row))
+    return values
+
+
+def _contribution(session: Session, values: Dict[str, Any], sign: int) -> Tuple[Optional[int], Tuple[float, int, int]]:
+    """(retailer_id, (spend, qty, cancelled)) a purchase with these values adds (sign=1) or removes (sign=-1)."""
+    retailer_id, ppu = _lead_values(session, values.get("oa_sourcing_id"))
+    final_qty = values.get("final_qty") or 0
+    return retailer_id, (
+        sign * ppu * final_qty,
+        sign * (values.get("og_qty") or 0),
+        sign * (values.get("cancelled_qty") or 0),
+    )
+
+
+def _current_values(purchase: PurchaseTracker) -> Dict[str, Any]:
+    return {key: getattr(purchase, key) for key in COUNTED_ATTRIBUTES}
+
+
+def _lead_contributions(session: Session, lead: OASourcing) -> List[Tuple[Optional[int], Tuple[float, int, int]]]:
+    """
+    Contributions that move a lead's stored purchases from its old PPU / retailer to the new ones.
+
+    Purchase sums are read as last flushed; purchases created, changed or
+    deleted in the same flush are counted at the new lead values by the
+    PurchaseTracker contributions.
+    """
+    old = _stored_values(session, lead, LEAD_COUNTED_ATTRIBUTES)
+    old_retailer_id, old_ppu = old["retailer_id"], old["ppu_including_ship"] or 0.0
+    new_retailer_id, new_ppu = lead.retailer_id, lead.ppu_including_ship or 0.0
+    if old_retailer_id == new_retailer_id and old_ppu == new_ppu:
+        return []
+
+    final_qty, og_qty, cancelled_qty = session.execute(
+        select(
+            func.coalesce(func.sum(PurchaseTracker.final_qty), 0),
+            func.coalesce(func.sum(PurchaseTracker.og_qty), 0),
+            func.coalesce(func.sum(PurchaseTracker.cancelled_qty), 0),
+        ).where(PurchaseTracker.oa_sourcing_id == lead.id)
+    ).one()
+    if old_retailer_id == new_retailer_id:
+        return [(new_retailer_id, ((new_ppu - old_ppu) * final_qty, 0, 0))]
+    return [
+        (old_retailer_id, (-old_ppu * final_qty, -og_qty, -cancelled_qty)),
+        (new_retailer_id, (new_ppu * final_qty, og_qty, cancelled_qty)),
+    ]
+
+
+def _collect_pending_deltas(session: Session, flush_context, instances) -> None:
+    """before_flush: turn pending purchase changes and lead PPU / retailer changes into retailer counter deltas."""
+    deltas: Dict[int, List[float]] = session.info.setdefault(_PENDING_KEY, defaultdict(lambda: [0.0, 0, 0]))
+    contributions = []
+
+    for obj in session.new:
+        if isinstance(obj, PurchaseTracker):
+            contributions.append(_contribution(session, _current_values(obj), 1))
+    for obj in session.deleted:
+        if isinstance(obj, PurchaseTracker):
+            contributions.append(_contribution(session, _stored_values(session, obj), -1))
+    for obj in session.dirty:
+        if isinstance(obj, OASourcing) and obj not in session.deleted:
+            state = inspect(obj)
+            if any(state.attrs[key].history.has_changes() for key in LEAD_COUNTED_ATTRIBUTES):
+                contributions.extend(_lead_contributions(session, obj))
+            continue
+        if not isinstance(obj, PurchaseTracker) or obj in session.deleted:
+            continue
+        state = inspect(obj)
+        if not any(state.attrs[key].history.has_changes() for key in COUNTED_ATTRIBUTES):
+            continue
+        contributions.append(_contribution(session, _stored_values(session, obj), -1))
+        contributions.append(_contribution(session, _current_values(obj), 1))
+
+    for retailer_id, (spend, qty, cancelled) in contributions:
+        if retailer_id is None:
+            continue
+        delta = deltas[retailer_id]
+        delta[0] += spend
+        delta[1] += qty
+        delta[2] += cancelled
+
+
+def _apply_pending_deltas(session: Session) -> None:
+    """before_commit: apply the transaction's retailer counter deltas, in retailer id order."""
+    # commit() flushes after before_commit; flush now so the last changes are counted
+    session.flush()
+    deltas = session.info.pop(_PENDING_KEY, None)
+    if not deltas:
+        return
+
+    for retailer_id in sorted(deltas):
+        spend, qty, cancelled = deltas[retailer_id]
+        if spend == 0 and qty == 0 and cancelled == 0:
+            continue
+        session.execute(
+            _APPLY_DELTA_SQL,
+            {"retailer_id": retailer_id, "spend": spend, "qty": qty, "cancelled": cancelled}
+        )
+        logger.debug(
+            f"[RETAILER COUNTERS] Retailer {retailer_id}: spend {spend:+.2f}, qty {qty:+d}, cancelled {cancelled:+d}"
+        )
+
+
+def _discard_pending_deltas(session: Session) -> None:
+    """after_rollback: the purchase changes are gone, and so are their deltas."""
+    session.info.pop(_PENDING_KEY, None)
+
+
+def reconcile_retailer_counters(db: Session, apply: bool = True) -> Dict[str, Any]:
+    """
+    Recompute every retailer's counters in one grouped query and report drift.
+
+    With apply, the retailer rows are locked (in id order) before the grouped
+    query and stay locked until the commit, so no concurrent delta is lost.
+
+    Args:
+        db: Database session
+        apply: Write the recomputed values (and commit) for the retailers that drifted
+
+    Returns:
+        Summary with the number of retailers checked and the drifted ones
+        (stored vs recomputed values)
+    """
+    started = time.perf_counter()
+    if apply:
+        db.execute(_LOCK_RETAILERS_SQL)
+    actual = {
+        row.retailer_id: (float(row.total_spend), int(row.total_qty), int(row.cancelled_qty))
+        for row in db.execute(_RECOMPUTE_SQL)
+    }
+
+    drift = []
+    retailers = db.query(Retailer).populate_existing().all()
+    for retailer in retailers:
+        spend, qty, cancelled = actual.get(retailer.id, (0.0, 0, 0))
+        percent = round(cancelled / qty * 100, 2) if qty else 0.0
+        stored = (retailer.total_spend or 0.0, retailer.total_qty_of_items_ordered or 0, retailer.percent_of_cancelled_qty or 0.0)
+        if (
+            abs(stored[0] - spend) < SPEND_TOLERANCE
+            and stored[1] == qty
+            and abs(stored[2] - percent) < PERCENT_TOLERANCE
+        ):
+            continue
+        drift.append({
+            "retailer_id": retailer.id,
+            "retailer": retailer.name,
+            "stored": {"total_spend": stored[0], "total_qty_of_items_ordered": stored[1], "percent_of_cancelled_qty": stored[2]},
+            "actual": {"total_spend": round(spend, 2), "total_qty_of_items_ordered": qty, "percent_of_cancelled_qty": percent},
+        })
+        if apply:
+            retailer.total_spend = round(spend, 2)
+            retailer.total_qty_of_items_ordered = qty
+            retailer.percent_of_cancelled_qty = percent
+
+    if apply:
+        # Also releases the retailer row locks when nothing drifted
+        db.commit()
+
+    elapsed = time.perf_counter() - started
+    if drift:
+        logger.warning(
+            f"[RETAILER COUNTERS] {len(drift)} of {len(retailers)} retailer(s) drifted"
+            f"{' (corrected)' if apply else ''}: " + ", ".join(d["retailer"] for d in drift[:10])
+        )
+    else:
+        logger.info(f"[RETAILER COUNTERS] All {len(retailers)} retailers in sync ({elapsed:.2f}s)")
+
+    return {
+        "retailers_checked": len(retailers),
+        "drifted": len(drift),
+        "applied": apply,
+        "duration_seconds": round(elapsed, 3),
+        "drift": drift,
+    }
@@ -4,49 +4,42 @@ Unified (retailer, email_type) classification layer for retailer emails.
 Classifies incoming emails into retailer + type before routing to processors.
 Check order: SHIPPING and CANCELLATION first (to avoid misclassification),
 then ORDER_CONFIRMATION.
+
+Sender dispatch: a SenderDispatchIndex compiled once from the parsers' sender
+constants narrows each email to the retailers whose is_<retailer>_email check
+can match its sender, so the ordered checks below skip every other parser.
 """
 
 import logging
+import re
+import threading
 from dataclasses import dataclass
 from enum import Enum
-from typing import Optional
+from typing import Dict, FrozenSet, List, Optional, Pattern, Tuple
 
 from app.models.email import EmailData
-
-from app.services.footlocker_parser import FootlockerEmailParser
-from app.services.champs_parser import ChampsEmailParser
-from app.services.dicks_parser import DicksEmailParser
-from app.services.hibbett_parser import HibbettEmailParser
-from app.services.dtlr_parser import DTLREmailParser
-from app.services.shoepalace_parser import ShoepalaceEmailParser
-from app.services.snipes_parser import SnipesEmailParser
-from app.services.finishline_parser import FinishLineEmailParser
-from app.services.shopsimon_parser import ShopSimonEmailParser
-from app.services.jdsports_parser import JDSportsEmailParser
-from app.services.revolve_parser import RevolveEmailParser
-from app.services.asos_parser import ASOSEmailParser
-from app.services.urban_parser import UrbanOutfittersEmailParser
-from app.services.bloomingdales_parser import BloomingdalesEmailParser
-from app.services.anthropologie_parser import AnthropologieEmailParser
-from app.services.nike_parser import NikeEmailParser
-from app.services.carbon38_parser import Carbon38EmailParser
-from app.services.gazelle_parser import GazelleEmailParser
-from app.services.netaporter_parser import NetAPorterEmailParser
-from app.services.fit2run_parser import Fit2RunEmailParser
-from app.services.sns_parser import SNSEmailParser
-from app.services.adidas_parser import AdidasEmailParser
-from app.services.concepts_parser import ConceptsEmailParser
-from app.services.sneaker_parser import SneakerPoliticsEmailParser
-from app.services.orleans_parser import OrleansEmailParser
-from app.services.endclothing_parser import ENDClothingEmailParser
-from app.services.shopwss_parser import ShopWSSEmailParser
-from app.services.als_parser import AlsEmailParser
-from app.services.fwrd_parser import FwrdEmailParser
-from app.services.academy_parser import AcademyEmailParser
-from app.services.scheels_parser import SceelsEmailParser
+from app.services.parser_registry import get_parser
 
 logger = logging.getLogger(__name__)
 
+# is_<retailer>_email checks that can match without a sender hit (always evaluated)
+# - bloomingdales: falls back to HTML branding for any sender
+# - als / fwrd / scheels: sender checks not expressed as *_FROM_EMAIL constants
+UNGATED_SENDER_CHECKS = frozenset({
+    "is_bloomingdales_email",
+    "is_als_email",
+    "is_fwrd_email",
+    "is_scheels_email",
+})
+
+# Sender substrings checked inline by a parser (not declared as class constants)
+EXTRA_SENDER_NEEDLES: Dict[str, Tuple[str, ...]] = {
+    "is_shoepalace_email": ("shoepalace", "shoe palace"),
+}
+
+# Distinct senders remembered by SenderDispatchIndex before the cache is reset
+SENDER_CACHE_SIZE = 4096
+
 
 class EmailType(str, Enum):
     """Type of retailer email."""
@@ -63,6 +56,75 @@ class ClassificationResult:
     display_name: str      # e.g. "Footlocker", "Nike"
 
 
+class SenderDispatchIndex:
+    """
+    Precompiled sender gates for the parsers' is_<retailer>_email checks.
+
+    Each gate is one case-insensitive regex built from the parser's sender
+    constants (*_FROM_EMAIL / *_FROM substrings and *_FROM_PATTERN regexes, dev
+    forwarding addresses included). A gate is a superset of its is_from check:
+    when it does not match, the check would return False, so skipping it keeps
+    classification identical. Results are cached per sender.
+    """
+
+    def __init__(self, parsers: Dict[str, object]):
+        """
+        Args:
+            parsers: is_<retailer>_email method name -> parser instance
+        """
+        patterns = {
+            is_from_attr: self._compile_sender_pattern(is_from_attr, parser)
+            for is_from_attr, parser in parsers.items()
+        }
+        self._gates: List[Tuple[str, Optional[Pattern]]] = [
+            (is_from_attr, None if is_from_attr in UNGATED_SENDER_CHECKS else pattern)
+            for is_from_attr, pattern in patterns.items()
+        ]
+        # Every retailer with sender constants, ungated checks included (is_retailer_sender)
+        self._sender_patterns: List[Pattern] = [pattern for pattern in patterns.values() if pattern is not None]
+        self._cache: Dict[str, FrozenSet[str]] = {}
+
+    @staticmethod
+    def _compile_sender_pattern(is_from_attr: str, parser: object) -> Optional[Pattern]:
+        """Combine the parser's sender constants into one regex (None = no constants)."""
+        alternatives = []
+        parser_cls = type(parser)
+        for name in sorted(dir(parser_cls)):
+            value = getattr(parser_cls, name, None)
+            if not name.isupper() or not isinstance(value, str) or not value:
+                continue
+            if name.endswith("FROM_PATTERN"):
+                alternatives.append(f"(?:{value})")
+            elif name.endswith("FROM_EMAIL") or name.endswith("_FROM"):
+                alternatives.append(re.escape(value.lower()))
+        alternatives.extend(re.escape(needle) for needle in EXTRA_SENDER_NEEDLES.get(is_from_attr, ()))
+
+        if not alternatives:
+            if is_from_attr not in UNGATED_SENDER_CHECKS:
+                logger.warning(f"No sender constants for {is_from_attr}; it will be checked for every email")
+            return None
+        return re.compile("|".join(alternatives), re.IGNORECASE)
+
+    def candidates(self, sender: Optional[str]) -> FrozenSet[str]:
+        """is_<retailer>_email method names whose check can match this sender."""
+        sender_lower = (sender or "").lower()
+        found = self._cache.get(sender_lower)
+        if found is None:
+            found = frozenset(
+                is_from_attr for is_from_attr, gate in self._gates
+                if gate is None or gate.search(sender_lower)
+            )
+            if len(self._cache) >= SENDER_CACHE_SIZE:
+                self._cache.clear()
+            self._cache[sender_lower] = found
+        return found
+
+    def matches_any_sender(self, sender: Optional[str]) -> bool:
+        """True if the sender matches the sender constants of any retailer."""
+        sender_lower = (sender or "").lower()
+        return any(pattern.search(sender_lower) for pattern in self._sender_patterns)
+
+
 class RetailerEmailClassifier:
     """
     Classifies retailer emails into (retailer_id, email_type).
@@ -71,40 +133,54 @@ class RetailerEmailClassifier:
     1. SHIPPING / CANCELLATION for retailers that support them
        (Footlocker, Champs, Dick's, Hibbett, DTLR)
     2. ORDER_CONFIRMATION for all supported retailers
+
+    Retailers whose sender gate does not match are skipped (see SenderDispatchIndex);
+    pass use_sender_index=False to evaluate every check as before.
     """
 
-    def __init__(self):
-        self._footlocker = FootlockerEmailParser()
-        self._champs = ChampsEmailParser()
-        self._dicks = DicksEmailParser()
-        self._hibbett = HibbettEmailParser()
-        self._dtlr = DTLREmailParser()
-        self._shoepalace = ShoepalaceEmailParser()
-        self._snipes = SnipesEmailParser()
-        self._finishline = FinishLineEmailParser()
-        self._shopsimon = ShopSimonEmailParser()
-        self._jdsports = JDSportsEmailParser()
-        self._urban = UrbanOutfittersEmailParser()
-        self._bloomingdales = BloomingdalesEmailParser()
-        self._anthropologie = AnthropologieEmailParser()
-        self._nike = NikeEmailParser()
-        self._carbon38 = Carbon38EmailParser()
-        self._gazelle = GazelleEmailParser()
-        self._netaporter = NetAPorterEmailParser()
-        self._fit2run = Fit2RunEmailParser()
-        self._sns = SNSEmailParser()
-        self._adidas = AdidasEmailParser()
-        self._concepts = ConceptsEmailParser()
-        self._sneaker = SneakerPoliticsEmailParser()
-        self._orleans = OrleansEmailParser()
-        self._revolve = RevolveEmailParser()
-        self._asos = ASOSEmailParser()
-        self._endclothing = ENDClothingEmailParser()
-        self._shopwss = ShopWSSEmailParser()
-        self._als = AlsEmailParser()
-        self._fwrd = FwrdEmailParser()
-        self._academy = AcademyEmailParser()
-        self._scheels = SceelsEmailParser()
+    def __init__(self, use_sender_index: bool = True):
+        self._footlocker = get_parser("footlocker")
+        self._champs = get_parser("champs")
+        self._dicks = get_parser("dicks")
+        self._hibbett = get_parser("hibbett")
+        self._dtlr = get_parser("dtlr")
+        self._shoepalace = get_parser("shoepalace")
+        self._snipes = get_parser("snipes")
+        self._finishline = get_parser("finishline")
+        self._shopsimon = get_parser("shopsimon")
+        self._jdsports = get_parser("jdsports")
+        self._urban = get_parser("urban")
+        self._bloomingdales = get_parser("bloomingdales")
+        self._anthropologie = get_parser("anthropologie")
+        self._nike = get_parser("nike")
+        self._carbon38 = get_parser("carbon38")
+        self._gazelle = get_parser("gazelle")
+        self._netaporter = get_parser("netaporter")
+        self._fit2run = get_parser("fit2run")
+        self._sns = get_parser("sns")
+        self._adidas = get_parser("adidas")
+        self._concepts = get_parser("concepts")
+        self._sneaker = get_parser("sneaker")
+        self._orleans = get_parser("orleans")
+        self._revolve = get_parser("revolve")
+        self._asos = get_parser("asos")
+        self._endclothing = get_parser("endclothing")
+        self._shopwss = get_parser("shopwss")
+        self._als = get_parser("als")
+        self._fwrd = get_parser("fwrd")
+        self._academy = get_parser("academy")
+        self._scheels = get_parser("scheels")
+
+        self._sender_index: Optional[SenderDispatchIndex] = None
+        if use_sender_index:
+            self._sender_index = SenderDispatchIndex({
+                is_from_attr: parser
+                for parser in vars(self).values()
+                for is_from_attr in dir(parser)
+                if re.fullmatch(r"is_\w+_email", is_from_attr)
+                and is_from_attr not in ("is_order_confirmation_email", "is_shipping_email",
+                                         "is_cancellation_email", "is_kids_footlocker_email")
+            })
 
     def classify(self, email_data: EmailData) -> Optional[ClassificationResult]:
         """
@@ -112,25 +188,51 @@ class RetailerEmailClassifier:
         
         Returns None if not a supported retailer email.
         """
+        candidates = self._sender_index.candidates(email_data.sender) if self._sender_index else None
+
         # 1. Check shipping/cancellation first (avoids misclassification)
-        result = self._check_shipping_or_cancellation(email_data)
+        result = self._check_shipping_or_cancellation(email_data, candidates)
         if result:
             return result
 
         # 2. Check order confirmation
-        return self._check_order_confirmation(email_data)
+        return self._check_order_confirmation(email_data, candidates)
 
-    def _check_shipping_or_cancellation(self, email_data: EmailData) -> Optional[ClassificationResult]:
+    def is_retailer_sender(self, sender: Optional[str]) -> bool:
+        """
+        Cheap pre-check on the From header alone: True if the sender matches a
+        retailer's sender constants, i.e. the email is worth a full fetch.
+        
+        Checks without sender constants (HTML-only fallbacks) are not considered.
+        Always True when the classifier was built without the sender index.
+        """
+        if self._sender_index is None:
+            return True
+        return self._sender_index.matches_any_sender(sender)
+
+    @staticmethod
+    def _is_from(parser, is_from_attr: str, email_data: EmailData, candidates: Optional[FrozenSet[str]]) -> bool:
+        """Run parser.<is_from_attr> unless the sender index rules the retailer out."""
+        if candidates is not None and is_from_attr not in candidates:
+            return False
+        is_from = getattr(parser, is_from_attr, None)
+        return callable(is_from) and is_from(email_data)
+
+    def _check_shipping_or_cancellation(
+        self,
+        email_data: EmailData,
+        candidates: Optional[FrozenSet[str]] = None
+    ) -> Optional[ClassificationResult]:
         """Check for shipping or cancellation emails. Returns first match."""
         # ASOS shipping FIRST: "Your order's on its way!" is unique - avoid other parsers stealing via broad "order" match
-        subject_lower = (email_data.subject or "").lower()
-        sender_lower = (email_data.sender or "").lower()
+        subject_lower = email_data.document.subject_lower
+        sender_lower = email_data.document.sender_lower
         if "on its way" in subject_lower:
             if "orders@asos.com" in sender_lower or "glenallagroupc@gmail.com" in sender_lower:
                 return ClassificationResult("asos", EmailType.SHIPPING, "ASOS")
         
         # Footlocker (with kids variant)
-        if self._footlocker.is_footlocker_email(email_data):
+        if self._is_from(self._footlocker, "is_footlocker_email", email_data, candidates):
             if self._footlocker.is_shipping_email(email_data):
                 is_kids = self._footlocker.is_kids_footlocker_email(email_data)
                 rid = "kidsfootlocker" if is_kids else "footlocker"
@@ -143,28 +245,28 @@ class RetailerEmailClassifier:
                 return ClassificationResult(rid, EmailType.CANCELLATION, disp)
 
         # Champs
-        if self._champs.is_champs_email(email_data):
+        if self._is_from(self._champs, "is_champs_email", email_data, candidates):
             if self._champs.is_shipping_email(email_data):
                 return ClassificationResult("champs", EmailType.SHIPPING, "Champs Sports")
             if self._champs.is_cancellation_email(email_data):
                 return ClassificationResult("champs", EmailType.CANCELLATION, "Champs Sports")
 
         # Dick's
-        if self._dicks.is_dicks_email(email_data):
+        if self._is_from(self._dicks, "is_dicks_email", email_data, candidates):
             if self._dicks.is_shipping_email(email_data):
                 return ClassificationResult("dicks", EmailType.SHIPPING, "Dick's")
             if self._dicks.is_cancellation_email(email_data):
                 return ClassificationResult("dicks", EmailType.CANCELLATION, "Dick's")
 
         # Hibbett
-        if self._hibbett.is_hibbett_email(email_data):
+        if self._is_from(self._hibbett, "is_hibbett_email", email_data, candidates):
             if self._hibbett.is_shipping_email(email_data):
                 return ClassificationResult("hibbett", EmailType.SHIPPING, "Hibbett")
             if self._hibbett.is_cancellation_email(email_data):
                 return ClassificationResult("hibbett", EmailType.CANCELLATION, "Hibbett")
 
         # DTLR
-        if self._dtlr.is_dtlr_email(email_data):
+        if self._is_from(self._dtlr, "is_dtlr_email", email_data, candidates):
             if self._dtlr.is_shipping_email(email_data):
                 return ClassificationResult("dtlr", EmailType.SHIPPING, "DTLR")
             if self._dtlr.is_cancellation_email(email_data):
@@ -172,83 +274,83 @@ class RetailerEmailClassifier:
 
         # Snipes EARLY (before Finish Line) - subject "Update on Your SNIPES Order", "Cancelation Update"
         # Finish Line uses broad body checks ("canceled") that can match Snipes emails from glenallagroupc
-        if self._snipes.is_snipes_email(email_data):
+        if self._is_from(self._snipes, "is_snipes_email", email_data, candidates):
             if self._snipes.is_shipping_email(email_data):
                 return ClassificationResult("snipes", EmailType.SHIPPING, "Snipes")
             if self._snipes.is_cancellation_email(email_data):
                 return ClassificationResult("snipes", EmailType.CANCELLATION, "Snipes")
 
         # Finish Line (shipping/update emails - includes partial ship+cancel)
-        if self._finishline.is_finishline_email(email_data):
+        if self._is_from(self._finishline, "is_finishline_email", email_data, candidates):
             if self._finishline.is_shipping_email(email_data):
                 return ClassificationResult("finishline", EmailType.SHIPPING, "Finish Line")
             if self._finishline.is_cancellation_email(email_data):
                 return ClassificationResult("finishline", EmailType.CANCELLATION, "Finish Line")
 
         # JD Sports (same HTML template as Finish Line, different from email)
-        if self._jdsports.is_jdsports_email(email_data):
+        if self._is_from(self._jdsports, "is_jdsports_email", email_data, candidates):
             if self._jdsports.is_shipping_email(email_data):
                 return ClassificationResult("jdsports", EmailType.SHIPPING, "JD Sports")
             if self._jdsports.is_cancellation_email(email_data):
                 return ClassificationResult("jdsports", EmailType.CANCELLATION, "JD Sports")
 
         # Revolve (shipping and cancellation)
-        if self._revolve.is_revolve_email(email_data):
+        if self._is_from(self._revolve, "is_revolve_email", email_data, candidates):
             if self._revolve.is_shipping_email(email_data):
                 return ClassificationResult("revolve", EmailType.SHIPPING, "Revolve")
             if self._revolve.is_cancellation_email(email_data):
                 return ClassificationResult("revolve", EmailType.CANCELLATION, "Revolve")
         
         # ASOS (shipping only)
-        if self._asos.is_asos_email(email_data):
+        if self._is_from(self._asos, "is_asos_email", email_data, candidates):
             if self._asos.is_shipping_email(email_data):
                 return ClassificationResult("asos", EmailType.SHIPPING, "ASOS")
 
         # Shoe Palace (shipping and cancellation)
-        if self._shoepalace.is_shoepalace_email(email_data):
+        if self._is_from(self._shoepalace, "is_shoepalace_email", email_data, candidates):
             if self._shoepalace.is_shipping_email(email_data):
                 return ClassificationResult("shoepalace", EmailType.SHIPPING, "Shoe Palace")
             if self._shoepalace.is_cancellation_email(email_data):
                 return ClassificationResult("shoepalace", EmailType.CANCELLATION, "Shoe Palace")
 
         # END Clothing (shipping)
-        if self._endclothing.is_endclothing_email(email_data):
+        if self._is_from(self._endclothing, "is_endclothing_email", email_data, candidates):
             if self._endclothing.is_shipping_email(email_data):
                 return ClassificationResult("endclothing", EmailType.SHIPPING, "END Clothing")
 
         # ShopWSS (cancellation first, then shipping) - "Order X has been canceled" vs "is about to ship"
-        if self._shopwss.is_shopwss_email(email_data):
+        if self._is_from(self._shopwss, "is_shopwss_email", email_data, candidates):
             if self._shopwss.is_cancellation_email(email_data):
                 return ClassificationResult("shopwss", EmailType.CANCELLATION, "ShopWSS")
             if self._shopwss.is_shipping_email(email_data):
                 return ClassificationResult("shopwss", EmailType.SHIPPING, "ShopWSS")
 
         # Al's Sporting Goods (shipping and cancellation)
-        if self._als.is_als_email(email_data):
+        if self._is_from(self._als, "is_als_email", email_data, candidates):
             if self._als.is_shipping_email(email_data):
                 return ClassificationResult("als", EmailType.SHIPPING, "Al's Sporting Goods")
             if self._als.is_cancellation_email(email_data):
                 return ClassificationResult("als", EmailType.CANCELLATION, "Al's Sporting Goods")
 
         # FWRD (shipping and cancellation)
-        if self._fwrd.is_fwrd_email(email_data):
+        if self._is_from(self._fwrd, "is_fwrd_email", email_data, candidates):
             if self._fwrd.is_shipping_email(email_data):
                 return ClassificationResult("fwrd", EmailType.SHIPPING, "FWRD")
             if self._fwrd.is_cancellation_email(email_data):
                 return ClassificationResult("fwrd", EmailType.CANCELLATION, "FWRD")
 
         # Academy Sports (shipping only, no cancellation)
-        if self._academy.is_academy_email(email_data):
+        if self._is_from(self._academy, "is_academy_email", email_data, candidates):
             if self._academy.is_shipping_email(email_data):
                 return ClassificationResult("academy", EmailType.SHIPPING, "Academy Sports")
 
         # Scheels (shipping only, no cancellation yet)
-        if self._scheels.is_scheels_email(email_data):
+        if self._is_from(self._scheels, "is_scheels_email", email_data, candidates):
             if self._scheels.is_shipping_email(email_data):
                 return ClassificationResult("scheels", EmailType.SHIPPING, "Scheels")
 
         # Urban Outfitters (shipping + cancellation)
-        if self._urban.is_urban_email(email_data):
+        if self._is_from(self._urban, "is_urban_email", email_data, candidates):
             if self._urban.is_shipping_email(email_data):
                 return ClassificationResult("urban", EmailType.SHIPPING, "Urban Outfitters")
             if self._urban.is_cancellation_email(email_data):
@@ -256,10 +358,14 @@ class RetailerEmailClassifier:
 
         return None
 
-    def _check_order_confirmation(self, email_data: EmailData) -> Optional[ClassificationResult]:
+    def _check_order_confirmation(
+        self,
+        email_data: EmailData,
+        candidates: Optional[FrozenSet[str]] = None
+    ) -> Optional[ClassificationResult]:
         """Check for order confirmation. Returns first match."""
-        subject_lower = (email_data.subject or "").lower()
-        sender_lower = (email_data.sender or "").lower()
+        subject_lower = email_data.document.subject_lower
+        sender_lower = email_data.document.sender_lower
 
         # Snipes EARLY: "Confirmation of Your SNIPES Order #SNP..." is unique - avoid other parsers stealing
         if "snipes order" in subject_lower:
@@ -313,8 +419,7 @@ class RetailerEmailClassifier:
         ]
 
         for retailer_id, display_name, parser, is_from_attr in confirmation_checks:
-            is_from = getattr(parser, is_from_attr, None)
-            if callable(is_from) and is_from(email_data):
+            if self._is_from(parser, is_from_attr, email_data, candidates):
                 if parser.is_order_confirmation_email(email_data):
                     return ClassificationResult(
                         retailer_id=retailer_id,
@@ -323,3 +428,16 @@ class RetailerEmailClassifier:
                     )
 
         return None
+
+
+_classifier: Optional[RetailerEmailClassifier] = None
+_classifier_lock = threading.Lock()
+
+
+def get_retailer_email_classifier() -> RetailerEmailClassifier:
+    """Return the process-wide classifier (parsers and sender index are built once)."""
+    global _classifier
+    with _classifier_lock:
+        if _classifier is None:
+            _classifier = RetailerEmailClassifier()
+        return _classifier
@@ -4,43 +4,48 @@ Processes order confirmation emails from retailers and creates purchase tracker
 """
 
 import logging
-import re
 from datetime import date, datetime
 from email.utils import parsedate_to_datetime
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
 
+from app.services import processed_messages
+from app.services.gmail_labeler import get_gmail_labeler
 from app.services.gmail_service import GmailService
-from app.services.footlocker_parser import FootlockerEmailParser, FootlockerOrderData, FootlockerOrderItem
-from app.services.champs_parser import ChampsEmailParser, ChampsOrderData, ChampsOrderItem
-from app.services.dicks_parser import DicksEmailParser, DicksOrderData, DicksOrderItem
-from app.services.hibbett_parser import HibbettEmailParser, HibbettOrderData, HibbettOrderItem
-from app.services.shoepalace_parser import ShoepalaceEmailParser, ShoepalaceOrderData, ShoepalaceOrderItem
-from app.services.snipes_parser import SnipesEmailParser, SnipesOrderData, SnipesOrderItem
-from app.services.finishline_parser import FinishLineEmailParser, FinishLineOrderData, FinishLineOrderItem
+from app.services.parser_registry import get_gmail_service, get_parser
+from app.services.parse_pool import parse_with
+from app.services.purchase_item_matcher import PurchaseItemMatcher, normalize_size, preloads_order_items
+from app.services.lead_asins import find_linked_asin_for_size
+from app.services.retailer_counters import track_retailer_counters
+from app.services.footlocker_parser import FootlockerOrderData, FootlockerOrderItem
+from app.services.champs_parser import ChampsOrderData, ChampsOrderItem
+from app.services.dicks_parser import DicksOrderData, DicksOrderItem
+from app.services.hibbett_parser import HibbettOrderData, HibbettOrderItem
+from app.services.shoepalace_parser import ShoepalaceOrderData, ShoepalaceOrderItem
+from app.services.snipes_parser import SnipesOrderData, SnipesOrderItem
+from app.services.finishline_parser import FinishLineOrderData, FinishLineOrderItem
 from app.services.shopsimon_parser import ShopSimonEmailParser, ShopSimonOrderData, ShopSimonOrderItem
-from app.services.jdsports_parser import JDSportsEmailParser, JDSportsOrderData, JDSportsOrderItem
-from app.services.revolve_parser import RevolveEmailParser, RevolveOrderData, RevolveOrderItem
-from app.services.asos_parser import ASOSEmailParser, ASOSOrderData, ASOSOrderItem
-from app.services.dtlr_parser import DTLREmailParser, DTLROrderData, DTLROrderItem
-from app.services.endclothing_parser import ENDClothingEmailParser, ENDClothingOrderData, ENDClothingOrderItem
-from app.services.shopwss_parser import ShopWSSEmailParser, ShopWSSOrderData, ShopWSSOrderItem
-from app.services.on_parser import OnEmailParser, OnOrderData, OnOrderItem
-from app.services.urban_parser import UrbanOutfittersEmailParser, UrbanOrderData, UrbanOrderItem
-from app.services.bloomingdales_parser import BloomingdalesEmailParser, BloomingdalesOrderData, BloomingdalesOrderItem
-from app.services.anthropologie_parser import AnthropologieEmailParser, AnthropologieOrderData, AnthropologieOrderItem
-from app.services.nike_parser import NikeEmailParser, NikeOrderData, NikeOrderItem
-from app.services.carbon38_parser import Carbon38EmailParser, Carbon38OrderData, Carbon38OrderItem
-from app.services.gazelle_parser import GazelleEmailParser, GazelleOrderData, GazelleOrderItem
-from app.services.netaporter_parser import NetAPorterEmailParser, NetAPorterOrderData, NetAPorterOrderItem
-from app.services.fit2run_parser import Fit2RunEmailParser, Fit2RunOrderData, Fit2RunOrderItem
-from app.services.sns_parser import SNSEmailParser, SNSOrderData, SNSOrderItem
-from app.services.adidas_parser import AdidasEmailParser, AdidasOrderData, AdidasOrderItem
-from app.services.concepts_parser import ConceptsEmailParser, ConceptsOrderData, ConceptsOrderItem
-from app.services.sneaker_parser import SneakerPoliticsEmailParser, SneakerOrderData, SneakerOrderItem
-from app.services.orleans_parser import OrleansEmailParser, OrleansOrderData, OrleansOrderItem
-from app.models.database import AsinBank, OASourcing, PurchaseTracker, Retailer
+from app.services.jdsports_parser import JDSportsOrderData, JDSportsOrderItem
+from app.services.revolve_parser import RevolveOrderData, RevolveOrderItem
+from app.services.asos_parser import ASOSOrderData, ASOSOrderItem
+from app.services.dtlr_parser import DTLROrderData, DTLROrderItem
+from app.services.endclothing_parser import ENDClothingOrderData, ENDClothingOrderItem
+from app.services.shopwss_parser import ShopWSSOrderData, ShopWSSOrderItem
+from app.services.on_parser import OnOrderData, OnOrderItem
+from app.services.urban_parser import UrbanOrderData, UrbanOrderItem
+from app.services.bloomingdales_parser import BloomingdalesOrderData, BloomingdalesOrderItem
+from app.services.anthropologie_parser import AnthropologieOrderData, AnthropologieOrderItem
+from app.services.nike_parser import NikeOrderData, NikeOrderItem
+from app.services.carbon38_parser import Carbon38OrderData, Carbon38OrderItem
+from app.services.gazelle_parser import GazelleOrderData, GazelleOrderItem
+from app.services.netaporter_parser import NetAPorterOrderData, NetAPorterOrderItem
+from app.services.fit2run_parser import Fit2RunOrderData, Fit2RunOrderItem
+from app.services.sns_parser import SNSOrderData, SNSOrderItem
+from app.services.adidas_parser import AdidasOrderData, AdidasOrderItem
+from app.services.concepts_parser import ConceptsOrderData, ConceptsOrderItem
+from app.services.sneaker_parser import SneakerOrderData, SneakerOrderItem
+from app.services.orleans_parser import OrleansOrderData, OrleansOrderItem
+from app.models.database import AsinBank, PurchaseTracker, Retailer
 from app.models.email import EmailData
 from app.utils.purchase_status import calculate_status_and_location
 
@@ -54,47 +59,58 @@ class RetailerOrderProcessor:
     PROCESSED_LABEL = "Retailer-Order/Processed"
     ERROR_LABEL = "Retailer-Order/Error"
     
-    def __init__(self, db_session: Session):
+    def __init__(self, db_session: Session, gmail_service: Optional[GmailService] = None):
         """
         Initialize the processor.
         
+        Parsers, the Gmail client and label IDs come from the process-wide
+        parser registry, so constructing a processor per email is cheap.
+        
         Args:
             db_session: SQLAlchemy database session
+            gmail_service: Gmail client to use (default: this thread's shared client)
         """
         self.db = db_session
-        self.gmail_service = GmailService()
-        self.footlocker_parser = FootlockerEmailParser()
-        self.champs_parser = ChampsEmailParser()
-        self.dicks_parser = DicksEmailParser()
-        self.hibbett_parser = HibbettEmailParser()
-        self.shoepalace_parser = ShoepalaceEmailParser()
-        self.snipes_parser = SnipesEmailParser()
-        self.finishline_parser = FinishLineEmailParser()
-        self.shopsimon_parser = ShopSimonEmailParser()
-        self.jdsports_parser = JDSportsEmailParser()
-        self.revolve_parser = RevolveEmailParser()
-        self.asos_parser = ASOSEmailParser()
-        self.dtlr_parser = DTLREmailParser()
-        self.endclothing_parser = ENDClothingEmailParser()
-        self.shopwss_parser = ShopWSSEmailParser()
-        self.on_parser = OnEmailParser()
-        self.urban_parser = UrbanOutfittersEmailParser()
-        self.bloomingdales_parser = BloomingdalesEmailParser()
-        self.anthropologie_parser = AnthropologieEmailParser()
-        self.nike_parser = NikeEmailParser()
-        self.carbon38_parser = Carbon38EmailParser()
-        self.gazelle_parser = GazelleEmailParser()
-        self.netaporter_parser = NetAPorterEmailParser()
-        self.fit2run_parser = Fit2RunEmailParser()
-        self.sns_parser = SNSEmailParser()
-        self.adidas_parser = AdidasEmailParser()
-        self.concepts_parser = ConceptsEmailParser()
-        self.sneaker_parser = SneakerPoliticsEmailParser()
-        self.orleans_parser = OrleansEmailParser()
+        # Purchase creates / quantity changes update the Retailer counters atomically on flush
+        track_retailer_counters(db_session)
+        self.gmail_service = gmail_service or get_gmail_service()
+        self.item_matcher = PurchaseItemMatcher(db_session)
+        self.footlocker_parser = get_parser("footlocker")
+        self.champs_parser = get_parser("champs")
+        self.dicks_parser = get_parser("dicks")
+        self.hibbett_parser = get_parser("hibbett")
+        self.shoepalace_parser = get_parser("shoepalace")
+        self.snipes_parser = get_parser("snipes")
+        self.finishline_parser = get_parser("finishline")
+        self.shopsimon_parser = get_parser("shopsimon")
+        self.jdsports_parser = get_parser("jdsports")
+        self.revolve_parser = get_parser("revolve")
+        self.asos_parser = get_parser("asos")
+        self.dtlr_parser = get_parser("dtlr")
+        self.endclothing_parser = get_parser("endclothing")
+        self.shopwss_parser = get_parser("shopwss")
+        self.on_parser = get_parser("on")
+        self.urban_parser = get_parser("urban")
+        self.bloomingdales_parser = get_parser("bloomingdales")
+        self.anthropologie_parser = get_parser("anthropologie")
+        self.nike_parser = get_parser("nike")
+        self.carbon38_parser = get_parser("carbon38")
+        self.gazelle_parser = get_parser("gazelle")
+        self.netaporter_parser = get_parser("netaporter")
+        self.fit2run_parser = get_parser("fit2run")
+        self.sns_parser = get_parser("sns")
+        self.adidas_parser = get_parser("adidas")
+        self.concepts_parser = get_parser("concepts")
+        self.sneaker_parser = get_parser("sneaker")
+        self.orleans_parser = get_parser("orleans")
         
         # Ensure labels exist
-        self.processed_label = self.gmail_service.get_or_create_label(self.PROCESSED_LABEL)
-        self.error_label = self.gmail_service.get_or_create_label(self.ERROR_LABEL)
+        labels = self.gmail_service.get_or_create_labels([self.PROCESSED_LABEL, self.ERROR_LABEL])
+        self.processed_label = labels[self.PROCESSED_LABEL]
+        self.error_label = labels[self.ERROR_LABEL]
+        
+        # Retailer and start time of the messages being processed (processed-message registry)
+        self._message_context: Dict[str, Tuple[Optional[str], datetime]] = {}
     
     def process_footlocker_emails(self, max_emails: int = 20) -> dict:
         """
@@ -118,22 +134,20 @@ class RetailerOrderProcessor:
         
         try:
             # Search for Footlocker order confirmation emails
-            # Exclude already processed emails
+            # Already processed emails are filtered out through the processed-message registry
             # Use environment-aware email address and subject pattern
             from_email = self.footlocker_parser.order_from_email
             subject_query = self.footlocker_parser.order_subject_query
-            query = f'from:{from_email} subject:"{subject_query}" -label:{self.PROCESSED_LABEL}'
+            query = f'from:{from_email} subject:"{subject_query}"'
             
-            message_ids = self.gmail_service.list_messages_with_query(
-                query=query,
-                max_results=max_emails
-            )
+            message_ids = self.list_unprocessed_message_ids(query, max_results=max_emails)
             
             results['total_emails'] = len(message_ids)
             logger.info(f"Found {len(message_ids)} unprocessed Footlocker emails")
             
             for message_id in message_ids:
                 try:
+                    self._start_message(message_id, 'footlocker')
                     # Get full message
                     message = self.gmail_service.get_message(message_id)
                     if not message:
@@ -153,13 +167,13 @@ class RetailerOrderProcessor:
                         continue
                     
                     # Parse order details
-                    order_data = self.footlocker_parser.parse_email(email_data)
+                    order_data = parse_with(self.footlocker_parser, "parse_email", email_data)
                     if not order_data:
                         error_msg = f"Failed to parse order from email {message_id}"
                         logger.error(error_msg)
                         results['errors'] += 1
                         results['error_messages'].append(error_msg)
-                        self._add_error_label(message_id)
+                        self._add_error_label(message_id, error=error_msg)
                         continue
                     
                     # Process the order: upsert (create or update) purchase tracker records
@@ -174,14 +188,14 @@ class RetailerOrderProcessor:
                         logger.error(f"Failed to process order {order_data.order_number}: {error_msg}")
                         results['errors'] += 1
                         results['error_messages'].append(error_msg)
-                        self._add_error_label(message_id)
+                        self._add_error_label(message_id, error=error_msg)
                 
                 except Exception as e:
                     error_msg = f"Error processing message {message_id}: {str(e)}"
                     logger.error(error_msg, exc_info=True)
                     results['errors'] += 1
                     results['error_messages'].append(error_msg)
-                    self._add_error_label(message_id)
+                    self._add_error_label(message_id, error=error_msg)
         
         except Exception as e:
             error_msg = f"Fatal error in Footlocker email processing: {str(e)}"
@@ -213,22 +227,20 @@ class RetailerOrderProcessor:
         
         try:
             # Search for Champs Sports order confirmation emails
-            # Exclude already processed emails
+            # Already processed emails are filtered out through the processed-message registry
             # Use environment-aware email address and subject pattern
             from_email = self.champs_parser.order_from_email
             subject_query = self.champs_parser.order_subject_query
-            query = f'from:{from_email} subject:"{subject_query}" -label:{self.PROCESSED_LABEL}'
+            query = f'from:{from_email} subject:"{subject_query}"'
             
-            message_ids = self.gmail_service.list_messages_with_query(
-                query=query,
-                max_results=max_emails
-            )
+            message_ids = self.list_unprocessed_message_ids(query, max_results=max_emails)
             
             results['total_emails'] = len(message_ids)
             logger.info(f"Found {len(message_ids)} unprocessed Champs emails")
             
             for message_id in message_ids:
                 try:
+                    self._start_message(message_id, 'champs')
                     # Get full message
                     message = self.gmail_service.get_message(message_id)
                     if not message:
@@ -248,13 +260,13 @@ class RetailerOrderProcessor:
                         continue
                     
                     # Parse order details
-                    order_data = self.champs_parser.parse_email(email_data)
+                    order_data = parse_with(self.champs_parser, "parse_email", email_data)
                     if not order_data:
                         error_msg = f"Failed to parse order from email {message_id}"
                         logger.error(error_msg)
                         results['errors'] += 1
                         results['error_messages'].append(error_msg)
-                        self._add_error_label(message_id)
+                        self._add_error_label(message_id, error=error_msg)
                         continue
                     
                     # Check for duplicate order
@@ -275,14 +287,14 @@ class RetailerOrderProcessor:
                         logger.error(f"Failed to process order {order_data.order_number}: {error_msg}")
                         results['errors'] += 1
                         results['error_messages'].append(error_msg)
-                        self._add_error_label(message_id)
+                        self._add_error_label(message_id, error=error_msg)
                 
                 except Exception as e:
                     error_msg = f"Error processing message {message_id}: {str(e)}"
                     logger.error(error_msg, exc_info=True)
                     results['errors'] += 1
                     results['error_messages'].append(error_msg)
-                    self._add_error_label(message_id)
+                    self._add_error_label(message_id, error=error_msg)
         
         except Exception as e:
             error_msg = f"Fatal error in Champs email processing: {str(e)}"
@@ -314,22 +326,20 @@ class RetailerOrderProcessor:
         
         try:
             # Search for Dick's Sporting Goods order confirmation emails
-            # Exclude already processed emails
+            # Already processed emails are filtered out through the processed-message registry
             # Use environment-aware email address and subject pattern
             from_email = self.dicks_parser.order_from_email
             subject_query = self.dicks_parser.order_subject_query
-            query = f'from:{from_email} subject:"{subject_query}" -label:{self.PROCESSED_LABEL}'
+            query = f'from:{from_email} subject:"{subject_query}"'
             
-            message_ids = self.gmail_service.list_messages_with_query(
-                query=query,
-                max_results=max_emails
-            )
+            message_ids = self.list_unprocessed_message_ids(query, max_results=max_emails)
             
             results['total_emails'] = len(message_ids)
             logger.info(f"Found {len(message_ids)} unprocessed Dick's emails")
             
             for message_id in message_ids:
                 try:
+                    self._start_message(message_id, 'dicks')
                     # Get full message
                     message = self.gmail_service.get_message(message_id)
                     if not message:
@@ -349,13 +359,13 @@ class RetailerOrderProcessor:
                         continue
                     
                     # Parse order details
-                    order_data = self.dicks_parser.parse_email(email_data)
+                    order_data = parse_with(self.dicks_parser, "parse_email", email_data)
                     if not order_data:
                         error_msg = f"Failed to parse order from email {message_id}"
                         logger.error(error_msg)
                         results['errors'] += 1
                         results['error_messages'].append(error_msg)
-                        self._add_error_label(message_id)
+                        self._add_error_label(message_id, error=error_msg)
                         continue
                     
                     # Check for duplicate order
@@ -376,14 +386,14 @@ class RetailerOrderProcessor:
                         logger.error(f"Failed to process order {order_data.order_number}: {error_msg}")
                         results['errors'] += 1
                         results['error_messages'].append(error_msg)
-                        self._add_error_label(message_id)
+                        self._add_error_label(message_id, error=error_msg)
                 
                 except Exception as e:
                     error_msg = f"Error processing message {message_id}: {str(e)}"
                     logger.error(error_msg, exc_info=True)
                     results['errors'] += 1
                     results['error_messages'].append(error_msg)
-                    self._add_error_label(message_id)
+                    self._add_error_label(message_id, error=error_msg)
         
         except Exception as e:
             error_msg = f"Fatal error in Dick's email processing: {str(e)}"
@@ -415,22 +425,20 @@ class RetailerOrderProcessor:
         
         try:
             # Search for Hibbett order confirmation emails
-            # Exclude already processed emails
+            # Already processed emails are filtered out through the processed-message registry
             # Use environment-aware email address and subject pattern
             from_email = self.hibbett_parser.order_from_email
             subject_query = self.hibbett_parser.order_subject_query
-            query = f'from:{from_email} subject:"{subject_query}" -label:{self.PROCESSED_LABEL}'
+            query = f'from:{from_email} subject:"{subject_query}"'
             
-            message_ids = self.gmail_service.list_messages_with_query(
-                query=query,
-                max_results=max_emails
-            )
+            message_ids = self.list_unprocessed_message_ids(query, max_results=max_emails)
             
             results['total_emails'] = len(message_ids)
             logger.info(f"Found {len(message_ids)} unprocessed Hibbett emails")
             
             for message_id in message_ids:
                 try:
+                    self._start_message(message_id, 'hibbett')
                     # Get full message
                     message = self.gmail_service.get_message(message_id)
                     if not message:
@@ -450,13 +458,13 @@ class RetailerOrderProcessor:
                         continue
                     
                     # Parse order details
-                    order_data = self.hibbett_parser.parse_email(email_data)
+                    order_data = parse_with(self.hibbett_parser, "parse_email", email_data)
                     if not order_data:
                         error_msg = f"Failed to parse order from email {message_id}"
                         logger.error(error_msg)
                         results['errors'] += 1
                         results['error_messages'].append(error_msg)
-                        self._add_error_label(message_id)
+                        self._add_error_label(message_id, error=error_msg)
                         continue
                     
                     # Check for duplicate order
@@ -477,14 +485,14 @@ class RetailerOrderProcessor:
                         logger.error(f"Failed to process order {order_data.order_number}: {error_msg}")
                         results['errors'] += 1
                         results['error_messages'].append(error_msg)
-                        self._add_error_label(message_id)
+                        self._add_error_label(message_id, error=error_msg)
                 
                 except Exception as e:
                     error_msg = f"Error processing message {message_id}: {str(e)}"
                     logger.error(error_msg, exc_info=True)
                     results['errors'] += 1
                     results['error_messages'].append(error_msg)
-                    self._add_error_label(message_id)
+                    self._add_error_label(message_id, error=error_msg)
         
         except Exception as e:
             error_msg = f"Fatal error in Hibbett email processing: {str(e)}"
@@ -516,22 +524,20 @@ class RetailerOrderProcessor:
         
         try:
             # Search for Shoe Palace order confirmation emails
-            # Exclude already processed emails
+            # Already processed emails are filtered out through the processed-message registry
             # Use environment-aware email address and subject pattern
             from_email = self.shoepalace_parser.order_from_email
             subject_query = self.shoepalace_parser.order_subject_query
-            query = f'from:{from_email} subject:"{subject_query}" -label:{self.PROCESSED_LABEL}'
+            query = f'from:{from_email} subject:"{subject_query}"'
             
-            message_ids = self.gmail_service.list_messages_with_query(
-                query=query,
-                max_results=max_emails
-            )
+            message_ids = self.list_unprocessed_message_ids(query, max_results=max_emails)
             
             results['total_emails'] = len(message_ids)
             logger.info(f"Found {len(message_ids)} unprocessed Shoe Palace emails")
             
             for message_id in message_ids:
                 try:
+                    self._start_message(message_id, 'shoepalace')
                     # Get full message
                     message = self.gmail_service.get_message(message_id)
                     if not message:
@@ -551,13 +557,13 @@ class RetailerOrderProcessor:
                         continue
                     
                     # Parse order details
-                    order_data = self.shoepalace_parser.parse_email(email_data)
+                    order_data = parse_with(self.shoepalace_parser, "parse_email", email_data)
                     if not order_data:
                         error_msg = f"Failed to parse order from email {message_id}"
                         logger.error(error_msg)
                         results['errors'] += 1
                         results['error_messages'].append(error_msg)
-                        self._add_error_label(message_id)
+                        self._add_error_label(message_id, error=error_msg)
                         continue
                     
                     # Check for duplicate order
@@ -578,14 +584,14 @@ class RetailerOrderProcessor:
                         logger.error(f"Failed to process order {order_data.order_number}: {error_msg}")
                         results['errors'] += 1
                         results['error_messages'].append(error_msg)
-                        self._add_error_label(message_id)
+                        self._add_error_label(message_id, error=error_msg)
                 
                 except Exception as e:
                     error_msg = f"Error processing message {message_id}: {str(e)}"
                     logger.error(error_msg, exc_info=True)
                     results['errors'] += 1
                     results['error_messages'].append(error_msg)
-                    self._add_error_label(message_id)
+                    self._add_error_label(message_id, error=error_msg)
         
         except Exception as e:
             error_msg = f"Fatal error in Shoe Palace email processing: {str(e)}"
@@ -617,22 +623,20 @@ class RetailerOrderProcessor:
         
         try:
             # Search for Snipes order confirmation emails
-            # Exclude already processed emails
+            # Already processed emails are filtered out through the processed-message registry
             # Use environment-aware email address and subject pattern
             from_email = self.snipes_parser.order_from_email
             subject_query = self.snipes_parser.order_subject_query
-            query = f'from:{from_email} subject:"{subject_query}" -label:{self.PROCESSED_LABEL}'
+            query = f'from:{from_email} subject:"{subject_query}"'
             
-            message_ids = self.gmail_service.list_messages_with_query(
-                query=query,
-                max_results=max_emails
-            )
+            message_ids = self.list_unprocessed_message_ids(query, max_results=max_emails)
             
             results['total_emails'] = len(message_ids)
             logger.info(f"Found {len(message_ids)} unprocessed Snipes emails")
             
             for message_id in message_ids:
                 try:
+                    self._start_message(message_id, 'snipes')
                     # Get full message
                     message = self.gmail_service.get_message(message_id)
                     if not message:
@@ -652,14 +656,14 @@ class RetailerOrderProcessor:
                         continue
                     
                     # Parse the email
-                    order_data = self.snipes_parser.parse_email(email_data)
+                    order_data = parse_with(self.snipes_parser, "parse_email", email_data)
                     
                     if not order_data:
                         error_msg = f"Failed to parse Snipes email {message_id}"
                         logger.error(error_msg)
                         results['errors'] += 1
                         results['error_messages'].append(error_msg)
-                        self._add_error_label(message_id)
+                        self._add_error_label(message_id, error=error_msg)
                         continue
                     
                     # Check for duplicate order
@@ -681,14 +685,14 @@ class RetailerOrderProcessor:
                         error_msg = f"Failed to process Snipes order {order_data.order_number}: {error}"
                         logger.error(error_msg)
                         results['error_messages'].append(error_msg)
-                        self._add_error_label(message_id)
+                        self._add_error_label(message_id, error=error_msg)
                 
                 except Exception as e:
                     results['errors'] += 1
                     error_msg = f"Error processing Snipes email {message_id}: {str(e)}"
                     logger.error(error_msg, exc_info=True)
                     results['error_messages'].append(error_msg)
-                    self._add_error_label(message_id)
+                    self._add_error_label(message_id, error=error_msg)
         
         except Exception as e:
             error_msg = f"Fatal error in Snipes email processing: {str(e)}"
@@ -720,22 +724,20 @@ class RetailerOrderProcessor:
         
         try:
             # Search for Finish Line order confirmation emails
-            # Exclude already processed emails
+            # Already processed emails are filtered out through the processed-message registry
             # Use environment-aware email address and subject pattern
             from_email = self.finishline_parser.order_from_email
             subject_query = self.finishline_parser.order_subject_query
-            query = f'from:{from_email} subject:"{subject_query}" -label:{self.PROCESSED_LABEL}'
+            query = f'from:{from_email} subject:"{subject_query}"'
             
-            message_ids = self.gmail_service.list_messages_with_query(
-                query=query,
-                max_results=max_emails
-            )
+            message_ids = self.list_unprocessed_message_ids(query, max_results=max_emails)
             
             results['total_emails'] = len(message_ids)
             logger.info(f"Found {len(message_ids)} unprocessed Finish Line emails")
             
             for message_id in message_ids:
                 try:
+                    self._start_message(message_id, 'finishline')
                     # Get full message
                     message = self.gmail_service.get_message(message_id)
                     if not message:
@@ -755,14 +757,14 @@ class RetailerOrderProcessor:
                         continue
                     
                     # Parse the email
-                    order_data = self.finishline_parser.parse_email(email_data)
+                    order_data = parse_with(self.finishline_parser, "parse_email", email_data)
                     
                     if not order_data:
                         error_msg = f"Failed to parse Finish Line email {message_id}"
                         logger.error(error_msg)
                         results['errors'] += 1
                         results['error_messages'].append(error_msg)
-                        self._add_error_label(message_id)
+                        self._add_error_label(message_id, error=error_msg)
                         continue
                     
                     # Check for duplicate order
@@ -784,14 +786,14 @@ class RetailerOrderProcessor:
                         error_msg = f"Failed to process Finish Line order {order_data.order_number}: {error}"
                         logger.error(error_msg)
                         results['error_messages'].append(error_msg)
-                        self._add_error_label(message_id)
+                        self._add_error_label(message_id, error=error_msg)
                 
                 except Exception as e:
                     results['errors'] += 1
                     error_msg = f"Error processing Finish Line email {message_id}: {str(e)}"
                     logger.error(error_msg, exc_info=True)
                     results['error_messages'].append(error_msg)
-                    self._add_error_label(message_id)
+                    self._add_error_label(message_id, error=error_msg)
         
         except Exception as e:
             error_msg = f"Fatal error in Finish Line email processing: {str(e)}"
@@ -823,19 +825,17 @@ class RetailerOrderProcessor:
         
         try:
             # Search for ShopSimon order confirmation emails
-            # Exclude already processed emails
-            query = f'from:{ShopSimonEmailParser.SHOPSIMON_FROM_EMAIL} subject:"{ShopSimonEmailParser.SUBJECT_ORDER_PATTERN}" -label:{self.PROCESSED_LABEL}'
+            # Already processed emails are filtered out through the processed-message registry
+            query = f'from:{ShopSimonEmailParser.SHOPSIMON_FROM_EMAIL} subject:"{ShopSimonEmailParser.SUBJECT_ORDER_PATTERN}"'
             
-            message_ids = self.gmail_service.list_messages_with_query(
-                query=query,
-                max_results=max_emails
-            )
+            message_ids = self.list_unprocessed_message_ids(query, max_results=max_emails)
             
             results['total_emails'] = len(message_ids)
             logger.info(f"Found {len(message_ids)} unprocessed ShopSimon emails")
             
             for message_id in message_ids:
                 try:
+                    self._start_message(message_id, 'shopsimon')
                     # Get full message
                     message = self.gmail_service.get_message(message_id)
                     if not message:
@@ -855,14 +855,14 @@ class RetailerOrderProcessor:
                         continue
                     
                     # Parse the email
-                    order_data = self.shopsimon_parser.parse_email(email_data)
+                    order_data = parse_with(self.shopsimon_parser, "parse_email", email_data)
                     
                     if not order_data:
                         error_msg = f"Failed to parse ShopSimon email {message_id}"
                         logger.error(error_msg)
                         results['errors'] += 1
                         results['error_messages'].append(error_msg)
-                        self._add_error_label(message_id)
+                        self._add_error_label(message_id, error=error_msg)
                         continue
                     
                     # Check for duplicate order
@@ -884,14 +884,14 @@ class RetailerOrderProcessor:
                         error_msg = f"Failed to process ShopSimon order {order_data.order_number}: {error}"
                         logger.error(error_msg)
                         results['error_messages'].append(error_msg)
-                        self._add_error_label(message_id)
+                        self._add_error_label(message_id, error=error_msg)
                 
                 except Exception as e:
                     results['errors'] += 1
                     error_msg = f"Error processing ShopSimon email {message_id}: {str(e)}"
                     logger.error(error_msg, exc_info=True)
                     results['error_messages'].append(error_msg)
-                    self._add_error_label(message_id)
+                    self._add_error_label(message_id, error=error_msg)
         
         except Exception as e:
             error_msg = f"Fatal error in ShopSimon email processing: {str(e)}"
@@ -917,6 +917,7 @@ class RetailerOrderProcessor:
         
         return exists is not None
     
+    @preloads_order_items
     def _process_order(self, order_data: FootlockerOrderData) -> Tuple[bool, Optional[str]]:
         """
         Process a Footlocker order: upsert purchase tracker records.
@@ -985,6 +986,7 @@ class RetailerOrderProcessor:
             logger.error(error_msg, exc_info=True)
             return False, error_msg
     
+    @preloads_order_items
     def _process_champs_order(self, order_data: ChampsOrderData) -> Tuple[bool, Optional[str]]:
         """
         Process a Champs Sports order and create purchase tracker records.
@@ -1041,6 +1043,7 @@ class RetailerOrderProcessor:
             logger.error(error_msg, exc_info=True)
             return False, error_msg
     
+    @preloads_order_items
     def _process_dicks_order(self, order_data: DicksOrderData) -> Tuple[bool, Optional[str]]:
         """
         Process a Dick's Sporting Goods order and create purchase tracker records.
@@ -1096,56 +1099,34 @@ class RetailerOrderProcessor:
             logger.error(error_msg, exc_info=True)
             return False, error_msg
     
-    def _normalize_size(self, size: str) -> str:
-        """
-        Normalize size for comparison (handles "11.0" vs "11" etc.)
-        
-        Args:
-            size: Size string (e.g., "11.0", "11", "9.5")
-        
-        Returns:
-            Normalized size string
-        """
-        if size is None:
-            return ""
-        size = str(size).strip()
-        if not size:
-            return size
-        
-        # Convert "11.0" to "11", "09.5" to "9.5", etc.
-        if re.match(r'^\d{1,2}\.\d$', size):
-            num = float(size)
-            return str(int(num)) if num % 1 == 0 else str(num)
-        # Strip leading zeros from whole numbers: "09" -> "9"
-        if re.match(r'^\d{1,2}$', size):
-            return str(int(size))
-        
-        return size
-    
     def _get_asin_for_lead_and_size(self, lead_id: str, size: str, oa_sourcing=None):
         """
         Look up AsinBank record by lead_id and size, using normalized size comparison.
         Handles format mismatches (e.g., "9" vs "9.0", "09" vs "9").
         
         Lookup order (prioritize OASourcing link - source of truth for "this lead uses these ASINs"):
-        1. OASourcing's linked asin1_id..asin15_id: query by id, match size (covers reused ASINs
-           from create_lead which keep original lead_id, and "Add ASIN to lead")
+        1. OASourcing's linked ASINs (lead_asin): one indexed join on normalized size (covers
+           reused ASINs from create_lead which keep original lead_id, and "Add ASIN to lead")
         2. AsinBank by lead_id + size (exact then normalized)
         
         Returns:
             AsinBank record or None
         """
-        normalized_input = self._normalize_size(str(size) if size is not None else "")
+        # Lead preloaded with the current order: answer from memory
+        resolution = self.item_matcher.resolution
+        if (
+            resolution is not None and oa_sourcing is not None
+            and oa_sourcing.lead_id == lead_id and oa_sourcing.unique_id in resolution.unique_ids
+        ):
+            return resolution.get_asin(oa_sourcing, size)
+        
+        normalized_input = normalize_size(size)
         
         # 1. OASourcing's linked ASINs - canonical link (covers reused ASINs with different lead_id)
         if oa_sourcing:
-            for i in range(1, 16):
-                asin_id = getattr(oa_sourcing, f'asin{i}_id', None)
-                if asin_id:
-                    asin_rec = self.db.query(AsinBank).filter(AsinBank.id == asin_id).first()
-                    if asin_rec and asin_rec.size:
-                        if self._normalize_size(str(asin_rec.size)) == normalized_input:
-                            return asin_rec
+            asin_rec = find_linked_asin_for_size(self.db, oa_sourcing.id, normalized_input)
+            if asin_rec:
+                return asin_rec
         
         # 2. AsinBank by lead_id (exact match)
         asin_record = self.db.query(AsinBank).filter(
@@ -1155,13 +1136,11 @@ class RetailerOrderProcessor:
         if asin_record:
             return asin_record
         
-        # 3. AsinBank by lead_id + normalized size match
-        records = self.db.query(AsinBank).filter(AsinBank.lead_id == lead_id).all()
-        for r in records:
-            if r.size and self._normalize_size(str(r.size)) == normalized_input:
-                return r
-        
-        return None
+        # 3. AsinBank by lead_id + normalized size match (size_normalized is generated by the DB)
+        return self.db.query(AsinBank).filter(
+            AsinBank.lead_id == lead_id,
+            AsinBank.size_normalized == normalized_input
+        ).first()
     
     def _create_or_update_purchase_tracker_record(
         self,
@@ -1180,42 +1159,14 @@ class RetailerOrderProcessor:
         Returns:
             Tuple of (success, action) where action is 'created', 'updated', or error message
         """
-        normalized_size = self._normalize_size(item.size)
         
         # Find existing record by order_number, unique_id (via OASourcing), and size
-        existing = self.db.query(PurchaseTracker).join(
-            OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-        ).outerjoin(
-            AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-        ).filter(
-            and_(
-                PurchaseTracker.order_number == order_number,
-                OASourcing.unique_id == item.unique_id,
-                or_(
-                    AsinBank.size == item.size,
-                    AsinBank.size == normalized_size
-                )
-            )
-        ).first()
-        
-        # Fallback: manual size normalization for DB records with different format
-        if not existing:
-            all_for_order = self.db.query(PurchaseTracker).join(
-                OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-            ).outerjoin(
-                AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-            ).filter(
-                and_(
-                    PurchaseTracker.order_number == order_number,
-                    OASourcing.unique_id == item.unique_id
-                )
-            ).all()
-            
-            for record in all_for_order:
-                db_size = record.asin_bank_ref.size if record.asin_bank_ref else None
-                if db_size and self._normalize_size(db_size) == normalized_size:
-                    existing = record
-                    break
+        matches = self.item_matcher.match_item(
+            order_number=order_number,
+            unique_id=item.unique_id,
+            size=item.size,
+        )
+        existing = matches[0] if matches else None
         
         if existing:
             # Update og_qty and final_qty from confirmation email
@@ -1260,9 +1211,7 @@ class RetailerOrderProcessor:
         """
         try:
             # Look up OA sourcing by unique_id
-            oa_sourcing = self.db.query(OASourcing).filter(
-                OASourcing.unique_id == item.unique_id
-            ).first()
+            oa_sourcing = self.item_matcher.find_oa_sourcing(item.unique_id)
             
             if not oa_sourcing:
                 return False, f"No OA sourcing lead found for unique_id: {item.unique_id}"
@@ -1271,7 +1220,7 @@ class RetailerOrderProcessor:
             asin_record = self._get_asin_for_lead_and_size(oa_sourcing.lead_id, item.size, oa_sourcing=oa_sourcing)
             
             if not asin_record:
-                asin_count = self.db.query(AsinBank).filter(AsinBank.lead_id == oa_sourcing.lead_id).count()
+                asin_count = self.item_matcher.count_asins_for_lead(oa_sourcing.lead_id)
                 logger.warning(
                     f"No ASIN found for lead_id={oa_sourcing.lead_id}, size={item.size}. "
                     f"Creating record without ASIN. (AsinBank has {asin_count} records for this lead. "
@@ -1315,6 +1264,7 @@ class RetailerOrderProcessor:
             )
             
             self.db.add(purchase_record)
+            self.item_matcher.register_record(purchase_record, oa_sourcing, asin_record)
             
             logger.info(
                 f"Created purchase tracker record: "
@@ -1333,6 +1283,7 @@ class RetailerOrderProcessor:
             logger.error(error_msg, exc_info=True)
             return False, error_msg
     
+    @preloads_order_items
     def _process_shoepalace_order(self, order_data: ShoepalaceOrderData) -> Tuple[bool, Optional[str]]:
         """
         Process a Shoe Palace order and create purchase tracker records.
@@ -1408,9 +1359,7 @@ class RetailerOrderProcessor:
         """
         try:
             # Look up OA sourcing by unique_id
-            oa_sourcing = self.db.query(OASourcing).filter(
-                OASourcing.unique_id == item.unique_id
-            ).first()
+            oa_sourcing = self.item_matcher.find_oa_sourcing(item.unique_id)
             
             if not oa_sourcing:
                 return False, f"No OA sourcing lead found for unique_id: {item.unique_id}"
@@ -1419,7 +1368,7 @@ class RetailerOrderProcessor:
             asin_record = self._get_asin_for_lead_and_size(oa_sourcing.lead_id, item.size, oa_sourcing=oa_sourcing)
             
             if not asin_record:
-                asin_count = self.db.query(AsinBank).filter(AsinBank.lead_id == oa_sourcing.lead_id).count()
+                asin_count = self.item_matcher.count_asins_for_lead(oa_sourcing.lead_id)
                 logger.warning(
                     f"No ASIN found for lead_id={oa_sourcing.lead_id}, size={item.size}. "
                     f"Creating record without ASIN. (AsinBank has {asin_count} records for this lead. "
@@ -1463,6 +1412,7 @@ class RetailerOrderProcessor:
             )
             
             self.db.add(purchase_record)
+            self.item_matcher.register_record(purchase_record, oa_sourcing, asin_record)
             
             logger.info(
                 f"Created purchase tracker record: "
@@ -1502,9 +1452,7 @@ class RetailerOrderProcessor:
         """
         try:
             # Look up OA sourcing by unique_id
-            oa_sourcing = self.db.query(OASourcing).filter(
-                OASourcing.unique_id == item.unique_id
-            ).first()
+            oa_sourcing = self.item_matcher.find_oa_sourcing(item.unique_id)
             
             if not oa_sourcing:
                 return False, f"No OA sourcing lead found for unique_id: {item.unique_id}"
@@ -1513,7 +1461,7 @@ class RetailerOrderProcessor:
             asin_record = self._get_asin_for_lead_and_size(oa_sourcing.lead_id, item.size, oa_sourcing=oa_sourcing)
             
             if not asin_record:
-                asin_count = self.db.query(AsinBank).filter(AsinBank.lead_id == oa_sourcing.lead_id).count()
+                asin_count = self.item_matcher.count_asins_for_lead(oa_sourcing.lead_id)
                 logger.warning(
                     f"No ASIN found for lead_id={oa_sourcing.lead_id}, size={item.size}. "
                     f"Creating record without ASIN. (AsinBank has {asin_count} records for this lead. "
@@ -1557,6 +1505,7 @@ class RetailerOrderProcessor:
             )
             
             self.db.add(purchase_record)
+            self.item_matcher.register_record(purchase_record, oa_sourcing, asin_record)
             
             logger.info(
                 f"Created purchase tracker record: "
@@ -1575,6 +1524,7 @@ class RetailerOrderProcessor:
             logger.error(error_msg, exc_info=True)
             return False, error_msg
     
+    @preloads_order_items
     def _process_shoepalace_order(self, order_data: ShoepalaceOrderData) -> Tuple[bool, Optional[str]]:
         """
         Process a Shoe Palace order and create purchase tracker records.
@@ -1650,9 +1600,7 @@ class RetailerOrderProcessor:
         """
         try:
             # Look up OA sourcing by unique_id
-            oa_sourcing = self.db.query(OASourcing).filter(
-                OASourcing.unique_id == item.unique_id
-            ).first()
+            oa_sourcing = self.item_matcher.find_oa_sourcing(item.unique_id)
             
             if not oa_sourcing:
                 return False, f"No OA sourcing lead found for unique_id: {item.unique_id}"
@@ -1661,7 +1609,7 @@ class RetailerOrderProcessor:
             asin_record = self._get_asin_for_lead_and_size(oa_sourcing.lead_id, item.size, oa_sourcing=oa_sourcing)
             
             if not asin_record:
-                asin_count = self.db.query(AsinBank).filter(AsinBank.lead_id == oa_sourcing.lead_id).count()
+                asin_count = self.item_matcher.count_asins_for_lead(oa_sourcing.lead_id)
                 logger.warning(
                     f"No ASIN found for lead_id={oa_sourcing.lead_id}, size={item.size}. "
                     f"Creating record without ASIN. (AsinBank has {asin_count} records for this lead. "
@@ -1705,6 +1653,7 @@ class RetailerOrderProcessor:
             )
             
             self.db.add(purchase_record)
+            self.item_matcher.register_record(purchase_record, oa_sourcing, asin_record)
             
             logger.info(
                 f"Created purchase tracker record: "
@@ -1743,9 +1692,7 @@ class RetailerOrderProcessor:
         """
         try:
             # Look up OA sourcing by unique_id
-            oa_sourcing = self.db.query(OASourcing).filter(
-                OASourcing.unique_id == item.unique_id
-            ).first()
+            oa_sourcing = self.item_matcher.find_oa_sourcing(item.unique_id)
             
             if not oa_sourcing:
                 return False, f"No OA sourcing lead found for unique_id: {item.unique_id}"
@@ -1754,7 +1701,7 @@ class RetailerOrderProcessor:
             asin_record = self._get_asin_for_lead_and_size(oa_sourcing.lead_id, item.size, oa_sourcing=oa_sourcing)
             
             if not asin_record:
-                asin_count = self.db.query(AsinBank).filter(AsinBank.lead_id == oa_sourcing.lead_id).count()
+                asin_count = self.item_matcher.count_asins_for_lead(oa_sourcing.lead_id)
                 logger.warning(
                     f"No ASIN found for lead_id={oa_sourcing.lead_id}, size={item.size}. "
                     f"Creating record without ASIN. (AsinBank has {asin_count} records for this lead. "
@@ -1798,6 +1745,7 @@ class RetailerOrderProcessor:
             )
             
             self.db.add(purchase_record)
+            self.item_matcher.register_record(purchase_record, oa_sourcing, asin_record)
             
             logger.info(
                 f"Created purchase tracker record: "
@@ -1816,6 +1764,7 @@ class RetailerOrderProcessor:
             logger.error(error_msg, exc_info=True)
             return False, error_msg
     
+    @preloads_order_items
     def _process_shoepalace_order(self, order_data: ShoepalaceOrderData) -> Tuple[bool, Optional[str]]:
         """
         Process a Shoe Palace order and create purchase tracker records.
@@ -1891,9 +1840,7 @@ class RetailerOrderProcessor:
         """
         try:
             # Look up OA sourcing by unique_id
-            oa_sourcing = self.db.query(OASourcing).filter(
-                OASourcing.unique_id == item.unique_id
-            ).first()
+            oa_sourcing = self.item_matcher.find_oa_sourcing(item.unique_id)
             
             if not oa_sourcing:
                 return False, f"No OA sourcing lead found for unique_id: {item.unique_id}"
@@ -1902,7 +1849,7 @@ class RetailerOrderProcessor:
             asin_record = self._get_asin_for_lead_and_size(oa_sourcing.lead_id, item.size, oa_sourcing=oa_sourcing)
             
             if not asin_record:
-                asin_count = self.db.query(AsinBank).filter(AsinBank.lead_id == oa_sourcing.lead_id).count()
+                asin_count = self.item_matcher.count_asins_for_lead(oa_sourcing.lead_id)
                 logger.warning(
                     f"No ASIN found for lead_id={oa_sourcing.lead_id}, size={item.size}. "
                     f"Creating record without ASIN. (AsinBank has {asin_count} records for this lead. "
@@ -1946,6 +1893,7 @@ class RetailerOrderProcessor:
             )
             
             self.db.add(purchase_record)
+            self.item_matcher.register_record(purchase_record, oa_sourcing, asin_record)
             
             logger.info(
                 f"Created purchase tracker record: "
@@ -1964,6 +1912,7 @@ class RetailerOrderProcessor:
             logger.error(error_msg, exc_info=True)
             return False, error_msg
     
+    @preloads_order_items
     def _process_jdsports_order(self, order_data: JDSportsOrderData) -> Tuple[bool, Optional[str]]:
         """
         Process a JD Sports order and create purchase tracker records.
@@ -2039,9 +1988,7 @@ class RetailerOrderProcessor:
         """
         try:
             # Look up OA sourcing by unique_id only
-            oa_sourcing = self.db.query(OASourcing).filter(
-                OASourcing.unique_id == item.unique_id
-            ).first()
+            oa_sourcing = self.item_matcher.find_oa_sourcing(item.unique_id)
             
             if not oa_sourcing:
                 return False, f"No OA sourcing lead found for unique_id: {item.unique_id}"
@@ -2050,7 +1997,7 @@ class RetailerOrderProcessor:
             asin_record = self._get_asin_for_lead_and_size(oa_sourcing.lead_id, item.size, oa_sourcing=oa_sourcing)
             
             if not asin_record:
-                asin_count = self.db.query(AsinBank).filter(AsinBank.lead_id == oa_sourcing.lead_id).count()
+                asin_count = self.item_matcher.count_asins_for_lead(oa_sourcing.lead_id)
                 logger.warning(
                     f"No ASIN found for lead_id={oa_sourcing.lead_id}, size={item.size}. "
                     f"Creating record without ASIN. (AsinBank has {asin_count} records for this lead. "
@@ -2095,6 +2042,7 @@ class RetailerOrderProcessor:
             )
             
             self.db.add(purchase_record)
+            self.item_matcher.register_record(purchase_record, oa_sourcing, asin_record)
             
             logger.info(
                 f"Created JD Sports purchase tracker record: "
@@ -2113,6 +2061,7 @@ class RetailerOrderProcessor:
             logger.error(error_msg, exc_info=True)
             return False, error_msg
     
+    @preloads_order_items
     def _process_revolve_order(self, order_data: RevolveOrderData) -> Tuple[bool, Optional[str]]:
         """
         Process a Revolve order and create purchase tracker records.
@@ -2188,9 +2137,7 @@ class RetailerOrderProcessor:
         """
         try:
             # Look up OA sourcing by unique_id only
-            oa_sourcing = self.db.query(OASourcing).filter(
-                OASourcing.unique_id == item.unique_id
-            ).first()
+            oa_sourcing = self.item_matcher.find_oa_sourcing(item.unique_id)
             
             if not oa_sourcing:
                 return False, f"No OA sourcing lead found for unique_id: {item.unique_id}"
@@ -2199,7 +2146,7 @@ class RetailerOrderProcessor:
             asin_record = self._get_asin_for_lead_and_size(oa_sourcing.lead_id, item.size, oa_sourcing=oa_sourcing)
             
             if not asin_record:
-                asin_count = self.db.query(AsinBank).filter(AsinBank.lead_id == oa_sourcing.lead_id).count()
+                asin_count = self.item_matcher.count_asins_for_lead(oa_sourcing.lead_id)
                 logger.warning(
                     f"No ASIN found for lead_id={oa_sourcing.lead_id}, size={item.size}. "
                     f"Creating record without ASIN. (AsinBank has {asin_count} records for this lead. "
@@ -2244,6 +2191,7 @@ class RetailerOrderProcessor:
             )
             
             self.db.add(purchase_record)
+            self.item_matcher.register_record(purchase_record, oa_sourcing, asin_record)
             
             logger.info(
                 f"Created Revolve purchase tracker record: "
@@ -2262,6 +2210,7 @@ class RetailerOrderProcessor:
             logger.error(error_msg, exc_info=True)
             return False, error_msg
     
+    @preloads_order_items
     def _process_asos_order(self, order_data: ASOSOrderData) -> Tuple[bool, Optional[str]]:
         """
         Process an ASOS order and create purchase tracker records.
@@ -2318,9 +2267,7 @@ class RetailerOrderProcessor:
     ) -> Tuple[bool, Optional[str]]:
         """Create a purchase tracker record for an ASOS order item. Same unique_id logic as Revolve."""
         try:
-            oa_sourcing = self.db.query(OASourcing).filter(
-                OASourcing.unique_id == item.unique_id
-            ).first()
+            oa_sourcing = self.item_matcher.find_oa_sourcing(item.unique_id)
             
             if not oa_sourcing:
                 return False, f"No OA sourcing lead found for unique_id: {item.unique_id}"
@@ -2328,7 +2275,7 @@ class RetailerOrderProcessor:
             asin_record = self._get_asin_for_lead_and_size(oa_sourcing.lead_id, item.size, oa_sourcing=oa_sourcing)
             
             if not asin_record:
-                asin_count = self.db.query(AsinBank).filter(AsinBank.lead_id == oa_sourcing.lead_id).count()
+                asin_count = self.item_matcher.count_asins_for_lead(oa_sourcing.lead_id)
                 logger.warning(
                     f"No ASIN found for lead_id={oa_sourcing.lead_id}, size={item.size}. "
                     f"Creating ASOS record without ASIN. (AsinBank has {asin_count} records for this lead.)"
@@ -2355,6 +2302,7 @@ class RetailerOrderProcessor:
             )
             
             self.db.add(purchase_record)
+            self.item_matcher.register_record(purchase_record, oa_sourcing, asin_record)
             
             logger.info(
                 f"Created ASOS purchase tracker record: "
@@ -2369,6 +2317,7 @@ class RetailerOrderProcessor:
             logger.error(error_msg, exc_info=True)
             return False, error_msg
     
+    @preloads_order_items
     def _process_dtlr_order(self, order_data: DTLROrderData) -> Tuple[bool, Optional[str]]:
         """
         Process a DTLR order and create purchase tracker records.
@@ -2449,9 +2398,7 @@ class RetailerOrderProcessor:
             
             if item.unique_id:
                 # Look up OA sourcing by unique_id only (for HOKA)
-                oa_sourcing = self.db.query(OASourcing).filter(
-                    OASourcing.unique_id == item.unique_id
-                ).first()
+                oa_sourcing = self.item_matcher.find_oa_sourcing(item.unique_id)
             else:
                 # For Nike/Jordan/Adidas: skip unique ID lookup
                 # Try to match by product name (fuzzy match) - but for now, just log and skip
@@ -2465,7 +2412,7 @@ class RetailerOrderProcessor:
             asin_record = self._get_asin_for_lead_and_size(oa_sourcing.lead_id, item.size, oa_sourcing=oa_sourcing)
             
             if not asin_record:
-                asin_count = self.db.query(AsinBank).filter(AsinBank.lead_id == oa_sourcing.lead_id).count()
+                asin_count = self.item_matcher.count_asins_for_lead(oa_sourcing.lead_id)
                 logger.warning(
                     f"No ASIN found for lead_id={oa_sourcing.lead_id}, size={item.size}. "
                     f"Creating record without ASIN. (AsinBank has {asin_count} records for this lead. "
@@ -2510,6 +2457,7 @@ class RetailerOrderProcessor:
             )
             
             self.db.add(purchase_record)
+            self.item_matcher.register_record(purchase_record, oa_sourcing, asin_record)
             
             logger.info(
                 f"Created DTLR purchase tracker record: "
@@ -2528,6 +2476,7 @@ class RetailerOrderProcessor:
             logger.error(error_msg, exc_info=True)
             return False, error_msg
     
+    @preloads_order_items
     def _process_endclothing_order(self, order_data: ENDClothingOrderData) -> Tuple[bool, Optional[str]]:
         """
         Process an END Clothing order and create purchase tracker records.
@@ -2604,9 +2553,7 @@ class RetailerOrderProcessor:
         """
         try:
             # Look up OA sourcing by unique_id
-            oa_sourcing = self.db.query(OASourcing).filter(
-                OASourcing.unique_id == item.unique_id
-            ).first()
+            oa_sourcing = self.item_matcher.find_oa_sourcing(item.unique_id)
             
             if not oa_sourcing:
                 return False, f"No OA sourcing lead found for unique_id: {item.unique_id}"
@@ -2615,7 +2562,7 @@ class RetailerOrderProcessor:
             asin_record = self._get_asin_for_lead_and_size(oa_sourcing.lead_id, item.size, oa_sourcing=oa_sourcing)
             
             if not asin_record:
-                asin_count = self.db.query(AsinBank).filter(AsinBank.lead_id == oa_sourcing.lead_id).count()
+                asin_count = self.item_matcher.count_asins_for_lead(oa_sourcing.lead_id)
                 logger.warning(
                     f"No ASIN found for lead_id={oa_sourcing.lead_id}, size={item.size}. "
                     f"Creating record without ASIN. (AsinBank has {asin_count} records for this lead. "
@@ -2660,6 +2607,7 @@ class RetailerOrderProcessor:
             )
             
             self.db.add(purchase_record)
+            self.item_matcher.register_record(purchase_record, oa_sourcing, asin_record)
             
             logger.info(
                 f"Created END Clothing purchase tracker record: "
@@ -2678,6 +2626,7 @@ class RetailerOrderProcessor:
             logger.error(error_msg, exc_info=True)
             return False, error_msg
     
+    @preloads_order_items
     def _process_shopwss_order(self, order_data: ShopWSSOrderData) -> Tuple[bool, Optional[str]]:
         """
         Process a ShopWSS order and create purchase tracker records.
@@ -2754,9 +2703,7 @@ class RetailerOrderProcessor:
         """
         try:
             # Look up OA sourcing by unique_id
-            oa_sourcing = self.db.query(OASourcing).filter(
-                OASourcing.unique_id == item.unique_id
-            ).first()
+            oa_sourcing = self.item_matcher.find_oa_sourcing(item.unique_id)
             
             if not oa_sourcing:
                 return False, f"No OA sourcing lead found for unique_id: {item.unique_id}"
@@ -2765,7 +2712,7 @@ class RetailerOrderProcessor:
             asin_record = self._get_asin_for_lead_and_size(oa_sourcing.lead_id, item.size, oa_sourcing=oa_sourcing)
             
             if not asin_record:
-                asin_count = self.db.query(AsinBank).filter(AsinBank.lead_id == oa_sourcing.lead_id).count()
+                asin_count = self.item_matcher.count_asins_for_lead(oa_sourcing.lead_id)
                 logger.warning(
                     f"No ASIN found for lead_id={oa_sourcing.lead_id}, size={item.size}. "
                     f"Creating record without ASIN. (AsinBank has {asin_count} records for this lead. "
@@ -2810,6 +2757,7 @@ class RetailerOrderProcessor:
             )
             
             self.db.add(purchase_record)
+            self.item_matcher.register_record(purchase_record, oa_sourcing, asin_record)
             
             logger.info(
                 f"Created ShopWSS purchase tracker record: "
@@ -2828,20 +2776,55 @@ class RetailerOrderProcessor:
             logger.error(error_msg, exc_info=True)
             return False, error_msg
     
+    def list_unprocessed_message_ids(self, query: str, max_results: int = 20) -> List[str]:
+        """
+        Search Gmail for order confirmations not yet processed successfully.
+        
+        Messages are filtered through the processed-message registry rather than
+        a -label: exclusion; failed messages are returned again, as before.
+        
+        Args:
+            query: Gmail search query (sender / subject)
+            max_results: Maximum number of message IDs
+        
+        Returns:
+            Message IDs, newest first
+        """
+        return processed_messages.list_unprocessed_message_ids(
+            self.db, self.gmail_service, query, processed_messages.TYPE_CONFIRMATION, max_results,
+            statuses=(processed_messages.STATUS_PROCESSED,)
+        )
+    
+    def _start_message(self, message_id: str, retailer: Optional[str]) -> None:
+        """Remember the retailer and start time of a message for its registry row."""
+        self._message_context[message_id] = (retailer, datetime.utcnow())
+    
+    def _record_message(self, message_id: str, status: str, error: Optional[str] = None) -> None:
+        """Record the outcome of a message in the processed-message registry."""
+        retailer, started_at = self._message_context.pop(message_id, (None, None))
+        processed_messages.record(
+            self.db, message_id, processed_messages.TYPE_CONFIRMATION, status,
+            retailer=retailer, error=error, started_at=started_at
+        )
+    
     def _add_processed_label(self, message_id: str) -> None:
-        """Add 'Processed' label to a message and remove 'Error' label if present"""
+        """Record a message as processed and queue the 'Processed' label (removing 'Error' if present)"""
+        self._record_message(message_id, processed_messages.STATUS_PROCESSED)
         if self.processed_label:
-            self.gmail_service.add_label_to_message(message_id, self.processed_label['id'])
-            
             # Remove error label if present (in case this is a reprocessed email that previously failed)
-            if self.error_label:
-                self.gmail_service.remove_label_from_message(message_id, self.error_label['id'])
+            get_gmail_labeler().submit(
+                message_id,
+                add_label_ids=[self.processed_label['id']],
+                remove_label_ids=[self.error_label['id']] if self.error_label else None
+            )
     
-    def _add_error_label(self, message_id: str) -> None:
-        """Add 'Error' label to a message"""
+    def _add_error_label(self, message_id: str, error: Optional[str] = None) -> None:
+        """Record a message as failed and queue the 'Error' label"""
+        self._record_message(message_id, processed_messages.STATUS_ERROR, error=error)
         if self.error_label:
-            self.gmail_service.add_label_to_message(message_id, self.error_label['id'])
+            get_gmail_labeler().submit(message_id, add_label_ids=[self.error_label['id']])
     
+    @preloads_order_items
     def _process_hibbett_order(self, order_data: HibbettOrderData) -> Tuple[bool, Optional[str]]:
         """
         Process a Hibbett order and create purchase tracker records.
@@ -2917,9 +2900,7 @@ class RetailerOrderProcessor:
         """
         try:
             # Look up OA sourcing by unique_id
-            oa_sourcing = self.db.query(OASourcing).filter(
-                OASourcing.unique_id == item.unique_id
-            ).first()
+            oa_sourcing = self.item_matcher.find_oa_sourcing(item.unique_id)
             
             if not oa_sourcing:
                 return False, f"No OA sourcing lead found for unique_id: {item.unique_id}"
@@ -2928,7 +2909,7 @@ class RetailerOrderProcessor:
             asin_record = self._get_asin_for_lead_and_size(oa_sourcing.lead_id, item.size, oa_sourcing=oa_sourcing)
             
             if not asin_record:
-                asin_count = self.db.query(AsinBank).filter(AsinBank.lead_id == oa_sourcing.lead_id).count()
+                asin_count = self.item_matcher.count_asins_for_lead(oa_sourcing.lead_id)
                 logger.warning(
                     f"No ASIN found for lead_id={oa_sourcing.lead_id}, size={item.size}. "
                     f"Creating record without ASIN. (AsinBank has {asin_count} records for this lead. "
@@ -2972,6 +2953,7 @@ class RetailerOrderProcessor:
             )
             
             self.db.add(purchase_record)
+            self.item_matcher.register_record(purchase_record, oa_sourcing, asin_record)
             
             logger.info(
                 f"Created purchase tracker record: "
@@ -2990,6 +2972,7 @@ class RetailerOrderProcessor:
             logger.error(error_msg, exc_info=True)
             return False, error_msg
     
+    @preloads_order_items
     def _process_shoepalace_order(self, order_data: ShoepalaceOrderData) -> Tuple[bool, Optional[str]]:
         """
         Process a Shoe Palace order and create purchase tracker records.
@@ -3065,9 +3048,7 @@ class RetailerOrderProcessor:
         """
         try:
             # Look up OA sourcing by unique_id
-            oa_sourcing = self.db.query(OASourcing).filter(
-                OASourcing.unique_id == item.unique_id
-            ).first()
+            oa_sourcing = self.item_matcher.find_oa_sourcing(item.unique_id)
             
             if not oa_sourcing:
                 return False, f"No OA sourcing lead found for unique_id: {item.unique_id}"
@@ -3076,7 +3057,7 @@ class RetailerOrderProcessor:
             asin_record = self._get_asin_for_lead_and_size(oa_sourcing.lead_id, item.size, oa_sourcing=oa_sourcing)
             
             if not asin_record:
-                asin_count = self.db.query(AsinBank).filter(AsinBank.lead_id == oa_sourcing.lead_id).count()
+                asin_count = self.item_matcher.count_asins_for_lead(oa_sourcing.lead_id)
                 logger.warning(
                     f"No ASIN found for lead_id={oa_sourcing.lead_id}, size={item.size}. "
                     f"Creating record without ASIN. (AsinBank has {asin_count} records for this lead. "
@@ -3120,6 +3101,7 @@ class RetailerOrderProcessor:
             )
             
             self.db.add(purchase_record)
+            self.item_matcher.register_record(purchase_record, oa_sourcing, asin_record)
             
             logger.info(
                 f"Created purchase tracker record: "
@@ -3138,6 +3120,7 @@ class RetailerOrderProcessor:
             logger.error(error_msg, exc_info=True)
             return False, error_msg
     
+    @preloads_order_items
     def _process_snipes_order(self, order_data: SnipesOrderData) -> Tuple[bool, Optional[str]]:
         """
         Process a Snipes order and create purchase tracker records.
@@ -3208,9 +3191,7 @@ class RetailerOrderProcessor:
         """
         try:
             # Find OASourcing by unique_id only (OASourcing has no size column - size is in AsinBank)
-            oa_sourcing = self.db.query(OASourcing).filter(
-                OASourcing.unique_id == item.unique_id
-            ).first()
+            oa_sourcing = self.item_matcher.find_oa_sourcing(item.unique_id)
             
             if not oa_sourcing:
                 return False, f"No OA sourcing lead found for unique_id: {item.unique_id}"
@@ -3219,7 +3200,7 @@ class RetailerOrderProcessor:
             asin_record = self._get_asin_for_lead_and_size(oa_sourcing.lead_id, item.size, oa_sourcing=oa_sourcing)
             
             if not asin_record:
-                asin_count = self.db.query(AsinBank).filter(AsinBank.lead_id == oa_sourcing.lead_id).count()
+                asin_count = self.item_matcher.count_asins_for_lead(oa_sourcing.lead_id)
                 logger.warning(
                     f"No ASIN found for lead_id={oa_sourcing.lead_id}, size={item.size}. "
                     f"Creating Snipes record without ASIN. (AsinBank has {asin_count} records for this lead.)"
@@ -3246,6 +3227,7 @@ class RetailerOrderProcessor:
             )
             
             self.db.add(purchase_record)
+            self.item_matcher.register_record(purchase_record, oa_sourcing, asin_record)
             
             logger.info(
                 f"Created Snipes purchase tracker record: "
@@ -3260,6 +3242,7 @@ class RetailerOrderProcessor:
             logger.error(error_msg, exc_info=True)
             return False, error_msg
     
+    @preloads_order_items
     def _process_finishline_order(self, order_data: FinishLineOrderData) -> Tuple[bool, Optional[str]]:
         """
         Process a Finish Line order and create purchase tracker records.
@@ -3335,17 +3318,13 @@ class RetailerOrderProcessor:
         """
         try:
             # Look up OA sourcing by unique_id (exact match first)
-            oa_sourcing = self.db.query(OASourcing).filter(
-                OASourcing.unique_id == item.unique_id
-            ).first()
+            oa_sourcing = self.item_matcher.find_oa_sourcing(item.unique_id)
             
             # Fallback: Finish Line emails use SKU_color (e.g. 1104451D_175);
             # user may add base SKU (1104451D) in OA sourcing
             if not oa_sourcing and '_' in item.unique_id:
                 base_sku = item.unique_id.rsplit('_', 1)[0]
-                oa_sourcing = self.db.query(OASourcing).filter(
-                    OASourcing.unique_id == base_sku
-                ).first()
+                oa_sourcing = self.item_matcher.find_oa_sourcing(base_sku)
             
             if not oa_sourcing:
                 return False, f"No OA sourcing lead found for unique_id: {item.unique_id}"
@@ -3354,7 +3333,7 @@ class RetailerOrderProcessor:
             asin_record = self._get_asin_for_lead_and_size(oa_sourcing.lead_id, item.size, oa_sourcing=oa_sourcing)
             
             if not asin_record:
-                asin_count = self.db.query(AsinBank).filter(AsinBank.lead_id == oa_sourcing.lead_id).count()
+                asin_count = self.item_matcher.count_asins_for_lead(oa_sourcing.lead_id)
                 logger.warning(
                     f"No ASIN found for lead_id={oa_sourcing.lead_id}, size={item.size}. "
                     f"Creating record without ASIN. (AsinBank has {asin_count} records for this lead. "
@@ -3399,6 +3378,7 @@ class RetailerOrderProcessor:
             )
             
             self.db.add(purchase_record)
+            self.item_matcher.register_record(purchase_record, oa_sourcing, asin_record)
             
             logger.info(
                 f"Created Finish Line purchase tracker record: "
@@ -3417,6 +3397,7 @@ class RetailerOrderProcessor:
             logger.error(error_msg, exc_info=True)
             return False, error_msg
     
+    @preloads_order_items
     def _process_shopsimon_order(self, order_data: ShopSimonOrderData) -> Tuple[bool, Optional[str]]:
         """
         Process a ShopSimon order and create purchase tracker records.
@@ -3492,9 +3473,7 @@ class RetailerOrderProcessor:
         """
         try:
             # Look up OA sourcing by unique_id only
-            oa_sourcing = self.db.query(OASourcing).filter(
-                OASourcing.unique_id == item.unique_id
-            ).first()
+            oa_sourcing = self.item_matcher.find_oa_sourcing(item.unique_id)
             
             if not oa_sourcing:
                 return False, f"No OA sourcing lead found for unique_id: {item.unique_id}"
@@ -3503,7 +3482,7 @@ class RetailerOrderProcessor:
             asin_record = self._get_asin_for_lead_and_size(oa_sourcing.lead_id, item.size, oa_sourcing=oa_sourcing)
             
             if not asin_record:
-                asin_count = self.db.query(AsinBank).filter(AsinBank.lead_id == oa_sourcing.lead_id).count()
+                asin_count = self.item_matcher.count_asins_for_lead(oa_sourcing.lead_id)
                 logger.warning(
                     f"No ASIN found for lead_id={oa_sourcing.lead_id}, size={item.size}. "
                     f"Creating record without ASIN. (AsinBank has {asin_count} records for this lead. "
@@ -3548,6 +3527,7 @@ class RetailerOrderProcessor:
             )
             
             self.db.add(purchase_record)
+            self.item_matcher.register_record(purchase_record, oa_sourcing, asin_record)
             
             logger.info(
                 f"Created ShopSimon purchase tracker record: "
@@ -3566,6 +3546,7 @@ class RetailerOrderProcessor:
             logger.error(error_msg, exc_info=True)
             return False, error_msg
     
+    @preloads_order_items
     def _process_urban_order(self, order_data: UrbanOrderData) -> Tuple[bool, Optional[str]]:
         """
         Process an Urban Outfitters order and create purchase tracker records.
@@ -3641,9 +3622,7 @@ class RetailerOrderProcessor:
         """
         try:
             # Look up OA sourcing by unique_id only
-            oa_sourcing = self.db.query(OASourcing).filter(
-                OASourcing.unique_id == item.unique_id
-            ).first()
+            oa_sourcing = self.item_matcher.find_oa_sourcing(item.unique_id)
             
             if not oa_sourcing:
                 return False, f"No OA sourcing lead found for unique_id: {item.unique_id}"
@@ -3652,7 +3631,7 @@ class RetailerOrderProcessor:
             asin_record = self._get_asin_for_lead_and_size(oa_sourcing.lead_id, item.size, oa_sourcing=oa_sourcing)
             
             if not asin_record:
-                asin_count = self.db.query(AsinBank).filter(AsinBank.lead_id == oa_sourcing.lead_id).count()
+                asin_count = self.item_matcher.count_asins_for_lead(oa_sourcing.lead_id)
                 logger.warning(
                     f"No ASIN found for lead_id={oa_sourcing.lead_id}, size={item.size}. "
                     f"Creating record without ASIN. (AsinBank has {asin_count} records for this lead. "
@@ -3697,6 +3676,7 @@ class RetailerOrderProcessor:
             )
             
             self.db.add(purchase_record)
+            self.item_matcher.register_record(purchase_record, oa_sourcing, asin_record)
             
             logger.info(
                 f"Created Urban Outfitters purchase tracker record: "
@@ -3715,6 +3695,7 @@ class RetailerOrderProcessor:
             logger.error(error_msg, exc_info=True)
             return False, error_msg
     
+    @preloads_order_items
     def _process_anthropologie_order(self, order_data: AnthropologieOrderData) -> Tuple[bool, Optional[str]]:
         """
         Process an Anthropologie order and create purchase tracker records.
@@ -3789,9 +3770,7 @@ class RetailerOrderProcessor:
         """
         try:
             # Look up OA sourcing by unique_id only
-            oa_sourcing = self.db.query(OASourcing).filter(
-                OASourcing.unique_id == item.unique_id
-            ).first()
+            oa_sourcing = self.item_matcher.find_oa_sourcing(item.unique_id)
             
             if not oa_sourcing:
                 return False, f"No OA sourcing lead found for unique_id: {item.unique_id}"
@@ -3800,7 +3779,7 @@ class RetailerOrderProcessor:
             asin_record = self._get_asin_for_lead_and_size(oa_sourcing.lead_id, item.size, oa_sourcing=oa_sourcing)
             
             if not asin_record:
-                asin_count = self.db.query(AsinBank).filter(AsinBank.lead_id == oa_sourcing.lead_id).count()
+                asin_count = self.item_matcher.count_asins_for_lead(oa_sourcing.lead_id)
                 logger.warning(
                     f"No ASIN found for lead_id={oa_sourcing.lead_id}, size={item.size}. "
                     f"Creating record without ASIN. (AsinBank has {asin_count} records for this lead. "
@@ -3845,6 +3824,7 @@ class RetailerOrderProcessor:
             )
             
             self.db.add(purchase_record)
+            self.item_matcher.register_record(purchase_record, oa_sourcing, asin_record)
             
             logger.info(
                 f"Created Anthropologie purchase tracker record: "
@@ -3861,6 +3841,7 @@ class RetailerOrderProcessor:
             logger.error(f"Error creating Anthropologie purchase tracker record: {e}", exc_info=True)
             return False, str(e)
     
+    @preloads_order_items
     def _process_nike_order(self, order_data: NikeOrderData) -> Tuple[bool, Optional[str]]:
         """
         Process a Nike order and create purchase tracker records.
@@ -3935,9 +3916,7 @@ class RetailerOrderProcessor:
         """
         try:
             # Look up OA sourcing by unique_id only
-            oa_sourcing = self.db.query(OASourcing).filter(
-                OASourcing.unique_id == item.unique_id
-            ).first()
+            oa_sourcing = self.item_matcher.find_oa_sourcing(item.unique_id)
             
             if not oa_sourcing:
                 return False, f"No OA sourcing lead found for unique_id: {item.unique_id}"
@@ -3946,7 +3925,7 @@ class RetailerOrderProcessor:
             asin_record = self._get_asin_for_lead_and_size(oa_sourcing.lead_id, item.size, oa_sourcing=oa_sourcing)
             
             if not asin_record:
-                asin_count = self.db.query(AsinBank).filter(AsinBank.lead_id == oa_sourcing.lead_id).count()
+                asin_count = self.item_matcher.count_asins_for_lead(oa_sourcing.lead_id)
                 logger.warning(
                     f"No ASIN found for lead_id={oa_sourcing.lead_id}, size={item.size}. "
                     f"Creating record without ASIN. (AsinBank has {asin_count} records for this lead. "
@@ -3991,6 +3970,7 @@ class RetailerOrderProcessor:
             )
             
             self.db.add(purchase_record)
+            self.item_matcher.register_record(purchase_record, oa_sourcing, asin_record)
             
             logger.info(
                 f"Created Nike purchase tracker record: "
@@ -4007,6 +3987,7 @@ class RetailerOrderProcessor:
             logger.error(f"Error creating Nike purchase tracker record: {e}", exc_info=True)
             return False, str(e)
     
+    @preloads_order_items
     def _process_carbon38_order(self, order_data: Carbon38OrderData) -> Tuple[bool, Optional[str]]:
         """
         Process a Carbon38 order and create purchase tracker records.
@@ -4081,9 +4062,7 @@ class RetailerOrderProcessor:
         """
         try:
             # Look up OA sourcing by unique_id only
-            oa_sourcing = self.db.query(OASourcing).filter(
-                OASourcing.unique_id == item.unique_id
-            ).first()
+            oa_sourcing = self.item_matcher.find_oa_sourcing(item.unique_id)
             
             if not oa_sourcing:
                 return False, f"No OA sourcing lead found for unique_id: {item.unique_id}"
@@ -4092,7 +4071,7 @@ class RetailerOrderProcessor:
             asin_record = self._get_asin_for_lead_and_size(oa_sourcing.lead_id, item.size, oa_sourcing=oa_sourcing)
             
             if not asin_record:
-                asin_count = self.db.query(AsinBank).filter(AsinBank.lead_id == oa_sourcing.lead_id).count()
+                asin_count = self.item_matcher.count_asins_for_lead(oa_sourcing.lead_id)
                 logger.warning(
                     f"No ASIN found for lead_id={oa_sourcing.lead_id}, size={item.size}. "
                     f"Creating record without ASIN. (AsinBank has {asin_count} records for this lead. "
@@ -4137,6 +4116,7 @@ class RetailerOrderProcessor:
             )
             
             self.db.add(purchase_record)
+            self.item_matcher.register_record(purchase_record, oa_sourcing, asin_record)
             
             logger.info(
                 f"Created Carbon38 purchase tracker record: "
@@ -4153,6 +4133,7 @@ class RetailerOrderProcessor:
             logger.error(f"Error creating Carbon38 purchase tracker record: {e}", exc_info=True)
             return False, str(e)
     
+    @preloads_order_items
     def _process_gazelle_order(self, order_data: GazelleOrderData) -> Tuple[bool, Optional[str]]:
         """
         Process a Gazelle Sports order and create purchase tracker records.
@@ -4227,9 +4208,7 @@ class RetailerOrderProcessor:
         """
         try:
             # Look up OA sourcing by unique_id only
-            oa_sourcing = self.db.query(OASourcing).filter(
-                OASourcing.unique_id == item.unique_id
-            ).first()
+            oa_sourcing = self.item_matcher.find_oa_sourcing(item.unique_id)
             
             if not oa_sourcing:
                 return False, f"No OA sourcing lead found for unique_id: {item.unique_id}"
@@ -4238,7 +4217,7 @@ class RetailerOrderProcessor:
             asin_record = self._get_asin_for_lead_and_size(oa_sourcing.lead_id, item.size, oa_sourcing=oa_sourcing)
             
             if not asin_record:
-                asin_count = self.db.query(AsinBank).filter(AsinBank.lead_id == oa_sourcing.lead_id).count()
+                asin_count = self.item_matcher.count_asins_for_lead(oa_sourcing.lead_id)
                 logger.warning(
                     f"No ASIN found for lead_id={oa_sourcing.lead_id}, size={item.size}. "
                     f"Creating record without ASIN. (AsinBank has {asin_count} records for this lead. "
@@ -4283,6 +4262,7 @@ class RetailerOrderProcessor:
             )
             
             self.db.add(purchase_record)
+            self.item_matcher.register_record(purchase_record, oa_sourcing, asin_record)
             
             logger.info(
                 f"Created Gazelle purchase tracker record: "
@@ -4299,6 +4279,7 @@ class RetailerOrderProcessor:
             logger.error(f"Error creating Gazelle purchase tracker record: {e}", exc_info=True)
             return False, str(e)
     
+    @preloads_order_items
     def _process_netaporter_order(self, order_data: NetAPorterOrderData) -> Tuple[bool, Optional[str]]:
         """
         Process a NET-A-PORTER order and create purchase tracker records.
@@ -4373,9 +4354,7 @@ class RetailerOrderProcessor:
         """
         try:
             # Look up OA sourcing by unique_id only
-            oa_sourcing = self.db.query(OASourcing).filter(
-                OASourcing.unique_id == item.unique_id
-            ).first()
+            oa_sourcing = self.item_matcher.find_oa_sourcing(item.unique_id)
             
             if not oa_sourcing:
                 return False, f"No OA sourcing lead found for unique_id: {item.unique_id}"
@@ -4384,7 +4363,7 @@ class RetailerOrderProcessor:
             asin_record = self._get_asin_for_lead_and_size(oa_sourcing.lead_id, item.size, oa_sourcing=oa_sourcing)
             
             if not asin_record:
-                asin_count = self.db.query(AsinBank).filter(AsinBank.lead_id == oa_sourcing.lead_id).count()
+                asin_count = self.item_matcher.count_asins_for_lead(oa_sourcing.lead_id)
                 logger.warning(
                     f"No ASIN found for lead_id={oa_sourcing.lead_id}, size={item.size}. "
                     f"Creating record without ASIN. (AsinBank has {asin_count} records for this lead. "
@@ -4429,6 +4408,7 @@ class RetailerOrderProcessor:
             )
             
             self.db.add(purchase_record)
+            self.item_matcher.register_record(purchase_record, oa_sourcing, asin_record)
             
             logger.info(
                 f"Created NET-A-PORTER purchase tracker record: "
@@ -4445,6 +4425,7 @@ class RetailerOrderProcessor:
             logger.error(f"Error creating NET-A-PORTER purchase tracker record: {e}", exc_info=True)
             return False, str(e)
     
+    @preloads_order_items
     def _process_fit2run_order(self, order_data: Fit2RunOrderData) -> Tuple[bool, Optional[str]]:
         """
         Process a Fit2Run order and create purchase tracker records.
@@ -4519,9 +4500,7 @@ class RetailerOrderProcessor:
         """
         try:
             # Look up OA sourcing by unique_id only
-            oa_sourcing = self.db.query(OASourcing).filter(
-                OASourcing.unique_id == item.unique_id
-            ).first()
+            oa_sourcing = self.item_matcher.find_oa_sourcing(item.unique_id)
             
             if not oa_sourcing:
                 return False, f"No OA sourcing lead found for unique_id: {item.unique_id}"
@@ -4530,7 +4509,7 @@ class RetailerOrderProcessor:
             asin_record = self._get_asin_for_lead_and_size(oa_sourcing.lead_id, item.size, oa_sourcing=oa_sourcing)
             
             if not asin_record:
-                asin_count = self.db.query(AsinBank).filter(AsinBank.lead_id == oa_sourcing.lead_id).count()
+                asin_count = self.item_matcher.count_asins_for_lead(oa_sourcing.lead_id)
                 logger.warning(
                     f"No ASIN found for lead_id={oa_sourcing.lead_id}, size={item.size}. "
                     f"Creating record without ASIN. (AsinBank has {asin_count} records for this lead. "
@@ -4575,6 +4554,7 @@ class RetailerOrderProcessor:
             )
             
             self.db.add(purchase_record)
+            self.item_matcher.register_record(purchase_record, oa_sourcing, asin_record)
             
             logger.info(
                 f"Created Fit2Run purchase tracker record: "
@@ -4591,6 +4571,7 @@ class RetailerOrderProcessor:
             logger.error(f"Error creating Fit2Run purchase tracker record: {e}", exc_info=True)
             return False, str(e)
     
+    @preloads_order_items
     def _process_sns_order(self, order_data: SNSOrderData) -> Tuple[bool, Optional[str]]:
         """
         Process a SNS order and create purchase tracker records.
@@ -4665,9 +4646,7 @@ class RetailerOrderProcessor:
         """
         try:
             # Look up OA sourcing by unique_id only
-            oa_sourcing = self.db.query(OASourcing).filter(
-                OASourcing.unique_id == item.unique_id
-            ).first()
+            oa_sourcing = self.item_matcher.find_oa_sourcing(item.unique_id)
             
             if not oa_sourcing:
                 return False, f"No OA sourcing lead found for unique_id: {item.unique_id}"
@@ -4676,7 +4655,7 @@ class RetailerOrderProcessor:
             asin_record = self._get_asin_for_lead_and_size(oa_sourcing.lead_id, item.size, oa_sourcing=oa_sourcing)
             
             if not asin_record:
-                asin_count = self.db.query(AsinBank).filter(AsinBank.lead_id == oa_sourcing.lead_id).count()
+                asin_count = self.item_matcher.count_asins_for_lead(oa_sourcing.lead_id)
                 logger.warning(
                     f"No ASIN found for lead_id={oa_sourcing.lead_id}, size={item.size}. "
                     f"Creating record without ASIN. (AsinBank has {asin_count} records for this lead. "
@@ -4721,6 +4700,7 @@ class RetailerOrderProcessor:
             )
             
             self.db.add(purchase_record)
+            self.item_matcher.register_record(purchase_record, oa_sourcing, asin_record)
             
             logger.info(
                 f"Created SNS purchase tracker record: "
@@ -4737,6 +4717,7 @@ class RetailerOrderProcessor:
             logger.error(f"Error creating SNS purchase tracker record: {e}", exc_info=True)
             return False, str(e)
     
+    @preloads_order_items
     def _process_adidas_order(self, order_data: AdidasOrderData) -> Tuple[bool, Optional[str]]:
         """
         Process an Adidas order and create purchase tracker records.
@@ -4805,10 +4786,7 @@ class RetailerOrderProcessor:
         """
         try:
             # Find OA sourcing record by unique_id
-            oa_sourcing = self.db.query(OASourcing).filter(
-                OASourcing.retailer_id == retailer.id,
-                OASourcing.unique_id == item.unique_id
-            ).first()
+            oa_sourcing = self.item_matcher.find_oa_sourcing(item.unique_id, retailer_id=retailer.id)
             
             if not oa_sourcing:
                 error_msg = f"No OA sourcing found for Adidas unique_id={item.unique_id}"
@@ -4862,6 +4840,7 @@ class RetailerOrderProcessor:
             )
             
             self.db.add(purchase_record)
+            self.item_matcher.register_record(purchase_record, oa_sourcing, asin_record)
             
             logger.info(
                 f"Created Adidas purchase tracker record: "
@@ -4878,6 +4857,7 @@ class RetailerOrderProcessor:
             logger.error(f"Error creating Adidas purchase tracker record: {e}", exc_info=True)
             return False, str(e)
     
+    @preloads_order_items
     def _process_concepts_order(self, order_data: ConceptsOrderData) -> Tuple[bool, Optional[str]]:
         """
         Process a CNCPTS order and create purchase tracker records.
@@ -4946,10 +4926,7 @@ class RetailerOrderProcessor:
         """
         try:
             # Find OA sourcing record by unique_id
-            oa_sourcing = self.db.query(OASourcing).filter(
-                OASourcing.retailer_id == retailer.id,
-                OASourcing.unique_id == item.unique_id
-            ).first()
+            oa_sourcing = self.item_matcher.find_oa_sourcing(item.unique_id, retailer_id=retailer.id)
             
             if not oa_sourcing:
                 error_msg = f"No OA sourcing found for CNCPTS unique_id={item.unique_id}"
@@ -5003,6 +4980,7 @@ class RetailerOrderProcessor:
             )
             
             self.db.add(purchase_record)
+            self.item_matcher.register_record(purchase_record, oa_sourcing, asin_record)
             
             logger.info(
                 f"Created CNCPTS purchase tracker record: "
@@ -5019,6 +4997,7 @@ class RetailerOrderProcessor:
             logger.error(f"Error creating CNCPTS purchase tracker record: {e}", exc_info=True)
             return False, str(e)
     
+    @preloads_order_items
     def _process_sneaker_order(self, order_data: SneakerOrderData) -> Tuple[bool, Optional[str]]:
         """
         Process a Sneaker Politics order and create purchase tracker records.
@@ -5087,10 +5066,7 @@ class RetailerOrderProcessor:
         """
         try:
             # Find OA sourcing record by unique_id
-            oa_sourcing = self.db.query(OASourcing).filter(
-                OASourcing.retailer_id == retailer.id,
-                OASourcing.unique_id == item.unique_id
-            ).first()
+            oa_sourcing = self.item_matcher.find_oa_sourcing(item.unique_id, retailer_id=retailer.id)
             
             if not oa_sourcing:
                 error_msg = f"No OA sourcing found for Sneaker Politics unique_id={item.unique_id}"
@@ -5139,6 +5115,7 @@ class RetailerOrderProcessor:
             logger.error(f"Error creating Sneaker Politics purchase tracker record: {e}", exc_info=True)
             return False, str(e)
     
+    @preloads_order_items
     def _process_orleans_order(self, order_data: OrleansOrderData) -> Tuple[bool, Optional[str]]:
         """
         Process an Orleans Shoe Co order and create purchase tracker records.
@@ -5207,10 +5184,7 @@ class RetailerOrderProcessor:
         """
         try:
             # Find OA sourcing record by unique_id
-            oa_sourcing = self.db.query(OASourcing).filter(
-                OASourcing.retailer_id == retailer.id,
-                OASourcing.unique_id == item.unique_id
-            ).first()
+            oa_sourcing = self.item_matcher.find_oa_sourcing(item.unique_id, retailer_id=retailer.id)
             
             if not oa_sourcing:
                 error_msg = f"No OA sourcing found for Orleans unique_id={item.unique_id}"
@@ -5259,6 +5233,7 @@ class RetailerOrderProcessor:
             logger.error(f"Error creating Orleans purchase tracker record: {e}", exc_info=True)
             return False, str(e)
     
+    @preloads_order_items
     def _process_bloomingdales_order(self, order_data: BloomingdalesOrderData) -> Tuple[bool, Optional[str]]:
         """
         Process a Bloomingdale's order and create purchase tracker records.
@@ -5334,9 +5309,7 @@ class RetailerOrderProcessor:
         """
         try:
             # Look up OA sourcing by unique_id only
-            oa_sourcing = self.db.query(OASourcing).filter(
-                OASourcing.unique_id == item.unique_id
-            ).first()
+            oa_sourcing = self.item_matcher.find_oa_sourcing(item.unique_id)
             
             if not oa_sourcing:
                 return False, f"No OA sourcing lead found for unique_id: {item.unique_id}"
@@ -5345,7 +5318,7 @@ class RetailerOrderProcessor:
             asin_record = self._get_asin_for_lead_and_size(oa_sourcing.lead_id, item.size, oa_sourcing=oa_sourcing)
             
             if not asin_record:
-                asin_count = self.db.query(AsinBank).filter(AsinBank.lead_id == oa_sourcing.lead_id).count()
+                asin_count = self.item_matcher.count_asins_for_lead(oa_sourcing.lead_id)
                 logger.warning(
                     f"No ASIN found for lead_id={oa_sourcing.lead_id}, size={item.size}. "
                     f"Creating record without ASIN. (AsinBank has {asin_count} records for this lead. "
@@ -5390,6 +5363,7 @@ class RetailerOrderProcessor:
             )
             
             self.db.add(purchase_record)
+            self.item_matcher.register_record(purchase_record, oa_sourcing, asin_record)
             
             logger.info(
                 f"Created Bloomingdale's purchase tracker record: "
@@ -5432,6 +5406,7 @@ class RetailerOrderProcessor:
                 'error': str (if failed)
             }
         """
+        self._start_message(message_id, retailer_name)
         try:
             # Map retailer name to parser and processor
             retailer_map = {
@@ -5560,12 +5535,13 @@ class RetailerOrderProcessor:
             processor = retailer_config['processor']
             
             # Parse order details
-            order_data = parser.parse_email(email_data)
+            order_data = parse_with(parser, "parse_email", email_data)
             if not order_data:
-                self._add_error_label(message_id)
+                error_msg = f"Failed to parse {retailer_name} order from email"
+                self._add_error_label(message_id, error=error_msg)
                 return {
                     'success': False,
-                    'error': f"Failed to parse {retailer_name} order from email"
+                    'error': error_msg
                 }
 
             # Fallback: set order_datetime from email Date header when parser didn't extract it
@@ -5599,7 +5575,7 @@ class RetailerOrderProcessor:
                 }
             else:
                 self.db.rollback()
-                self._add_error_label(message_id)
+                self._add_error_label(message_id, error=error_msg)
                 return {
                     'success': False,
                     'order_number': order_data.order_number,
@@ -5610,7 +5586,7 @@ class RetailerOrderProcessor:
             error_msg = f"Error processing {retailer_name} email {message_id}: {str(e)}"
             logger.error(error_msg, exc_info=True)
             self.db.rollback()
-            self._add_error_label(message_id)
+            self._add_error_label(message_id, error=error_msg)
             return {
                 'success': False,
                 'error': error_msg
@@ -4,12 +4,18 @@ Processes order update emails (shipping and cancellation) from retailers
 """
 
 import logging
-import re
-from typing import Optional, Tuple
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
 
+from app.services.fulfillment_ledger import EVENT_CANCELLATION, EVENT_SHIPPING, has_events, lock_record, record_event
+from app.services import processed_messages
+from app.services.gmail_labeler import get_gmail_labeler
 from app.services.gmail_service import GmailService
+from app.services.parser_registry import get_gmail_service, get_parser
+from app.services.parse_pool import parse_with
+from app.services.purchase_item_matcher import PurchaseItemMatcher, normalize_size, preloads_order_items
+from app.services.retailer_counters import track_retailer_counters
 from app.services.footlocker_parser import (
     FootlockerEmailParser, 
     FootlockerShippingData, 
@@ -17,91 +23,75 @@ from app.services.footlocker_parser import (
     FootlockerOrderItem
 )
 from app.services.champs_parser import (
-    ChampsEmailParser,
     ChampsShippingData,
     ChampsCancellationData,
     ChampsOrderItem
 )
 from app.services.hibbett_parser import (
-    HibbettEmailParser,
     HibbettShippingData,
     HibbettCancellationData,
     HibbettOrderItem
 )
 from app.services.dicks_parser import (
-    DicksEmailParser,
     DicksShippingData,
     DicksShippingOrderItem,
     DicksCancellationData,
     DicksCancellationOrderItem
 )
 from app.services.dtlr_parser import (
-    DTLREmailParser,
     DTLRShippingData,
     DTLRShippingOrderItem,
     DTLRCancellationData,
     DTLRCancellationOrderItem
 )
 from app.services.urban_parser import (
-    UrbanOutfittersEmailParser,
     UrbanOutfittersCancellationData,
     UrbanOutfittersShippingData,
     UrbanOrderItem as UrbanOutfittersOrderItem
 )
 from app.services.shoepalace_parser import (
-    ShoepalaceEmailParser,
     ShoepalaceShippingData,
     ShoepalaceCancellationData,
     ShoepalaceOrderItem
 )
 from app.services.endclothing_parser import (
-    ENDClothingEmailParser,
     ENDClothingShippingData,
     ENDClothingOrderItem
 )
 from app.services.shopwss_parser import (
-    ShopWSSEmailParser,
     ShopWSSShippingData,
     ShopWSSShippingOrderItem,
     ShopWSSCancellationData,
 )
 from app.services.orleans_parser import (
-    OrleansEmailParser,
     OrleansCancellationData,
     OrleansOrderItem
 )
 from app.services.finishline_parser import (
-    FinishLineEmailParser,
     FinishLineCancellationData,
     FinishLineOrderItem,
     FinishLineShippingData,
     FinishLineShippingOrderItem
 )
-from app.services.jdsports_parser import JDSportsEmailParser
 from app.services.revolve_parser import (
-    RevolveEmailParser,
     RevolveShippingData,
     RevolveCancellationData,
 )
 from app.services.asos_parser import (
-    ASOSEmailParser,
     ASOSShippingData,
 )
 from app.services.snipes_parser import (
-    SnipesEmailParser,
     SnipesShippingData,
     SnipesCancellationData,
 )
 from app.services.als_parser import (
-    AlsEmailParser,
     AlsShippingData,
     AlsCancellationData,
     AlsOrderItem
 )
-from app.services.fwrd_parser import FwrdEmailParser
-from app.services.academy_parser import AcademyEmailParser, AcademyShippingData
-from app.services.scheels_parser import SceelsEmailParser, SceelsShippingData
-from app.models.database import AsinBank, EmailManualReview, OASourcing, PurchaseTracker
+from app.services.academy_parser import AcademyShippingData
+from app.services.scheels_parser import SceelsShippingData
+from app.models.database import AsinBank, EmailManualReview, PurchaseTracker
 from app.models.email import EmailData
 from app.utils.purchase_status import calculate_status_and_location
 
@@ -122,45 +112,60 @@ class RetailerOrderUpdateProcessor:
     PROCESSED_LABEL = "Retailer-Updates/Processed"
     ERROR_LABEL = "Retailer-Updates/Error"
     
-    def __init__(self, db_session: Session):
+    def __init__(self, db_session: Session, gmail_service: Optional[GmailService] = None):
         """
         Initialize the processor.
         
+        Parsers, the Gmail client and label IDs come from the process-wide
+        parser registry, so constructing a processor per email is cheap.
+        
         Args:
             db_session: SQLAlchemy database session
+            gmail_service: Gmail client to use (default: this thread's shared client)
         """
         self.db = db_session
-        self.gmail_service = GmailService()
-        self.footlocker_parser = FootlockerEmailParser()
-        self.champs_parser = ChampsEmailParser()
-        self.hibbett_parser = HibbettEmailParser()
-        self.dicks_parser = DicksEmailParser()
-        self.dtlr_parser = DTLREmailParser()
-        self.urban_parser = UrbanOutfittersEmailParser()
-        self.shoepalace_parser = ShoepalaceEmailParser()
-        self.orleans_parser = OrleansEmailParser()
-        self.finishline_parser = FinishLineEmailParser()
-        self.jdsports_parser = JDSportsEmailParser()
-        self.revolve_parser = RevolveEmailParser()
-        self.asos_parser = ASOSEmailParser()
-        self.snipes_parser = SnipesEmailParser()
-        self.endclothing_parser = ENDClothingEmailParser()
-        self.shopwss_parser = ShopWSSEmailParser()
-        self.als_parser = AlsEmailParser()
-        self.fwrd_parser = FwrdEmailParser()
-        self.academy_parser = AcademyEmailParser()
-        self.scheels_parser = SceelsEmailParser()
+        # Purchase creates / quantity changes update the Retailer counters atomically on flush
+        track_retailer_counters(db_session)
+        self.gmail_service = gmail_service or get_gmail_service()
+        self.item_matcher = PurchaseItemMatcher(db_session)
+        self.footlocker_parser = get_parser("footlocker")
+        self.champs_parser = get_parser("champs")
+        self.hibbett_parser = get_parser("hibbett")
+        self.dicks_parser = get_parser("dicks")
+        self.dtlr_parser = get_parser("dtlr")
+        self.urban_parser = get_parser("urban")
+        self.shoepalace_parser = get_parser("shoepalace")
+        self.orleans_parser = get_parser("orleans")
+        self.finishline_parser = get_parser("finishline")
+        self.jdsports_parser = get_parser("jdsports")
+        self.revolve_parser = get_parser("revolve")
+        self.asos_parser = get_parser("asos")
+        self.snipes_parser = get_parser("snipes")
+        self.endclothing_parser = get_parser("endclothing")
+        self.shopwss_parser = get_parser("shopwss")
+        self.als_parser = get_parser("als")
+        self.fwrd_parser = get_parser("fwrd")
+        self.academy_parser = get_parser("academy")
+        self.scheels_parser = get_parser("scheels")
 
-        # Ensure type-specific labels exist
-        self.shipping_processed_label = self.gmail_service.get_or_create_label(self.SHIPPING_PROCESSED_LABEL)
-        self.shipping_error_label = self.gmail_service.get_or_create_label(self.SHIPPING_ERROR_LABEL)
-        self.shipping_manual_review_label = self.gmail_service.get_or_create_label(self.SHIPPING_MANUAL_REVIEW_LABEL)
-        self.cancel_processed_label = self.gmail_service.get_or_create_label(self.CANCEL_PROCESSED_LABEL)
-        self.cancel_error_label = self.gmail_service.get_or_create_label(self.CANCEL_ERROR_LABEL)
-        self.cancel_manual_review_label = self.gmail_service.get_or_create_label(self.CANCEL_MANUAL_REVIEW_LABEL)
+        # Ensure type-specific labels exist (one cached lookup for all of them)
+        labels = self.gmail_service.get_or_create_labels([
+            self.SHIPPING_PROCESSED_LABEL, self.SHIPPING_ERROR_LABEL, self.SHIPPING_MANUAL_REVIEW_LABEL,
+            self.CANCEL_PROCESSED_LABEL, self.CANCEL_ERROR_LABEL, self.CANCEL_MANUAL_REVIEW_LABEL,
+            self.PROCESSED_LABEL, self.ERROR_LABEL,
+        ])
+        self.shipping_processed_label = labels[self.SHIPPING_PROCESSED_LABEL]
+        self.shipping_error_label = labels[self.SHIPPING_ERROR_LABEL]
+        self.shipping_manual_review_label = labels[self.SHIPPING_MANUAL_REVIEW_LABEL]
+        self.cancel_processed_label = labels[self.CANCEL_PROCESSED_LABEL]
+        self.cancel_error_label = labels[self.CANCEL_ERROR_LABEL]
+        self.cancel_manual_review_label = labels[self.CANCEL_MANUAL_REVIEW_LABEL]
         # Legacy labels for backward-compatible duplicate detection
-        self.processed_label = self.gmail_service.get_or_create_label(self.PROCESSED_LABEL)
-        self.error_label = self.gmail_service.get_or_create_label(self.ERROR_LABEL)
+        self.processed_label = labels[self.PROCESSED_LABEL]
+        self.error_label = labels[self.ERROR_LABEL]
+        
+        # Retailer and start time of the messages being processed (processed-message registry)
+        self._message_context: Dict[str, Tuple[Optional[str], datetime]] = {}
     
     def process_footlocker_shipping_emails(self, max_emails: int = 20) -> dict:
         """
@@ -186,20 +191,17 @@ class RetailerOrderUpdateProcessor:
             query = (
                 f'{{from:{FootlockerEmailParser.FOOTLOCKER_UPDATE_FROM_EMAIL} '
                 f'from:{FootlockerEmailParser.KIDS_FOOTLOCKER_UPDATE_FROM_EMAIL}}} '
-                f'subject:"{FootlockerEmailParser.SUBJECT_SHIPPING_PATTERN}" '
-                f'-label:{self.SHIPPING_PROCESSED_LABEL} -label:{self.SHIPPING_ERROR_LABEL} -label:{self.SHIPPING_MANUAL_REVIEW_LABEL}'
+                f'subject:"{FootlockerEmailParser.SUBJECT_SHIPPING_PATTERN}"'
             )
             
-            message_ids = self.gmail_service.list_messages_with_query(
-                query=query,
-                max_results=max_emails
-            )
+            message_ids = self._list_unprocessed_message_ids(query, 'shipping', max_emails)
             
             results['total_emails'] = len(message_ids)
             logger.info(f"Found {len(message_ids)} unprocessed Footlocker shipping emails")
             
             for message_id in message_ids:
                 try:
+                    self._start_message(message_id, 'footlocker')
                     # Get full message
                     message = self.gmail_service.get_message(message_id)
                     if not message:
@@ -219,17 +221,17 @@ class RetailerOrderUpdateProcessor:
                         continue
                     
                     # Parse shipping details
-                    shipping_data = self.footlocker_parser.parse_shipping_email(email_data)
+                    shipping_data = parse_with(self.footlocker_parser, "parse_shipping_email", email_data)
                     if not shipping_data:
                         error_msg = f"Failed to parse shipping data from email {message_id}"
                         logger.error(error_msg)
                         results['errors'] += 1
                         results['error_messages'].append(error_msg)
-                        self._add_error_label(message_id, 'shipping')
+                        self._add_error_label(message_id, 'shipping', error=error_msg)
                         continue
                     
                     # Process the shipping update
-                    success, error_msg = self._process_shipping_update(shipping_data)
+                    success, error_msg = self._process_shipping_update(shipping_data, message_id=message_id)
                     
                     if success:
                         logger.info(f"Successfully processed shipping update for order {shipping_data.order_number}")
@@ -239,14 +241,14 @@ class RetailerOrderUpdateProcessor:
                         logger.error(f"Failed to process shipping update for order {shipping_data.order_number}: {error_msg}")
                         results['errors'] += 1
                         results['error_messages'].append(error_msg)
-                        self._add_error_label(message_id, 'shipping')
+                        self._add_error_label(message_id, 'shipping', error=error_msg)
                 
                 except Exception as e:
                     error_msg = f"Error processing message {message_id}: {str(e)}"
                     logger.error(error_msg, exc_info=True)
                     results['errors'] += 1
                     results['error_messages'].append(error_msg)
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error=error_msg)
         
         except Exception as e:
             error_msg = f"Fatal error in Footlocker shipping email processing: {str(e)}"
@@ -263,14 +265,14 @@ class RetailerOrderUpdateProcessor:
         try:
             query = (
                 f'{self.shopwss_parser.cancellation_from_query} '
-                f'{self.shopwss_parser.shipping_subject_query} '
-                f'-label:{self.SHIPPING_PROCESSED_LABEL} -label:{self.SHIPPING_ERROR_LABEL} -label:{self.SHIPPING_MANUAL_REVIEW_LABEL}'
+                f'{self.shopwss_parser.shipping_subject_query}'
             )
-            message_ids = self.gmail_service.list_messages_with_query(query=query, max_results=max_emails)
+            message_ids = self._list_unprocessed_message_ids(query, 'shipping', max_emails)
             results['total_emails'] = len(message_ids)
             logger.info(f"Found {len(message_ids)} unprocessed ShopWSS shipping emails")
             for message_id in message_ids:
                 try:
+                    self._start_message(message_id, 'shopwss')
                     if self._is_email_processed(message_id, 'shipping'):
                         continue
                     message = self.gmail_service.get_message(message_id)
@@ -281,24 +283,24 @@ class RetailerOrderUpdateProcessor:
                         continue
                     if not self.shopwss_parser.is_shipping_email(email_data):
                         continue
-                    shipping_data = self.shopwss_parser.parse_shipping_email(email_data)
+                    shipping_data = parse_with(self.shopwss_parser, "parse_shipping_email", email_data)
                     if not shipping_data:
                         results['errors'] += 1
                         results['error_messages'].append('Failed to parse ShopWSS shipping data')
-                        self._add_error_label(message_id, 'shipping')
+                        self._add_error_label(message_id, 'shipping', error='Failed to parse ShopWSS shipping data')
                         continue
-                    success, error_msg = self._process_shopwss_shipping_update(shipping_data)
+                    success, error_msg = self._process_shopwss_shipping_update(shipping_data, message_id=message_id)
                     if success:
                         results['processed'] += 1
                         self._add_processed_label(message_id, 'shipping')
                     else:
                         results['errors'] += 1
                         results['error_messages'].append(error_msg or 'Unknown error')
-                        self._add_error_label(message_id, 'shipping')
+                        self._add_error_label(message_id, 'shipping', error=error_msg or 'Unknown error')
                 except Exception as e:
                     results['errors'] += 1
                     results['error_messages'].append(str(e))
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error=str(e))
         except Exception as e:
             error_msg = f"Fatal error in ShopWSS shipping email processing: {str(e)}"
             logger.error(error_msg, exc_info=True)
@@ -313,14 +315,14 @@ class RetailerOrderUpdateProcessor:
         try:
             query = (
                 f'{self.shopwss_parser.cancellation_from_query} '
-                f'{self.shopwss_parser.cancellation_subject_query} '
-                f'-label:{self.CANCEL_PROCESSED_LABEL} -label:{self.CANCEL_ERROR_LABEL} -label:{self.CANCEL_MANUAL_REVIEW_LABEL}'
+                f'{self.shopwss_parser.cancellation_subject_query}'
             )
-            message_ids = self.gmail_service.list_messages_with_query(query=query, max_results=max_emails)
+            message_ids = self._list_unprocessed_message_ids(query, 'cancellation', max_emails)
             results['total_emails'] = len(message_ids)
             logger.info(f"Found {len(message_ids)} unprocessed ShopWSS cancellation emails")
             for message_id in message_ids:
                 try:
+                    self._start_message(message_id, 'shopwss')
                     if self._is_email_processed(message_id, 'cancellation'):
                         continue
                     message = self.gmail_service.get_message(message_id)
@@ -331,9 +333,9 @@ class RetailerOrderUpdateProcessor:
                         continue
                     if not self.shopwss_parser.is_cancellation_email(email_data):
                         continue
-                    cancellation_data = self.shopwss_parser.parse_cancellation_email(email_data)
+                    cancellation_data = parse_with(self.shopwss_parser, "parse_cancellation_email", email_data)
                     if not cancellation_data:
-                        partial = self.shopwss_parser.parse_cancellation_email_partial(email_data)
+                        partial = parse_with(self.shopwss_parser, "parse_cancellation_email_partial", email_data)
                         if partial:
                             try:
                                 existing = self.db.query(EmailManualReview).filter(
@@ -363,20 +365,20 @@ class RetailerOrderUpdateProcessor:
                         else:
                             results['errors'] += 1
                             results['error_messages'].append('Failed to parse ShopWSS cancellation data')
-                            self._add_error_label(message_id, 'cancellation')
+                            self._add_error_label(message_id, 'cancellation', error='Failed to parse ShopWSS cancellation data')
                         continue
-                    success, error_msg = self._process_shopwss_cancellation_update(cancellation_data)
+                    success, error_msg = self._process_shopwss_cancellation_update(cancellation_data, message_id=message_id)
                     if success:
                         results['processed'] += 1
                         self._add_processed_label(message_id, 'cancellation')
                     else:
                         results['errors'] += 1
                         results['error_messages'].append(error_msg or 'Unknown error')
-                        self._add_error_label(message_id, 'cancellation')
+                        self._add_error_label(message_id, 'cancellation', error=error_msg or 'Unknown error')
                 except Exception as e:
                     results['errors'] += 1
                     results['error_messages'].append(str(e))
-                    self._add_error_label(message_id, 'cancellation')
+                    self._add_error_label(message_id, 'cancellation', error=str(e))
         except Exception as e:
             error_msg = f"Fatal error in ShopWSS cancellation email processing: {str(e)}"
             logger.error(error_msg, exc_info=True)
@@ -394,14 +396,14 @@ class RetailerOrderUpdateProcessor:
         try:
             query = (
                 f'from:{self.finishline_parser.update_from_email} '
-                f'{self.finishline_parser.shipping_subject_query} '
-                f'-label:{self.SHIPPING_PROCESSED_LABEL} -label:{self.SHIPPING_ERROR_LABEL} -label:{self.SHIPPING_MANUAL_REVIEW_LABEL}'
+                f'{self.finishline_parser.shipping_subject_query}'
             )
-            message_ids = self.gmail_service.list_messages_with_query(query=query, max_results=max_emails)
+            message_ids = self._list_unprocessed_message_ids(query, 'shipping', max_emails)
             results['total_emails'] = len(message_ids)
             logger.info(f"Found {len(message_ids)} unprocessed Finish Line shipping emails")
             for message_id in message_ids:
                 try:
+                    self._start_message(message_id, 'finishline')
                     if self._is_email_processed(message_id, 'shipping'):
                         continue
                     message = self.gmail_service.get_message(message_id)
@@ -410,23 +412,23 @@ class RetailerOrderUpdateProcessor:
                     email_data = self.gmail_service.parse_message_to_email_data(message)
                     if not self.finishline_parser.is_shipping_email(email_data):
                         continue
-                    shipping_data = self.finishline_parser.parse_shipping_email(email_data)
+                    shipping_data = parse_with(self.finishline_parser, "parse_shipping_email", email_data)
                     if not shipping_data:
                         results['errors'] += 1
                         self._add_error_label(message_id, 'shipping')
                         continue
-                    success, error_msg = self._process_finishline_shipping_update(shipping_data)
+                    success, error_msg = self._process_finishline_shipping_update(shipping_data, message_id=message_id)
                     if success:
                         results['processed'] += 1
                         self._add_processed_label(message_id, 'shipping')
                     else:
                         results['errors'] += 1
                         results['error_messages'].append(error_msg or 'Unknown error')
-                        self._add_error_label(message_id, 'shipping')
+                        self._add_error_label(message_id, 'shipping', error=error_msg or 'Unknown error')
                 except Exception as e:
                     results['errors'] += 1
                     results['error_messages'].append(str(e))
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error=str(e))
         except Exception as e:
             results['error_messages'].append(str(e))
         logger.info(f"Finish Line shipping processing complete: {results}")
@@ -439,13 +441,13 @@ class RetailerOrderUpdateProcessor:
         try:
             query = (
                 f'from:{self.finishline_parser.update_from_email} '
-                f'{self.finishline_parser.cancellation_subject_query} '
-                f'-label:{self.CANCEL_PROCESSED_LABEL} -label:{self.CANCEL_ERROR_LABEL} -label:{self.CANCEL_MANUAL_REVIEW_LABEL}'
+                f'{self.finishline_parser.cancellation_subject_query}'
             )
-            message_ids = self.gmail_service.list_messages_with_query(query=query, max_results=max_emails)
+            message_ids = self._list_unprocessed_message_ids(query, 'cancellation', max_emails)
             results['total_emails'] = len(message_ids)
             for message_id in message_ids:
                 try:
+                    self._start_message(message_id, 'finishline')
                     if self._is_email_processed(message_id, 'cancellation'):
                         continue
                     message = self.gmail_service.get_message(message_id)
@@ -454,23 +456,23 @@ class RetailerOrderUpdateProcessor:
                     email_data = self.gmail_service.parse_message_to_email_data(message)
                     if not self.finishline_parser.is_cancellation_email(email_data):
                         continue
-                    cancellation_data = self.finishline_parser.parse_cancellation_email(email_data)
+                    cancellation_data = parse_with(self.finishline_parser, "parse_cancellation_email", email_data)
                     if not cancellation_data:
                         results['errors'] += 1
                         self._add_error_label(message_id, 'cancellation')
                         continue
-                    success, error_msg = self._process_finishline_cancellation_update(cancellation_data)
+                    success, error_msg = self._process_finishline_cancellation_update(cancellation_data, message_id=message_id)
                     if success:
                         results['processed'] += 1
                         self._add_processed_label(message_id, 'cancellation')
                     else:
                         results['errors'] += 1
                         results['error_messages'].append(error_msg or 'Unknown error')
-                        self._add_error_label(message_id, 'cancellation')
+                        self._add_error_label(message_id, 'cancellation', error=error_msg or 'Unknown error')
                 except Exception as e:
                     results['errors'] += 1
                     results['error_messages'].append(str(e))
-                    self._add_error_label(message_id, 'cancellation')
+                    self._add_error_label(message_id, 'cancellation', error=str(e))
         except Exception as e:
             results['error_messages'].append(str(e))
         logger.info(f"Finish Line cancellation processing complete: {results}")
@@ -483,13 +485,13 @@ class RetailerOrderUpdateProcessor:
         try:
             query = (
                 f'from:{self.jdsports_parser.update_from_email} '
-                f'{self.jdsports_parser.shipping_subject_query} '
-                f'-label:{self.SHIPPING_PROCESSED_LABEL} -label:{self.SHIPPING_ERROR_LABEL} -label:{self.SHIPPING_MANUAL_REVIEW_LABEL}'
+                f'{self.jdsports_parser.shipping_subject_query}'
             )
-            message_ids = self.gmail_service.list_messages_with_query(query=query, max_results=max_emails)
+            message_ids = self._list_unprocessed_message_ids(query, 'shipping', max_emails)
             results['total_emails'] = len(message_ids)
             for message_id in message_ids:
                 try:
+                    self._start_message(message_id, 'jdsports')
                     if self._is_email_processed(message_id, 'shipping'):
                         continue
                     message = self.gmail_service.get_message(message_id)
@@ -498,23 +500,23 @@ class RetailerOrderUpdateProcessor:
                     email_data = self.gmail_service.parse_message_to_email_data(message)
                     if not self.jdsports_parser.is_shipping_email(email_data):
                         continue
-                    shipping_data = self.jdsports_parser.parse_shipping_email(email_data)
+                    shipping_data = parse_with(self.jdsports_parser, "parse_shipping_email", email_data)
                     if not shipping_data:
                         results['errors'] += 1
                         self._add_error_label(message_id, 'shipping')
                         continue
-                    success, error_msg = self._process_finishline_shipping_update(shipping_data)
+                    success, error_msg = self._process_finishline_shipping_update(shipping_data, message_id=message_id)
                     if success:
                         results['processed'] += 1
                         self._add_processed_label(message_id, 'shipping')
                     else:
                         results['errors'] += 1
                         results['error_messages'].append(error_msg or 'Unknown error')
-                        self._add_error_label(message_id, 'shipping')
+                        self._add_error_label(message_id, 'shipping', error=error_msg or 'Unknown error')
                 except Exception as e:
                     results['errors'] += 1
                     results['error_messages'].append(str(e))
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error=str(e))
         except Exception as e:
             results['error_messages'].append(str(e))
         logger.info(f"JD Sports shipping processing complete: {results}")
@@ -527,13 +529,13 @@ class RetailerOrderUpdateProcessor:
         try:
             query = (
                 f'from:{self.jdsports_parser.update_from_email} '
-                f'{self.jdsports_parser.cancellation_subject_query} '
-                f'-label:{self.CANCEL_PROCESSED_LABEL} -label:{self.CANCEL_ERROR_LABEL} -label:{self.CANCEL_MANUAL_REVIEW_LABEL}'
+                f'{self.jdsports_parser.cancellation_subject_query}'
             )
-            message_ids = self.gmail_service.list_messages_with_query(query=query, max_results=max_emails)
+            message_ids = self._list_unprocessed_message_ids(query, 'cancellation', max_emails)
             results['total_emails'] = len(message_ids)
             for message_id in message_ids:
                 try:
+                    self._start_message(message_id, 'jdsports')
                     if self._is_email_processed(message_id, 'cancellation'):
                         continue
                     message = self.gmail_service.get_message(message_id)
@@ -542,23 +544,23 @@ class RetailerOrderUpdateProcessor:
                     email_data = self.gmail_service.parse_message_to_email_data(message)
                     if not self.jdsports_parser.is_cancellation_email(email_data):
                         continue
-                    cancellation_data = self.jdsports_parser.parse_cancellation_email(email_data)
+                    cancellation_data = parse_with(self.jdsports_parser, "parse_cancellation_email", email_data)
                     if not cancellation_data:
                         results['errors'] += 1
                         self._add_error_label(message_id, 'cancellation')
                         continue
-                    success, error_msg = self._process_finishline_cancellation_update(cancellation_data)
+                    success, error_msg = self._process_finishline_cancellation_update(cancellation_data, message_id=message_id)
                     if success:
                         results['processed'] += 1
                         self._add_processed_label(message_id, 'cancellation')
                     else:
                         results['errors'] += 1
                         results['error_messages'].append(error_msg or 'Unknown error')
-                        self._add_error_label(message_id, 'cancellation')
+                        self._add_error_label(message_id, 'cancellation', error=error_msg or 'Unknown error')
                 except Exception as e:
                     results['errors'] += 1
                     results['error_messages'].append(str(e))
-                    self._add_error_label(message_id, 'cancellation')
+                    self._add_error_label(message_id, 'cancellation', error=str(e))
         except Exception as e:
             results['error_messages'].append(str(e))
         logger.info(f"JD Sports cancellation processing complete: {results}")
@@ -571,13 +573,13 @@ class RetailerOrderUpdateProcessor:
         try:
             query = (
                 f'from:{self.hibbett_parser.update_from_email} '
-                f'{self.hibbett_parser.shipping_subject_query} '
-                f'-label:{self.SHIPPING_PROCESSED_LABEL} -label:{self.SHIPPING_ERROR_LABEL} -label:{self.SHIPPING_MANUAL_REVIEW_LABEL}'
+                f'{self.hibbett_parser.shipping_subject_query}'
             )
-            message_ids = self.gmail_service.list_messages_with_query(query=query, max_results=max_emails)
+            message_ids = self._list_unprocessed_message_ids(query, 'shipping', max_emails)
             results['total_emails'] = len(message_ids)
             for message_id in message_ids:
                 try:
+                    self._start_message(message_id, 'hibbett')
                     if self._is_email_processed(message_id, 'shipping'):
                         continue
                     message = self.gmail_service.get_message(message_id)
@@ -586,9 +588,9 @@ class RetailerOrderUpdateProcessor:
                     email_data = self.gmail_service.parse_message_to_email_data(message)
                     if not self.hibbett_parser.is_shipping_email(email_data):
                         continue
-                    shipping_data = self.hibbett_parser.parse_shipping_email(email_data)
+                    shipping_data = parse_with(self.hibbett_parser, "parse_shipping_email", email_data)
                     if not shipping_data:
-                        partial = self.hibbett_parser.parse_shipping_email_partial(email_data)
+                        partial = parse_with(self.hibbett_parser, "parse_shipping_email_partial", email_data)
                         if partial:
                             try:
                                 existing = self.db.query(EmailManualReview).filter(
@@ -626,7 +628,7 @@ class RetailerOrderUpdateProcessor:
                             self._add_error_label(message_id, 'shipping')
                         results['errors'] += 1
                         continue
-                    success, error_msg = self._process_hibbett_shipping_update(shipping_data)
+                    success, error_msg = self._process_hibbett_shipping_update(shipping_data, message_id=message_id)
                     if success:
                         results['processed'] += 1
                         self._add_processed_label(message_id, 'shipping')
@@ -674,7 +676,7 @@ class RetailerOrderUpdateProcessor:
                 except Exception as e:
                     results['errors'] += 1
                     results['error_messages'].append(str(e))
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error=str(e))
         except Exception as e:
             results['error_messages'].append(str(e))
         logger.info(f"Hibbett shipping processing complete: {results}")
@@ -687,13 +689,13 @@ class RetailerOrderUpdateProcessor:
         try:
             query = (
                 f'from:{self.hibbett_parser.update_from_email} '
-                f'{self.hibbett_parser.cancellation_subject_query} '
-                f'-label:{self.CANCEL_PROCESSED_LABEL} -label:{self.CANCEL_ERROR_LABEL} -label:{self.CANCEL_MANUAL_REVIEW_LABEL}'
+                f'{self.hibbett_parser.cancellation_subject_query}'
             )
-            message_ids = self.gmail_service.list_messages_with_query(query=query, max_results=max_emails)
+            message_ids = self._list_unprocessed_message_ids(query, 'cancellation', max_emails)
             results['total_emails'] = len(message_ids)
             for message_id in message_ids:
                 try:
+                    self._start_message(message_id, 'hibbett')
                     if self._is_email_processed(message_id, 'cancellation'):
                         continue
                     message = self.gmail_service.get_message(message_id)
@@ -702,23 +704,23 @@ class RetailerOrderUpdateProcessor:
                     email_data = self.gmail_service.parse_message_to_email_data(message)
                     if not self.hibbett_parser.is_cancellation_email(email_data):
                         continue
-                    cancellation_data = self.hibbett_parser.parse_cancellation_email(email_data)
+                    cancellation_data = parse_with(self.hibbett_parser, "parse_cancellation_email", email_data)
                     if not cancellation_data:
                         results['errors'] += 1
                         self._add_error_label(message_id, 'cancellation')
                         continue
-                    success, error_msg = self._process_hibbett_cancellation_update(cancellation_data)
+                    success, error_msg = self._process_hibbett_cancellation_update(cancellation_data, message_id=message_id)
                     if success:
                         results['processed'] += 1
                         self._add_processed_label(message_id, 'cancellation')
                     else:
                         results['errors'] += 1
                         results['error_messages'].append(error_msg or 'Unknown error')
-                        self._add_error_label(message_id, 'cancellation')
+                        self._add_error_label(message_id, 'cancellation', error=error_msg or 'Unknown error')
                 except Exception as e:
                     results['errors'] += 1
                     results['error_messages'].append(str(e))
-                    self._add_error_label(message_id, 'cancellation')
+                    self._add_error_label(message_id, 'cancellation', error=str(e))
         except Exception as e:
             results['error_messages'].append(str(e))
         logger.info(f"Hibbett cancellation processing complete: {results}")
@@ -748,20 +750,17 @@ class RetailerOrderUpdateProcessor:
             query = (
                 f'{{from:{FootlockerEmailParser.FOOTLOCKER_UPDATE_FROM_EMAIL} '
                 f'from:{FootlockerEmailParser.KIDS_FOOTLOCKER_UPDATE_FROM_EMAIL}}} '
-                f'subject:"{FootlockerEmailParser.SUBJECT_CANCELLATION_PATTERN}" '
-                f'-label:{self.CANCEL_PROCESSED_LABEL} -label:{self.CANCEL_ERROR_LABEL} -label:{self.CANCEL_MANUAL_REVIEW_LABEL}'
+                f'subject:"{FootlockerEmailParser.SUBJECT_CANCELLATION_PATTERN}"'
             )
             
-            message_ids = self.gmail_service.list_messages_with_query(
-                query=query,
-                max_results=max_emails
-            )
+            message_ids = self._list_unprocessed_message_ids(query, 'cancellation', max_emails)
             
             results['total_emails'] = len(message_ids)
             logger.info(f"Found {len(message_ids)} unprocessed Footlocker cancellation emails")
             
             for message_id in message_ids:
                 try:
+                    self._start_message(message_id, 'footlocker')
                     # Get full message
                     message = self.gmail_service.get_message(message_id)
                     if not message:
@@ -781,17 +780,17 @@ class RetailerOrderUpdateProcessor:
                         continue
                     
                     # Parse cancellation details
-                    cancellation_data = self.footlocker_parser.parse_cancellation_email(email_data)
+                    cancellation_data = parse_with(self.footlocker_parser, "parse_cancellation_email", email_data)
                     if not cancellation_data:
                         error_msg = f"Failed to parse cancellation data from email {message_id}"
                         logger.error(error_msg)
                         results['errors'] += 1
                         results['error_messages'].append(error_msg)
-                        self._add_error_label(message_id, 'cancellation')
+                        self._add_error_label(message_id, 'cancellation', error=error_msg)
                         continue
                     
                     # Process the cancellation update
-                    success, error_msg = self._process_cancellation_update(cancellation_data)
+                    success, error_msg = self._process_cancellation_update(cancellation_data, message_id=message_id)
                     
                     if success:
                         logger.info(f"Successfully processed cancellation update for order {cancellation_data.order_number}")
@@ -801,14 +800,14 @@ class RetailerOrderUpdateProcessor:
                         logger.error(f"Failed to process cancellation update for order {cancellation_data.order_number}: {error_msg}")
                         results['errors'] += 1
                         results['error_messages'].append(error_msg)
-                        self._add_error_label(message_id, 'cancellation')
+                        self._add_error_label(message_id, 'cancellation', error=error_msg)
                 
                 except Exception as e:
                     error_msg = f"Error processing message {message_id}: {str(e)}"
                     logger.error(error_msg, exc_info=True)
                     results['errors'] += 1
                     results['error_messages'].append(error_msg)
-                    self._add_error_label(message_id, 'cancellation')
+                    self._add_error_label(message_id, 'cancellation', error=error_msg)
         
         except Exception as e:
             error_msg = f"Fatal error in Footlocker cancellation email processing: {str(e)}"
@@ -829,13 +828,13 @@ class RetailerOrderUpdateProcessor:
         try:
             query = (
                 f'from:{self.snipes_parser.update_from_email} '
-                f'({self.snipes_parser.cancellation_subject_query} OR {self.snipes_parser.full_cancellation_subject_query}) '
-                f'-label:{self.CANCEL_PROCESSED_LABEL} -label:{self.CANCEL_ERROR_LABEL} -label:{self.CANCEL_MANUAL_REVIEW_LABEL}'
+                f'({self.snipes_parser.cancellation_subject_query} OR {self.snipes_parser.full_cancellation_subject_query})'
             )
-            message_ids = self.gmail_service.list_messages_with_query(query=query, max_results=max_emails)
+            message_ids = self._list_unprocessed_message_ids(query, 'cancellation', max_emails)
             results['total_emails'] = len(message_ids)
             for message_id in message_ids:
                 try:
+                    self._start_message(message_id, 'snipes')
                     if self._is_email_processed(message_id, 'cancellation'):
                         continue
                     message = self.gmail_service.get_message(message_id)
@@ -844,7 +843,7 @@ class RetailerOrderUpdateProcessor:
                     email_data = self.gmail_service.parse_message_to_email_data(message)
                     if not self.snipes_parser.is_cancellation_email(email_data):
                         continue
-                    cancellation_data = self.snipes_parser.parse_cancellation_email(email_data)
+                    cancellation_data = parse_with(self.snipes_parser, "parse_cancellation_email", email_data)
                     if not cancellation_data:
                         if self.snipes_parser.is_full_cancellation_email(email_data):
                             try:
@@ -873,18 +872,18 @@ class RetailerOrderUpdateProcessor:
                         results['errors'] += 1
                         self._add_error_label(message_id, 'cancellation')
                         continue
-                    success, error_msg = self._process_snipes_cancellation_update(cancellation_data)
+                    success, error_msg = self._process_snipes_cancellation_update(cancellation_data, message_id=message_id)
                     if success:
                         results['processed'] += 1
                         self._add_processed_label(message_id, 'cancellation')
                     else:
                         results['errors'] += 1
                         results['error_messages'].append(error_msg or 'Unknown error')
-                        self._add_error_label(message_id, 'cancellation')
+                        self._add_error_label(message_id, 'cancellation', error=error_msg or 'Unknown error')
                 except Exception as e:
                     results['errors'] += 1
                     results['error_messages'].append(str(e))
-                    self._add_error_label(message_id, 'cancellation')
+                    self._add_error_label(message_id, 'cancellation', error=str(e))
         except Exception as e:
             results['error_messages'].append(str(e))
         logger.info(f"Snipes cancellation processing complete: {results}")
@@ -909,47 +908,83 @@ class RetailerOrderUpdateProcessor:
         except Exception as e:
             logger.error(f"Error recalculating status/location for record {record.id}: {e}")
     
-    def _is_email_processed(self, message_id: str, email_type: str = 'shipping') -> bool:
+    def _is_email_processed(self, message_id: str, email_type: str = 'shipping', label_ids: Optional[List[str]] = None) -> bool:
         """
         Check if an email has already been processed.
         
+        Looks the message up in the processed-message registry, then in the
+        fulfillment ledger (indexed queries, no Gmail call). Emails processed
+        before the registry existed are recognised by their processed label when
+        the caller already has the message's label IDs, and added to the registry.
+        
         Args:
             message_id: Gmail message ID
             email_type: 'shipping' or 'cancellation'
+            label_ids: labelIds of the already fetched message, if any
         
         Returns:
             True if email has been processed, False otherwise
         """
         try:
-            message = self.gmail_service.get_message(message_id)
-            if not message:
-                return False
+            if processed_messages.is_processed(self.db, message_id, email_type):
+                logger.info(f"Email {message_id} has already been processed (in the processed-message registry)")
+                return True
             
-            label_ids = message.get('labelIds', [])
+            if has_events(self.db, message_id, email_type):
+                logger.info(f"Email {message_id} has already been processed (in the fulfillment ledger)")
+                self._record_message(message_id, email_type, processed_messages.STATUS_PROCESSED)
+                return True
             
-            # Check new type-specific processed label
+            if not label_ids:
+                return False
+            
+            # Type-specific processed label, then legacy Retailer-Updates/Processed
             if email_type == 'cancellation':
-                new_label = self.cancel_processed_label
-                new_label_name = self.CANCEL_PROCESSED_LABEL
+                processed_labels = (self.cancel_processed_label, self.processed_label)
             else:
-                new_label = self.shipping_processed_label
-                new_label_name = self.SHIPPING_PROCESSED_LABEL
-            
-            if new_label and new_label['id'] in label_ids:
-                logger.info(f"Email {message_id} has already been processed (has {new_label_name} label)")
-                return True
-            
-            # Backward compat: also check legacy Retailer-Updates/Processed
-            legacy_id = self.processed_label['id'] if self.processed_label else None
-            if legacy_id and legacy_id in label_ids:
-                logger.info(f"Email {message_id} has already been processed (has {self.PROCESSED_LABEL} label)")
-                return True
+                processed_labels = (self.shipping_processed_label, self.processed_label)
+            for label in processed_labels:
+                if label and label['id'] in label_ids:
+                    logger.info(f"Email {message_id} has already been processed (has {label['name']} label)")
+                    self._record_message(message_id, email_type, processed_messages.STATUS_PROCESSED)
+                    return True
             
             return False
         except Exception as e:
             logger.error(f"Error checking if email {message_id} is processed: {e}")
+            self.db.rollback()
             return False  # If we can't check, allow processing to proceed
     
+    def _claim_fulfillment_event(
+        self,
+        message_id: Optional[str],
+        event_type: str,
+        record: PurchaseTracker,
+        line: int,
+        qty: int,
+        order_number: Optional[str],
+        item=None,
+        unique_id: Optional[str] = None,
+        size: Optional[str] = None
+    ) -> bool:
+        """
+        Record an email line in the fulfillment ledger before applying it to record.
+        
+        Call after lock_record(record) and before changing its quantities.
+        
+        Returns:
+            False if this line of the email was already applied (skip the update);
+            True otherwise, including when there is no message_id to key on
+        """
+        if not message_id:
+            return True
+        return record_event(
+            self.db, message_id, event_type, record, line, qty,
+            order_number=order_number,
+            unique_id=unique_id or getattr(item, 'unique_id', None),
+            size=size or getattr(item, 'size', None)
+        )
+    
     def process_single_shipping_email(
         self, 
         email_data: EmailData, 
@@ -969,8 +1004,9 @@ class RetailerOrderUpdateProcessor:
         Returns:
             Dictionary with processing results
         """
+        self._start_message(message_id, retailer_name)
         # Check if email has already been processed
-        if self._is_email_processed(message_id, 'shipping'):
+        if self._is_email_processed(message_id, 'shipping', label_ids=email_data.labels):
             logger.info(f"Skipping already processed email {message_id}")
             return {
                 'success': True,
@@ -982,12 +1018,12 @@ class RetailerOrderUpdateProcessor:
         
         try:
             if retailer_name == 'footlocker' or retailer_name == 'kidsfootlocker':
-                shipping_data = self.footlocker_parser.parse_shipping_email(email_data)
+                shipping_data = parse_with(self.footlocker_parser, "parse_shipping_email", email_data)
                 if not shipping_data:
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error='Failed to parse shipping data')
                     return {'success': False, 'error': 'Failed to parse shipping data'}
                 
-                success, error_msg = self._process_shipping_update(shipping_data)
+                success, error_msg = self._process_shipping_update(shipping_data, message_id=message_id)
                 
                 if success:
                     self._add_processed_label(message_id, 'shipping')
@@ -998,15 +1034,15 @@ class RetailerOrderUpdateProcessor:
                         'items_count': len(shipping_data.items)
                     }
                 else:
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error=error_msg)
                     return {'success': False, 'error': error_msg}
             elif retailer_name == 'champs':
-                shipping_data = self.champs_parser.parse_shipping_email(email_data)
+                shipping_data = parse_with(self.champs_parser, "parse_shipping_email", email_data)
                 if not shipping_data:
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error='Failed to parse shipping data')
                     return {'success': False, 'error': 'Failed to parse shipping data'}
                 
-                success, error_msg = self._process_champs_shipping_update(shipping_data)
+                success, error_msg = self._process_champs_shipping_update(shipping_data, message_id=message_id)
                 
                 if success:
                     self._add_processed_label(message_id, 'shipping')
@@ -1017,12 +1053,12 @@ class RetailerOrderUpdateProcessor:
                         'items_count': len(shipping_data.items)
                     }
                 else:
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error=error_msg)
                     return {'success': False, 'error': error_msg}
             elif retailer_name == 'hibbett':
-                shipping_data = self.hibbett_parser.parse_shipping_email(email_data)
+                shipping_data = parse_with(self.hibbett_parser, "parse_shipping_email", email_data)
                 if not shipping_data:
-                    partial = self.hibbett_parser.parse_shipping_email_partial(email_data)
+                    partial = parse_with(self.hibbett_parser, "parse_shipping_email_partial", email_data)
                     queued = False
                     if partial:
                         try:
@@ -1066,7 +1102,7 @@ class RetailerOrderUpdateProcessor:
                         'queued_for_manual_review': queued,
                     }
                 
-                success, error_msg = self._process_hibbett_shipping_update(shipping_data)
+                success, error_msg = self._process_hibbett_shipping_update(shipping_data, message_id=message_id)
                 
                 if success:
                     self._add_processed_label(message_id, 'shipping')
@@ -1126,12 +1162,12 @@ class RetailerOrderUpdateProcessor:
                         'queued_for_manual_review': queued,
                     }
             elif retailer_name == 'dicks':
-                shipping_data = self.dicks_parser.parse_shipping_email(email_data)
+                shipping_data = parse_with(self.dicks_parser, "parse_shipping_email", email_data)
                 if not shipping_data:
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error='Failed to parse shipping data')
                     return {'success': False, 'error': 'Failed to parse shipping data'}
                 
-                success, error_msg = self._process_dicks_shipping_update(shipping_data)
+                success, error_msg = self._process_dicks_shipping_update(shipping_data, message_id=message_id)
                 
                 if success:
                     self._add_processed_label(message_id, 'shipping')
@@ -1142,15 +1178,15 @@ class RetailerOrderUpdateProcessor:
                         'items_count': len(shipping_data.items)
                     }
                 else:
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error=error_msg)
                     return {'success': False, 'error': error_msg}
             elif retailer_name == 'dtlr':
-                shipping_data = self.dtlr_parser.parse_shipping_email(email_data)
+                shipping_data = parse_with(self.dtlr_parser, "parse_shipping_email", email_data)
                 if not shipping_data:
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error='Failed to parse shipping data')
                     return {'success': False, 'error': 'Failed to parse shipping data'}
                 
-                success, error_msg = self._process_dtlr_shipping_update(shipping_data)
+                success, error_msg = self._process_dtlr_shipping_update(shipping_data, message_id=message_id)
                 
                 if success:
                     self._add_processed_label(message_id, 'shipping')
@@ -1161,15 +1197,15 @@ class RetailerOrderUpdateProcessor:
                         'items_count': len(shipping_data.items)
                     }
                 else:
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error=error_msg)
                     return {'success': False, 'error': error_msg}
             elif retailer_name == 'finishline':
-                shipping_data = self.finishline_parser.parse_shipping_email(email_data)
+                shipping_data = parse_with(self.finishline_parser, "parse_shipping_email", email_data)
                 if not shipping_data:
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error='Failed to parse Finish Line shipping data')
                     return {'success': False, 'error': 'Failed to parse Finish Line shipping data'}
                 
-                success, error_msg = self._process_finishline_shipping_update(shipping_data)
+                success, error_msg = self._process_finishline_shipping_update(shipping_data, message_id=message_id)
                 
                 if success:
                     self._add_processed_label(message_id, 'shipping')
@@ -1184,15 +1220,15 @@ class RetailerOrderUpdateProcessor:
                         'items_count': items_count
                     }
                 else:
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error=error_msg)
                     return {'success': False, 'error': error_msg}
             elif retailer_name == 'jdsports':
-                shipping_data = self.jdsports_parser.parse_shipping_email(email_data)
+                shipping_data = parse_with(self.jdsports_parser, "parse_shipping_email", email_data)
                 if not shipping_data:
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error='Failed to parse JD Sports shipping data')
                     return {'success': False, 'error': 'Failed to parse JD Sports shipping data'}
                 
-                success, error_msg = self._process_finishline_shipping_update(shipping_data)
+                success, error_msg = self._process_finishline_shipping_update(shipping_data, message_id=message_id)
                 
                 if success:
                     self._add_processed_label(message_id, 'shipping')
@@ -1207,15 +1243,15 @@ class RetailerOrderUpdateProcessor:
                         'items_count': items_count
                     }
                 else:
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error=error_msg)
                     return {'success': False, 'error': error_msg}
             elif retailer_name == 'revolve':
-                shipping_data = self.revolve_parser.parse_shipping_email(email_data)
+                shipping_data = parse_with(self.revolve_parser, "parse_shipping_email", email_data)
                 if not shipping_data:
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error='Failed to parse Revolve shipping data')
                     return {'success': False, 'error': 'Failed to parse Revolve shipping data'}
                 
-                success, error_msg = self._process_revolve_shipping_update(shipping_data)
+                success, error_msg = self._process_revolve_shipping_update(shipping_data, message_id=message_id)
                 
                 if success:
                     self._add_processed_label(message_id, 'shipping')
@@ -1226,15 +1262,15 @@ class RetailerOrderUpdateProcessor:
                         'items_count': len(shipping_data.items)
                     }
                 else:
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error=error_msg)
                     return {'success': False, 'error': error_msg}
             elif retailer_name == 'asos':
-                shipping_data = self.asos_parser.parse_shipping_email(email_data)
+                shipping_data = parse_with(self.asos_parser, "parse_shipping_email", email_data)
                 if not shipping_data:
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error='Failed to parse ASOS shipping data')
                     return {'success': False, 'error': 'Failed to parse ASOS shipping data'}
                 
-                success, error_msg = self._process_asos_shipping_update(shipping_data)
+                success, error_msg = self._process_asos_shipping_update(shipping_data, message_id=message_id)
                 
                 if success:
                     self._add_processed_label(message_id, 'shipping')
@@ -1245,15 +1281,15 @@ class RetailerOrderUpdateProcessor:
                         'items_count': len(shipping_data.items)
                     }
                 else:
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error=error_msg)
                     return {'success': False, 'error': error_msg}
             elif retailer_name == 'snipes':
-                shipping_data = self.snipes_parser.parse_shipping_email(email_data)
+                shipping_data = parse_with(self.snipes_parser, "parse_shipping_email", email_data)
                 if not shipping_data:
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error='Failed to parse Snipes shipping data')
                     return {'success': False, 'error': 'Failed to parse Snipes shipping data'}
                 
-                success, error_msg = self._process_snipes_shipping_update(shipping_data)
+                success, error_msg = self._process_snipes_shipping_update(shipping_data, message_id=message_id)
                 
                 if success:
                     self._add_processed_label(message_id, 'shipping')
@@ -1264,15 +1300,15 @@ class RetailerOrderUpdateProcessor:
                         'items_count': len(shipping_data.items)
                     }
                 else:
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error=error_msg)
                     return {'success': False, 'error': error_msg}
             elif retailer_name == 'shoepalace':
-                shipping_data = self.shoepalace_parser.parse_shipping_email(email_data)
+                shipping_data = parse_with(self.shoepalace_parser, "parse_shipping_email", email_data)
                 if not shipping_data:
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error='Failed to parse Shoe Palace shipping data')
                     return {'success': False, 'error': 'Failed to parse Shoe Palace shipping data'}
                 
-                success, error_msg = self._process_shoepalace_shipping_update(shipping_data)
+                success, error_msg = self._process_shoepalace_shipping_update(shipping_data, message_id=message_id)
                 
                 if success:
                     self._add_processed_label(message_id, 'shipping')
@@ -1283,15 +1319,15 @@ class RetailerOrderUpdateProcessor:
                         'items_count': len(shipping_data.items)
                     }
                 else:
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error=error_msg)
                     return {'success': False, 'error': error_msg}
             elif retailer_name == 'endclothing':
-                shipping_data = self.endclothing_parser.parse_shipping_email(email_data)
+                shipping_data = parse_with(self.endclothing_parser, "parse_shipping_email", email_data)
                 if not shipping_data:
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error='Failed to parse END Clothing shipping data')
                     return {'success': False, 'error': 'Failed to parse END Clothing shipping data'}
                 
-                success, error_msg = self._process_endclothing_shipping_update(shipping_data)
+                success, error_msg = self._process_endclothing_shipping_update(shipping_data, message_id=message_id)
                 
                 if success:
                     self._add_processed_label(message_id, 'shipping')
@@ -1302,15 +1338,15 @@ class RetailerOrderUpdateProcessor:
                         'items_count': len(shipping_data.items)
                     }
                 else:
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error=error_msg)
                     return {'success': False, 'error': error_msg}
             elif retailer_name == 'shopwss':
-                shipping_data = self.shopwss_parser.parse_shipping_email(email_data)
+                shipping_data = parse_with(self.shopwss_parser, "parse_shipping_email", email_data)
                 if not shipping_data:
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error='Failed to parse ShopWSS shipping data')
                     return {'success': False, 'error': 'Failed to parse ShopWSS shipping data'}
                 
-                success, error_msg = self._process_shopwss_shipping_update(shipping_data)
+                success, error_msg = self._process_shopwss_shipping_update(shipping_data, message_id=message_id)
                 
                 if success:
                     self._add_processed_label(message_id, 'shipping')
@@ -1321,15 +1357,15 @@ class RetailerOrderUpdateProcessor:
                         'items_count': len(shipping_data.items)
                     }
                 else:
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error=error_msg)
                     return {'success': False, 'error': error_msg}
             elif retailer_name == 'als':
-                shipping_data = self.als_parser.parse_shipping_email(email_data)
+                shipping_data = parse_with(self.als_parser, "parse_shipping_email", email_data)
                 if not shipping_data:
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error="Failed to parse Al's shipping data")
                     return {'success': False, 'error': "Failed to parse Al's shipping data"}
 
-                success, error_msg = self._process_als_shipping_update(shipping_data)
+                success, error_msg = self._process_als_shipping_update(shipping_data, message_id=message_id)
 
                 if success:
                     self._add_processed_label(message_id, 'shipping')
@@ -1340,15 +1376,15 @@ class RetailerOrderUpdateProcessor:
                         'items_count': len(shipping_data.items)
                     }
                 else:
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error=error_msg)
                     return {'success': False, 'error': error_msg}
             elif retailer_name == 'academy':
-                shipping_data = self.academy_parser.parse_shipping_email(email_data)
+                shipping_data = parse_with(self.academy_parser, "parse_shipping_email", email_data)
                 if not shipping_data:
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error="Failed to parse Academy Sports shipping data")
                     return {'success': False, 'error': "Failed to parse Academy Sports shipping data"}
 
-                success, error_msg = self._process_academy_shipping_update(shipping_data)
+                success, error_msg = self._process_academy_shipping_update(shipping_data, message_id=message_id)
 
                 if success:
                     self._add_processed_label(message_id, 'shipping')
@@ -1359,15 +1395,15 @@ class RetailerOrderUpdateProcessor:
                         'items_count': len(shipping_data.items)
                     }
                 else:
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error=error_msg)
                     return {'success': False, 'error': error_msg}
             elif retailer_name == 'scheels':
-                shipping_data = self.scheels_parser.parse_shipping_email(email_data)
+                shipping_data = parse_with(self.scheels_parser, "parse_shipping_email", email_data)
                 if not shipping_data:
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error="Failed to parse Scheels shipping data")
                     return {'success': False, 'error': "Failed to parse Scheels shipping data"}
 
-                success, error_msg = self._process_scheels_shipping_update(shipping_data)
+                success, error_msg = self._process_scheels_shipping_update(shipping_data, message_id=message_id)
 
                 if success:
                     self._add_processed_label(message_id, 'shipping')
@@ -1378,15 +1414,15 @@ class RetailerOrderUpdateProcessor:
                         'items_count': len(shipping_data.items)
                     }
                 else:
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error=error_msg)
                     return {'success': False, 'error': error_msg}
             elif retailer_name == 'urban' or retailer_name == 'urbanoutfitters':
-                shipping_data = self.urban_parser.parse_shipping_email(email_data)
+                shipping_data = parse_with(self.urban_parser, "parse_shipping_email", email_data)
                 if not shipping_data:
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error='Failed to parse Urban Outfitters shipping data')
                     return {'success': False, 'error': 'Failed to parse Urban Outfitters shipping data'}
 
-                success, error_msg = self._process_urban_shipping_update(shipping_data)
+                success, error_msg = self._process_urban_shipping_update(shipping_data, message_id=message_id)
 
                 if success:
                     self._add_processed_label(message_id, 'shipping')
@@ -1397,14 +1433,14 @@ class RetailerOrderUpdateProcessor:
                         'items_count': len(shipping_data.items)
                     }
                 else:
-                    self._add_error_label(message_id, 'shipping')
+                    self._add_error_label(message_id, 'shipping', error=error_msg)
                     return {'success': False, 'error': error_msg}
             else:
                 return {'success': False, 'error': f'Retailer {retailer_name} not supported for shipping updates yet'}
 
         except Exception as e:
             logger.error(f"Error processing single shipping email: {e}", exc_info=True)
-            self._add_error_label(message_id, 'shipping')
+            self._add_error_label(message_id, 'shipping', error=str(e))
             return {'success': False, 'error': str(e)}
 
     def process_single_cancellation_email(
@@ -1426,8 +1462,9 @@ class RetailerOrderUpdateProcessor:
         Returns:
             Dictionary with processing results
         """
+        self._start_message(message_id, retailer_name)
         # Check if email has already been processed
-        if self._is_email_processed(message_id, 'cancellation'):
+        if self._is_email_processed(message_id, 'cancellation', label_ids=email_data.labels):
             logger.info(f"Skipping already processed email {message_id}")
             return {
                 'success': True,
@@ -1438,12 +1475,12 @@ class RetailerOrderUpdateProcessor:
         
         try:
             if retailer_name == 'footlocker' or retailer_name == 'kidsfootlocker':
-                cancellation_data = self.footlocker_parser.parse_cancellation_email(email_data)
+                cancellation_data = parse_with(self.footlocker_parser, "parse_cancellation_email", email_data)
                 if not cancellation_data:
-                    self._add_error_label(message_id, 'cancellation')
+                    self._add_error_label(message_id, 'cancellation', error='Failed to parse cancellation data')
                     return {'success': False, 'error': 'Failed to parse cancellation data'}
                 
-                success, error_msg = self._process_cancellation_update(cancellation_data)
+                success, error_msg = self._process_cancellation_update(cancellation_data, message_id=message_id)
                 
                 if success:
                     self._add_processed_label(message_id, 'cancellation')
@@ -1453,15 +1490,15 @@ class RetailerOrderUpdateProcessor:
                         'items_count': len(cancellation_data.items)
                     }
                 else:
-                    self._add_error_label(message_id, 'cancellation')
+                    self._add_error_label(message_id, 'cancellation', error=error_msg)
                     return {'success': False, 'error': error_msg}
             elif retailer_name == 'champs':
-                cancellation_data = self.champs_parser.parse_cancellation_email(email_data)
+                cancellation_data = parse_with(self.champs_parser, "parse_cancellation_email", email_data)
                 if not cancellation_data:
-                    self._add_error_label(message_id, 'cancellation')
+                    self._add_error_label(message_id, 'cancellation', error='Failed to parse cancellation data')
                     return {'success': False, 'error': 'Failed to parse cancellation data'}
                 
-                success, error_msg = self._process_champs_cancellation_update(cancellation_data)
+                success, error_msg = self._process_champs_cancellation_update(cancellation_data, message_id=message_id)
                 
                 if success:
                     self._add_processed_label(message_id, 'cancellation')
@@ -1471,15 +1508,15 @@ class RetailerOrderUpdateProcessor:
                         'items_count': len(cancellation_data.items)
                     }
                 else:
-                    self._add_error_label(message_id, 'cancellation')
+                    self._add_error_label(message_id, 'cancellation', error=error_msg)
                     return {'success': False, 'error': error_msg}
             elif retailer_name == 'hibbett':
-                cancellation_data = self.hibbett_parser.parse_cancellation_email(email_data)
+                cancellation_data = parse_with(self.hibbett_parser, "parse_cancellation_email", email_data)
                 if not cancellation_data:
-                    self._add_error_label(message_id, 'cancellation')
+                    self._add_error_label(message_id, 'cancellation', error='Failed to parse cancellation data')
                     return {'success': False, 'error': 'Failed to parse cancellation data'}
                 
-                success, error_msg = self._process_hibbett_cancellation_update(cancellation_data)
+                success, error_msg = self._process_hibbett_cancellation_update(cancellation_data, message_id=message_id)
                 
                 if success:
                     self._add_processed_label(message_id, 'cancellation')
@@ -1489,15 +1526,15 @@ class RetailerOrderUpdateProcessor:
                         'items_count': len(cancellation_data.items)
                     }
                 else:
-                    self._add_error_label(message_id, 'cancellation')
+                    self._add_error_label(message_id, 'cancellation', error=error_msg)
                     return {'success': False, 'error': error_msg}
             elif retailer_name == 'dicks':
-                cancellation_data = self.dicks_parser.parse_cancellation_email(email_data)
+                cancellation_data = parse_with(self.dicks_parser, "parse_cancellation_email", email_data)
                 if not cancellation_data:
-                    self._add_error_label(message_id, 'cancellation')
+                    self._add_error_label(message_id, 'cancellation', error='Failed to parse cancellation data')
                     return {'success': False, 'error': 'Failed to parse cancellation data'}
                 
-                success, error_msg = self._process_dicks_cancellation_update(cancellation_data)
+                success, error_msg = self._process_dicks_cancellation_update(cancellation_data, message_id=message_id)
                 
                 if success:
                     self._add_processed_label(message_id, 'cancellation')
@@ -1507,15 +1544,15 @@ class RetailerOrderUpdateProcessor:
                         'items_count': len(cancellation_data.items)
                     }
                 else:
-                    self._add_error_label(message_id, 'cancellation')
+                    self._add_error_label(message_id, 'cancellation', error=error_msg)
                     return {'success': False, 'error': error_msg}
             elif retailer_name == 'dtlr':
-                cancellation_data = self.dtlr_parser.parse_cancellation_email(email_data)
+                cancellation_data = parse_with(self.dtlr_parser, "parse_cancellation_email", email_data)
                 if not cancellation_data:
-                    self._add_error_label(message_id, 'cancellation')
+                    self._add_error_label(message_id, 'cancellation', error='Failed to parse cancellation data')
                     return {'success': False, 'error': 'Failed to parse cancellation data'}
                 
-                success, error_msg = self._process_dtlr_cancellation_update(cancellation_data)
+                success, error_msg = self._process_dtlr_cancellation_update(cancellation_data, message_id=message_id)
                 
                 if success:
                     self._add_processed_label(message_id, 'cancellation')
@@ -1525,15 +1562,15 @@ class RetailerOrderUpdateProcessor:
                         'items_count': len(cancellation_data.items)
                     }
                 else:
-                    self._add_error_label(message_id, 'cancellation')
+                    self._add_error_label(message_id, 'cancellation', error=error_msg)
                     return {'success': False, 'error': error_msg}
             elif retailer_name == 'urban' or retailer_name == 'urbanoutfitters':
-                cancellation_data = self.urban_parser.parse_cancellation_email(email_data)
+                cancellation_data = parse_with(self.urban_parser, "parse_cancellation_email", email_data)
                 if not cancellation_data:
-                    self._add_error_label(message_id, 'cancellation')
+                    self._add_error_label(message_id, 'cancellation', error='Failed to parse cancellation data')
                     return {'success': False, 'error': 'Failed to parse cancellation data'}
                 
-                success, error_msg = self._process_urban_cancellation_update(cancellation_data)
+                success, error_msg = self._process_urban_cancellation_update(cancellation_data, message_id=message_id)
                 
                 if success:
                     self._add_processed_label(message_id, 'cancellation')
@@ -1543,12 +1580,12 @@ class RetailerOrderUpdateProcessor:
                         'items_count': len(cancellation_data.items)
                     }
                 else:
-                    self._add_error_label(message_id, 'cancellation')
+                    self._add_error_label(message_id, 'cancellation', error=error_msg)
                     return {'success': False, 'error': error_msg}
             elif retailer_name == 'shoepalace':
-                cancellation_data = self.shoepalace_parser.parse_cancellation_email(email_data)
+                cancellation_data = parse_with(self.shoepalace_parser, "parse_cancellation_email", email_data)
                 if not cancellation_data:
-                    partial = self.shoepalace_parser.parse_cancellation_email_partial(email_data)
+                    partial = parse_with(self.shoepalace_parser, "parse_cancellation_email_partial", email_data)
                     if partial:
                         try:
                             existing = self.db.query(EmailManualReview).filter(
@@ -1580,9 +1617,9 @@ class RetailerOrderUpdateProcessor:
                             'error': 'Shoe Palace cancellation - queued for manual review',
                             'queued_for_manual_review': True,
                         }
-                    self._add_error_label(message_id, 'cancellation')
+                    self._add_error_label(message_id, 'cancellation', error='Failed to parse Shoe Palace cancellation data')
                     return {'success': False, 'error': 'Failed to parse Shoe Palace cancellation data'}
-                success, error_msg = self._process_shoepalace_cancellation_update(cancellation_data)
+                success, error_msg = self._process_shoepalace_cancellation_update(cancellation_data, message_id=message_id)
                 
                 if success:
                     self._add_processed_label(message_id, 'cancellation')
@@ -1592,15 +1629,15 @@ class RetailerOrderUpdateProcessor:
                         'items_count': len(cancellation_data.items)
                     }
                 else:
-                    self._add_error_label(message_id, 'cancellation')
+                    self._add_error_label(message_id, 'cancellation', error=error_msg)
                     return {'success': False, 'error': error_msg}
             elif retailer_name == 'orleans':
-                cancellation_data = self.orleans_parser.parse_cancellation_email(email_data)
+                cancellation_data = parse_with(self.orleans_parser, "parse_cancellation_email", email_data)
                 if not cancellation_data:
-                    self._add_error_label(message_id, 'cancellation')
+                    self._add_error_label(message_id, 'cancellation', error='Failed to parse cancellation data')
                     return {'success': False, 'error': 'Failed to parse cancellation data'}
                 
-                success, error_msg = self._process_orleans_cancellation_update(cancellation_data)
+                success, error_msg = self._process_orleans_cancellation_update(cancellation_data, message_id=message_id)
                 
                 if success:
                     self._add_processed_label(message_id, 'cancellation')
@@ -1610,15 +1647,15 @@ class RetailerOrderUpdateProcessor:
                         'items_count': len(cancellation_data.items)
                     }
                 else:
-                    self._add_error_label(message_id, 'cancellation')
+                    self._add_error_label(message_id, 'cancellation', error=error_msg)
                     return {'success': False, 'error': error_msg}
             elif retailer_name == 'finishline':
-                cancellation_data = self.finishline_parser.parse_cancellation_email(email_data)
+                cancellation_data = parse_with(self.finishline_parser, "parse_cancellation_email", email_data)
                 if not cancellation_data:
-                    self._add_error_label(message_id, 'cancellation')
+                    self._add_error_label(message_id, 'cancellation', error='Failed to parse cancellation data')
                     return {'success': False, 'error': 'Failed to parse cancellation data'}
                 
-                success, error_msg = self._process_finishline_cancellation_update(cancellation_data)
+                success, error_msg = self._process_finishline_cancellation_update(cancellation_data, message_id=message_id)
                 
                 if success:
                     self._add_processed_label(message_id, 'cancellation')
@@ -1628,15 +1665,15 @@ class RetailerOrderUpdateProcessor:
                         'items_count': len(cancellation_data.items)
                     }
                 else:
-                    self._add_error_label(message_id, 'cancellation')
+                    self._add_error_label(message_id, 'cancellation', error=error_msg)
                     return {'success': False, 'error': error_msg}
             elif retailer_name == 'jdsports':
-                cancellation_data = self.jdsports_parser.parse_cancellation_email(email_data)
+                cancellation_data = parse_with(self.jdsports_parser, "parse_cancellation_email", email_data)
                 if not cancellation_data:
-                    self._add_error_label(message_id, 'cancellation')
+                    self._add_error_label(message_id, 'cancellation', error='Failed to parse JD Sports cancellation data')
                     return {'success': False, 'error': 'Failed to parse JD Sports cancellation data'}
                 
-                success, error_msg = self._process_finishline_cancellation_update(cancellation_data)
+                success, error_msg = self._process_finishline_cancellation_update(cancellation_data, message_id=message_id)
                 
                 if success:
                     self._add_processed_label(message_id, 'cancellation')
@@ -1646,12 +1683,12 @@ class RetailerOrderUpdateProcessor:
                         'items_count': len(cancellation_data.items)
                     }
                 else:
-                    self._add_error_label(message_id, 'cancellation')
+                    self._add_error_label(message_id, 'cancellation', error=error_msg)
                     return {'success': False, 'error': error_msg}
             elif retailer_name == 'revolve':
-                cancellation_data = self.revolve_parser.parse_cancellation_email(email_data)
+                cancellation_data = parse_with(self.revolve_parser, "parse_cancellation_email", email_data)
                 if not cancellation_data:
-                    partial = self.revolve_parser.parse_cancellation_email_partial(email_data)
+                    partial = parse_with(self.revolve_parser, "parse_cancellation_email_partial", email_data)
                     queued = False
                     if partial:
                         try:
@@ -1687,7 +1724,7 @@ class RetailerOrderUpdateProcessor:
                         'queued_for_manual_review': queued,
                     }
                 
-                success, error_msg = self._process_revolve_cancellation_update(cancellation_data)
+                success, error_msg = self._process_revolve_cancellation_update(cancellation_data, message_id=message_id)
                 
                 if success:
                     self._add_processed_label(message_id, 'cancellation')
@@ -1697,10 +1734,10 @@ class RetailerOrderUpdateProcessor:
                         'items_count': len(cancellation_data.items)
                     }
                 else:
-                    self._add_error_label(message_id, 'cancellation')
+                    self._add_error_label(message_id, 'cancellation', error=error_msg)
                     return {'success': False, 'error': error_msg}
             elif retailer_name == 'snipes':
-                cancellation_data = self.snipes_parser.parse_cancellation_email(email_data)
+                cancellation_data = parse_with(self.snipes_parser, "parse_cancellation_email", email_data)
                 if not cancellation_data:
                     if self.snipes_parser.is_full_cancellation_email(email_data):
                         queued = False
@@ -1733,10 +1770,10 @@ class RetailerOrderUpdateProcessor:
                             'error': 'Snipes full cancellation - no extractable data',
                             'queued_for_manual_review': queued,
                         }
-                    self._add_error_label(message_id, 'cancellation')
+                    self._add_error_label(message_id, 'cancellation', error='Failed to parse Snipes cancellation data')
                     return {'success': False, 'error': 'Failed to parse Snipes cancellation data'}
                 
-                success, error_msg = self._process_snipes_cancellation_update(cancellation_data)
+                success, error_msg = self._process_snipes_cancellation_update(cancellation_data, message_id=message_id)
                 
                 if success:
                     self._add_processed_label(message_id, 'cancellation')
@@ -1746,12 +1783,12 @@ class RetailerOrderUpdateProcessor:
                         'items_count': len(cancellation_data.items)
                     }
                 else:
-                    self._add_error_label(message_id, 'cancellation')
+                    self._add_error_label(message_id, 'cancellation', error=error_msg)
                     return {'success': False, 'error': error_msg}
             elif retailer_name == 'shopwss':
-                cancellation_data = self.shopwss_parser.parse_cancellation_email(email_data)
+                cancellation_data = parse_with(self.shopwss_parser, "parse_cancellation_email", email_data)
                 if not cancellation_data:
-                    partial = self.shopwss_parser.parse_cancellation_email_partial(email_data)
+                    partial = parse_with(self.shopwss_parser, "parse_cancellation_email_partial", email_data)
                     if partial:
                         try:
                             existing = self.db.query(EmailManualReview).filter(
@@ -1783,9 +1820,9 @@ class RetailerOrderUpdateProcessor:
                             'error': 'ShopWSS partial cancellation - queued for manual review',
                             'queued_for_manual_review': True,
                         }
-                    self._add_error_label(message_id, 'cancellation')
+                    self._add_error_label(message_id, 'cancellation', error='Failed to parse ShopWSS cancellation data')
                     return {'success': False, 'error': 'Failed to parse ShopWSS cancellation data'}
-                success, error_msg = self._process_shopwss_cancellation_update(cancellation_data)
+                success, error_msg = self._process_shopwss_cancellation_update(cancellation_data, message_id=message_id)
                 if success:
                     self._add_processed_label(message_id, 'cancellation')
                     return {
@@ -1794,15 +1831,15 @@ class RetailerOrderUpdateProcessor:
                         'items_count': len(cancellation_data.items) if cancellation_data.items else None
                     }
                 else:
-                    self._add_error_label(message_id, 'cancellation')
+                    self._add_error_label(message_id, 'cancellation', error=error_msg)
                     return {'success': False, 'error': error_msg}
             elif retailer_name == 'als':
-                cancellation_data = self.als_parser.parse_cancellation_email(email_data)
+                cancellation_data = parse_with(self.als_parser, "parse_cancellation_email", email_data)
                 if not cancellation_data:
-                    self._add_error_label(message_id, 'cancellation')
+                    self._add_error_label(message_id, 'cancellation', error="Failed to parse Al's cancellation data")
                     return {'success': False, 'error': "Failed to parse Al's cancellation data"}
 
-                success, error_msg = self._process_als_cancellation_update(cancellation_data)
+                success, error_msg = self._process_als_cancellation_update(cancellation_data, message_id=message_id)
 
                 if success:
                     self._add_processed_label(message_id, 'cancellation')
@@ -1812,17 +1849,18 @@ class RetailerOrderUpdateProcessor:
                         'items_count': len(cancellation_data.items)
                     }
                 else:
-                    self._add_error_label(message_id, 'cancellation')
+                    self._add_error_label(message_id, 'cancellation', error=error_msg)
                     return {'success': False, 'error': error_msg}
             else:
                 return {'success': False, 'error': f'Retailer {retailer_name} not supported for cancellation updates yet'}
 
         except Exception as e:
             logger.error(f"Error processing single cancellation email: {e}", exc_info=True)
-            self._add_error_label(message_id, 'cancellation')
+            self._add_error_label(message_id, 'cancellation', error=str(e))
             return {'success': False, 'error': str(e)}
     
-    def _process_shipping_update(self, shipping_data: FootlockerShippingData) -> Tuple[bool, Optional[str]]:
+    @preloads_order_items
+    def _process_shipping_update(self, shipping_data: FootlockerShippingData, message_id: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Process shipping update: Update shipped_to_pw and tracking.
         
@@ -1835,6 +1873,7 @@ class RetailerOrderUpdateProcessor:
         
         Args:
             shipping_data: FootlockerShippingData object
+            message_id: Gmail message ID (fulfillment ledger key; None skips the ledger)
         
         Returns:
             Tuple of (success: bool, error_message: Optional[str])
@@ -1844,42 +1883,13 @@ class RetailerOrderUpdateProcessor:
             
             items_updated = 0
             
-            for item in shipping_data.items:
-                normalized_size = self._normalize_size(item.size)
-                
+            for line, item in enumerate(shipping_data.items):
                 # Find matching purchase tracker record by order_number + unique_id + size
-                matching_records = self.db.query(PurchaseTracker).join(
-                    OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                ).outerjoin(
-                    AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                ).filter(
-                    and_(
-                        PurchaseTracker.order_number == shipping_data.order_number,
-                        OASourcing.unique_id == item.unique_id,
-                        or_(
-                            AsinBank.size == item.size,
-                            AsinBank.size == normalized_size
-                        )
-                    )
-                ).all()
-                
-                # Fallback: manual size normalization
-                if not matching_records:
-                    all_for_order = self.db.query(PurchaseTracker).join(
-                        OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                    ).outerjoin(
-                        AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                    ).filter(
-                        and_(
-                            PurchaseTracker.order_number == shipping_data.order_number,
-                            OASourcing.unique_id == item.unique_id
-                        )
-                    ).all()
-                    
-                    for record in all_for_order:
-                        db_size = record.asin_bank_ref.size if record.asin_bank_ref else None
-                        if db_size and self._normalize_size(db_size) == normalized_size:
-                            matching_records.append(record)
+                matching_records = self.item_matcher.match_item(
+                    order_number=shipping_data.order_number,
+                    unique_id=item.unique_id,
+                    size=item.size,
+                )
                 
                 if not matching_records:
                     logger.warning(
@@ -1890,6 +1900,9 @@ class RetailerOrderUpdateProcessor:
                 
                 # Update each matching record (should typically be 1)
                 for record in matching_records:
+                    lock_record(self.db, record)
+                    if not self._claim_fulfillment_event(message_id, EVENT_SHIPPING, record, line, item.quantity, shipping_data.order_number, item):
+                        continue
                     # Add quantity to shipped_to_pw (cumulative - sums from multiple shipping emails)
                     current_shipped_to_pw = record.shipped_to_pw or 0
                     record.shipped_to_pw = current_shipped_to_pw + item.quantity
@@ -1920,28 +1933,8 @@ class RetailerOrderUpdateProcessor:
             logger.error(error_msg, exc_info=True)
             return (False, error_msg)
     
-    def _normalize_size(self, size: str) -> str:
-        """
-        Normalize size for comparison (handles "11.0" vs "11" etc.)
-        
-        Args:
-            size: Size string (e.g., "11.0", "11", "9.5")
-        
-        Returns:
-            Normalized size string
-        """
-        if not size:
-            return size
-        
-        # Convert "11.0" to "11", "09.5" to "9.5", etc.
-        if re.match(r'^\d{1,2}\.\d$', size):
-            num = float(size)
-            # Remove .0 if it's a whole number
-            return str(int(num)) if num % 1 == 0 else str(num)
-        
-        return size
-    
-    def _process_cancellation_update(self, cancellation_data: FootlockerCancellationData) -> Tuple[bool, Optional[str]]:
+    @preloads_order_items
+    def _process_cancellation_update(self, cancellation_data: FootlockerCancellationData, message_id: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Process cancellation update: Deduct quantity from 'final_qty' and update 'cancelled_qty'.
         
@@ -1952,6 +1945,7 @@ class RetailerOrderUpdateProcessor:
         
         Args:
             cancellation_data: FootlockerCancellationData object
+            message_id: Gmail message ID (fulfillment ledger key; None skips the ledger)
         
         Returns:
             Tuple of (success: bool, error_message: Optional[str])
@@ -1961,42 +1955,15 @@ class RetailerOrderUpdateProcessor:
             
             items_updated = 0
             
-            for item in cancellation_data.items:
-                normalized_cancel_size = self._normalize_size(item.size)
+            for line, item in enumerate(cancellation_data.items):
+                normalized_cancel_size = normalize_size(item.size)
                 
                 # Find matching purchase tracker record by order_number + unique_id + size
-                matching_records = self.db.query(PurchaseTracker).join(
-                    OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                ).outerjoin(
-                    AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                ).filter(
-                    and_(
-                        PurchaseTracker.order_number == cancellation_data.order_number,
-                        OASourcing.unique_id == item.unique_id,
-                        or_(
-                            AsinBank.size == item.size,
-                            AsinBank.size == normalized_cancel_size
-                        )
-                    )
-                ).all()
-                
-                # Fallback: manual size normalization
-                if not matching_records:
-                    all_for_order = self.db.query(PurchaseTracker).join(
-                        OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                    ).outerjoin(
-                        AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                    ).filter(
-                        and_(
-                            PurchaseTracker.order_number == cancellation_data.order_number,
-                            OASourcing.unique_id == item.unique_id
-                        )
-                    ).all()
-                    
-                    for record in all_for_order:
-                        db_size = record.asin_bank_ref.size if record.asin_bank_ref else None
-                        if db_size and self._normalize_size(db_size) == normalized_cancel_size:
-                            matching_records.append(record)
+                matching_records = self.item_matcher.match_item(
+                    order_number=cancellation_data.order_number,
+                    unique_id=item.unique_id,
+                    size=item.size,
+                )
                 
                 if not matching_records:
                     logger.warning(
@@ -2007,6 +1974,9 @@ class RetailerOrderUpdateProcessor:
                 
                 # Update each matching record
                 for record in matching_records:
+                    lock_record(self.db, record)
+                    if not self._claim_fulfillment_event(message_id, EVENT_CANCELLATION, record, line, item.quantity, cancellation_data.order_number, item):
+                        continue
                     # Deduct from final_qty
                     current_final_qty = record.final_qty or 0
                     record.final_qty = max(0, current_final_qty - item.quantity)
@@ -2039,7 +2009,8 @@ class RetailerOrderUpdateProcessor:
             logger.error(error_msg, exc_info=True)
             return (False, error_msg)
     
-    def _process_champs_shipping_update(self, shipping_data: ChampsShippingData) -> Tuple[bool, Optional[str]]:
+    @preloads_order_items
+    def _process_champs_shipping_update(self, shipping_data: ChampsShippingData, message_id: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Process Champs Sports shipping update: Update shipped_to_pw and tracking.
         
@@ -2052,6 +2023,7 @@ class RetailerOrderUpdateProcessor:
         
         Args:
             shipping_data: ChampsShippingData object
+            message_id: Gmail message ID (fulfillment ledger key; None skips the ledger)
         
         Returns:
             Tuple of (success: bool, error_message: Optional[str])
@@ -2061,38 +2033,16 @@ class RetailerOrderUpdateProcessor:
             
             items_updated = 0
             
-            for item in shipping_data.items:
+            for line, item in enumerate(shipping_data.items):
                 # Normalize the size from shipping email for comparison
-                normalized_shipping_size = self._normalize_size(item.size)
+                normalized_shipping_size = normalize_size(item.size)
                 
                 # Find matching purchase tracker record(s)
                 # Match by order_number and size (handle both normalized and non-normalized sizes)
-                matching_records = self.db.query(PurchaseTracker).join(
-                    AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                ).filter(
-                    and_(
-                        PurchaseTracker.order_number == shipping_data.order_number,
-                        or_(
-                            AsinBank.size == item.size,  # Exact match
-                            AsinBank.size == normalized_shipping_size  # Normalized match
-                        )
-                    )
-                ).all()
-                
-                # If no exact matches, try to match by normalizing all sizes manually
-                if not matching_records:
-                    all_order_records = self.db.query(PurchaseTracker).join(
-                        AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                    ).filter(
-                        PurchaseTracker.order_number == shipping_data.order_number
-                    ).all()
-                    
-                    for record in all_order_records:
-                        db_size = record.asin_bank_ref.size if record.asin_bank_ref else None
-                        if db_size:
-                            normalized_db_size = self._normalize_size(db_size)
-                            if normalized_db_size == normalized_shipping_size:
-                                matching_records.append(record)
+                matching_records = self.item_matcher.match_order_size(
+                    order_number=shipping_data.order_number,
+                    size=item.size,
+                )
                 
                 if not matching_records:
                     logger.warning(
@@ -2103,6 +2053,9 @@ class RetailerOrderUpdateProcessor:
                 
                 # Update each matching record
                 for record in matching_records:
+                    lock_record(self.db, record)
+                    if not self._claim_fulfillment_event(message_id, EVENT_SHIPPING, record, line, item.quantity, shipping_data.order_number, item):
+                        continue
                     # Add quantity to shipped_to_pw (cumulative - sums from multiple shipping emails)
                     current_shipped_to_pw = record.shipped_to_pw or 0
                     record.shipped_to_pw = current_shipped_to_pw + item.quantity
@@ -2132,7 +2085,8 @@ class RetailerOrderUpdateProcessor:
             logger.error(error_msg, exc_info=True)
             return (False, error_msg)
     
-    def _process_champs_cancellation_update(self, cancellation_data: ChampsCancellationData) -> Tuple[bool, Optional[str]]:
+    @preloads_order_items
+    def _process_champs_cancellation_update(self, cancellation_data: ChampsCancellationData, message_id: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Process Champs Sports cancellation update: Deduct quantity from 'final_qty' and update 'cancelled_qty'.
         
@@ -2143,6 +2097,7 @@ class RetailerOrderUpdateProcessor:
         
         Args:
             cancellation_data: ChampsCancellationData object
+            message_id: Gmail message ID (fulfillment ledger key; None skips the ledger)
         
         Returns:
             Tuple of (success: bool, error_message: Optional[str])
@@ -2152,38 +2107,16 @@ class RetailerOrderUpdateProcessor:
             
             items_updated = 0
             
-            for item in cancellation_data.items:
+            for line, item in enumerate(cancellation_data.items):
                 # Normalize the size from cancellation email for comparison
-                normalized_cancel_size = self._normalize_size(item.size)
+                normalized_cancel_size = normalize_size(item.size)
                 
                 # Find matching purchase tracker record(s)
                 # Match by order_number and size (handle both normalized and non-normalized sizes)
-                matching_records = self.db.query(PurchaseTracker).join(
-                    AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                ).filter(
-                    and_(
-                        PurchaseTracker.order_number == cancellation_data.order_number,
-                        or_(
-                            AsinBank.size == item.size,  # Exact match
-                            AsinBank.size == normalized_cancel_size  # Normalized match
-                        )
-                    )
-                ).all()
-                
-                # If no exact matches, try to match by normalizing all sizes manually
-                if not matching_records:
-                    all_order_records = self.db.query(PurchaseTracker).join(
-                        AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                    ).filter(
-                        PurchaseTracker.order_number == cancellation_data.order_number
-                    ).all()
-                    
-                    for record in all_order_records:
-                        db_size = record.asin_bank_ref.size if record.asin_bank_ref else None
-                        if db_size:
-                            normalized_db_size = self._normalize_size(db_size)
-                            if normalized_db_size == normalized_cancel_size:
-                                matching_records.append(record)
+                matching_records = self.item_matcher.match_order_size(
+                    order_number=cancellation_data.order_number,
+                    size=item.size,
+                )
                 
                 if not matching_records:
                     logger.warning(
@@ -2194,6 +2127,9 @@ class RetailerOrderUpdateProcessor:
                 
                 # Update each matching record
                 for record in matching_records:
+                    lock_record(self.db, record)
+                    if not self._claim_fulfillment_event(message_id, EVENT_CANCELLATION, record, line, item.quantity, cancellation_data.order_number, item):
+                        continue
                     # Deduct from final_qty
                     current_final_qty = record.final_qty or 0
                     record.final_qty = max(0, current_final_qty - item.quantity)
@@ -2226,7 +2162,8 @@ class RetailerOrderUpdateProcessor:
             logger.error(error_msg, exc_info=True)
             return (False, error_msg)
     
-    def _process_hibbett_shipping_update(self, shipping_data: HibbettShippingData) -> Tuple[bool, Optional[str]]:
+    @preloads_order_items
+    def _process_hibbett_shipping_update(self, shipping_data: HibbettShippingData, message_id: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Process Hibbett shipping update: Update shipped_to_pw.
         
@@ -2240,6 +2177,7 @@ class RetailerOrderUpdateProcessor:
         
         Args:
             shipping_data: HibbettShippingData object
+            message_id: Gmail message ID (fulfillment ledger key; None skips the ledger)
         
         Returns:
             Tuple of (success: bool, error_message: Optional[str])
@@ -2249,50 +2187,21 @@ class RetailerOrderUpdateProcessor:
             
             items_updated = 0
             
-            for item in shipping_data.items:
+            for line, item in enumerate(shipping_data.items):
                 # Normalize the size from shipping email for comparison
-                normalized_shipping_size = self._normalize_size(item.size)
+                normalized_shipping_size = normalize_size(item.size)
                 
                 # Find matching purchase tracker record(s)
                 # Match by order_number and size (handle both normalized and non-normalized sizes)
-                matching_records = self.db.query(PurchaseTracker).join(
-                    AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                ).filter(
-                    and_(
-                        PurchaseTracker.order_number == shipping_data.order_number,
-                        or_(
-                            AsinBank.size == item.size,  # Exact match
-                            AsinBank.size == normalized_shipping_size  # Normalized match
-                        )
-                    )
-                ).all()
-                
-                # If no exact matches, try to match by normalizing all sizes manually
-                if not matching_records:
-                    all_order_records = self.db.query(PurchaseTracker).join(
-                        AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                    ).filter(
-                        PurchaseTracker.order_number == shipping_data.order_number
-                    ).all()
-                    
-                    for record in all_order_records:
-                        db_size = record.asin_bank_ref.size if record.asin_bank_ref else None
-                        if db_size:
-                            normalized_db_size = self._normalize_size(db_size)
-                            if normalized_db_size == normalized_shipping_size:
-                                matching_records.append(record)
+                matching_records = self.item_matcher.match_order_size(
+                    order_number=shipping_data.order_number,
+                    size=item.size,
+                )
                 
                 # Fallback: when size is "0" (placeholder from parser when Size missing in email),
                 # match by order_number + unique_id (product_number) from OASourcing
                 if not matching_records and item.size == "0" and item.unique_id:
-                    matching_records = self.db.query(PurchaseTracker).join(
-                        OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                    ).filter(
-                        and_(
-                            PurchaseTracker.order_number == shipping_data.order_number,
-                            OASourcing.unique_id == item.unique_id
-                        )
-                    ).all()
+                    matching_records = self.item_matcher.match_unique_id(shipping_data.order_number, item.unique_id)
                     if matching_records:
                         logger.info(
                             f"Matched by unique_id (size missing in email): "
@@ -2308,6 +2217,9 @@ class RetailerOrderUpdateProcessor:
                 
                 # Update each matching record
                 for record in matching_records:
+                    lock_record(self.db, record)
+                    if not self._claim_fulfillment_event(message_id, EVENT_SHIPPING, record, line, item.quantity, shipping_data.order_number, item):
+                        continue
                     # Add quantity to shipped_to_pw (cumulative - sums from multiple shipping emails)
                     current_shipped_to_pw = record.shipped_to_pw or 0
                     record.shipped_to_pw = current_shipped_to_pw + item.quantity
@@ -2333,7 +2245,8 @@ class RetailerOrderUpdateProcessor:
             logger.error(error_msg, exc_info=True)
             return (False, error_msg)
     
-    def _process_hibbett_cancellation_update(self, cancellation_data: HibbettCancellationData) -> Tuple[bool, Optional[str]]:
+    @preloads_order_items
+    def _process_hibbett_cancellation_update(self, cancellation_data: HibbettCancellationData, message_id: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Process Hibbett cancellation update: Deduct quantity from 'final_qty' and update 'cancelled_qty'.
         
@@ -2342,6 +2255,7 @@ class RetailerOrderUpdateProcessor:
         
         Args:
             cancellation_data: HibbettCancellationData object
+            message_id: Gmail message ID (fulfillment ledger key; None skips the ledger)
         
         Returns:
             Tuple of (success: bool, error_message: Optional[str])
@@ -2351,68 +2265,27 @@ class RetailerOrderUpdateProcessor:
             
             items_updated = 0
             
-            for item in cancellation_data.items:
+            for line, item in enumerate(cancellation_data.items):
                 cancel_qty = max(0, item.quantity or 0)
                 if cancel_qty <= 0:
                     continue
-                normalized_cancel_size = self._normalize_size(item.size)
+                normalized_cancel_size = normalize_size(item.size)
                 
                 # Match by order_number + unique_id + size (like Foot Locker)
                 matching_records = []
                 if item.unique_id:
-                    matching_records = self.db.query(PurchaseTracker).join(
-                        OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                    ).outerjoin(
-                        AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                    ).filter(
-                        and_(
-                            PurchaseTracker.order_number == cancellation_data.order_number,
-                            OASourcing.unique_id == item.unique_id,
-                            or_(
-                                AsinBank.size == item.size,
-                                AsinBank.size == normalized_cancel_size
-                            )
-                        )
-                    ).all()
-                    if not matching_records and item.unique_id:
-                        all_for_order = self.db.query(PurchaseTracker).join(
-                            OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                        ).outerjoin(
-                            AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                        ).filter(
-                            and_(
-                                PurchaseTracker.order_number == cancellation_data.order_number,
-                                OASourcing.unique_id == item.unique_id
-                            )
-                        ).all()
-                        for record in all_for_order:
-                            db_size = record.asin_bank_ref.size if record.asin_bank_ref else None
-                            if db_size and self._normalize_size(db_size) == normalized_cancel_size:
-                                matching_records.append(record)
+                    matching_records = self.item_matcher.match_item(
+                        order_number=cancellation_data.order_number,
+                        unique_id=item.unique_id,
+                        size=item.size,
+                    )
                 
                 # Fallback: match by order_number + size only
                 if not matching_records:
-                    matching_records = self.db.query(PurchaseTracker).join(
-                        AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                    ).filter(
-                        and_(
-                            PurchaseTracker.order_number == cancellation_data.order_number,
-                            or_(
-                                AsinBank.size == item.size,
-                                AsinBank.size == normalized_cancel_size
-                            )
-                        )
-                    ).all()
-                if not matching_records:
-                    all_order_records = self.db.query(PurchaseTracker).join(
-                        AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                    ).filter(
-                        PurchaseTracker.order_number == cancellation_data.order_number
-                    ).all()
-                    for record in all_order_records:
-                        db_size = record.asin_bank_ref.size if record.asin_bank_ref else None
-                        if db_size and self._normalize_size(db_size) == normalized_cancel_size:
-                            matching_records.append(record)
+                    matching_records = self.item_matcher.match_order_size(
+                        order_number=cancellation_data.order_number,
+                        size=item.size,
+                    )
                 
                 if not matching_records:
                     logger.warning(
@@ -2422,12 +2295,16 @@ class RetailerOrderUpdateProcessor:
                     continue
                 
                 for record in matching_records:
+                    lock_record(self.db, record)
                     current_final_qty = record.final_qty or 0
                     og_qty = max(0, record.og_qty or 0)
                     effective_cancel = min(cancel_qty, current_final_qty)
-                    record.final_qty = max(0, current_final_qty - effective_cancel)
                     current_cancelled = record.cancelled_qty or 0
-                    record.cancelled_qty = min(og_qty, max(0, current_cancelled + effective_cancel))
+                    new_cancelled = min(og_qty, max(0, current_cancelled + effective_cancel))
+                    if not self._claim_fulfillment_event(message_id, EVENT_CANCELLATION, record, line, new_cancelled - current_cancelled, cancellation_data.order_number, item):
+                        continue
+                    record.final_qty = max(0, current_final_qty - effective_cancel)
+                    record.cancelled_qty = new_cancelled
                     self._recalculate_status_and_location(record)
                     logger.info(
                         f"Updated purchase tracker ID {record.id}: order={cancellation_data.order_number}, "
@@ -2446,7 +2323,8 @@ class RetailerOrderUpdateProcessor:
             logger.error(error_msg, exc_info=True)
             return (False, error_msg)
     
-    def _process_dicks_shipping_update(self, shipping_data: DicksShippingData) -> Tuple[bool, Optional[str]]:
+    @preloads_order_items
+    def _process_dicks_shipping_update(self, shipping_data: DicksShippingData, message_id: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Process Dick's shipping update: Update shipped_to_pw.
 
@@ -2459,6 +2337,7 @@ class RetailerOrderUpdateProcessor:
 
         Args:
             shipping_data: DicksShippingData object
+            message_id: Gmail message ID (fulfillment ledger key; None skips the ledger)
 
         Returns:
             Tuple of (success: bool, error_message: Optional[str])
@@ -2468,39 +2347,15 @@ class RetailerOrderUpdateProcessor:
 
             items_updated = 0
 
-            for item in shipping_data.items:
+            for line, item in enumerate(shipping_data.items):
                 matching_records = []
 
                 # If size is available, match by order number and size (like Hibbett)
                 if item.size:
-                    normalized_shipping_size = self._normalize_size(item.size)
-
-                    matching_records = self.db.query(PurchaseTracker).join(
-                        AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                    ).filter(
-                        and_(
-                            PurchaseTracker.order_number == shipping_data.order_number,
-                            or_(
-                                AsinBank.size == item.size,  # Exact match
-                                AsinBank.size == normalized_shipping_size  # Normalized match
-                            )
-                        )
-                    ).all()
-
-                    # If no exact matches, try to match by normalizing all sizes manually
-                    if not matching_records:
-                        all_order_records = self.db.query(PurchaseTracker).join(
-                            AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                        ).filter(
-                            PurchaseTracker.order_number == shipping_data.order_number
-                        ).all()
-
-                        for record in all_order_records:
-                            db_size = record.asin_bank_ref.size if record.asin_bank_ref else None
-                            if db_size:
-                                normalized_db_size = self._normalize_size(db_size)
-                                if normalized_db_size == normalized_shipping_size:
-                                    matching_records.append(record)
+                    matching_records = self.item_matcher.match_order_size(
+                        order_number=shipping_data.order_number,
+                        size=item.size,
+                    )
                 else:
                     # Size not available - match by order number only
                     # This is less precise but necessary when size is missing
@@ -2522,6 +2377,9 @@ class RetailerOrderUpdateProcessor:
 
                 # Update each matching record
                 for record in matching_records:
+                    lock_record(self.db, record)
+                    if not self._claim_fulfillment_event(message_id, EVENT_SHIPPING, record, line, item.quantity, shipping_data.order_number, item):
+                        continue
                     # Add quantity to shipped_to_pw (cumulative - sums from multiple shipping emails)
                     current_shipped_to_pw = record.shipped_to_pw or 0
                     record.shipped_to_pw = current_shipped_to_pw + item.quantity
@@ -2544,7 +2402,8 @@ class RetailerOrderUpdateProcessor:
             logger.error(error_msg, exc_info=True)
             return (False, error_msg)
     
-    def _process_dtlr_shipping_update(self, shipping_data: DTLRShippingData) -> Tuple[bool, Optional[str]]:
+    @preloads_order_items
+    def _process_dtlr_shipping_update(self, shipping_data: DTLRShippingData, message_id: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Process DTLR shipping update: Update shipped_to_pw.
         
@@ -2556,6 +2415,7 @@ class RetailerOrderUpdateProcessor:
         
         Args:
             shipping_data: DTLRShippingData object
+            message_id: Gmail message ID (fulfillment ledger key; None skips the ledger)
         
         Returns:
             Tuple of (success: bool, error_message: Optional[str])
@@ -2565,39 +2425,15 @@ class RetailerOrderUpdateProcessor:
             
             items_updated = 0
             
-            for item in shipping_data.items:
+            for line, item in enumerate(shipping_data.items):
                 matching_records = []
                 
                 # Match by order number and size (like Hibbett/Dicks)
                 if item.size:
-                    normalized_shipping_size = self._normalize_size(item.size)
-                    
-                    matching_records = self.db.query(PurchaseTracker).join(
-                        AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                    ).filter(
-                        and_(
-                            PurchaseTracker.order_number == shipping_data.order_number,
-                            or_(
-                                AsinBank.size == item.size,  # Exact match
-                                AsinBank.size == normalized_shipping_size  # Normalized match
-                            )
-                        )
-                    ).all()
-                    
-                    # If no exact matches, try to match by normalizing all sizes manually
-                    if not matching_records:
-                        all_order_records = self.db.query(PurchaseTracker).join(
-                            AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                        ).filter(
-                            PurchaseTracker.order_number == shipping_data.order_number
-                        ).all()
-                        
-                        for record in all_order_records:
-                            db_size = record.asin_bank_ref.size if record.asin_bank_ref else None
-                            if db_size:
-                                normalized_db_size = self._normalize_size(db_size)
-                                if normalized_db_size == normalized_shipping_size:
-                                    matching_records.append(record)
+                    matching_records = self.item_matcher.match_order_size(
+                        order_number=shipping_data.order_number,
+                        size=item.size,
+                    )
                 else:
                     # Size not available - match by order number only
                     matching_records = self.db.query(PurchaseTracker).filter(
@@ -2618,6 +2454,9 @@ class RetailerOrderUpdateProcessor:
                 
                 # Update each matching record
                 for record in matching_records:
+                    lock_record(self.db, record)
+                    if not self._claim_fulfillment_event(message_id, EVENT_SHIPPING, record, line, item.quantity, shipping_data.order_number, item):
+                        continue
                     # Add quantity to shipped_to_pw (cumulative - sums from multiple shipping emails)
                     current_shipped_to_pw = record.shipped_to_pw or 0
                     record.shipped_to_pw = current_shipped_to_pw + item.quantity
@@ -2641,7 +2480,8 @@ class RetailerOrderUpdateProcessor:
             logger.error(error_msg, exc_info=True)
             return (False, error_msg)
     
-    def _process_dtlr_cancellation_update(self, cancellation_data: DTLRCancellationData) -> Tuple[bool, Optional[str]]:
+    @preloads_order_items
+    def _process_dtlr_cancellation_update(self, cancellation_data: DTLRCancellationData, message_id: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Process DTLR cancellation update: Deduct quantity from 'final_qty' and update 'cancelled_qty'.
         
@@ -2652,6 +2492,7 @@ class RetailerOrderUpdateProcessor:
         
         Args:
             cancellation_data: DTLRCancellationData object
+            message_id: Gmail message ID (fulfillment ledger key; None skips the ledger)
         
         Returns:
             Tuple of (success: bool, error_message: Optional[str])
@@ -2661,7 +2502,7 @@ class RetailerOrderUpdateProcessor:
             
             items_updated = 0
             
-            for item in cancellation_data.items:
+            for line, item in enumerate(cancellation_data.items):
                 matching_records = []
                 
                 # Since size is not available in DTLR cancellation emails, match by order number and product name
@@ -2707,6 +2548,9 @@ class RetailerOrderUpdateProcessor:
                 
                 # Update each matching record
                 for record in matching_records:
+                    lock_record(self.db, record)
+                    if not self._claim_fulfillment_event(message_id, EVENT_CANCELLATION, record, line, item.quantity, cancellation_data.order_number, item):
+                        continue
                     # Deduct from final_qty
                     current_final_qty = record.final_qty or 0
                     record.final_qty = max(0, current_final_qty - item.quantity)
@@ -2739,7 +2583,8 @@ class RetailerOrderUpdateProcessor:
             logger.error(error_msg, exc_info=True)
             return (False, error_msg)
     
-    def _process_dicks_cancellation_update(self, cancellation_data: DicksCancellationData) -> Tuple[bool, Optional[str]]:
+    @preloads_order_items
+    def _process_dicks_cancellation_update(self, cancellation_data: DicksCancellationData, message_id: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Process Dick's cancellation update: Deduct quantity from 'final_qty' and update 'cancelled_qty'.
         
@@ -2751,6 +2596,7 @@ class RetailerOrderUpdateProcessor:
         
         Args:
             cancellation_data: DicksCancellationData object
+            message_id: Gmail message ID (fulfillment ledger key; None skips the ledger)
         
         Returns:
             Tuple of (success: bool, error_message: Optional[str])
@@ -2760,40 +2606,15 @@ class RetailerOrderUpdateProcessor:
             
             items_updated = 0
             
-            for item in cancellation_data.items:
+            for line, item in enumerate(cancellation_data.items):
                 matching_records = []
                 
                 # If size is available, match by order number and size
                 if item.size:
-                    normalized_cancellation_size = self._normalize_size(item.size)
-                    
-                    matching_records = self.db.query(PurchaseTracker).join(
-                        AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                    ).filter(
-                        
-                        and_(
-                            PurchaseTracker.order_number == cancellation_data.order_number,
-                            or_(
-                                AsinBank.size == item.size,  # Exact match
-                                AsinBank.size == normalized_cancellation_size  # Normalized match
-                            )
-                        )
-                    ).all()
-                    
-                    # If no exact matches, try to match by normalizing all sizes manually
-                    if not matching_records:
-                        all_order_records = self.db.query(PurchaseTracker).join(
-                            AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                        ).filter(
-                            PurchaseTracker.order_number == cancellation_data.order_number
-                        ).all()
-                        
-                        for record in all_order_records:
-                            db_size = record.asin_bank_ref.size if record.asin_bank_ref else None
-                            if db_size:
-                                normalized_db_size = self._normalize_size(db_size)
-                                if normalized_db_size == normalized_cancellation_size:
-                                    matching_records.append(record)
+                    matching_records = self.item_matcher.match_order_size(
+                        order_number=cancellation_data.order_number,
+                        size=item.size,
+                    )
                 else:
                     # Size not available - match by order number only
                     matching_records = self.db.query(PurchaseTracker).filter(
@@ -2814,6 +2635,9 @@ class RetailerOrderUpdateProcessor:
                 
                 # Update each matching record
                 for record in matching_records:
+                    lock_record(self.db, record)
+                    if not self._claim_fulfillment_event(message_id, EVENT_CANCELLATION, record, line, item.quantity, cancellation_data.order_number, item):
+                        continue
                     # Deduct quantity from final_qty
                     current_final_qty = record.final_qty or 0
                     new_final_qty = max(0, current_final_qty - item.quantity)  # Don't go below 0
@@ -2848,7 +2672,8 @@ class RetailerOrderUpdateProcessor:
             logger.error(error_msg, exc_info=True)
             return (False, error_msg)
     
-    def _process_urban_cancellation_update(self, cancellation_data: UrbanOutfittersCancellationData) -> Tuple[bool, Optional[str]]:
+    @preloads_order_items
+    def _process_urban_cancellation_update(self, cancellation_data: UrbanOutfittersCancellationData, message_id: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Process Urban Outfitters cancellation update: Deduct quantity from 'final_qty' and update 'cancelled_qty'.
         
@@ -2859,6 +2684,7 @@ class RetailerOrderUpdateProcessor:
         
         Args:
             cancellation_data: UrbanOutfittersCancellationData object
+            message_id: Gmail message ID (fulfillment ledger key; None skips the ledger)
         
         Returns:
             Tuple of (success: bool, error_message: Optional[str])
@@ -2868,38 +2694,16 @@ class RetailerOrderUpdateProcessor:
             
             items_updated = 0
             
-            for item in cancellation_data.items:
+            for line, item in enumerate(cancellation_data.items):
                 # Normalize the size from cancellation email for comparison
-                normalized_cancel_size = self._normalize_size(item.size)
+                normalized_cancel_size = normalize_size(item.size)
                 
                 # Find matching purchase tracker record(s)
                 # Match by order_number and size (handle both normalized and non-normalized sizes)
-                matching_records = self.db.query(PurchaseTracker).join(
-                    AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                ).filter(
-                    and_(
-                        PurchaseTracker.order_number == cancellation_data.order_number,
-                        or_(
-                            AsinBank.size == item.size,  # Exact match
-                            AsinBank.size == normalized_cancel_size  # Normalized match
-                        )
-                    )
-                ).all()
-                
-                # If no exact matches, try to match by normalizing all sizes manually
-                if not matching_records:
-                    all_order_records = self.db.query(PurchaseTracker).join(
-                        AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                    ).filter(
-                        PurchaseTracker.order_number == cancellation_data.order_number
-                    ).all()
-                    
-                    for record in all_order_records:
-                        db_size = record.asin_bank_ref.size if record.asin_bank_ref else None
-                        if db_size:
-                            normalized_db_size = self._normalize_size(db_size)
-                            if normalized_db_size == normalized_cancel_size:
-                                matching_records.append(record)
+                matching_records = self.item_matcher.match_order_size(
+                    order_number=cancellation_data.order_number,
+                    size=item.size,
+                )
                 
                 if not matching_records:
                     logger.warning(
@@ -2910,6 +2714,9 @@ class RetailerOrderUpdateProcessor:
                 
                 # Update each matching record
                 for record in matching_records:
+                    lock_record(self.db, record)
+                    if not self._claim_fulfillment_event(message_id, EVENT_CANCELLATION, record, line, item.quantity, cancellation_data.order_number, item):
+                        continue
                     # Deduct from final_qty
                     current_final_qty = record.final_qty or 0
                     record.final_qty = max(0, current_final_qty - item.quantity)
@@ -2942,7 +2749,8 @@ class RetailerOrderUpdateProcessor:
             logger.error(error_msg, exc_info=True)
             return (False, error_msg)
 
-    def _process_urban_shipping_update(self, shipping_data: UrbanOutfittersShippingData) -> Tuple[bool, Optional[str]]:
+    @preloads_order_items
+    def _process_urban_shipping_update(self, shipping_data: UrbanOutfittersShippingData, message_id: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Process Urban Outfitters shipping update: Add quantity to 'shipped_to_pw' (cumulative)
         and set tracking number.
@@ -2959,6 +2767,7 @@ class RetailerOrderUpdateProcessor:
 
         Args:
             shipping_data: UrbanOutfittersShippingData object
+            message_id: Gmail message ID (fulfillment ledger key; None skips the ledger)
 
         Returns:
             Tuple of (success: bool, error_message: Optional[str])
@@ -2971,37 +2780,15 @@ class RetailerOrderUpdateProcessor:
 
             items_updated = 0
 
-            for item in shipping_data.items:
+            for line, item in enumerate(shipping_data.items):
                 # Normalize the size from shipping email for comparison
-                normalized_ship_size = self._normalize_size(item.size)
+                normalized_ship_size = normalize_size(item.size)
 
                 # Find matching purchase tracker record(s) by order_number + size
-                matching_records = self.db.query(PurchaseTracker).join(
-                    AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                ).filter(
-                    and_(
-                        PurchaseTracker.order_number == shipping_data.order_number,
-                        or_(
-                            AsinBank.size == item.size,
-                            AsinBank.size == normalized_ship_size
-                        )
-                    )
-                ).all()
-
-                # If no exact matches, fall back to manual size normalization across all order records
-                if not matching_records:
-                    all_order_records = self.db.query(PurchaseTracker).join(
-                        AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                    ).filter(
-                        PurchaseTracker.order_number == shipping_data.order_number
-                    ).all()
-
-                    for record in all_order_records:
-                        db_size = record.asin_bank_ref.size if record.asin_bank_ref else None
-                        if db_size:
-                            normalized_db_size = self._normalize_size(db_size)
-                            if normalized_db_size == normalized_ship_size:
-                                matching_records.append(record)
+                matching_records = self.item_matcher.match_order_size(
+                    order_number=shipping_data.order_number,
+                    size=item.size,
+                )
 
                 if not matching_records:
                     logger.warning(
@@ -3013,6 +2800,9 @@ class RetailerOrderUpdateProcessor:
 
                 # Update each matching record
                 for record in matching_records:
+                    lock_record(self.db, record)
+                    if not self._claim_fulfillment_event(message_id, EVENT_SHIPPING, record, line, item.quantity, shipping_data.order_number, item):
+                        continue
                     # Add to shipped_to_pw (cumulative)
                     current_shipped = record.shipped_to_pw or 0
                     record.shipped_to_pw = current_shipped + item.quantity
@@ -3045,7 +2835,8 @@ class RetailerOrderUpdateProcessor:
             logger.error(error_msg, exc_info=True)
             return (False, error_msg)
 
-    def _process_shoepalace_cancellation_update(self, cancellation_data: ShoepalaceCancellationData) -> Tuple[bool, Optional[str]]:
+    @preloads_order_items
+    def _process_shoepalace_cancellation_update(self, cancellation_data: ShoepalaceCancellationData, message_id: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Process Shoe Palace cancellation update: Deduct quantity from 'final_qty' and update 'cancelled_qty'.
         
@@ -3060,6 +2851,7 @@ class RetailerOrderUpdateProcessor:
         
         Args:
             cancellation_data: ShoepalaceCancellationData object
+            message_id: Gmail message ID (fulfillment ledger key; None skips the ledger)
         
         Returns:
             Tuple of (success: bool, error_message: Optional[str])
@@ -3076,61 +2868,21 @@ class RetailerOrderUpdateProcessor:
             
             items_updated = 0
             
-            for item in cancellation_data.items:
+            for line, item in enumerate(cancellation_data.items):
                 # Normalize the size from cancellation email for comparison
-                normalized_cancel_size = self._normalize_size(item.size)
+                normalized_cancel_size = normalize_size(item.size)
                 
                 # Find matching purchase tracker record(s)
                 # Match by order_number (try both with and without SP prefix) and unique_id first, then fallback to size matching
                 # Use PurchaseTracker.oa_sourcing_id (not AsinBank - AsinBank has no oa_sourcing_id)
-                matching_records = self.db.query(PurchaseTracker).join(
-                    OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                ).outerjoin(
-                    AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                ).filter(
-                    and_(
-                        or_(
-                            PurchaseTracker.order_number == order_number,  # With SP prefix
-                            PurchaseTracker.order_number == order_number_without_prefix  # Without SP prefix
-                        ),
-                        OASourcing.unique_id == item.unique_id
-                    )
-                ).all()
+                matching_records = self.item_matcher.match_unique_id([order_number, order_number_without_prefix], item.unique_id)
                 
                 # If no matches by unique_id, try matching by size
                 if not matching_records:
-                    matching_records = self.db.query(PurchaseTracker).join(
-                        AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                    ).filter(
-                        and_(
-                            or_(
-                                PurchaseTracker.order_number == order_number,  # With SP prefix
-                                PurchaseTracker.order_number == order_number_without_prefix  # Without SP prefix
-                            ),
-                            or_(
-                                AsinBank.size == item.size,  # Exact match
-                                AsinBank.size == normalized_cancel_size  # Normalized match
-                            )
-                        )
-                    ).all()
-                
-                # If still no matches, try to match by normalizing all sizes manually
-                if not matching_records:
-                    all_order_records = self.db.query(PurchaseTracker).join(
-                        AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                    ).filter(
-                        or_(
-                            PurchaseTracker.order_number == order_number,  # With SP prefix
-                            PurchaseTracker.order_number == order_number_without_prefix  # Without SP prefix
-                        )
-                    ).all()
-                    
-                    for record in all_order_records:
-                        db_size = record.asin_bank_ref.size if record.asin_bank_ref else None
-                        if db_size:
-                            normalized_db_size = self._normalize_size(db_size)
-                            if normalized_db_size == normalized_cancel_size:
-                                matching_records.append(record)
+                    matching_records = self.item_matcher.match_order_size(
+                        order_number=[order_number, order_number_without_prefix],
+                        size=item.size,
+                    )
                 
                 if not matching_records:
                     logger.warning(
@@ -3142,6 +2894,9 @@ class RetailerOrderUpdateProcessor:
                 
                 # Update each matching record
                 for record in matching_records:
+                    lock_record(self.db, record)
+                    if not self._claim_fulfillment_event(message_id, EVENT_CANCELLATION, record, line, item.quantity, cancellation_data.order_number, item):
+                        continue
                     # Deduct from final_qty
                     current_final_qty = record.final_qty or 0
                     record.final_qty = max(0, current_final_qty - item.quantity)
@@ -3175,7 +2930,8 @@ class RetailerOrderUpdateProcessor:
             logger.error(error_msg, exc_info=True)
             return (False, error_msg)
     
-    def _process_orleans_cancellation_update(self, cancellation_data: OrleansCancellationData) -> Tuple[bool, Optional[str]]:
+    @preloads_order_items
+    def _process_orleans_cancellation_update(self, cancellation_data: OrleansCancellationData, message_id: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Process Orleans Shoe Co cancellation update: Deduct quantity from 'final_qty' and update 'cancelled_qty'.
         
@@ -3186,6 +2942,7 @@ class RetailerOrderUpdateProcessor:
         
         Args:
             cancellation_data: OrleansCancellationData object
+            message_id: Gmail message ID (fulfillment ledger key; None skips the ledger)
         
         Returns:
             Tuple of (success: bool, error_message: Optional[str])
@@ -3195,52 +2952,21 @@ class RetailerOrderUpdateProcessor:
             
             items_updated = 0
             
-            for item in cancellation_data.items:
+            for line, item in enumerate(cancellation_data.items):
                 # Normalize the size from cancellation email for comparison
-                normalized_cancel_size = self._normalize_size(item.size)
+                normalized_cancel_size = normalize_size(item.size)
                 
                 # Find matching purchase tracker record(s)
                 # Match by order_number and unique_id first, then fallback to size matching
                 # Use PurchaseTracker.oa_sourcing_id (not AsinBank - AsinBank has no oa_sourcing_id)
-                matching_records = self.db.query(PurchaseTracker).join(
-                    OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                ).outerjoin(
-                    AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                ).filter(
-                    and_(
-                        PurchaseTracker.order_number == cancellation_data.order_number,
-                        OASourcing.unique_id == item.unique_id
-                    )
-                ).all()
+                matching_records = self.item_matcher.match_unique_id(cancellation_data.order_number, item.unique_id)
                 
                 # If no matches by unique_id, try matching by size
                 if not matching_records:
-                    matching_records = self.db.query(PurchaseTracker).join(
-                        AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                    ).filter(
-                        and_(
-                            PurchaseTracker.order_number == cancellation_data.order_number,
-                            or_(
-                                AsinBank.size == item.size,  # Exact match
-                                AsinBank.size == normalized_cancel_size  # Normalized match
-                            )
-                        )
-                    ).all()
-                
-                # If still no matches, try to match by normalizing all sizes manually
-                if not matching_records:
-                    all_order_records = self.db.query(PurchaseTracker).join(
-                        AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                    ).filter(
-                        PurchaseTracker.order_number == cancellation_data.order_number
-                    ).all()
-                    
-                    for record in all_order_records:
-                        db_size = record.asin_bank_ref.size if record.asin_bank_ref else None
-                        if db_size:
-                            normalized_db_size = self._normalize_size(db_size)
-                            if normalized_db_size == normalized_cancel_size:
-                                matching_records.append(record)
+                    matching_records = self.item_matcher.match_order_size(
+                        order_number=cancellation_data.order_number,
+                        size=item.size,
+                    )
                 
                 if not matching_records:
                     logger.warning(
@@ -3251,6 +2977,9 @@ class RetailerOrderUpdateProcessor:
                 
                 # Update each matching record
                 for record in matching_records:
+                    lock_record(self.db, record)
+                    if not self._claim_fulfillment_event(message_id, EVENT_CANCELLATION, record, line, item.quantity, cancellation_data.order_number, item):
+                        continue
                     # Deduct from final_qty
                     current_final_qty = record.final_qty or 0
                     record.final_qty = max(0, current_final_qty - item.quantity)
@@ -3284,7 +3013,8 @@ class RetailerOrderUpdateProcessor:
             logger.error(error_msg, exc_info=True)
             return (False, error_msg)
 
-    def _process_als_shipping_update(self, shipping_data: AlsShippingData) -> Tuple[bool, Optional[str]]:
+    @preloads_order_items
+    def _process_als_shipping_update(self, shipping_data: AlsShippingData, message_id: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Process Al's shipping update: Update shipped_to_pw and tracking.
 
@@ -3294,39 +3024,12 @@ class RetailerOrderUpdateProcessor:
             logger.info(f"Processing Al's shipping update for order {shipping_data.order_number}")
             items_updated = 0
 
-            for item in shipping_data.items:
-                normalized_size = self._normalize_size(item.size)
-
-                matching_records = self.db.query(PurchaseTracker).join(
-                    OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                ).outerjoin(
-                    AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                ).filter(
-                    and_(
-                        PurchaseTracker.order_number == shipping_data.order_number,
-                        OASourcing.unique_id == item.unique_id,
-                        or_(
-                            AsinBank.size == item.size,
-                            AsinBank.size == normalized_size
-                        )
-                    )
-                ).all()
-
-                if not matching_records:
-                    all_for_order = self.db.query(PurchaseTracker).join(
-                        OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                    ).outerjoin(
-                        AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                    ).filter(
-                        and_(
-                            PurchaseTracker.order_number == shipping_data.order_number,
-                            OASourcing.unique_id == item.unique_id
-                        )
-                    ).all()
-                    for record in all_for_order:
-                        db_size = record.asin_bank_ref.size if record.asin_bank_ref else None
-                        if db_size and self._normalize_size(db_size) == normalized_size:
-                            matching_records.append(record)
+            for line, item in enumerate(shipping_data.items):
+                matching_records = self.item_matcher.match_item(
+                    order_number=shipping_data.order_number,
+                    unique_id=item.unique_id,
+                    size=item.size,
+                )
 
                 if not matching_records:
                     logger.warning(
@@ -3336,6 +3039,9 @@ class RetailerOrderUpdateProcessor:
                     continue
 
                 for record in matching_records:
+                    lock_record(self.db, record)
+                    if not self._claim_fulfillment_event(message_id, EVENT_SHIPPING, record, line, item.quantity, shipping_data.order_number, item):
+                        continue
                     current_shipped = record.shipped_to_pw or 0
                     record.shipped_to_pw = current_shipped + item.quantity
                     if not record.tracking and shipping_data.tracking_number:
@@ -3358,7 +3064,8 @@ class RetailerOrderUpdateProcessor:
             logger.error(error_msg, exc_info=True)
             return (False, error_msg)
 
-    def _process_academy_shipping_update(self, shipping_data: AcademyShippingData) -> Tuple[bool, Optional[str]]:
+    @preloads_order_items
+    def _process_academy_shipping_update(self, shipping_data: AcademyShippingData, message_id: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Process Academy Sports shipping update: Update shipped_to_pw and tracking.
 
@@ -3368,39 +3075,12 @@ class RetailerOrderUpdateProcessor:
             logger.info(f"Processing Academy shipping update for order {shipping_data.order_number}")
             items_updated = 0
 
-            for item in shipping_data.items:
-                normalized_size = self._normalize_size(item.size)
-
-                matching_records = self.db.query(PurchaseTracker).join(
-                    OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                ).outerjoin(
-                    AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                ).filter(
-                    and_(
-                        PurchaseTracker.order_number == shipping_data.order_number,
-                        OASourcing.unique_id == item.unique_id,
-                        or_(
-                            AsinBank.size == item.size,
-                            AsinBank.size == normalized_size
-                        )
-                    )
-                ).all()
-
-                if not matching_records:
-                    all_for_order = self.db.query(PurchaseTracker).join(
-                        OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                    ).outerjoin(
-                        AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                    ).filter(
-                        and_(
-                            PurchaseTracker.order_number == shipping_data.order_number,
-                            OASourcing.unique_id == item.unique_id
-                        )
-                    ).all()
-                    for record in all_for_order:
-                        db_size = record.asin_bank_ref.size if record.asin_bank_ref else None
-                        if db_size and self._normalize_size(db_size) == normalized_size:
-                            matching_records.append(record)
+            for line, item in enumerate(shipping_data.items):
+                matching_records = self.item_matcher.match_item(
+                    order_number=shipping_data.order_number,
+                    unique_id=item.unique_id,
+                    size=item.size,
+                )
 
                 if not matching_records:
                     logger.warning(
@@ -3410,6 +3090,9 @@ class RetailerOrderUpdateProcessor:
                     continue
 
                 for record in matching_records:
+                    lock_record(self.db, record)
+                    if not self._claim_fulfillment_event(message_id, EVENT_SHIPPING, record, line, item.quantity, shipping_data.order_number, item):
+                        continue
                     current_shipped = record.shipped_to_pw or 0
                     record.shipped_to_pw = current_shipped + item.quantity
                     if not record.tracking and shipping_data.tracking_number:
@@ -3432,21 +3115,15 @@ class RetailerOrderUpdateProcessor:
             logger.error(error_msg, exc_info=True)
             return (False, error_msg)
 
-    def _process_scheels_shipping_update(self, shipping_data: SceelsShippingData) -> Tuple[bool, Optional[str]]:
+    @preloads_order_items
+    def _process_scheels_shipping_update(self, shipping_data: SceelsShippingData, message_id: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """Process Scheels shipping update: Update shipped_to_pw. No tracking number available."""
         try:
             logger.info(f"Processing Scheels shipping update for order {shipping_data.order_number}")
             items_updated = 0
 
-            for item in shipping_data.items:
-                matching_records = self.db.query(PurchaseTracker).join(
-                    OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                ).filter(
-                    and_(
-                        PurchaseTracker.order_number == shipping_data.order_number,
-                        OASourcing.unique_id == item.unique_id
-                    )
-                ).all()
+            for line, item in enumerate(shipping_data.items):
+                matching_records = self.item_matcher.match_unique_id(shipping_data.order_number, item.unique_id)
 
                 if not matching_records:
                     logger.warning(
@@ -3456,6 +3133,9 @@ class RetailerOrderUpdateProcessor:
                     continue
 
                 for record in matching_records:
+                    lock_record(self.db, record)
+                    if not self._claim_fulfillment_event(message_id, EVENT_SHIPPING, record, line, item.quantity, shipping_data.order_number, item):
+                        continue
                     current_shipped = record.shipped_to_pw or 0
                     record.shipped_to_pw = current_shipped + item.quantity
                     self._recalculate_status_and_location(record)
@@ -3476,7 +3156,8 @@ class RetailerOrderUpdateProcessor:
             logger.error(error_msg, exc_info=True)
             return (False, error_msg)
 
-    def _process_als_cancellation_update(self, cancellation_data: AlsCancellationData) -> Tuple[bool, Optional[str]]:
+    @preloads_order_items
+    def _process_als_cancellation_update(self, cancellation_data: AlsCancellationData, message_id: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Process Al's cancellation update: Deduct quantity from 'final_qty' and update 'cancelled_qty'.
 
@@ -3490,48 +3171,17 @@ class RetailerOrderUpdateProcessor:
 
             items_updated = 0
 
-            for item in cancellation_data.items:
-                normalized_cancel_size = self._normalize_size(item.size)
+            for line, item in enumerate(cancellation_data.items):
+                normalized_cancel_size = normalize_size(item.size)
 
-                matching_records = self.db.query(PurchaseTracker).join(
-                    OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                ).outerjoin(
-                    AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                ).filter(
-                    and_(
-                        PurchaseTracker.order_number == cancellation_data.order_number,
-                        OASourcing.unique_id == item.unique_id
-                    )
-                ).all()
+                matching_records = self.item_matcher.match_unique_id(cancellation_data.order_number, item.unique_id)
 
                 # If no matches by unique_id, try matching by size
                 if not matching_records:
-                    matching_records = self.db.query(PurchaseTracker).join(
-                        AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                    ).filter(
-                        and_(
-                            PurchaseTracker.order_number == cancellation_data.order_number,
-                            or_(
-                                AsinBank.size == item.size,
-                                AsinBank.size == normalized_cancel_size
-                            )
-                        )
-                    ).all()
-
-                # If still no matches, try to match by normalizing all sizes manually
-                if not matching_records:
-                    all_order_records = self.db.query(PurchaseTracker).join(
-                        AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                    ).filter(
-                        PurchaseTracker.order_number == cancellation_data.order_number
-                    ).all()
-
-                    for record in all_order_records:
-                        db_size = record.asin_bank_ref.size if record.asin_bank_ref else None
-                        if db_size:
-                            normalized_db_size = self._normalize_size(db_size)
-                            if normalized_db_size == normalized_cancel_size:
-                                matching_records.append(record)
+                    matching_records = self.item_matcher.match_order_size(
+                        order_number=cancellation_data.order_number,
+                        size=item.size,
+                    )
 
                 if not matching_records:
                     logger.warning(
@@ -3542,6 +3192,9 @@ class RetailerOrderUpdateProcessor:
 
                 # Update each matching record
                 for record in matching_records:
+                    lock_record(self.db, record)
+                    if not self._claim_fulfillment_event(message_id, EVENT_CANCELLATION, record, line, item.quantity, cancellation_data.order_number, item):
+                        continue
                     # Deduct from final_qty
                     current_final_qty = record.final_qty or 0
                     record.final_qty = max(0, current_final_qty - item.quantity)
@@ -3575,7 +3228,8 @@ class RetailerOrderUpdateProcessor:
             logger.error(error_msg, exc_info=True)
             return (False, error_msg)
 
-    def _process_finishline_shipping_update(self, shipping_data: FinishLineShippingData) -> Tuple[bool, Optional[str]]:
+    @preloads_order_items
+    def _process_finishline_shipping_update(self, shipping_data: FinishLineShippingData, message_id: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Process Finish Line shipping/update: shipping items (shipped_to_pw) + optional cancellation items.
 
@@ -3591,43 +3245,21 @@ class RetailerOrderUpdateProcessor:
         """
         try:
             # Process shipping items first
-            for item in shipping_data.items:
-                normalized_size = self._normalize_size(item.size)
-                matching_records = self.db.query(PurchaseTracker).join(
-                    OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                ).outerjoin(
-                    AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                ).filter(
-                    and_(
-                        PurchaseTracker.order_number == shipping_data.order_number,
-                        OASourcing.unique_id == item.unique_id,
-                        or_(
-                            AsinBank.size == item.size,
-                            AsinBank.size == normalized_size
-                        )
-                    )
-                ).all()
-
-                if not matching_records:
-                    all_for_order = self.db.query(PurchaseTracker).join(
-                        OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                    ).outerjoin(
-                        AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                    ).filter(
-                        and_(
-                            PurchaseTracker.order_number == shipping_data.order_number,
-                            OASourcing.unique_id == item.unique_id
-                        )
-                    ).all()
-                    for record in all_for_order:
-                        db_size = record.asin_bank_ref.size if record.asin_bank_ref else None
-                        if db_size and self._normalize_size(db_size) == normalized_size:
-                            matching_records.append(record)
+            for line, item in enumerate(shipping_data.items):
+                matching_records = self.item_matcher.match_item(
+                    order_number=shipping_data.order_number,
+                    unique_id=item.unique_id,
+                    size=item.size,
+                )
 
                 for record in matching_records:
+                    lock_record(self.db, record)
                     current_shipped = record.shipped_to_pw or 0
                     # Use MAX: FNL scoop emails report cumulative shipped count, not incremental
-                    record.shipped_to_pw = max(current_shipped, item.quantity)
+                    new_shipped = max(current_shipped, item.quantity)
+                    if not self._claim_fulfillment_event(message_id, EVENT_SHIPPING, record, line, new_shipped - current_shipped, shipping_data.order_number, item):
+                        continue
+                    record.shipped_to_pw = new_shipped
                     if not record.tracking and item.tracking:
                         record.tracking = item.tracking
                     self._recalculate_status_and_location(record)
@@ -3639,7 +3271,7 @@ class RetailerOrderUpdateProcessor:
                     items=shipping_data.cancellation_items,
                     is_full_cancellation=False
                 )
-                success, error = self._process_finishline_cancellation_update(cancel_data)
+                success, error = self._process_finishline_cancellation_update(cancel_data, message_id=message_id)
                 if not success:
                     return (False, error)
             
@@ -3652,7 +3284,8 @@ class RetailerOrderUpdateProcessor:
             logger.error(error_msg, exc_info=True)
             return (False, error_msg)
 
-    def _process_revolve_shipping_update(self, shipping_data: RevolveShippingData) -> Tuple[bool, Optional[str]]:
+    @preloads_order_items
+    def _process_revolve_shipping_update(self, shipping_data: RevolveShippingData, message_id: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Process Revolve shipping update (full or partial): Update shipped_to_pw and tracking.
         
@@ -3661,6 +3294,7 @@ class RetailerOrderUpdateProcessor:
         
         Args:
             shipping_data: RevolveShippingData object
+            message_id: Gmail message ID (fulfillment ledger key; None skips the ledger)
         
         Returns:
             Tuple of (success: bool, error_message: Optional[str])
@@ -3669,39 +3303,12 @@ class RetailerOrderUpdateProcessor:
             logger.info(f"Processing Revolve shipping update for order {shipping_data.order_number}")
             items_updated = 0
             
-            for item in shipping_data.items:
-                normalized_size = self._normalize_size(item.size)
-                
-                matching_records = self.db.query(PurchaseTracker).join(
-                    OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                ).outerjoin(
-                    AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                ).filter(
-                    and_(
-                        PurchaseTracker.order_number == shipping_data.order_number,
-                        OASourcing.unique_id == item.unique_id,
-                        or_(
-                            AsinBank.size == item.size,
-                            AsinBank.size == normalized_size
-                        )
-                    )
-                ).all()
-                
-                if not matching_records:
-                    all_for_order = self.db.query(PurchaseTracker).join(
-                        OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                    ).outerjoin(
-                        AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                    ).filter(
-                        and_(
-                            PurchaseTracker.order_number == shipping_data.order_number,
-                            OASourcing.unique_id == item.unique_id
-                        )
-                    ).all()
-                    for record in all_for_order:
-                        db_size = record.asin_bank_ref.size if record.asin_bank_ref else None
-                        if db_size and self._normalize_size(db_size) == normalized_size:
-                            matching_records.append(record)
+            for line, item in enumerate(shipping_data.items):
+                matching_records = self.item_matcher.match_item(
+                    order_number=shipping_data.order_number,
+                    unique_id=item.unique_id,
+                    size=item.size,
+                )
                 
                 if not matching_records:
                     logger.warning(
@@ -3711,6 +3318,9 @@ class RetailerOrderUpdateProcessor:
                     continue
                 
                 for record in matching_records:
+                    lock_record(self.db, record)
+                    if not self._claim_fulfillment_event(message_id, EVENT_SHIPPING, record, line, item.quantity, shipping_data.order_number, item):
+                        continue
                     current_shipped = record.shipped_to_pw or 0
                     record.shipped_to_pw = current_shipped + item.quantity
                     if not record.tracking and shipping_data.tracking_number:
@@ -3733,7 +3343,8 @@ class RetailerOrderUpdateProcessor:
             logger.error(error_msg, exc_info=True)
             return (False, error_msg)
 
-    def _process_asos_shipping_update(self, shipping_data: ASOSShippingData) -> Tuple[bool, Optional[str]]:
+    @preloads_order_items
+    def _process_asos_shipping_update(self, shipping_data: ASOSShippingData, message_id: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Process ASOS shipping update: Update shipped_to_pw and tracking.
         
@@ -3742,6 +3353,7 @@ class RetailerOrderUpdateProcessor:
         
         Args:
             shipping_data: ASOSShippingData object
+            message_id: Gmail message ID (fulfillment ledger key; None skips the ledger)
         
         Returns:
             Tuple of (success: bool, error_message: Optional[str])
@@ -3750,39 +3362,12 @@ class RetailerOrderUpdateProcessor:
             logger.info(f"Processing ASOS shipping update for order {shipping_data.order_number}")
             items_updated = 0
             
-            for item in shipping_data.items:
-                normalized_size = self._normalize_size(item.size)
-                
-                matching_records = self.db.query(PurchaseTracker).join(
-                    OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                ).outerjoin(
-                    AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                ).filter(
-                    and_(
-                        PurchaseTracker.order_number == shipping_data.order_number,
-                        OASourcing.unique_id == item.unique_id,
-                        or_(
-                            AsinBank.size == item.size,
-                            AsinBank.size == normalized_size
-                        )
-                    )
-                ).all()
-                
-                if not matching_records:
-                    all_for_order = self.db.query(PurchaseTracker).join(
-                        OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                    ).outerjoin(
-                        AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                    ).filter(
-                        and_(
-                            PurchaseTracker.order_number == shipping_data.order_number,
-                            OASourcing.unique_id == item.unique_id
-                        )
-                    ).all()
-                    for record in all_for_order:
-                        db_size = record.asin_bank_ref.size if record.asin_bank_ref else None
-                        if db_size and self._normalize_size(db_size) == normalized_size:
-                            matching_records.append(record)
+            for line, item in enumerate(shipping_data.items):
+                matching_records = self.item_matcher.match_item(
+                    order_number=shipping_data.order_number,
+                    unique_id=item.unique_id,
+                    size=item.size,
+                )
                 
                 if not matching_records:
                     logger.warning(
@@ -3792,6 +3377,9 @@ class RetailerOrderUpdateProcessor:
                     continue
                 
                 for record in matching_records:
+                    lock_record(self.db, record)
+                    if not self._claim_fulfillment_event(message_id, EVENT_SHIPPING, record, line, item.quantity, shipping_data.order_number, item):
+                        continue
                     current_shipped = record.shipped_to_pw or 0
                     record.shipped_to_pw = current_shipped + item.quantity
                     if not record.tracking and shipping_data.tracking_number:
@@ -3814,7 +3402,8 @@ class RetailerOrderUpdateProcessor:
             logger.error(error_msg, exc_info=True)
             return (False, error_msg)
 
-    def _process_snipes_shipping_update(self, shipping_data: SnipesShippingData) -> Tuple[bool, Optional[str]]:
+    @preloads_order_items
+    def _process_snipes_shipping_update(self, shipping_data: SnipesShippingData, message_id: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Process Snipes shipping update: Update shipped_to_pw and tracking.
         
@@ -3825,39 +3414,12 @@ class RetailerOrderUpdateProcessor:
             logger.info(f"Processing Snipes shipping update for order {shipping_data.order_number}")
             items_updated = 0
             
-            for item in shipping_data.items:
-                normalized_size = self._normalize_size(item.size)
-                
-                matching_records = self.db.query(PurchaseTracker).join(
-                    OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                ).outerjoin(
-                    AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                ).filter(
-                    and_(
-                        PurchaseTracker.order_number == shipping_data.order_number,
-                        OASourcing.unique_id == item.unique_id,
-                        or_(
-                            AsinBank.size == item.size,
-                            AsinBank.size == normalized_size
-                        )
-                    )
-                ).all()
-                
-                if not matching_records:
-                    all_for_order = self.db.query(PurchaseTracker).join(
-                        OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                    ).outerjoin(
-                        AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                    ).filter(
-                        and_(
-                            PurchaseTracker.order_number == shipping_data.order_number,
-                            OASourcing.unique_id == item.unique_id
-                        )
-                    ).all()
-                    for record in all_for_order:
-                        db_size = record.asin_bank_ref.size if record.asin_bank_ref else None
-                        if db_size and self._normalize_size(db_size) == normalized_size:
-                            matching_records.append(record)
+            for line, item in enumerate(shipping_data.items):
+                matching_records = self.item_matcher.match_item(
+                    order_number=shipping_data.order_number,
+                    unique_id=item.unique_id,
+                    size=item.size,
+                )
                 
                 if not matching_records:
                     logger.warning(
@@ -3867,6 +3429,9 @@ class RetailerOrderUpdateProcessor:
                     continue
                 
                 for record in matching_records:
+                    lock_record(self.db, record)
+                    if not self._claim_fulfillment_event(message_id, EVENT_SHIPPING, record, line, item.quantity, shipping_data.order_number, item):
+                        continue
                     current_shipped = record.shipped_to_pw or 0
                     record.shipped_to_pw = current_shipped + item.quantity
                     if not record.tracking and shipping_data.tracking_number:
@@ -3889,7 +3454,8 @@ class RetailerOrderUpdateProcessor:
             logger.error(error_msg, exc_info=True)
             return (False, error_msg)
 
-    def _process_shoepalace_shipping_update(self, shipping_data: ShoepalaceShippingData) -> Tuple[bool, Optional[str]]:
+    @preloads_order_items
+    def _process_shoepalace_shipping_update(self, shipping_data: ShoepalaceShippingData, message_id: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Process Shoe Palace shipping update: Update shipped_to_pw and tracking.
         
@@ -3901,39 +3467,12 @@ class RetailerOrderUpdateProcessor:
             logger.info(f"Processing Shoe Palace shipping update for order {shipping_data.order_number}")
             items_updated = 0
             
-            for item in shipping_data.items:
-                normalized_size = self._normalize_size(item.size)
-                
-                matching_records = self.db.query(PurchaseTracker).join(
-                    OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                ).outerjoin(
-                    AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                ).filter(
-                    and_(
-                        PurchaseTracker.order_number == shipping_data.order_number,
-                        OASourcing.unique_id == item.unique_id,
-                        or_(
-                            AsinBank.size == item.size,
-                            AsinBank.size == normalized_size
-                        )
-                    )
-                ).all()
-                
-                if not matching_records:
-                    all_for_order = self.db.query(PurchaseTracker).join(
-                        OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                    ).outerjoin(
-                        AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                    ).filter(
-                        and_(
-                            PurchaseTracker.order_number == shipping_data.order_number,
-                            OASourcing.unique_id == item.unique_id
-                        )
-                    ).all()
-                    for record in all_for_order:
-                        db_size = record.asin_bank_ref.size if record.asin_bank_ref else None
-                        if db_size and self._normalize_size(db_size) == normalized_size:
-                            matching_records.append(record)
+            for line, item in enumerate(shipping_data.items):
+                matching_records = self.item_matcher.match_item(
+                    order_number=shipping_data.order_number,
+                    unique_id=item.unique_id,
+                    size=item.size,
+                )
                 
                 if not matching_records:
                     logger.warning(
@@ -3943,6 +3482,9 @@ class RetailerOrderUpdateProcessor:
                     continue
                 
                 for record in matching_records:
+                    lock_record(self.db, record)
+                    if not self._claim_fulfillment_event(message_id, EVENT_SHIPPING, record, line, item.quantity, shipping_data.order_number, item):
+                        continue
                     current_shipped = record.shipped_to_pw or 0
                     record.shipped_to_pw = current_shipped + item.quantity
                     if not record.tracking and shipping_data.tracking_number:
@@ -3965,7 +3507,8 @@ class RetailerOrderUpdateProcessor:
             logger.error(error_msg, exc_info=True)
             return (False, error_msg)
 
-    def _process_endclothing_shipping_update(self, shipping_data: ENDClothingShippingData) -> Tuple[bool, Optional[str]]:
+    @preloads_order_items
+    def _process_endclothing_shipping_update(self, shipping_data: ENDClothingShippingData, message_id: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Process END Clothing shipping update: Update shipped_to_pw and tracking.
         
@@ -3976,39 +3519,12 @@ class RetailerOrderUpdateProcessor:
             logger.info(f"Processing END Clothing shipping update for order {shipping_data.order_number}")
             items_updated = 0
             
-            for item in shipping_data.items:
-                normalized_size = self._normalize_size(item.size)
-                
-                matching_records = self.db.query(PurchaseTracker).join(
-                    OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                ).outerjoin(
-                    AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                ).filter(
-                    and_(
-                        PurchaseTracker.order_number == shipping_data.order_number,
-                        OASourcing.unique_id == item.unique_id,
-                        or_(
-                            AsinBank.size == item.size,
-                            AsinBank.size == normalized_size
-                        )
-                    )
-                ).all()
-                
-                if not matching_records:
-                    all_for_order = self.db.query(PurchaseTracker).join(
-                        OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                    ).outerjoin(
-                        AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                    ).filter(
-                        and_(
-                            PurchaseTracker.order_number == shipping_data.order_number,
-                            OASourcing.unique_id == item.unique_id
-                        )
-                    ).all()
-                    for record in all_for_order:
-                        db_size = record.asin_bank_ref.size if record.asin_bank_ref else None
-                        if db_size and self._normalize_size(db_size) == normalized_size:
-                            matching_records.append(record)
+            for line, item in enumerate(shipping_data.items):
+                matching_records = self.item_matcher.match_item(
+                    order_number=shipping_data.order_number,
+                    unique_id=item.unique_id,
+                    size=item.size,
+                )
                 
                 if not matching_records:
                     logger.warning(
@@ -4018,6 +3534,9 @@ class RetailerOrderUpdateProcessor:
                     continue
                 
                 for record in matching_records:
+                    lock_record(self.db, record)
+                    if not self._claim_fulfillment_event(message_id, EVENT_SHIPPING, record, line, item.quantity, shipping_data.order_number, item):
+                        continue
                     current_shipped = record.shipped_to_pw or 0
                     record.shipped_to_pw = current_shipped + item.quantity
                     if not record.tracking and shipping_data.tracking_number:
@@ -4040,7 +3559,8 @@ class RetailerOrderUpdateProcessor:
             logger.error(error_msg, exc_info=True)
             return (False, error_msg)
 
-    def _process_shopwss_shipping_update(self, shipping_data: ShopWSSShippingData) -> Tuple[bool, Optional[str]]:
+    @preloads_order_items
+    def _process_shopwss_shipping_update(self, shipping_data: ShopWSSShippingData, message_id: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Process ShopWSS shipping update: Update shipped_to_pw and tracking.
         
@@ -4053,16 +3573,9 @@ class RetailerOrderUpdateProcessor:
             logger.info(f"Processing ShopWSS shipping update for order {shipping_data.order_number}")
             items_updated = 0
             
-            for item in shipping_data.items:
+            for line, item in enumerate(shipping_data.items):
                 # Match by order_number + unique_id only (no size in email)
-                matching_records = self.db.query(PurchaseTracker).join(
-                    OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                ).filter(
-                    and_(
-                        PurchaseTracker.order_number == shipping_data.order_number,
-                        OASourcing.unique_id == item.unique_id
-                    )
-                ).all()
+                matching_records = self.item_matcher.match_unique_id(shipping_data.order_number, item.unique_id)
                 
                 if not matching_records:
                     logger.warning(
@@ -4093,6 +3606,9 @@ class RetailerOrderUpdateProcessor:
                     matching_records = [target]
                 
                 for record in matching_records:
+                    lock_record(self.db, record)
+                    if not self._claim_fulfillment_event(message_id, EVENT_SHIPPING, record, line, item.quantity, shipping_data.order_number, item):
+                        continue
                     current_shipped = record.shipped_to_pw or 0
                     record.shipped_to_pw = current_shipped + item.quantity
                     if not record.tracking and shipping_data.tracking_number:
@@ -4116,7 +3632,8 @@ class RetailerOrderUpdateProcessor:
             logger.error(error_msg, exc_info=True)
             return (False, error_msg)
 
-    def _process_shopwss_cancellation_update(self, cancellation_data: ShopWSSCancellationData) -> Tuple[bool, Optional[str]]:
+    @preloads_order_items
+    def _process_shopwss_cancellation_update(self, cancellation_data: ShopWSSCancellationData, message_id: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Process ShopWSS cancellation: full or partial.
         items=[] means cancel ALL purchase tracker records for order_number.
@@ -4135,7 +3652,10 @@ class RetailerOrderUpdateProcessor:
                     return (True, None)
                 items_updated = 0
                 for record in records:
+                    lock_record(self.db, record)
                     current_final = record.final_qty or 0
+                    if not self._claim_fulfillment_event(message_id, EVENT_CANCELLATION, record, 0, current_final, cancellation_data.order_number):
+                        continue
                     record.final_qty = 0
                     record.cancelled_qty = (record.cancelled_qty or 0) + current_final
                     self._recalculate_status_and_location(record)
@@ -4151,40 +3671,15 @@ class RetailerOrderUpdateProcessor:
             # Partial cancellation - match by order_number + unique_id + size
             logger.info(f"Processing ShopWSS partial cancellation for order {cancellation_data.order_number}, {len(cancellation_data.items)} items")
             items_updated = 0
-            for item in cancellation_data.items:
+            for line, item in enumerate(cancellation_data.items):
                 cancel_qty = max(0, item.quantity or 0)
                 if cancel_qty <= 0:
                     continue
-                normalized_size = self._normalize_size(item.size)
-                matching_records = self.db.query(PurchaseTracker).join(
-                    OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                ).outerjoin(
-                    AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                ).filter(
-                    and_(
-                        PurchaseTracker.order_number == cancellation_data.order_number,
-                        OASourcing.unique_id == item.unique_id,
-                        or_(
-                            AsinBank.size == item.size,
-                            AsinBank.size == normalized_size
-                        )
-                    )
-                ).all()
-                if not matching_records:
-                    all_for_order = self.db.query(PurchaseTracker).join(
-                        OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                    ).outerjoin(
-                        AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                    ).filter(
-                        and_(
-                            PurchaseTracker.order_number == cancellation_data.order_number,
-                            OASourcing.unique_id == item.unique_id
-                        )
-                    ).all()
-                    for record in all_for_order:
-                        db_size = record.asin_bank_ref.size if record.asin_bank_ref else None
-                        if db_size and self._normalize_size(db_size) == normalized_size:
-                            matching_records.append(record)
+                matching_records = self.item_matcher.match_item(
+                    order_number=cancellation_data.order_number,
+                    unique_id=item.unique_id,
+                    size=item.size,
+                )
                 if not matching_records:
                     logger.warning(
                         f"No purchase tracker record for order {cancellation_data.order_number}, "
@@ -4192,11 +3687,16 @@ class RetailerOrderUpdateProcessor:
                     )
                     continue
                 for record in matching_records:
+                    lock_record(self.db, record)
                     current_final = record.final_qty or 0
+                    current_cancelled = record.cancelled_qty or 0
                     og_qty = max(0, record.og_qty or 0)
                     effective_cancel = min(cancel_qty, current_final)
+                    new_cancelled = min(og_qty, current_cancelled + effective_cancel)
+                    if not self._claim_fulfillment_event(message_id, EVENT_CANCELLATION, record, line, new_cancelled - current_cancelled, cancellation_data.order_number, item):
+                        continue
                     record.final_qty = max(0, current_final - effective_cancel)
-                    record.cancelled_qty = min(og_qty, (record.cancelled_qty or 0) + effective_cancel)
+                    record.cancelled_qty = new_cancelled
                     self._recalculate_status_and_location(record)
                     logger.info(
                         f"Updated ShopWSS partial cancel ID {record.id}: order={cancellation_data.order_number}, "
@@ -4212,7 +3712,8 @@ class RetailerOrderUpdateProcessor:
             logger.error(error_msg, exc_info=True)
             return (False, error_msg)
 
-    def _process_snipes_cancellation_update(self, cancellation_data: SnipesCancellationData) -> Tuple[bool, Optional[str]]:
+    @preloads_order_items
+    def _process_snipes_cancellation_update(self, cancellation_data: SnipesCancellationData, message_id: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Process Snipes cancellation update: Deduct from final_qty, add to cancelled_qty.
         
@@ -4233,7 +3734,10 @@ class RetailerOrderUpdateProcessor:
                     self.db.commit()
                     return (True, None)
                 for record in records:
+                    lock_record(self.db, record)
                     current_final = record.final_qty or 0
+                    if not self._claim_fulfillment_event(message_id, EVENT_CANCELLATION, record, 0, current_final, cancellation_data.order_number):
+                        continue
                     record.final_qty = 0
                     record.cancelled_qty = (record.cancelled_qty or 0) + current_final
                     self._recalculate_status_and_location(record)
@@ -4246,39 +3750,12 @@ class RetailerOrderUpdateProcessor:
                 logger.info(f"Successfully cancelled {items_updated} Snipes purchase tracker records (full cancellation)")
                 return (True, None)
             
-            for item in cancellation_data.items:
-                normalized_size = self._normalize_size(item.size)
-                
-                matching_records = self.db.query(PurchaseTracker).join(
-                    OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                ).outerjoin(
-                    AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                ).filter(
-                    and_(
-                        PurchaseTracker.order_number == cancellation_data.order_number,
-                        OASourcing.unique_id == item.unique_id,
-                        or_(
-                            AsinBank.size == item.size,
-                            AsinBank.size == normalized_size
-                        )
-                    )
-                ).all()
-                
-                if not matching_records:
-                    all_for_order = self.db.query(PurchaseTracker).join(
-                        OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                    ).outerjoin(
-                        AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                    ).filter(
-                        and_(
-                            PurchaseTracker.order_number == cancellation_data.order_number,
-                            OASourcing.unique_id == item.unique_id
-                        )
-                    ).all()
-                    for record in all_for_order:
-                        db_size = record.asin_bank_ref.size if record.asin_bank_ref else None
-                        if db_size and self._normalize_size(db_size) == normalized_size:
-                            matching_records.append(record)
+            for line, item in enumerate(cancellation_data.items):
+                matching_records = self.item_matcher.match_item(
+                    order_number=cancellation_data.order_number,
+                    unique_id=item.unique_id,
+                    size=item.size,
+                )
                 
                 if not matching_records:
                     logger.warning(
@@ -4288,6 +3765,9 @@ class RetailerOrderUpdateProcessor:
                     continue
                 
                 for record in matching_records:
+                    lock_record(self.db, record)
+                    if not self._claim_fulfillment_event(message_id, EVENT_CANCELLATION, record, line, item.quantity, cancellation_data.order_number, item):
+                        continue
                     current_final = record.final_qty or 0
                     record.final_qty = max(0, current_final - item.quantity)
                     current_cancelled = record.cancelled_qty or 0
@@ -4310,7 +3790,8 @@ class RetailerOrderUpdateProcessor:
             logger.error(error_msg, exc_info=True)
             return (False, error_msg)
 
-    def _process_revolve_cancellation_update(self, cancellation_data: RevolveCancellationData) -> Tuple[bool, Optional[str]]:
+    @preloads_order_items
+    def _process_revolve_cancellation_update(self, cancellation_data: RevolveCancellationData, message_id: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Process Revolve cancellation update: Deduct quantity from 'final_qty' and update 'cancelled_qty'.
         
@@ -4319,6 +3800,7 @@ class RetailerOrderUpdateProcessor:
         
         Args:
             cancellation_data: RevolveCancellationData object
+            message_id: Gmail message ID (fulfillment ledger key; None skips the ledger)
         
         Returns:
             Tuple of (success: bool, error_message: Optional[str])
@@ -4327,39 +3809,12 @@ class RetailerOrderUpdateProcessor:
             logger.info(f"Processing Revolve cancellation update for order {cancellation_data.order_number}")
             items_updated = 0
             
-            for item in cancellation_data.items:
-                normalized_size = self._normalize_size(item.size)
-                
-                matching_records = self.db.query(PurchaseTracker).join(
-                    OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                ).outerjoin(
-                    AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                ).filter(
-                    and_(
-                        PurchaseTracker.order_number == cancellation_data.order_number,
-                        OASourcing.unique_id == item.unique_id,
-                        or_(
-                            AsinBank.size == item.size,
-                            AsinBank.size == normalized_size
-                        )
-                    )
-                ).all()
-                
-                if not matching_records:
-                    all_for_order = self.db.query(PurchaseTracker).join(
-                        OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                    ).outerjoin(
-                        AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                    ).filter(
-                        and_(
-                            PurchaseTracker.order_number == cancellation_data.order_number,
-                            OASourcing.unique_id == item.unique_id
-                        )
-                    ).all()
-                    for record in all_for_order:
-                        db_size = record.asin_bank_ref.size if record.asin_bank_ref else None
-                        if db_size and self._normalize_size(db_size) == normalized_size:
-                            matching_records.append(record)
+            for line, item in enumerate(cancellation_data.items):
+                matching_records = self.item_matcher.match_item(
+                    order_number=cancellation_data.order_number,
+                    unique_id=item.unique_id,
+                    size=item.size,
+                )
                 
                 if not matching_records:
                     logger.warning(
@@ -4370,8 +3825,11 @@ class RetailerOrderUpdateProcessor:
                 
                 cancel_qty = item.quantity if item.quantity > 0 else 1  # Qty 0 = treat as 1 (like Finish Line)
                 for record in matching_records:
+                    lock_record(self.db, record)
                     current_final = record.final_qty or 0
                     effective = min(cancel_qty, current_final)  # Don't deduct more than current
+                    if not self._claim_fulfillment_event(message_id, EVENT_CANCELLATION, record, line, effective, cancellation_data.order_number, item):
+                        continue
                     record.final_qty = max(0, current_final - effective)
                     current_cancelled = record.cancelled_qty or 0
                     record.cancelled_qty = current_cancelled + effective
@@ -4393,7 +3851,8 @@ class RetailerOrderUpdateProcessor:
             logger.error(error_msg, exc_info=True)
             return (False, error_msg)
     
-    def _process_finishline_cancellation_update(self, cancellation_data: FinishLineCancellationData) -> Tuple[bool, Optional[str]]:
+    @preloads_order_items
+    def _process_finishline_cancellation_update(self, cancellation_data: FinishLineCancellationData, message_id: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Process Finish Line cancellation update: Deduct quantity from 'final_qty' and update 'cancelled_qty'.
         
@@ -4407,6 +3866,7 @@ class RetailerOrderUpdateProcessor:
         
         Args:
             cancellation_data: FinishLineCancellationData object
+            message_id: Gmail message ID (fulfillment ledger key; None skips the ledger)
         
         Returns:
             Tuple of (success: bool, error_message: Optional[str])
@@ -4423,7 +3883,10 @@ class RetailerOrderUpdateProcessor:
                 ).filter(PurchaseTracker.order_number == cancellation_data.order_number).all()
                 
                 for record in all_records:
+                    lock_record(self.db, record)
                     og_qty = max(0, record.og_qty or 0)
+                    if not self._claim_fulfillment_event(message_id, EVENT_CANCELLATION, record, 0, og_qty - (record.cancelled_qty or 0), cancellation_data.order_number):
+                        continue
                     record.final_qty = 0
                     record.cancelled_qty = og_qty
                     self._recalculate_status_and_location(record)
@@ -4440,49 +3903,22 @@ class RetailerOrderUpdateProcessor:
             # Finish Line partial: each email shows CUMULATIVE cancelled state. Sum by (unique_id, size).
             cancel_totals: dict = {}
             for item in cancellation_data.items:
-                key = (item.unique_id, self._normalize_size(item.size))
+                key = (item.unique_id, normalize_size(item.size) if item.size is not None else None)
                 cancel_totals[key] = cancel_totals.get(key, 0) + max(0, item.quantity or 0)
             
-            for (item_uid, item_size), total_cancelled in cancel_totals.items():
+            for line, ((item_uid, item_size), total_cancelled) in enumerate(cancel_totals.items()):
                 if total_cancelled <= 0:
                     continue
-                normalized_cancel_size = self._normalize_size(item_size)
+                normalized_cancel_size = normalize_size(item_size)
                 
                 # Find matching purchase tracker record(s)
-                matching_records = self.db.query(PurchaseTracker).join(
-                    OASourcing, PurchaseTracker.oa_sourcing_id == OASourcing.id
-                ).outerjoin(
-                    AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                ).filter(
-                    and_(
-                        PurchaseTracker.order_number == cancellation_data.order_number,
-                        OASourcing.unique_id == item_uid
-                    )
-                ).all()
+                matching_records = self.item_matcher.match_unique_id(cancellation_data.order_number, item_uid)
                 
                 if not matching_records:
-                    matching_records = self.db.query(PurchaseTracker).join(
-                        AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                    ).filter(
-                        and_(
-                            PurchaseTracker.order_number == cancellation_data.order_number,
-                            or_(
-                                AsinBank.size == item_size,
-                                AsinBank.size == normalized_cancel_size
-                            )
-                        )
-                    ).all()
-                
-                if not matching_records:
-                    all_order_records = self.db.query(PurchaseTracker).join(
-                        AsinBank, PurchaseTracker.asin_bank_id == AsinBank.id
-                    ).filter(
-                        PurchaseTracker.order_number == cancellation_data.order_number
-                    ).all()
-                    for record in all_order_records:
-                        db_size = record.asin_bank_ref.size if record.asin_bank_ref else None
-                        if db_size and self._normalize_size(db_size) == normalized_cancel_size:
-                            matching_records.append(record)
+                    matching_records = self.item_matcher.match_order_size(
+                        order_number=cancellation_data.order_number,
+                        size=item_size,
+                    )
                 
                 if not matching_records:
                     logger.warning(
@@ -4494,10 +3930,16 @@ class RetailerOrderUpdateProcessor:
                 # Each email shows cumulative state: SET cancelled_qty = total from email
                 # Use max() to handle out-of-order email delivery
                 for record in matching_records:
+                    lock_record(self.db, record)
                     og_qty = max(0, record.og_qty or 0)
                     current_cancelled = record.cancelled_qty or 0
                     # Email shows cumulative cancelled; take max for out-of-order safety
                     new_cancelled = min(og_qty, max(current_cancelled, total_cancelled))
+                    if not self._claim_fulfillment_event(
+                        message_id, EVENT_CANCELLATION, record, line, new_cancelled - current_cancelled,
+                        cancellation_data.order_number, unique_id=item_uid, size=item_size
+                    ):
+                        continue
                     record.cancelled_qty = new_cancelled
                     record.final_qty = max(0, og_qty - new_cancelled)
                     self._recalculate_status_and_location(record)
@@ -4520,75 +3962,88 @@ class RetailerOrderUpdateProcessor:
             logger.error(error_msg, exc_info=True)
             return (False, error_msg)
     
+    def _list_unprocessed_message_ids(self, query: str, email_type: str, max_results: int) -> List[str]:
+        """
+        Search Gmail for update emails the processed-message registry does not have yet.
+        
+        Processed, failed and manual-review messages are all skipped, as the
+        -label: exclusions of the search queries used to do.
+        
+        Args:
+            query: Gmail search query (sender / subject)
+            email_type: 'shipping' or 'cancellation'
+            max_results: Maximum number of message IDs
+        """
+        return processed_messages.list_unprocessed_message_ids(
+            self.db, self.gmail_service, query, email_type, max_results
+        )
+    
+    def _start_message(self, message_id: str, retailer: Optional[str]) -> None:
+        """Remember the retailer and start time of a message for its registry row."""
+        self._message_context[message_id] = (retailer, datetime.utcnow())
+    
+    def _record_message(self, message_id: str, email_type: str, status: str, error: Optional[str] = None) -> None:
+        """Record the outcome of a message in the processed-message registry."""
+        retailer, started_at = self._message_context.pop(message_id, (None, None))
+        processed_messages.record(
+            self.db, message_id, email_type, status,
+            retailer=retailer, error=error, started_at=started_at
+        )
+    
     def _add_processed_label(self, message_id: str, email_type: str = 'shipping') -> None:
-        """Add type-specific Processed label and remove Error/Manual-Review if present.
+        """Record a message as processed and queue the type-specific Processed label (removing Error/Manual-Review).
         
         Args:
             message_id: Gmail message ID
             email_type: 'shipping' or 'cancellation'
         """
+        self._record_message(message_id, email_type, processed_messages.STATUS_PROCESSED)
         if email_type == 'cancellation':
             label = self.cancel_processed_label
             error_label = self.cancel_error_label
             manual_label = self.cancel_manual_review_label
-            label_name = self.CANCEL_PROCESSED_LABEL
         else:
             label = self.shipping_processed_label
             error_label = self.shipping_error_label
             manual_label = self.shipping_manual_review_label
-            label_name = self.SHIPPING_PROCESSED_LABEL
-        try:
-            self.gmail_service.add_label_to_message(message_id, label['id'])
-            logger.debug(f"Added {label_name} label to message {message_id}")
-            # Remove error/manual-review labels if present
-            if error_label:
-                self.gmail_service.remove_label_from_message(message_id, error_label['id'])
-            if manual_label:
-                self.gmail_service.remove_label_from_message(message_id, manual_label['id'])
-        except Exception as e:
-            logger.error(f"Failed to add processed label to message {message_id}: {e}")
+        get_gmail_labeler().submit(
+            message_id,
+            add_label_ids=[label['id']] if label else None,
+            remove_label_ids=[l['id'] for l in (error_label, manual_label) if l]
+        )
     
-    def _add_error_label(self, message_id: str, email_type: str = 'shipping') -> None:
-        """Add type-specific Error label.
+    def _add_error_label(self, message_id: str, email_type: str = 'shipping', error: Optional[str] = None) -> None:
+        """Record a message as failed and queue the type-specific Error label.
         
         Args:
             message_id: Gmail message ID
             email_type: 'shipping' or 'cancellation'
+            error: Why processing failed, for the registry
         """
-        if email_type == 'cancellation':
-            label = self.cancel_error_label
-            label_name = self.CANCEL_ERROR_LABEL
-        else:
-            label = self.shipping_error_label
-            label_name = self.SHIPPING_ERROR_LABEL
-        try:
-            self.gmail_service.add_label_to_message(message_id, label['id'])
-            logger.debug(f"Added {label_name} label to message {message_id}")
-        except Exception as e:
-            logger.error(f"Failed to add error label to message {message_id}: {e}")
+        self._record_message(message_id, email_type, processed_messages.STATUS_ERROR, error=error)
+        label = self.cancel_error_label if email_type == 'cancellation' else self.shipping_error_label
+        if label:
+            get_gmail_labeler().submit(message_id, add_label_ids=[label['id']])
     
     def _add_manual_review_label(self, message_id: str, email_type: str = 'shipping') -> None:
-        """Add type-specific Manual-Review label and remove Error if present.
+        """Record a message as queued for manual review and queue the type-specific Manual-Review label (removing Error).
         
         Args:
             message_id: Gmail message ID
             email_type: 'shipping' or 'cancellation'
         """
+        self._record_message(message_id, email_type, processed_messages.STATUS_MANUAL_REVIEW)
         if email_type == 'cancellation':
             label = self.cancel_manual_review_label
             error_label = self.cancel_error_label
-            label_name = self.CANCEL_MANUAL_REVIEW_LABEL
         else:
             label = self.shipping_manual_review_label
             error_label = self.shipping_error_label
-            label_name = self.SHIPPING_MANUAL_REVIEW_LABEL
-        try:
-            self.gmail_service.add_label_to_message(message_id, label['id'])
-            logger.debug(f"Added {label_name} label to message {message_id}")
-            if error_label:
-                self.gmail_service.remove_label_from_message(message_id, error_label['id'])
-        except Exception as e:
-            logger.error(f"Failed to add manual review label to message {message_id}: {e}")
+        get_gmail_labeler().submit(
+            message_id,
+            add_label_ids=[label['id']] if label else None,
+            remove_label_ids=[error_label['id']] if error_label else None
+        )
     
     def _check_and_notify_gift_card_cancellation(self, order_number: str) -> None:
         """
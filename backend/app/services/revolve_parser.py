@@ -160,7 +160,7 @@ class RevolveEmailParser:
 
     def is_revolve_email(self, email_data: EmailData) -> bool:
         """Check if email is from Revolve (order, shipping, or cancellation)."""
-        sender_lower = email_data.sender.lower()
+        sender_lower = email_data.document.sender_lower
         
         # In development, check for forwarded emails from dev email address
         if self.settings.is_development:
@@ -177,7 +177,7 @@ class RevolveEmailParser:
 
     def is_order_confirmation_email(self, email_data: EmailData) -> bool:
         """Check if email is an order confirmation"""
-        subject_lower = email_data.subject.lower()
+        subject_lower = email_data.document.subject_lower
         pattern = self.order_subject_pattern
         
         # Use regex matching for subject pattern
@@ -187,7 +187,7 @@ class RevolveEmailParser:
         """Check if email is a shipping notification (full or partial)."""
         if not self.is_revolve_email(email_data):
             return False
-        subject_lower = email_data.subject.lower()
+        subject_lower = email_data.document.subject_lower
         # Full: "Your order #XXX has been shipped"
         if re.search(self.SUBJECT_SHIPPING_FULL_PATTERN, subject_lower, re.IGNORECASE):
             return True
@@ -205,7 +205,7 @@ class RevolveEmailParser:
         """Check if email is a cancellation notification (type 1 or 2)."""
         if not self.is_revolve_email(email_data):
             return False
-        subject_lower = email_data.subject.lower()
+        subject_lower = email_data.document.subject_lower
         if re.search(self.SUBJECT_CANCEL_PATTERN, subject_lower, re.IGNORECASE):
             return True
         if re.search(self.SUBJECT_CANCEL_OUTOFSTOCK_PATTERN, subject_lower, re.IGNORECASE):
@@ -229,7 +229,7 @@ class RevolveEmailParser:
                 logger.error("No HTML content in Revolve email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Extract order number from subject
             order_number = self._extract_order_number(email_data.subject)
@@ -282,7 +282,7 @@ class RevolveEmailParser:
                 logger.error("No HTML content in Revolve shipping email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Order number from subject
             order_number = self._extract_order_number(email_data.subject)
@@ -339,7 +339,7 @@ class RevolveEmailParser:
                 logger.error("No HTML content in Revolve cancellation email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Order number from body (type 1 has "order #341221096"; type 2 does not)
             order_number = self._extract_order_number_from_html(soup, html_content)
@@ -383,7 +383,7 @@ class RevolveEmailParser:
             html_content = email_data.html_content
             if not html_content:
                 return None
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             order_number = self._extract_order_number_from_html(soup, html_content)
             items = self._extract_items(soup)
             items_with_uid = [i for i in items if i.unique_id]
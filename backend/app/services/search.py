@@ -0,0 +1,73 @@
+"""
+Substring and full-text search for the list endpoint filters.
+
+The listing filters (product name, order number, ASIN, lead ID, retailer
+name) are "contains" searches. contains() builds the ILIKE '%term%'
+criterion; on PostgreSQL the pg_trgm GIN indexes declared on the models
+(migrations/add_search_indexes.sql) serve it for terms of 3+ characters, so
+search-as-you-type does not scan the table.
+
+Product names can also be searched word by word with PostgreSQL full-text
+search (search_mode="fulltext"): product_name_matches() / product_name_rank()
+use the to_tsvector expression index on oa_sourcing.product_name.
+"""
+
+from typing import Optional
+
+from sqlalchemy import func, literal_column
+from sqlalchemy.sql.elements import ColumnElement
+
+# search_mode values accepted by the product name filters
+SEARCH_MODES = ("contains", "fulltext")
+
+# Text search configuration of the product name index: 'simple' lower-cases
+# without stemming or stop words (brand and model names are not English prose).
+# _product_name_tsvector() must build the expression of idx_oa_sourcing_product_name_fts
+# (app/models/database.py) for the index to be used.
+TEXT_SEARCH_CONFIG = "simple"
+
+_LIKE_ESCAPE = "\\"
+
+
+def escape_like(term: str) -> str:
+    """Escape LIKE wildcards so % and _ in user input match literally."""
+    return (
+        term.replace(_LIKE_ESCAPE, _LIKE_ESCAPE * 2)
+        .replace("%", _LIKE_ESCAPE + "%")
+        .replace("_", _LIKE_ESCAPE + "_")
+    )
+
+
+def contains(column, term: str) -> ColumnElement:
+    """Case-insensitive "column contains term" (trigram-indexed ILIKE)."""
+    return column.ilike(f"%{escape_like(term.strip())}%", escape=_LIKE_ESCAPE)
+
+
+def _config():
+    return literal_column(f"'{TEXT_SEARCH_CONFIG}'::regconfig")
+
+
+def _product_name_tsvector(column):
+    return func.to_tsvector(_config(), func.coalesce(column, literal_column("''::character varying")))
+
+
+def _tsquery(term: str):
+    # websearch syntax: words are ANDed, "quoted phrases", -excluded, or
+    return func.websearch_to_tsquery(_config(), term)
+
+
+def product_name_matches(column, term: str) -> ColumnElement:
+    """Full-text match of every word of term against column (oa_sourcing.product_name)."""
+    return _product_name_tsvector(column).op("@@")(_tsquery(term))
+
+
+def product_name_rank(column, term: str) -> ColumnElement:
+    """ts_rank of column against term, for ordering full-text results best match first."""
+    return func.ts_rank(_product_name_tsvector(column), _tsquery(term))
+
+
+def product_name_filter(column, term: str, search_mode: Optional[str] = "contains") -> ColumnElement:
+    """Product name criterion for search_mode ("contains" or "fulltext")."""
+    if search_mode == "fulltext":
+        return product_name_matches(column, term)
+    return contains(column, term)
@@ -132,12 +132,12 @@ class ShoepalaceEmailParser:
         to contain "shoepalace" or "shopifyemail" to avoid claiming other retailers'
         forwarded emails (Footlocker, Champs, Snipes, etc.).
         """
-        sender_lower = email_data.sender.lower()
+        sender_lower = email_data.document.sender_lower
         
         # In development, check for forwarded emails from dev email address
         if self.settings.is_development:
             if self.DEV_SHOEPALACE_ORDER_FROM_EMAIL.lower() in sender_lower:
-                html = (email_data.html_content or "").lower()
+                html = email_data.document.html_lower
                 # Shoe Palace uses Shopify (shopifyemail) and has shoepalace branding
                 if "shoepalace" in html or "shopifyemail" in html:
                     return True
@@ -160,7 +160,7 @@ class ShoepalaceEmailParser:
         """Check if email is a Shoe Palace shipping notification."""
         if not self.is_shoepalace_email(email_data):
             return False
-        subject_lower = (email_data.subject or "").lower()
+        subject_lower = email_data.document.subject_lower
         if re.search(r"shipment.*on the way", subject_lower, re.IGNORECASE):
             return True
         if self.settings.is_development and re.search(self.DEV_SUBJECT_SHIPPING_PATTERN, subject_lower, re.IGNORECASE):
@@ -173,7 +173,7 @@ class ShoepalaceEmailParser:
         if not self.is_shoepalace_email(email_data):
             return False
         
-        subject_lower = email_data.subject.lower()
+        subject_lower = email_data.document.subject_lower
         pattern = self.order_subject_pattern
         
         # Use regex matching for subject pattern
@@ -198,7 +198,7 @@ class ShoepalaceEmailParser:
         if not self.is_shoepalace_email(email_data):
             return False
         
-        subject_lower = email_data.subject.lower()
+        subject_lower = email_data.document.subject_lower
         
         # Check subject pattern
         if re.search(self.SUBJECT_CANCELLATION_PATTERN, subject_lower, re.IGNORECASE):
@@ -206,7 +206,7 @@ class ShoepalaceEmailParser:
         
         # Also check body text for cancellation indicators
         if email_data.html_content:
-            html_lower = email_data.html_content.lower()
+            html_lower = email_data.document.html_lower
             if any(phrase in html_lower for phrase in [
                 "order cancelation notification",
                 "order cancellation notification",
@@ -257,7 +257,7 @@ class ShoepalaceEmailParser:
                 logger.error("No HTML content in Shoe Palace email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Extract order number from subject first, then try body as fallback
             order_number = self._extract_order_number(email_data.subject)
@@ -308,7 +308,7 @@ class ShoepalaceEmailParser:
                 logger.error("No HTML content in Shoe Palace shipping email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             order_number = self._extract_shipping_order_number(email_data.subject)
             if not order_number:
@@ -345,14 +345,14 @@ class ShoepalaceEmailParser:
         (use parse_cancellation_email_partial - unique_id from email doesn't match purchase tracker).
         """
         try:
-            subject = (email_data.subject or "").lower()
+            subject = email_data.document.subject_lower
             if re.search(self.SUBJECT_CANCELLATION_ITEMS_PATTERN, subject):
                 return None  # Use parse_cancellation_email_partial - no usable unique_id in email
             html_content = email_data.html_content
             if not html_content:
                 logger.error("No HTML content in Shoe Palace cancellation email")
                 return None
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             order_number = self._extract_cancellation_order_number(soup)
             if not order_number:
                 logger.error("Failed to extract order number from Shoe Palace cancellation email")
@@ -379,7 +379,7 @@ class ShoepalaceEmailParser:
             subject = email_data.subject or ""
             if not html_content:
                 return None
-            soup = BeautifulSoup(html_content, "lxml")
+            soup = email_data.document.soup
             order_number = self._extract_cancellation_order_number(soup)
             if not order_number:
                 return None
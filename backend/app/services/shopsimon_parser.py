@@ -93,7 +93,7 @@ class ShopSimonEmailParser:
 
     def is_shopsimon_email(self, email_data: EmailData) -> bool:
         """Check if email is from ShopSimon"""
-        sender_lower = email_data.sender.lower()
+        sender_lower = email_data.document.sender_lower
         
         # In development, check for forwarded emails from dev email address
         if self.settings.is_development:
@@ -105,7 +105,7 @@ class ShopSimonEmailParser:
 
     def is_order_confirmation_email(self, email_data: EmailData) -> bool:
         """Check if email is an order confirmation"""
-        subject_lower = email_data.subject.lower()
+        subject_lower = email_data.document.subject_lower
         pattern = self.order_subject_pattern
         
         # Use regex matching for subject pattern
@@ -128,7 +128,7 @@ class ShopSimonEmailParser:
                 logger.error("No HTML content in ShopSimon email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Extract order number from subject
             order_number = self._extract_order_number(email_data.subject, soup)
@@ -160,12 +160,12 @@ class ShopWSSEmailParser:
         to contain "shopwss" to uniquely filter ShopWSS and avoid claiming other
         retailers' forwarded emails.
         """
-        sender_lower = email_data.sender.lower()
+        sender_lower = email_data.document.sender_lower
         
         # In development, check for forwarded emails from dev email address
         if self.settings.is_development:
             if self.DEV_SHOPWSS_ORDER_FROM_EMAIL.lower() in sender_lower:
-                html = (email_data.html_content or "").lower()
+                html = email_data.document.html_lower
                 if "shopwss" in html:
                     return True
                 return False
@@ -181,7 +181,7 @@ class ShopWSSEmailParser:
         """Check if email is a ShopWSS shipping notification."""
         if not self.is_shopwss_email(email_data):
             return False
-        subject_lower = (email_data.subject or "").lower()
+        subject_lower = email_data.document.subject_lower
         if re.search(r"is\s+about\s+to\s+ship", subject_lower, re.IGNORECASE):
             return True
         if re.search(r"partially\s+shipped|order\s+.*\s+shipped", subject_lower, re.IGNORECASE):
@@ -194,7 +194,7 @@ class ShopWSSEmailParser:
         """Check if email is a ShopWSS cancellation notification."""
         if not self.is_shopwss_email(email_data):
             return False
-        subject_lower = (email_data.subject or "").lower()
+        subject_lower = email_data.document.subject_lower
         if re.search(r"has\s+been\s+cancel(?:l)?ed", subject_lower, re.IGNORECASE):
             return True
         if re.search(self.SUBJECT_PARTIAL_CANCEL_PATTERN, subject_lower):
@@ -225,7 +225,7 @@ class ShopWSSEmailParser:
                 logger.error("No HTML content in ShopWSS email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Extract order number from subject or HTML
             order_number = self._extract_order_number(email_data.subject, soup)
@@ -275,7 +275,7 @@ class ShopWSSEmailParser:
                 logger.error("No HTML content in ShopWSS shipping email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             order_number = self._extract_shipping_order_number(email_data.subject, soup)
             if not order_number:
@@ -311,7 +311,7 @@ class ShopWSSEmailParser:
         Do NOT use for partial cancellation ("Cancelled Order Notification") - that uses parse_cancellation_email_partial.
         """
         try:
-            subject = (email_data.subject or "").lower()
+            subject = email_data.document.subject_lower
             if re.search(self.SUBJECT_PARTIAL_CANCEL_PATTERN, subject):
                 return None  # Partial cancellation - use parse_cancellation_email_partial instead
             html_content = email_data.html_content
@@ -349,7 +349,7 @@ class ShopWSSEmailParser:
             subject = email_data.subject or ""
             if not html_content:
                 return None
-            soup = BeautifulSoup(html_content, "lxml")
+            soup = email_data.document.soup
             text = soup.get_text()
             match = re.search(r"Order\s+#?\s*(\d+)\s+Order\s+Date", text, re.IGNORECASE)
             if not match:
@@ -1,6 +1,7 @@
 """
 Sneaker Politics Email Parser
-Parses order confirmation emails from Sneaker Politics using BeautifulSoup
+Parses order confirmation emails from Sneaker Politics using precompiled
+lxml XPath extraction specs (app.services.extraction_spec)
 
 Email Format:
 - From: store+2147974@t.shopifyemail.com (production)
@@ -26,10 +27,10 @@ Unique ID Extraction:
 import re
 import logging
 from typing import List, Optional
-from bs4 import BeautifulSoup
 from pydantic import BaseModel, Field
 
 from app.models.email import EmailData
+from app.services.extraction_spec import ExtractionSpec, FieldSpec, ItemSpec
 from app.utils.address_utils import normalize_shipping_address
 from app.config.settings import get_settings
 
@@ -69,6 +70,40 @@ class SneakerPoliticsEmailParser:
     # Email identification - Development (forwarded emails)
     DEV_SNEAKER_ORDER_FROM_EMAIL = "glenallagroupc@gmail.com"
     DEV_SUBJECT_ORDER_PATTERN = r"(?:Fwd:\s*)?(?:order\s+confirmation|order|sneaker\s+politics|sneaker)"
+    
+    # Order confirmation (Shopify notification template). Product rows hold a
+    # cdn.shopify.com image, a "Name × qty" span (font-size:16px;font-weight:600)
+    # and a size span (color:#999); rows are deduplicated by image + size.
+    ORDER_SPEC = ExtractionSpec(
+        fields={
+            "order_number": FieldSpec(
+                "//span[re:test(., 'Order\\s+#\\s*\\d+', 'i')]",
+                "//text()[re:test(., 'Order\\s+#', 'i')]",
+                pattern=r'Order\s+#\s*(\d+)', flags=re.IGNORECASE, strip=False,
+            ),
+            "shipping_address": FieldSpec(
+                "//h4[re:test(., 'Shipping\\s+address', 'i')]/ancestor::*[self::td or self::tr][1]//p",
+                separator=" ",
+            ),
+        },
+        items=ItemSpec(
+            anchors=(
+                "//img[re:test(@src, 'cdn\\.shopify\\.com.*(?:files|products)')"
+                " and not(re:test(@src, 'logo|spacer|icon|arrow|facebook|twitter|instagram|discounttag', 'i'))]"
+            ),
+            scope=("ancestor::tr[1]", "ancestor::td[1]"),
+            where="re:test(string(.), '×\\s*\\d+|\\b[WM]?\\d+(?:\\.\\d+)?\\b')",
+            fields={
+                "anchor": FieldSpec("$anchor/@src"),
+                "image": FieldSpec(".//img[re:test(@src, 'cdn\\.shopify\\.com')]/@src"),
+                "name": FieldSpec(".//span[contains(@style, 'font-size:16px') and contains(@style, 'font-weight:600') and contains(., '×')]"),
+                "size": FieldSpec(".//span[contains(@style, 'color:#999')]", pattern=r'^(?=.{1,9}$)[WM]?\d+(?:\.\d+)?$', group=0),
+            },
+            unique=("anchor", "size"),
+        ),
+    )
+    QUANTITY = re.compile(r'×\s*(\d+)')
+    QUANTITY_SUFFIX = re.compile(r'\s*×\s*\d+\s*$')
 
     def __init__(self):
         """Initialize the Sneaker Politics email parser."""
@@ -105,8 +140,8 @@ class SneakerPoliticsEmailParser:
         Returns:
             True if the email is from Sneaker Politics, False otherwise
         """
-        sender_lower = email_data.sender.lower()
-        subject = email_data.subject.lower() if email_data.subject else ""
+        sender_lower = email_data.document.sender_lower
+        subject = email_data.document.subject_lower if email_data.subject else ""
         
         # Check production email
         if self.SNEAKER_FROM_EMAIL.lower() in sender_lower:
@@ -132,7 +167,7 @@ class SneakerPoliticsEmailParser:
         if not self.is_sneaker_email(email_data):
             return False
         
-        subject = email_data.subject.lower() if email_data.subject else ""
+        subject = email_data.document.subject_lower if email_data.subject else ""
         
         # Check subject pattern
         if re.search(self.order_subject_pattern, subject, re.IGNORECASE):
@@ -140,7 +175,7 @@ class SneakerPoliticsEmailParser:
         
         # Also check HTML content for order confirmation indicators
         if email_data.html_content:
-            html_lower = email_data.html_content.lower()
+            html_lower = email_data.document.html_lower
             if "order confirmation" in html_lower or "order #" in html_lower or "sneaker politics" in html_lower:
                 return True
         
@@ -199,26 +234,22 @@ class SneakerPoliticsEmailParser:
             logger.error(f"Error extracting unique ID from image URL: {e}", exc_info=True)
             return None
     
-    def _extract_sneaker_product_details(self, product_row) -> Optional[SneakerOrderItem]:
+    def _build_item(self, record: dict) -> Optional[SneakerOrderItem]:
         """
-        Extract product details from a Sneaker Politics product row.
+        Build an order item from an ORDER_SPEC item record.
         
         Args:
-            product_row: BeautifulSoup element containing product information
+            record: Values extracted for one product row
         
         Returns:
             SneakerOrderItem object or None
         """
         try:
-            # Find product image
-            img = product_row.find('img', src=re.compile(r'cdn\.shopify\.com'))
-            
-            if not img:
+            img_src = record["image"]
+            if not img_src:
                 logger.warning("Could not find product image")
                 return None
             
-            img_src = img.get('src', '')
-            
             # Extract unique ID from image URL
             unique_id = self._extract_unique_id_from_image_url(img_src)
             
@@ -226,54 +257,19 @@ class SneakerPoliticsEmailParser:
                 logger.warning(f"Could not extract unique ID from image: {img_src[:100]}")
                 return None
             
-            # Find product name - look for span with font-size:16px and font-weight:600
-            # The style can be in any order: "font-size:16px;font-weight:600" or "font-weight:600;font-size:16px"
+            # Product name format: "Nike Killshot 2 - Black/White × 2" (quantity after ×)
             product_name = None
-            product_name_span = None
-            
-            # Try multiple patterns to find product name span
-            spans = product_row.find_all('span')
-            for span in spans:
-                style = span.get('style', '')
-                if 'font-size:16px' in style and 'font-weight:600' in style:
-                    span_text = span.get_text(strip=True)
-                    # Check if it contains the product name pattern (has × symbol)
-                    if '×' in span_text:
-                        product_name_span = span
-                        break
-            
-            if product_name_span:
-                raw_product_name = product_name_span.get_text(strip=True)
-                # Extract product name and quantity
-                # Format: "Nike Killshot 2 - Black/White × 2"
-                # Remove quantity part (× 2 or × 1)
-                product_name = re.sub(r'\s*×\s*\d+\s*$', '', raw_product_name).strip()
-            
-            # Find size - look for span with color:#999
-            size = None
-            size_spans = product_row.find_all('span', style=re.compile(r'color:#999'))
-            for span in size_spans:
-                span_text = span.get_text(strip=True)
-                # Size is typically a number or number with decimal (e.g., "9", "9.5", "W8")
-                # Exclude discount/spacer text
-                if re.match(r'^[WM]?\d+(?:\.\d+)?$', span_text) and len(span_text) < 10:
-                    size = span_text
-                    break
-            
-            if not size:
-                size = "Unknown"
-            
-            # Find quantity - extract from product name if available, otherwise default to 1
             quantity = 1
-            if product_name_span:
-                raw_product_name = product_name_span.get_text(strip=True)
-                qty_match = re.search(r'×\s*(\d+)', raw_product_name)
+            raw_product_name = record["name"]
+            if raw_product_name:
+                product_name = self.QUANTITY_SUFFIX.sub('', raw_product_name).strip()
+                qty_match = self.QUANTITY.search(raw_product_name)
                 if qty_match:
                     quantity = int(qty_match.group(1))
             
             return SneakerOrderItem(
                 unique_id=unique_id,
-                size=size,
+                size=record["size"] or "Unknown",
                 quantity=quantity,
                 product_name=product_name
             )
@@ -282,173 +278,6 @@ class SneakerPoliticsEmailParser:
             logger.error(f"Error extracting Sneaker Politics product details: {e}", exc_info=True)
             return None
     
-    def _extract_order_number(self, soup: BeautifulSoup) -> Optional[str]:
-        """
-        Extract order number from HTML.
-        
-        Args:
-            soup: BeautifulSoup object
-        
-        Returns:
-            Order number string or None
-        """
-        try:
-            # Look for "Order #" followed by number
-            # Format: <span style="font-size:16px"> Order #536510 </span>
-            order_spans = soup.find_all('span', string=re.compile(r'Order\s+#\s*\d+', re.IGNORECASE))
-            
-            for span in order_spans:
-                text = span.get_text()
-                match = re.search(r'Order\s+#\s*(\d+)', text, re.IGNORECASE)
-                if match:
-                    order_number = match.group(1)
-                    logger.debug(f"Extracted order number: {order_number}")
-                    return order_number
-            
-            # Fallback: Look for text containing "Order #"
-            order_text = soup.find(string=re.compile(r'Order\s+#', re.IGNORECASE))
-            if order_text:
-                match = re.search(r'Order\s+#\s*(\d+)', order_text, re.IGNORECASE)
-                if match:
-                    order_number = match.group(1)
-                    logger.debug(f"Extracted order number (fallback): {order_number}")
-                    return order_number
-            
-            logger.warning("Could not extract order number")
-            return None
-            
-        except Exception as e:
-            logger.error(f"Error extracting order number: {e}", exc_info=True)
-            return None
-    
-    def _extract_products(self, soup: BeautifulSoup) -> List[SneakerOrderItem]:
-        """
-        Extract products from HTML.
-        
-        Args:
-            soup: BeautifulSoup object
-        
-        Returns:
-            List of SneakerOrderItem objects
-        """
-        items = []
-        
-        try:
-            # Find all product images from shopify
-            product_images = soup.find_all('img', src=re.compile(r'cdn\.shopify\.com.*(?:files|products)'))
-            
-            logger.debug(f"Found {len(product_images)} Shopify images")
-            
-            seen_products = set()
-            
-            for img in product_images:
-                # Exclude non-product images
-                img_src = img.get('src', '')
-                if any(exclude in img_src.lower() for exclude in ['logo', 'spacer', 'icon', 'arrow', 'facebook', 'twitter', 'instagram', 'discounttag']):
-                    logger.debug(f"Skipping non-product image: {img_src[:100]}")
-                    continue
-                
-                # Check if this is a product image (has product name nearby)
-                parent = img.find_parent(['td', 'tr'])
-                if not parent:
-                    logger.debug(f"No parent found for image: {img_src[:100]}")
-                    continue
-                
-                # Find the containing table row
-                product_row = img.find_parent('tr')
-                if not product_row:
-                    product_row = parent.find_parent('tr')
-                if not product_row:
-                    product_row = parent
-                
-                # Check if this row contains product information
-                # Look for product name span with × symbol or size span
-                row_text = product_row.get_text()
-                has_product_name = bool(re.search(r'×\s*\d+', row_text))
-                has_size = bool(re.search(r'\b[WM]?\d+(?:\.\d+)?\b', row_text))
-                
-                if not (has_product_name or has_size):
-                    logger.debug(f"No product indicators found in row text for image: {img_src[:100]}")
-                    continue
-                
-                logger.debug(f"Processing product image: {img_src[:100]}")
-                
-                # Try to extract size from nearby spans for uniqueness
-                size_key = "unknown"
-                size_spans = product_row.find_all('span', style=re.compile(r'color:#999'))
-                for span in size_spans:
-                    span_text = span.get_text(strip=True)
-                    if re.match(r'^[WM]?\d+(?:\.\d+)?$', span_text) and len(span_text) < 10:
-                        size_key = span_text
-                        break
-                
-                product_id = f"{img_src}_{size_key}"
-                
-                if product_id in seen_products:
-                    continue
-                seen_products.add(product_id)
-                
-                try:
-                    # Extract product details from the product row
-                    product_details = self._extract_sneaker_product_details(product_row)
-                    
-                    if product_details:
-                        items.append(product_details)
-                        logger.debug(f"Successfully extracted product: {product_details.product_name}, unique_id: {product_details.unique_id}")
-                    else:
-                        logger.debug(f"Failed to extract product details from row")
-                
-                except Exception as e:
-                    logger.error(f"Error extracting product details: {e}", exc_info=True)
-                    import traceback
-                    logger.debug(traceback.format_exc())
-                    continue
-            
-            logger.info(f"Extracted {len(items)} products from Sneaker Politics email")
-            return items
-            
-        except Exception as e:
-            logger.error(f"Error extracting Sneaker Politics products: {e}", exc_info=True)
-            return []
-    
-    def _extract_shipping_address(self, soup: BeautifulSoup) -> str:
-        """
-        Extract shipping address from HTML.
-        
-        Args:
-            soup: BeautifulSoup object
-        
-        Returns:
-            Normalized shipping address string
-        """
-        try:
-            # Look for "Shipping address" heading
-            shipping_heading = soup.find('h4', string=re.compile(r'Shipping\s+address', re.IGNORECASE))
-            
-            if shipping_heading:
-                # Find the parent table/row
-                parent = shipping_heading.find_parent(['td', 'tr'])
-                
-                if parent:
-                    # Look for paragraph containing address information
-                    address_p = parent.find('p')
-                    
-                    if address_p:
-                        # Get text and clean it up
-                        address_text = address_p.get_text(separator=' ', strip=True)
-                        
-                        # Normalize the address
-                        normalized = normalize_shipping_address(address_text)
-                        logger.debug(f"Extracted shipping address: {normalized}")
-                        return normalized
-            
-            logger.warning("Could not extract shipping address")
-            return ""
-            
-        except Exception as e:
-            logger.error(f"Error extracting shipping address: {e}", exc_info=True)
-            return ""
-    
     def parse_email(self, email_data: EmailData) -> Optional[SneakerOrderData]:
         """
         Parse a Sneaker Politics order confirmation email.
@@ -466,22 +295,27 @@ class SneakerPoliticsEmailParser:
                 logger.warning("No HTML content found in email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'html.parser')
+            values = self.ORDER_SPEC.extract(email_data.document.tree)
             
             # Extract order number
-            order_number = self._extract_order_number(soup)
+            order_number = values["order_number"]
             if not order_number:
                 logger.warning("Could not extract order number")
                 return None
             
             # Extract products
-            items = self._extract_products(soup)
+            items = [item for item in map(self._build_item, values["items"]) if item]
+            logger.info(f"Extracted {len(items)} products from Sneaker Politics email")
             if not items:
                 logger.warning("Could not extract any products")
                 return None
             
             # Extract shipping address
-            shipping_address = self._extract_shipping_address(soup)
+            shipping_address = ""
+            if values["shipping_address"]:
+                shipping_address = normalize_shipping_address(values["shipping_address"])
+            else:
+                logger.warning("Could not extract shipping address")
             
             return SneakerOrderData(
                 order_number=order_number,
@@ -124,7 +124,7 @@ class SnipesEmailParser:
         - HTML contains "snipesusa" (Snipes branding)
         to avoid Snipes claiming other retailers' forwarded emails.
         """
-        sender_lower = email_data.sender.lower()
+        sender_lower = email_data.document.sender_lower
         
         # Production: direct from Snipes (order or shipping)
         if self.SNIPES_FROM_EMAIL.lower() in sender_lower:
@@ -136,11 +136,11 @@ class SnipesEmailParser:
         if self.settings.is_development:
             if self.DEV_SNIPES_ORDER_FROM_EMAIL.lower() not in sender_lower:
                 return False
-            subject = (email_data.subject or "").lower()
+            subject = email_data.document.subject_lower
             # Subject "Confirmation of Your SNIPES Order #SNP..." is Snipes-specific
             if "snipes order" in subject:
                 return True
-            html = (email_data.html_content or "").lower()
+            html = email_data.document.html_lower
             if "snipesusa" in html:
                 return True
             # Shipping subject "Get Hyped! Your Order Has Shipped" is Snipes-specific
@@ -179,12 +179,12 @@ class SnipesEmailParser:
 
     def is_shipping_email(self, email_data: EmailData) -> bool:
         """Check if email is a Snipes shipping notification."""
-        subject_lower = (email_data.subject or "").lower()
+        subject_lower = email_data.document.subject_lower
         return bool(re.search(self.SUBJECT_SHIPPING_PATTERN, subject_lower, re.IGNORECASE))
 
     def is_cancellation_email(self, email_data: EmailData) -> bool:
         """Check if email is a Snipes cancellation notification (partial or full)."""
-        subject_lower = (email_data.subject or "").lower()
+        subject_lower = email_data.document.subject_lower
         if re.search(self.SUBJECT_CANCELLATION_PATTERN, subject_lower, re.IGNORECASE):
             return True
         if re.search(self.SUBJECT_FULL_CANCELLATION_PATTERN, subject_lower, re.IGNORECASE):
@@ -193,7 +193,7 @@ class SnipesEmailParser:
 
     def is_full_cancellation_email(self, email_data: EmailData) -> bool:
         """Check if email is Snipes full cancellation (Update on Your SNIPES Order - no extractable data)."""
-        subject_lower = (email_data.subject or "").lower()
+        subject_lower = email_data.document.subject_lower
         return bool(re.search(self.SUBJECT_FULL_CANCELLATION_PATTERN, subject_lower, re.IGNORECASE))
 
     def parse_cancellation_email(self, email_data: EmailData) -> Optional[SnipesCancellationData]:
@@ -210,7 +210,7 @@ class SnipesEmailParser:
                 logger.error("No HTML content in Snipes cancellation email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             order_number = self._extract_shipping_order_number(soup)
             if not order_number:
@@ -242,7 +242,7 @@ class SnipesEmailParser:
                 logger.error("No HTML content in Snipes shipping email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             order_number = self._extract_shipping_order_number(soup)
             if not order_number:
@@ -366,7 +366,7 @@ class SnipesEmailParser:
 
     def is_order_confirmation_email(self, email_data: EmailData) -> bool:
         """Check if email is an order confirmation"""
-        subject_lower = (email_data.subject or "").lower()
+        subject_lower = email_data.document.subject_lower
         
         # Use environment-aware subject pattern
         if re.search(self.order_subject_pattern, subject_lower, re.IGNORECASE):
@@ -395,7 +395,7 @@ class SnipesEmailParser:
                 logger.error("No HTML content in Snipes email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Extract order number from subject, with fallback to HTML body
             order_number = self._extract_order_number(email_data.subject, soup)
@@ -104,7 +104,7 @@ class SNSEmailParser:
 
     def is_sns_email(self, email_data: EmailData) -> bool:
         """Check if email is from SNS"""
-        sender_lower = email_data.sender.lower()
+        sender_lower = email_data.document.sender_lower
         
         # In development, check for forwarded emails from dev email address
         if self.settings.is_development:
@@ -116,7 +116,7 @@ class SNSEmailParser:
 
     def is_order_confirmation_email(self, email_data: EmailData) -> bool:
         """Check if email is an order confirmation"""
-        subject_lower = email_data.subject.lower()
+        subject_lower = email_data.document.subject_lower
         pattern = self.order_subject_pattern
         
         # Use regex matching for subject pattern
@@ -125,7 +125,7 @@ class SNSEmailParser:
         
         # For forwarded emails in dev mode, also check HTML content for SNS confirmation indicators
         if self.settings.is_development and email_data.html_content:
-            html_lower = email_data.html_content.lower()
+            html_lower = email_data.document.html_lower
             # Check for "We've got your order" or order confirmation indicators
             has_confirmation_text = (
                 "we've got your order" in html_lower or
@@ -156,7 +156,7 @@ class SNSEmailParser:
                 logger.error("No HTML content in SNS email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Extract order number from HTML
             order_number = self._extract_order_number(soup)
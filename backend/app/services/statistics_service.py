@@ -0,0 +1,237 @@
+"""
+Dashboard statistics read from the trigger-maintained summary tables.
+
+The purchase tracker, check-in and retailer dashboards poll their summary
+endpoints. Those used to aggregate purchase_tracker, oa_sourcing, asin_bank
+and checkin on every call; the stats_* tables (migrations/
+create_statistics_tables.sql) are kept current by row triggers, so each
+summary is now a few primary-key or top-N index reads. The triggers append
+to insert-only delta tables, so every computation first folds the pending
+deltas into the summary tables (fold_statistics_deltas()).
+
+On top of that, results are cached per process for
+settings.statistics_cache_ttl_seconds, so concurrent dashboard polls share
+one read. refresh_statistics() rebuilds the tables from scratch (drift repair)
+and clears the cache.
+"""
+
+import logging
+import threading
+import time
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Tuple
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from app.config.settings import get_settings
+from app.models.database import (
+    Retailer,
+    StatsCheckinDay,
+    StatsCheckinOrder,
+    StatsCounter,
+    StatsPlatform,
+    StatsRetailer,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class StatisticsCache:
+    """
+    Per-process TTL cache of computed statistics, keyed by statistic name.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+
+    def get_or_compute(self, key: str, ttl_seconds: float, compute: Callable[[], Any]) -> Any:
+        """Cached value of `key` if younger than ttl_seconds, else compute() (and cache it)."""
+        with self.lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < ttl_seconds:
+                return entry[1]
+        value = compute()
+        with self.lock:
+            self._entries[key] = (time.monotonic(), value)
+        return value
+
+    def invalidate(self) -> None:
+        """Drop every cached statistic."""
+        with self.lock:
+            self._entries.clear()
+
+
+_cache = StatisticsCache()
+
+
+def _cached(key: str, compute: Callable[[], Any]) -> Any:
+    return _cache.get_or_compute(key, get_settings().statistics_cache_ttl_seconds, compute)
+
+
+def _fold_deltas(db: Session) -> None:
+    """
+    Add the pending trigger deltas to the summary tables, in a transaction of its own.
+
+    Skipped (not waited for) while another fold or a refresh is running.
+    """
+    db.execute(text("SELECT fold_statistics_deltas()"))
+    db.commit()
+
+
+def _counters(db: Session) -> Dict[str, float]:
+    """All stats_counter values (missing counters read as 0)."""
+    return {name: value for name, value in db.query(StatsCounter.name, StatsCounter.value).all()}
+
+
+def get_purchase_tracker_summary(db: Session) -> Dict[str, Any]:
+    """
+    Data of GET /purchase-tracker/statistics/summary
+    """
+    def compute():
+        _fold_deltas(db)
+        counters = _counters(db)
+        ppu_count = counters.get("ppu_count", 0)
+
+        top_platforms = db.query(StatsPlatform.platform, StatsPlatform.purchase_count)\
+            .filter(StatsPlatform.purchase_count > 0)\
+            .order_by(StatsPlatform.purchase_count.desc())\
+            .limit(5)\
+            .all()
+
+        top_brands = db.query(Retailer.name, StatsRetailer.purchase_count)\
+            .join(Retailer, Retailer.id == StatsRetailer.retailer_id)\
+            .filter(StatsRetailer.purchase_count > 0)\
+            .order_by(StatsRetailer.purchase_count.desc())\
+            .limit(5)\
+            .all()
+
+        return {
+            "total_leads": int(counters.get("leads", 0)),
+            "total_purchases": int(counters.get("purchases", 0)),
+            "total_asins_in_bank": int(counters.get("asins", 0)),
+            "total_spend": float(counters.get("total_spend", 0)),
+            "average_ppu": float(counters.get("ppu_sum", 0) / ppu_count) if ppu_count else 0,
+            "top_platforms": [{"platform": p, "count": c} for p, c in top_platforms if p],
+            "top_brands": [{"brand": b, "count": c} for b, c in top_brands if b]
+        }
+
+    return _cached("purchase_tracker_summary", compute)
+
+
+def get_statistics_by_retailer(db: Session) -> Dict[str, Any]:
+    """
+    Data of GET /purchase-tracker/statistics/by-retailer
+    """
+    def compute():
+        _fold_deltas(db)
+        stats = db.query(Retailer.id, Retailer.name, StatsRetailer)\
+            .join(Retailer, Retailer.id == StatsRetailer.retailer_id)\
+            .filter(StatsRetailer.lead_count > 0)\
+            .order_by(StatsRetailer.lead_count.desc())\
+            .all()
+
+        return {
+            "items": [
+                {
+                    "retailer_id": retailer_id,
+                    "retailer": retailer_name,
+                    "lead_count": row.lead_count,
+                    "avg_ppu": float(row.ppu_sum / row.ppu_count) if row.ppu_count and row.ppu_sum else None,
+                    "avg_margin": float(row.margin_sum / row.margin_count) if row.margin_count and row.margin_sum else None
+                }
+                for retailer_id, retailer_name, row in stats
+            ]
+        }
+
+    return _cached("statistics_by_retailer", compute)
+
+
+def get_checkin_summary(db: Session) -> Dict[str, Any]:
+    """
+    Data of GET /checkin/stats/summary
+    """
+    def compute():
+        _fold_deltas(db)
+        counters = _counters(db)
+        checkins_today = db.query(func.coalesce(func.sum(StatsCheckinDay.checkin_count), 0))\
+            .filter(StatsCheckinDay.day >= date.today())\
+            .scalar()
+
+        by_order = db.query(StatsCheckinOrder)\
+            .filter(StatsCheckinOrder.checkin_count > 0)\
+            .order_by(StatsCheckinOrder.total_quantity.desc())\
+            .limit(10)\
+            .all()
+
+        return {
+            "total_checkins": int(counters.get("checkins", 0)),
+            "total_quantity_checked_in": int(counters.get("checkin_quantity", 0)),
+            "checkins_today": int(checkins_today),
+            "top_orders": [
+                {
+                    "order_number": row.order_number,
+                    "total_quantity": int(row.total_quantity),
+                    "checkin_count": row.checkin_count
+                }
+                for row in by_order if row.order_number
+            ]
+        }
+
+    return _cached("checkin_summary", compute)
+
+
+def get_retailers_summary(db: Session) -> Dict[str, Any]:
+    """
+    Data of GET /retailers/stats/summary
+
+    Aggregates the retailers table itself (one row per retailer, so its size does
+    not grow with purchase history); only the TTL cache applies.
+    """
+    def compute():
+        totals = db.query(
+            func.count(Retailer.id),
+            func.coalesce(func.sum(Retailer.total_spend), 0.0),
+            func.coalesce(func.sum(Retailer.total_qty_of_items_ordered), 0),
+            func.count(Retailer.id).filter(Retailer.shopify == True)
+        ).one()
+        total_retailers, total_spend, total_items, shopify_count = totals
+
+        location_counts = db.query(Retailer.location, func.count(Retailer.id))\
+            .group_by(Retailer.location)\
+            .all()
+        wholesale_counts = db.query(Retailer.wholesale, func.count(Retailer.id))\
+            .group_by(Retailer.wholesale)\
+            .all()
+
+        return {
+            "total_retailers": total_retailers,
+            "total_spend": float(total_spend),
+            "total_items_ordered": int(total_items),
+            "by_location": {loc: count for loc, count in location_counts if loc},
+            "by_wholesale": {ws: count for ws, count in wholesale_counts if ws},
+            "shopify_count": shopify_count
+        }
+
+    return _cached("retailers_summary", compute)
+
+
+def refresh_statistics(db: Session) -> Dict[str, Any]:
+    """
+    Rebuild every stats_* table from the source tables (refresh_statistics() in SQL) and clear the cache.
+
+    Blocks writes to purchase_tracker, oa_sourcing, asin_bank and checkin until it commits.
+    """
+    started = time.perf_counter()
+    db.execute(text("SELECT refresh_statistics()"))
+    db.commit()
+    invalidate_statistics_cache()
+    elapsed = time.perf_counter() - started
+    logger.info(f"[STATISTICS] Summary tables rebuilt in {elapsed:.2f}s")
+    return {"refreshed_at": datetime.now().isoformat(), "duration_seconds": round(elapsed, 3)}
+
+
+def invalidate_statistics_cache() -> None:
+    """Make the next read of every statistic hit the database."""
+    _cache.invalidate()
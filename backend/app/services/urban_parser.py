@@ -153,7 +153,7 @@ class UrbanOutfittersEmailParser:
 
     def is_urban_email(self, email_data: EmailData) -> bool:
         """Check if email is from Urban Outfitters"""
-        sender_lower = email_data.sender.lower()
+        sender_lower = email_data.document.sender_lower
         
         # In development, check for forwarded emails from dev email address
         if self.settings.is_development:
@@ -180,7 +180,7 @@ class UrbanOutfittersEmailParser:
         if not self.is_urban_email(email_data):
             return False
         
-        subject_lower = email_data.subject.lower()
+        subject_lower = email_data.document.subject_lower
         # Exclude Revolve: "Your order #XXX has been processed"
         if re.search(r"your order\s+#\d+\s+has been processed", subject_lower, re.IGNORECASE):
             return False
@@ -193,7 +193,7 @@ class UrbanOutfittersEmailParser:
         
         # Also check body text for order confirmation indicators
         if email_data.html_content:
-            html_lower = email_data.html_content.lower()
+            html_lower = email_data.document.html_lower
             if any(phrase in html_lower for phrase in [
                 "order confirmation",
                 "thank you for your order",
@@ -219,7 +219,7 @@ class UrbanOutfittersEmailParser:
         if not self.is_urban_email(email_data):
             return False
         
-        subject_lower = email_data.subject.lower()
+        subject_lower = email_data.document.subject_lower
         
         # Check subject pattern
         if re.search(self.SUBJECT_CANCELLATION_PATTERN, subject_lower, re.IGNORECASE):
@@ -227,7 +227,7 @@ class UrbanOutfittersEmailParser:
         
         # Also check body text for cancellation indicators
         if email_data.html_content:
-            html_lower = email_data.html_content.lower()
+            html_lower = email_data.document.html_lower
             if any(phrase in html_lower for phrase in [
                 "cancellation notice",
                 "have been cancelled",
@@ -252,7 +252,7 @@ class UrbanOutfittersEmailParser:
         if not self.is_urban_email(email_data):
             return False
         
-        subject_lower = email_data.subject.lower()
+        subject_lower = email_data.document.subject_lower
         
         # Check subject pattern
         if re.search(self.SUBJECT_SHIPPING_PATTERN, subject_lower, re.IGNORECASE):
@@ -260,7 +260,7 @@ class UrbanOutfittersEmailParser:
         
         # Also check body text for shipping indicators
         if email_data.html_content:
-            html_lower = email_data.html_content.lower()
+            html_lower = email_data.document.html_lower
             if any(phrase in html_lower for phrase in [
                 "shipping confirmation",
                 "the below items shipped",
@@ -310,7 +310,7 @@ class UrbanOutfittersEmailParser:
                 logger.error("No HTML content in Urban Outfitters email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Extract order number from HTML
             order_number = self._extract_order_number(soup)
@@ -359,7 +359,7 @@ class UrbanOutfittersEmailParser:
                 logger.error("No HTML content in Urban Outfitters cancellation email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Extract order number
             order_number = self._extract_order_number(soup)
@@ -403,7 +403,7 @@ class UrbanOutfittersEmailParser:
                 logger.error("No HTML content in Urban Outfitters shipping email")
                 return None
             
-            soup = BeautifulSoup(html_content, 'lxml')
+            soup = email_data.document.soup
             
             # Extract order number
             order_number = self._extract_order_number(soup)
@@ -0,0 +1,28 @@
+-- Migration: Persisted normalized size on asin_bank
+-- Date: 2026-10-16
+-- Description: Adds asin_bank.size_normalized, generated by the database from normalize_size(size)
+--   ("11.0" -> "11", "09.5" -> "9.5", "09" -> "9"). Being a STORED generated column, existing rows
+--   are backfilled when the column is added and every INSERT/UPDATE of size keeps it in sync -
+--   including raw SQL imports that bypass the ORM.
+--
+--   PurchaseItemMatcher (app/services/purchase_item_matcher.py) matches email items against
+--   size OR size_normalized in a single query, replacing the second "normalized size" query.
+--
+-- Requires: add_order_matching_indexes.sql (creates normalize_size()).
+-- Adding the column rewrites asin_bank (ACCESS EXCLUSIVE lock for the duration).
+-- Safe to run multiple times.
+
+ALTER TABLE asin_bank
+    ADD COLUMN IF NOT EXISTS size_normalized VARCHAR(50)
+    GENERATED ALWAYS AS (normalize_size(size)) STORED;
+
+COMMENT ON COLUMN asin_bank.size_normalized IS 'normalize_size(size) - generated, used for size matching';
+
+CREATE INDEX IF NOT EXISTS idx_asin_bank_asin_size_normalized ON asin_bank(asin, size_normalized);
+CREATE INDEX IF NOT EXISTS idx_asin_bank_lead_id_size_normalized ON asin_bank(lead_id, size_normalized);
+
+-- Superseded by the size_normalized indexes above
+DROP INDEX IF EXISTS idx_asin_bank_asin_size_norm;
+DROP INDEX IF EXISTS idx_asin_bank_lead_id_size_norm;
+
+ANALYZE asin_bank;
@@ -0,0 +1,51 @@
+-- Migration: Indexes for the order-matching hot path
+-- Date: 2026-10-16
+-- Description: Every confirmation, shipping, cancellation and PrepWorx check-in email looks up
+--   purchase_tracker by order_number, oa_sourcing by unique_id and asin_bank by (asin, size) /
+--   (lead_id, size). None of those were indexed (except oa_sourcing.unique_id and asin_bank.asin
+--   on databases built from create_tables.sql), so each email did sequential scans.
+--
+--   Also adds normalize_size(), the SQL twin of normalize_size() in
+--   app/services/purchase_item_matcher.py ("11.0" -> "11", "09.5" -> "9.5", "09" -> "9"; keep the
+--   two in sync), plus expression indexes on it. The processors
+--   now filter on normalize_size(asin_bank.size) instead of loading every record of an order and
+--   normalizing sizes in Python.
+--
+-- Safe to run multiple times. On a busy production database consider running the CREATE INDEX
+-- statements with CONCURRENTLY (outside a transaction) to avoid blocking writes.
+
+-- Size normalization (keep in sync with NORMALIZE_SIZE_FUNCTION_SQL in app/models/database.py)
+CREATE OR REPLACE FUNCTION normalize_size(size TEXT)
+RETURNS TEXT
+LANGUAGE sql
+IMMUTABLE STRICT PARALLEL SAFE
+AS $$
+    SELECT CASE
+        WHEN btrim(size, E' \t\r\n') ~ '^[0-9]{1,2}\.[0-9]$' THEN
+            CASE
+                WHEN btrim(size, E' \t\r\n')::numeric = trunc(btrim(size, E' \t\r\n')::numeric)
+                    THEN btrim(size, E' \t\r\n')::numeric::int::text
+                ELSE btrim(size, E' \t\r\n')::numeric::text
+            END
+        WHEN btrim(size, E' \t\r\n') ~ '^[0-9]{1,2}$' THEN btrim(size, E' \t\r\n')::int::text
+        ELSE btrim(size, E' \t\r\n')
+    END
+$$;
+
+COMMENT ON FUNCTION normalize_size(TEXT) IS 'Normalize shoe/apparel size for matching: 11.0 -> 11, 09.5 -> 9.5, 09 -> 9';
+
+-- purchase_tracker: _is_order_duplicate, shipping/cancellation/confirmation matching
+CREATE INDEX IF NOT EXISTS idx_purchase_tracker_order_number ON purchase_tracker(order_number);
+
+-- oa_sourcing: order_number + unique_id matching (already in create_tables.sql, missing on older databases)
+CREATE INDEX IF NOT EXISTS idx_oa_sourcing_unique_id ON oa_sourcing(unique_id);
+
+-- asin_bank: PrepWorx check-ins (asin + size) and lead ASIN resolution (lead_id + size)
+CREATE INDEX IF NOT EXISTS idx_asin_bank_asin_size ON asin_bank(asin, size);
+CREATE INDEX IF NOT EXISTS idx_asin_bank_lead_id_size ON asin_bank(lead_id, size);
+CREATE INDEX IF NOT EXISTS idx_asin_bank_asin_size_norm ON asin_bank(asin, normalize_size(size));
+CREATE INDEX IF NOT EXISTS idx_asin_bank_lead_id_size_norm ON asin_bank(lead_id, normalize_size(size));
+
+ANALYZE purchase_tracker;
+ANALYZE oa_sourcing;
+ANALYZE asin_bank;
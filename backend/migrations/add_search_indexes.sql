@@ -0,0 +1,38 @@
+-- Migration: Search indexes for the list endpoint filters
+-- Date: 2026-10-16
+-- Description: The list endpoints filter with ILIKE '%term%' (product name, order number, ASIN,
+--   lead ID). A leading wildcard cannot use a btree index, so every keystroke of
+--   search-as-you-type scanned the whole table. pg_trgm GIN indexes serve those filters for
+--   terms of 3+ characters; a to_tsvector GIN index serves the ranked full-text product name
+--   search (search_mode=fulltext). See app/services/search.py.
+--
+-- Indexes are built CONCURRENTLY so writes continue while they build: run this file with
+-- psql (each statement in its own transaction), not inside BEGIN/COMMIT.
+-- Safe to run multiple times. create_all() (init_database.py) creates the same indexes on
+-- new databases, see app/models/database.py.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- GET /leads?product_name=, GET /purchases?product_name=
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_oa_sourcing_product_name_trgm
+    ON oa_sourcing USING gin (product_name gin_trgm_ops);
+
+-- search_mode=fulltext (expression must match app/services/search.py)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_oa_sourcing_product_name_fts
+    ON oa_sourcing USING gin (to_tsvector('simple'::regconfig, COALESCE(product_name, ''::character varying)));
+
+-- GET /purchases?order_number=
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_purchase_tracker_order_number_trgm
+    ON purchase_tracker USING gin (order_number gin_trgm_ops);
+
+-- GET /checkin?order_number=
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_checkin_order_number_trgm
+    ON checkin USING gin (order_number gin_trgm_ops);
+
+-- GET /asin-bank?asin=&lead_id=, GET /asins?asin=, GET /purchases?asin=, GET /checkin?asin=
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_asin_bank_asin_trgm
+    ON asin_bank USING gin (asin gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_asin_bank_lead_id_trgm
+    ON asin_bank USING gin (lead_id gin_trgm_ops);
+
+ANALYZE oa_sourcing, purchase_tracker, checkin, asin_bank;
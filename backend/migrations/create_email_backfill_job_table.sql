@@ -0,0 +1,34 @@
+-- Migration: Email backfill jobs
+-- Date: 2026-10-16
+-- Description: Emails that arrive while the webhook is down (deploy, outage, expired history)
+--   were caught up by hand through the per-retailer /gmail/process-* endpoints, 20 emails per
+--   serial search. POST /v1/gmail/backfill walks a date range or a history ID range instead and
+--   hands the missed retailer emails to the email worker pool. This migration adds
+--   email_backfill_job: one row per backfill with its range, progress counters and the checkpoint
+--   it resumes from.
+--
+-- Safe to run multiple times. create_all() (init_database.py) creates the same table.
+
+CREATE TABLE IF NOT EXISTS email_backfill_job (
+    id BIGSERIAL PRIMARY KEY,
+    mode VARCHAR(20) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    range_after TIMESTAMP,
+    range_before TIMESTAMP,
+    start_history_id BIGINT,
+    end_history_id BIGINT,
+    query TEXT,
+    checkpoint VARCHAR(50),
+    scanned INTEGER NOT NULL DEFAULT 0,
+    known INTEGER NOT NULL DEFAULT 0,
+    unrelated INTEGER NOT NULL DEFAULT 0,
+    queued INTEGER NOT NULL DEFAULT 0,
+    duplicates INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL
+);
+
+COMMENT ON TABLE email_backfill_job IS 'Backfills of missed retailer emails (date or history ID range) with their resume cursor';
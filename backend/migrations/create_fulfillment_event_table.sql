@@ -0,0 +1,55 @@
+-- Migration: Fulfillment event ledger
+-- Date: 2026-10-16
+-- Description: Shipping and cancellation emails add their quantities to purchase_tracker
+--   (shipped_to_pw, cancelled_qty, final_qty) cumulatively, so an email applied twice (webhook
+--   retry, two workers, a batch run racing the webhook) counts twice. The only guard was a Gmail
+--   label check that re-fetched the full message.
+--   This migration adds fulfillment_event: one row per email line applied to a purchase record,
+--   keyed by Gmail message ID. Applying an email inserts its rows with ON CONFLICT DO NOTHING and
+--   only increments the quantities of rows that were actually inserted.
+--
+--   Existing records get one 'baseline' shipping / cancellation event holding their current
+--   shipped_to_pw / cancelled_qty, and a final_adjustment event holding how far final_qty is
+--   from og_qty - cancelled_qty, so the quantities can be rebuilt from the ledger
+--   (POST /api/v1/purchase-tracker/purchases/fulfillment/rebuild). Manual edits through
+--   PATCH /purchases/{id} are recorded as 'manual:' events.
+--
+-- Safe to run multiple times: records that already have ledger rows get no baseline.
+-- create_all() (init_database.py) also runs this file when it creates fulfillment_event, see
+-- app/models/database.py.
+
+CREATE TABLE IF NOT EXISTS fulfillment_event (
+    id BIGSERIAL PRIMARY KEY,
+    message_id VARCHAR(100) NOT NULL,
+    event_type VARCHAR(20) NOT NULL,
+    purchase_tracker_id INTEGER NOT NULL REFERENCES purchase_tracker(id) ON DELETE CASCADE,
+    line INTEGER NOT NULL DEFAULT 0,
+    order_number VARCHAR(200),
+    unique_id VARCHAR(200),
+    size VARCHAR(100),
+    qty INTEGER NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    CONSTRAINT uq_fulfillment_event UNIQUE (message_id, event_type, purchase_tracker_id, line)
+);
+
+-- Rebuild of one record's quantities
+CREATE INDEX IF NOT EXISTS idx_fulfillment_event_purchase_tracker_id ON fulfillment_event(purchase_tracker_id);
+
+COMMENT ON TABLE fulfillment_event IS 'Shipping/cancellation email lines applied to purchase_tracker, one row per (message, type, record, line)';
+COMMENT ON COLUMN fulfillment_event.qty IS 'Quantity applied: added to shipped_to_pw (shipping), cancelled_qty (cancellation) or final_qty beyond og_qty - cancelled_qty (final_adjustment)';
+
+-- Baseline: quantities applied before the ledger existed
+INSERT INTO fulfillment_event (message_id, event_type, purchase_tracker_id, line, order_number, qty)
+SELECT 'baseline', baseline.event_type, p.id, 0, p.order_number, baseline.qty
+FROM purchase_tracker p
+CROSS JOIN LATERAL (VALUES
+    ('shipping', p.shipped_to_pw),
+    ('cancellation', p.cancelled_qty),
+    ('final_adjustment', CASE WHEN p.og_qty IS NOT NULL
+        THEN COALESCE(p.final_qty, 0) - (p.og_qty - COALESCE(p.cancelled_qty, 0)) END)
+) AS baseline(event_type, qty)
+WHERE COALESCE(baseline.qty, 0) <> 0
+  AND NOT EXISTS (SELECT 1 FROM fulfillment_event e WHERE e.purchase_tracker_id = p.id)
+ON CONFLICT ON CONSTRAINT uq_fulfillment_event DO NOTHING;
+
+ANALYZE fulfillment_event;
@@ -0,0 +1,20 @@
+-- Migration: Gmail history checkpoint
+-- Date: 2026-10-16
+-- Description: The webhook kept the Gmail history cursor in a .gmail_history_id file under
+--   base_dir. Every uvicorn worker / container had its own file (or raced on a shared one), so
+--   concurrent Pub/Sub pushes read the same history range twice or moved the cursor backwards.
+--   This migration adds gmail_history_checkpoint: one row per mailbox, advanced with a single
+--   compare-and-swap statement that only moves the history ID forward.
+--
+--   The first notification after deploying imports the value of an existing .gmail_history_id
+--   file, so no history range is skipped during the switch.
+--
+-- Safe to run multiple times. create_all() (init_database.py) creates the same table.
+
+CREATE TABLE IF NOT EXISTS gmail_history_checkpoint (
+    mailbox VARCHAR(255) PRIMARY KEY,
+    history_id BIGINT NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL
+);
+
+COMMENT ON TABLE gmail_history_checkpoint IS 'Gmail history ID up to which Pub/Sub notifications were handled, per mailbox';
@@ -0,0 +1,58 @@
+-- Migration: Normalized lead-to-ASIN links
+-- Date: 2026-10-16
+-- Description: oa_sourcing links a lead to its ASINs through 15 asinN_id foreign keys plus
+--   15 asinN_recommended_quantity columns. Finding "the lead's ASIN for size X" or "the leads
+--   that use ASIN Y" means checking all 15 columns, and a lead cannot have a 16th ASIN.
+--   This migration adds lead_asin (one row per link, with its display position and
+--   recommended quantity) and backfills it from the wide columns.
+--
+--   The application reads lead_asin and keeps writing positions 1-15 to the wide columns as
+--   well, so scripts and reports that still read asinN_id keep working until they move over.
+--
+-- Safe to run multiple times: the backfill skips positions that already have a link, so it
+-- can be rerun after rows were written to the wide columns directly (e.g. a CSV import).
+-- create_all() (init_database.py) also runs this file when it creates lead_asin, see
+-- app/models/database.py.
+
+CREATE TABLE IF NOT EXISTS lead_asin (
+    id SERIAL PRIMARY KEY,
+    oa_sourcing_id INTEGER NOT NULL REFERENCES oa_sourcing(id) ON DELETE CASCADE,
+    asin_bank_id INTEGER NOT NULL REFERENCES asin_bank(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    recommended_quantity INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL
+);
+
+-- A lead's ASINs in order (and one ASIN per position)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_lead_asin_lead_position ON lead_asin(oa_sourcing_id, position);
+-- Leads that use an ASIN
+CREATE INDEX IF NOT EXISTS idx_lead_asin_asin_bank_id ON lead_asin(asin_bank_id);
+
+COMMENT ON TABLE lead_asin IS 'ASINs linked to each oa_sourcing lead, by display position';
+COMMENT ON COLUMN lead_asin.position IS '1-based display position; 1-15 are mirrored to oa_sourcing.asinN_id';
+
+-- Backfill from the wide columns
+INSERT INTO lead_asin (oa_sourcing_id, asin_bank_id, position, recommended_quantity)
+SELECT o.id, slot.asin_bank_id, slot.position, slot.recommended_quantity
+FROM oa_sourcing o
+CROSS JOIN LATERAL (VALUES
+    (1, o.asin1_id, o.asin1_recommended_quantity),
+    (2, o.asin2_id, o.asin2_recommended_quantity),
+    (3, o.asin3_id, o.asin3_recommended_quantity),
+    (4, o.asin4_id, o.asin4_recommended_quantity),
+    (5, o.asin5_id, o.asin5_recommended_quantity),
+    (6, o.asin6_id, o.asin6_recommended_quantity),
+    (7, o.asin7_id, o.asin7_recommended_quantity),
+    (8, o.asin8_id, o.asin8_recommended_quantity),
+    (9, o.asin9_id, o.asin9_recommended_quantity),
+    (10, o.asin10_id, o.asin10_recommended_quantity),
+    (11, o.asin11_id, o.asin11_recommended_quantity),
+    (12, o.asin12_id, o.asin12_recommended_quantity),
+    (13, o.asin13_id, o.asin13_recommended_quantity),
+    (14, o.asin14_id, o.asin14_recommended_quantity),
+    (15, o.asin15_id, o.asin15_recommended_quantity)
+) AS slot(position, asin_bank_id, recommended_quantity)
+WHERE slot.asin_bank_id IS NOT NULL
+ON CONFLICT (oa_sourcing_id, position) DO NOTHING;
+
+ANALYZE lead_asin;
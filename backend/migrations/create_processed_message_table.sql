@@ -0,0 +1,38 @@
+-- Migration: Processed-message registry
+-- Date: 2026-10-16
+-- Description: Which emails were already processed used to live only in Gmail labels
+--   (Retailer-Order/Processed, Retailer-Shipping/Error, ...). Checking a label cost a full
+--   get_message call, every search query carried 6-8 -label: exclusions, and the processing
+--   stats could only count 500 messages per label.
+--   This migration adds processed_message: one row per (Gmail message, email type) written by
+--   the order, update and PrepWorx check-in processors with the outcome, attempts, timings and
+--   last error. Searches drop the -label: exclusions and filter their results through this
+--   table; labels are still applied, off the processing path.
+--
+--   Emails processed before this table existed only carry labels: run
+--   scripts/backfill_processed_messages.py once after this migration, before deploying.
+--
+-- Safe to run multiple times. create_all() (init_database.py) creates the same table.
+
+CREATE TABLE IF NOT EXISTS processed_message (
+    id BIGSERIAL PRIMARY KEY,
+    message_id VARCHAR(100) NOT NULL,
+    email_type VARCHAR(20) NOT NULL,
+    retailer VARCHAR(50),
+    status VARCHAR(20) NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 1,
+    error TEXT,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP,
+    duration_ms INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    CONSTRAINT uq_processed_message UNIQUE (message_id, email_type)
+);
+
+-- Stats per type/status and retry selection (oldest errors first)
+CREATE INDEX IF NOT EXISTS idx_processed_message_type_status ON processed_message(email_type, status, updated_at);
+
+COMMENT ON TABLE processed_message IS 'Gmail messages handled by the email processors, one row per (message, email type)';
+COMMENT ON COLUMN processed_message.status IS 'Last outcome: processed, error or manual_review';
+COMMENT ON COLUMN processed_message.attempts IS 'Times the message was processed (retries included)';
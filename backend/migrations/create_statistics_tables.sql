@@ -0,0 +1,484 @@
+-- Migration: Incrementally maintained dashboard statistics
+-- Date: 2026-10-16
+-- Description: GET /purchase-tracker/statistics/summary, /statistics/by-retailer and
+--   /checkin/stats/summary used to aggregate all of purchase_tracker, oa_sourcing, asin_bank
+--   and checkin on every dashboard load. This migration adds small summary tables that row
+--   triggers keep current on every INSERT / UPDATE / DELETE, so the endpoints read a handful
+--   of rows however large the history grows:
+--
+--   stats_counter        named totals (leads, purchases, asins, total_spend, ppu_sum/ppu_count,
+--                        checkins, checkin_quantity)
+--   stats_platform       purchases per purchase_tracker.platform ('' = no platform)
+--   stats_retailer       per retailer: leads, ppu/margin sums and counts (for averages), purchases
+--   stats_checkin_order  check-in quantity and count per order number ('' = no order number)
+--   stats_checkin_day    check-ins per day of checked_in_at
+--
+--   The triggers never update those tables: each write appends its increments to the matching
+--   insert-only stats_*_delta table, so concurrent writers share no row locks (every purchase
+--   would otherwise queue on the 'purchases' and 'total_spend' counter rows until commit).
+--   fold_statistics_deltas() moves the pending deltas into the summary tables in its own short
+--   transaction; the statistics service runs it before reading.
+--
+--   refresh_statistics() rebuilds every table from the source tables (used below for the
+--   initial backfill, after TRUNCATE, and by POST /purchase-tracker/statistics/refresh).
+--
+-- Safe to run multiple times. create_all() (init_database.py) also runs this file when it
+-- creates stats_counter, see app/models/database.py.
+
+CREATE TABLE IF NOT EXISTS stats_counter (
+    name VARCHAR(50) PRIMARY KEY,
+    value DOUBLE PRECISION NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS stats_platform (
+    platform VARCHAR(100) PRIMARY KEY,
+    purchase_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_stats_platform_purchase_count ON stats_platform(purchase_count DESC);
+
+CREATE TABLE IF NOT EXISTS stats_retailer (
+    retailer_id INTEGER PRIMARY KEY,
+    lead_count INTEGER NOT NULL DEFAULT 0,
+    ppu_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    ppu_count INTEGER NOT NULL DEFAULT 0,
+    margin_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    margin_count INTEGER NOT NULL DEFAULT 0,
+    purchase_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_stats_retailer_lead_count ON stats_retailer(lead_count DESC);
+CREATE INDEX IF NOT EXISTS idx_stats_retailer_purchase_count ON stats_retailer(purchase_count DESC);
+
+CREATE TABLE IF NOT EXISTS stats_checkin_order (
+    order_number VARCHAR(200) PRIMARY KEY,
+    total_quantity BIGINT NOT NULL DEFAULT 0,
+    checkin_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_stats_checkin_order_total_quantity ON stats_checkin_order(total_quantity DESC);
+
+CREATE TABLE IF NOT EXISTS stats_checkin_day (
+    day DATE PRIMARY KEY,
+    checkin_count INTEGER NOT NULL DEFAULT 0
+);
+
+
+-- Pending increments, appended by the triggers and folded in by fold_statistics_deltas()
+CREATE TABLE IF NOT EXISTS stats_counter_delta (
+    id BIGSERIAL PRIMARY KEY,
+    name VARCHAR(50) NOT NULL,
+    delta DOUBLE PRECISION NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS stats_platform_delta (
+    id BIGSERIAL PRIMARY KEY,
+    platform VARCHAR(100) NOT NULL,
+    purchase_count INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS stats_retailer_delta (
+    id BIGSERIAL PRIMARY KEY,
+    retailer_id INTEGER NOT NULL,
+    lead_count INTEGER NOT NULL,
+    ppu_sum DOUBLE PRECISION NOT NULL,
+    ppu_count INTEGER NOT NULL,
+    margin_sum DOUBLE PRECISION NOT NULL,
+    margin_count INTEGER NOT NULL,
+    purchase_count INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS stats_checkin_order_delta (
+    id BIGSERIAL PRIMARY KEY,
+    order_number VARCHAR(200) NOT NULL,
+    total_quantity BIGINT NOT NULL,
+    checkin_count INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS stats_checkin_day_delta (
+    id BIGSERIAL PRIMARY KEY,
+    day DATE NOT NULL,
+    checkin_count INTEGER NOT NULL
+);
+
+
+-- ----------------------------------------------------------------------------
+-- Increment helpers: append to the delta tables (insert-only, so writers never wait on
+-- each other; zero deltas are skipped)
+-- ----------------------------------------------------------------------------
+
+CREATE OR REPLACE FUNCTION stats_bump(counter_name TEXT, delta DOUBLE PRECISION)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF delta IS NULL OR delta = 0 THEN
+        RETURN;
+    END IF;
+    INSERT INTO stats_counter_delta (name, delta) VALUES (counter_name, delta);
+END
+$$;
+
+CREATE OR REPLACE FUNCTION stats_bump_platform(platform_name TEXT, delta INTEGER)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF delta = 0 THEN
+        RETURN;
+    END IF;
+    INSERT INTO stats_platform_delta (platform, purchase_count) VALUES (COALESCE(platform_name, ''), delta);
+END
+$$;
+
+CREATE OR REPLACE FUNCTION stats_bump_retailer(
+    target_retailer_id INTEGER,
+    leads INTEGER,
+    ppu_total DOUBLE PRECISION,
+    ppus INTEGER,
+    margin_total DOUBLE PRECISION,
+    margins INTEGER,
+    purchases INTEGER
+)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF target_retailer_id IS NULL
+        OR (leads = 0 AND ppu_total = 0 AND ppus = 0 AND margin_total = 0 AND margins = 0 AND purchases = 0) THEN
+        RETURN;
+    END IF;
+    INSERT INTO stats_retailer_delta (retailer_id, lead_count, ppu_sum, ppu_count, margin_sum, margin_count, purchase_count)
+    VALUES (target_retailer_id, leads, ppu_total, ppus, margin_total, margins, purchases);
+END
+$$;
+
+CREATE OR REPLACE FUNCTION stats_bump_checkin(order_no TEXT, checked_in TIMESTAMP, quantity INTEGER, checkins INTEGER)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM stats_bump('checkins', checkins);
+    PERFORM stats_bump('checkin_quantity', quantity);
+    INSERT INTO stats_checkin_order_delta (order_number, total_quantity, checkin_count)
+    VALUES (COALESCE(order_no, ''), quantity, checkins);
+    IF checked_in IS NOT NULL THEN
+        INSERT INTO stats_checkin_day_delta (day, checkin_count) VALUES (checked_in::date, checkins);
+    END IF;
+END
+$$;
+
+
+-- ----------------------------------------------------------------------------
+-- Fold pending deltas into the summary tables
+-- ----------------------------------------------------------------------------
+
+-- Returns false without waiting when another fold (or refresh_statistics()) holds the fold
+-- lock; its result is about to commit. Each DELETE ... RETURNING takes only the deltas
+-- committed so far, and the upserts run in key order.
+CREATE OR REPLACE FUNCTION fold_statistics_deltas()
+RETURNS boolean
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF NOT pg_try_advisory_xact_lock(hashtext('stats_fold')) THEN
+        RETURN false;
+    END IF;
+
+    WITH moved AS (DELETE FROM stats_counter_delta RETURNING name, delta)
+    INSERT INTO stats_counter (name, value)
+    SELECT name, sum(delta) FROM moved GROUP BY name ORDER BY name
+    ON CONFLICT (name) DO UPDATE SET value = stats_counter.value + EXCLUDED.value;
+
+    WITH moved AS (DELETE FROM stats_platform_delta RETURNING platform, purchase_count)
+    INSERT INTO stats_platform (platform, purchase_count)
+    SELECT platform, sum(purchase_count) FROM moved GROUP BY platform ORDER BY platform
+    ON CONFLICT (platform) DO UPDATE SET purchase_count = stats_platform.purchase_count + EXCLUDED.purchase_count;
+
+    WITH moved AS (
+        DELETE FROM stats_retailer_delta
+        RETURNING retailer_id, lead_count, ppu_sum, ppu_count, margin_sum, margin_count, purchase_count
+    )
+    INSERT INTO stats_retailer (retailer_id, lead_count, ppu_sum, ppu_count, margin_sum, margin_count, purchase_count)
+    SELECT retailer_id, sum(lead_count), sum(ppu_sum), sum(ppu_count), sum(margin_sum), sum(margin_count), sum(purchase_count)
+    FROM moved GROUP BY retailer_id ORDER BY retailer_id
+    ON CONFLICT (retailer_id) DO UPDATE SET
+        lead_count = stats_retailer.lead_count + EXCLUDED.lead_count,
+        ppu_sum = stats_retailer.ppu_sum + EXCLUDED.ppu_sum,
+        ppu_count = stats_retailer.ppu_count + EXCLUDED.ppu_count,
+        margin_sum = stats_retailer.margin_sum + EXCLUDED.margin_sum,
+        margin_count = stats_retailer.margin_count + EXCLUDED.margin_count,
+        purchase_count = stats_retailer.purchase_count + EXCLUDED.purchase_count;
+
+    WITH moved AS (DELETE FROM stats_checkin_order_delta RETURNING order_number, total_quantity, checkin_count)
+    INSERT INTO stats_checkin_order (order_number, total_quantity, checkin_count)
+    SELECT order_number, sum(total_quantity), sum(checkin_count) FROM moved GROUP BY order_number ORDER BY order_number
+    ON CONFLICT (order_number) DO UPDATE SET
+        total_quantity = stats_checkin_order.total_quantity + EXCLUDED.total_quantity,
+        checkin_count = stats_checkin_order.checkin_count + EXCLUDED.checkin_count;
+
+    WITH moved AS (DELETE FROM stats_checkin_day_delta RETURNING day, checkin_count)
+    INSERT INTO stats_checkin_day (day, checkin_count)
+    SELECT day, sum(checkin_count) FROM moved GROUP BY day ORDER BY day
+    ON CONFLICT (day) DO UPDATE SET checkin_count = stats_checkin_day.checkin_count + EXCLUDED.checkin_count;
+
+    RETURN true;
+END
+$$;
+
+
+-- ----------------------------------------------------------------------------
+-- Row triggers
+-- ----------------------------------------------------------------------------
+
+-- oa_sourcing: lead counts, PPU/margin averages; a changed PPU or retailer also moves the
+-- spend and purchase counts of the lead's purchases
+CREATE OR REPLACE FUNCTION stats_oa_sourcing_changed()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    purchase_rows INTEGER;
+    purchase_qty DOUBLE PRECISION;
+BEGIN
+    IF TG_OP = 'UPDATE'
+        AND NEW.retailer_id IS NOT DISTINCT FROM OLD.retailer_id
+        AND NEW.ppu_including_ship IS NOT DISTINCT FROM OLD.ppu_including_ship
+        AND NEW.margin IS NOT DISTINCT FROM OLD.margin THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM stats_bump('leads', -1);
+        PERFORM stats_bump('ppu_sum', -COALESCE(OLD.ppu_including_ship, 0));
+        PERFORM stats_bump('ppu_count', -(OLD.ppu_including_ship IS NOT NULL)::int);
+        PERFORM stats_bump_retailer(
+            OLD.retailer_id, -1,
+            -COALESCE(OLD.ppu_including_ship, 0), -(OLD.ppu_including_ship IS NOT NULL)::int,
+            -COALESCE(OLD.margin, 0), -(OLD.margin IS NOT NULL)::int,
+            0
+        );
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM stats_bump('leads', 1);
+        PERFORM stats_bump('ppu_sum', COALESCE(NEW.ppu_including_ship, 0));
+        PERFORM stats_bump('ppu_count', (NEW.ppu_including_ship IS NOT NULL)::int);
+        PERFORM stats_bump_retailer(
+            NEW.retailer_id, 1,
+            COALESCE(NEW.ppu_including_ship, 0), (NEW.ppu_including_ship IS NOT NULL)::int,
+            COALESCE(NEW.margin, 0), (NEW.margin IS NOT NULL)::int,
+            0
+        );
+    END IF;
+
+    IF TG_OP = 'UPDATE' THEN
+        SELECT count(*), COALESCE(sum(final_qty), 0)
+        INTO purchase_rows, purchase_qty
+        FROM purchase_tracker
+        WHERE oa_sourcing_id = NEW.id;
+
+        IF purchase_rows > 0 THEN
+            PERFORM stats_bump(
+                'total_spend',
+                (COALESCE(NEW.ppu_including_ship, 0) - COALESCE(OLD.ppu_including_ship, 0)) * purchase_qty
+            );
+            IF NEW.retailer_id IS DISTINCT FROM OLD.retailer_id THEN
+                PERFORM stats_bump_retailer(OLD.retailer_id, 0, 0, 0, 0, 0, -purchase_rows);
+                PERFORM stats_bump_retailer(NEW.retailer_id, 0, 0, 0, 0, 0, purchase_rows);
+            END IF;
+        END IF;
+    END IF;
+
+    RETURN NULL;
+END
+$$;
+
+-- purchase_tracker: purchase counts, spend (lead PPU x final_qty), platforms, purchases per retailer
+CREATE OR REPLACE FUNCTION stats_purchase_tracker_changed()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    lead_ppu DOUBLE PRECISION;
+    lead_retailer_id INTEGER;
+BEGIN
+    IF TG_OP = 'UPDATE'
+        AND NEW.oa_sourcing_id IS NOT DISTINCT FROM OLD.oa_sourcing_id
+        AND NEW.final_qty IS NOT DISTINCT FROM OLD.final_qty
+        AND NEW.platform IS NOT DISTINCT FROM OLD.platform THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        SELECT ppu_including_ship, retailer_id INTO lead_ppu, lead_retailer_id
+        FROM oa_sourcing WHERE id = OLD.oa_sourcing_id;
+        PERFORM stats_bump('purchases', -1);
+        PERFORM stats_bump('total_spend', -COALESCE(lead_ppu, 0) * COALESCE(OLD.final_qty, 0));
+        PERFORM stats_bump_platform(OLD.platform, -1);
+        PERFORM stats_bump_retailer(lead_retailer_id, 0, 0, 0, 0, 0, -1);
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT ppu_including_ship, retailer_id INTO lead_ppu, lead_retailer_id
+        FROM oa_sourcing WHERE id = NEW.oa_sourcing_id;
+        PERFORM stats_bump('purchases', 1);
+        PERFORM stats_bump('total_spend', COALESCE(lead_ppu, 0) * COALESCE(NEW.final_qty, 0));
+        PERFORM stats_bump_platform(NEW.platform, 1);
+        PERFORM stats_bump_retailer(lead_retailer_id, 0, 0, 0, 0, 0, 1);
+    END IF;
+
+    RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION stats_asin_bank_changed()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM stats_bump('asins', CASE TG_OP WHEN 'INSERT' THEN 1 ELSE -1 END);
+    RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION stats_checkin_changed()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+        AND NEW.order_number IS NOT DISTINCT FROM OLD.order_number
+        AND NEW.quantity IS NOT DISTINCT FROM OLD.quantity
+        AND NEW.checked_in_at IS NOT DISTINCT FROM OLD.checked_in_at THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM stats_bump_checkin(OLD.order_number, OLD.checked_in_at, -COALESCE(OLD.quantity, 0), -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM stats_bump_checkin(NEW.order_number, NEW.checked_in_at, COALESCE(NEW.quantity, 0), 1);
+    END IF;
+
+    RETURN NULL;
+END
+$$;
+
+
+-- ----------------------------------------------------------------------------
+-- Full rebuild (initial backfill, TRUNCATE, drift repair)
+-- ----------------------------------------------------------------------------
+
+CREATE OR REPLACE FUNCTION refresh_statistics()
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- Block writes to the source tables until the rebuild commits, so no trigger
+    -- increment lands between the DELETE and the recount
+    LOCK TABLE oa_sourcing, purchase_tracker, asin_bank, checkin IN SHARE MODE;
+    -- and keep fold_statistics_deltas() out until then
+    PERFORM pg_advisory_xact_lock(hashtext('stats_fold'));
+
+    DELETE FROM stats_counter_delta;
+    DELETE FROM stats_platform_delta;
+    DELETE FROM stats_retailer_delta;
+    DELETE FROM stats_checkin_order_delta;
+    DELETE FROM stats_checkin_day_delta;
+    DELETE FROM stats_counter;
+    DELETE FROM stats_platform;
+    DELETE FROM stats_retailer;
+    DELETE FROM stats_checkin_order;
+    DELETE FROM stats_checkin_day;
+
+    INSERT INTO stats_counter (name, value)
+    SELECT 'leads', count(*) FROM oa_sourcing
+    UNION ALL SELECT 'ppu_sum', COALESCE(sum(ppu_including_ship), 0) FROM oa_sourcing
+    UNION ALL SELECT 'ppu_count', count(ppu_including_ship) FROM oa_sourcing
+    UNION ALL SELECT 'purchases', count(*) FROM purchase_tracker
+    UNION ALL SELECT 'total_spend', COALESCE(sum(o.ppu_including_ship * p.final_qty), 0)
+        FROM purchase_tracker p JOIN oa_sourcing o ON o.id = p.oa_sourcing_id
+    UNION ALL SELECT 'asins', count(*) FROM asin_bank
+    UNION ALL SELECT 'checkins', count(*) FROM checkin
+    UNION ALL SELECT 'checkin_quantity', COALESCE(sum(quantity), 0) FROM checkin;
+
+    INSERT INTO stats_platform (platform, purchase_count)
+    SELECT COALESCE(platform, ''), count(*) FROM purchase_tracker GROUP BY COALESCE(platform, '');
+
+    INSERT INTO stats_retailer (retailer_id, lead_count, ppu_sum, ppu_count, margin_sum, margin_count, purchase_count)
+    SELECT
+        o.retailer_id,
+        count(*),
+        COALESCE(sum(o.ppu_including_ship), 0),
+        count(o.ppu_including_ship),
+        COALESCE(sum(o.margin), 0),
+        count(o.margin),
+        COALESCE(sum(p.purchase_count), 0)
+    FROM oa_sourcing o
+    LEFT JOIN (
+        SELECT oa_sourcing_id, count(*) AS purchase_count FROM purchase_tracker GROUP BY oa_sourcing_id
+    ) p ON p.oa_sourcing_id = o.id
+    WHERE o.retailer_id IS NOT NULL
+    GROUP BY o.retailer_id;
+
+    INSERT INTO stats_checkin_order (order_number, total_quantity, checkin_count)
+    SELECT COALESCE(order_number, ''), COALESCE(sum(quantity), 0), count(*)
+    FROM checkin GROUP BY COALESCE(order_number, '');
+
+    INSERT INTO stats_checkin_day (day, checkin_count)
+    SELECT checked_in_at::date, count(*) FROM checkin
+    WHERE checked_in_at IS NOT NULL GROUP BY checked_in_at::date;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION stats_source_truncated()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM refresh_statistics();
+    RETURN NULL;
+END
+$$;
+
+
+DROP TRIGGER IF EXISTS trg_stats_oa_sourcing ON oa_sourcing;
+CREATE TRIGGER trg_stats_oa_sourcing
+    AFTER INSERT OR UPDATE OR DELETE ON oa_sourcing
+    FOR EACH ROW EXECUTE FUNCTION stats_oa_sourcing_changed();
+
+DROP TRIGGER IF EXISTS trg_stats_purchase_tracker ON purchase_tracker;
+CREATE TRIGGER trg_stats_purchase_tracker
+    AFTER INSERT OR UPDATE OR DELETE ON purchase_tracker
+    FOR EACH ROW EXECUTE FUNCTION stats_purchase_tracker_changed();
+
+DROP TRIGGER IF EXISTS trg_stats_asin_bank ON asin_bank;
+CREATE TRIGGER trg_stats_asin_bank
+    AFTER INSERT OR DELETE ON asin_bank
+    FOR EACH ROW EXECUTE FUNCTION stats_asin_bank_changed();
+
+DROP TRIGGER IF EXISTS trg_stats_checkin ON checkin;
+CREATE TRIGGER trg_stats_checkin
+    AFTER INSERT OR UPDATE OR DELETE ON checkin
+    FOR EACH ROW EXECUTE FUNCTION stats_checkin_changed();
+
+DROP TRIGGER IF EXISTS trg_stats_oa_sourcing_truncate ON oa_sourcing;
+CREATE TRIGGER trg_stats_oa_sourcing_truncate
+    AFTER TRUNCATE ON oa_sourcing
+    FOR EACH STATEMENT EXECUTE FUNCTION stats_source_truncated();
+
+DROP TRIGGER IF EXISTS trg_stats_purchase_tracker_truncate ON purchase_tracker;
+CREATE TRIGGER trg_stats_purchase_tracker_truncate
+    AFTER TRUNCATE ON purchase_tracker
+    FOR EACH STATEMENT EXECUTE FUNCTION stats_source_truncated();
+
+DROP TRIGGER IF EXISTS trg_stats_asin_bank_truncate ON asin_bank;
+CREATE TRIGGER trg_stats_asin_bank_truncate
+    AFTER TRUNCATE ON asin_bank
+    FOR EACH STATEMENT EXECUTE FUNCTION stats_source_truncated();
+
+DROP TRIGGER IF EXISTS trg_stats_checkin_truncate ON checkin;
+CREATE TRIGGER trg_stats_checkin_truncate
+    AFTER TRUNCATE ON checkin
+    FOR EACH STATEMENT EXECUTE FUNCTION stats_source_truncated();
+
+-- Initial backfill
+SELECT refresh_statistics();
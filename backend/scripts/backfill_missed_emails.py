@@ -0,0 +1,117 @@
+"""
+Backfill retailer emails missed while the webhook was down
+
+Same job as POST /v1/gmail/backfill, run in the foreground (e.g. right after a
+deploy, before the API takes traffic). This script:
+1. Creates an email_backfill_job for a date range or a history ID range
+   (or resumes an existing job from its checkpoint)
+2. Walks the range under the Gmail quota limit and queues every missed
+   retailer / PrepWorx email on a local email worker pool
+3. Waits for the workers to finish the queued emails
+
+Ctrl+C pauses the job; --resume continues it from its checkpoint.
+
+Usage (from backend dir, after migrations/create_email_backfill_job_table.sql):
+    python scripts/backfill_missed_emails.py --after 2026-10-15T22:00 [--before 2026-10-16T08:00] [--query in:inbox]
+    python scripts/backfill_missed_emails.py --start-history-id 123456
+    python scripts/backfill_missed_emails.py --resume 7
+"""
+
+import sys
+import os
+import argparse
+from datetime import datetime
+
+# Add parent directory to path so we can import from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.api.webhook import get_email_worker_pool, shutdown_email_worker_pool
+from app.config.database import SessionLocal
+from app.services import email_backfill
+
+# Seconds between progress lines
+PROGRESS_INTERVAL = 10
+
+
+def print_progress(job_id: int) -> dict:
+    """Print one progress line for the job and return its current state"""
+    db = SessionLocal()
+    try:
+        job = email_backfill.job_to_dict(email_backfill.get_job(db, job_id))
+    finally:
+        db.close()
+    print(
+        f"[{job['status']:<9}] checkpoint {job['checkpoint'] or '-':<12} "
+        f"scanned {job['scanned']:>6}  known {job['known']:>6}  unrelated {job['unrelated']:>6}  "
+        f"queued {job['queued']:>5}  duplicates {job['duplicates']:>4}"
+    )
+    return job
+
+
+def backfill_missed_emails(args):
+    """
+    Create (or resume) a backfill job and run it until it completes or is interrupted
+    """
+    if args.resume:
+        job_id = args.resume
+    else:
+        db = SessionLocal()
+        try:
+            job = email_backfill.create_job(
+                db,
+                range_after=datetime.fromisoformat(args.after) if args.after else None,
+                range_before=datetime.fromisoformat(args.before) if args.before else None,
+                start_history_id=args.start_history_id,
+                query=args.query,
+            )
+            job_id = job.id
+        finally:
+            db.close()
+
+    print("=" * 70)
+    print(f"BACKFILL MISSED EMAILS (job {job_id})")
+    print("=" * 70)
+
+    runner = email_backfill.start_job(job_id, get_email_worker_pool())
+    if runner is None:
+        print_progress(job_id)
+        print("\n[ERROR] Job is already running or completed")
+        sys.exit(1)
+
+    try:
+        while runner.is_alive():
+            runner.join(PROGRESS_INTERVAL)
+            print_progress(job_id)
+    except KeyboardInterrupt:
+        print("\nPausing (finishing the current call)...")
+        runner.stop()
+        runner.join()
+
+    print("\nWaiting for the queued emails to be processed...")
+    shutdown_email_worker_pool(wait=True)
+
+    job = print_progress(job_id)
+    print(f"\n{'=' * 70}")
+    if job['status'] == email_backfill.STATUS_COMPLETED:
+        print(f"Done: {job['queued']} missed emails processed")
+    else:
+        print(f"Job {job_id} {job['status']}{': ' + job['error'] if job['error'] else ''}")
+        print(f"Resume with: python scripts/backfill_missed_emails.py --resume {job_id}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill retailer emails missed while the webhook was down")
+    parser.add_argument("--after", help="Start of the date range (ISO 8601, UTC unless an offset is given)")
+    parser.add_argument("--before", help="End of the date range (default: now)")
+    parser.add_argument("--start-history-id", type=int, help="Backfill the Gmail history from this ID instead")
+    parser.add_argument("--query", help="Extra Gmail search terms for a date range, e.g. in:inbox")
+    parser.add_argument("--resume", type=int, metavar="JOB_ID", help="Resume a paused or failed job")
+    args = parser.parse_args()
+
+    if not (args.after or args.start_history_id or args.resume):
+        parser.error("pass --after, --start-history-id or --resume")
+    try:
+        backfill_missed_emails(args)
+    except ValueError as e:
+        parser.error(str(e))
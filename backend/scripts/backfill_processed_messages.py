@@ -0,0 +1,96 @@
+"""
+Backfill the processed_message registry from the Gmail processing labels
+
+Searches no longer exclude processed emails with -label: (they are filtered
+through processed_message), so emails processed before the registry existed
+must be in it before the new backend version runs. This script:
+1. Lists every message carrying a processing label (all pages, no 500 cap)
+2. Inserts one registry row per (message, email type) with the label's status
+3. Leaves rows that already exist untouched (safe to run multiple times)
+
+Processed labels are imported first, so a message carrying both a Processed
+and an Error label counts as processed.
+
+Usage (from backend dir, after migrations/create_processed_message_table.sql):
+    python scripts/backfill_processed_messages.py
+"""
+
+import sys
+import os
+
+# Add parent directory to path so we can import from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import text
+
+from app.config.database import SessionLocal
+from app.services import processed_messages
+from app.services.gmail_service import GmailService
+
+# Gmail label -> (email type, status), in import order
+LABELS = [
+    ("Retailer-Order/Processed", processed_messages.TYPE_CONFIRMATION, processed_messages.STATUS_PROCESSED),
+    ("Retailer-Shipping/Processed", processed_messages.TYPE_SHIPPING, processed_messages.STATUS_PROCESSED),
+    ("Retailer-Cancel/Processed", processed_messages.TYPE_CANCELLATION, processed_messages.STATUS_PROCESSED),
+    ("PrepWorx/Processed", processed_messages.TYPE_CHECKIN, processed_messages.STATUS_PROCESSED),
+    ("Retailer-Shipping/Manual-Review", processed_messages.TYPE_SHIPPING, processed_messages.STATUS_MANUAL_REVIEW),
+    ("Retailer-Cancel/Manual-Review", processed_messages.TYPE_CANCELLATION, processed_messages.STATUS_MANUAL_REVIEW),
+    ("Retailer-Order/Error", processed_messages.TYPE_CONFIRMATION, processed_messages.STATUS_ERROR),
+    ("Retailer-Shipping/Error", processed_messages.TYPE_SHIPPING, processed_messages.STATUS_ERROR),
+    ("Retailer-Cancel/Error", processed_messages.TYPE_CANCELLATION, processed_messages.STATUS_ERROR),
+]
+
+INSERT_SQL = text("""
+    INSERT INTO processed_message (message_id, email_type, status, attempts, error, created_at, updated_at)
+    SELECT message_id, :email_type, :status, 1, :error, now(), now()
+    FROM unnest(CAST(:message_ids AS varchar[])) AS message_id
+    ON CONFLICT ON CONSTRAINT uq_processed_message DO NOTHING
+""")
+
+
+def backfill_processed_messages():
+    """
+    Import every labeled message into processed_message
+    """
+    db = SessionLocal()
+    gmail_service = GmailService()
+    total_found = 0
+    total_inserted = 0
+
+    try:
+        print("=" * 70)
+        print("BACKFILL PROCESSED_MESSAGE FROM GMAIL LABELS")
+        print("=" * 70)
+
+        for label_name, email_type, status in LABELS:
+            found = 0
+            inserted = 0
+            error = f"Imported from the {label_name} label" if status != processed_messages.STATUS_PROCESSED else None
+            for page in gmail_service.iter_message_id_pages(f'label:{label_name}', page_size=500):
+                result = db.execute(INSERT_SQL, {
+                    "message_ids": page,
+                    "email_type": email_type,
+                    "status": status,
+                    "error": error,
+                })
+                db.commit()
+                found += len(page)
+                inserted += result.rowcount
+            print(f"{label_name:<34} {found:>7} labeled, {inserted:>7} new rows ({email_type}/{status})")
+            total_found += found
+            total_inserted += inserted
+
+        print(f"\n{'=' * 70}")
+        print(f"Done: {total_found} labeled messages, {total_inserted} rows added")
+        print("=" * 70)
+
+    except Exception as e:
+        db.rollback()
+        print(f"\n[ERROR] Backfill failed: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    backfill_processed_messages()
@@ -14,6 +14,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from app.config.database import SessionLocal, init_db
 from app.models.database import AsinBank, OASourcing, PurchaseTracker
+from app.services.lead_asins import link_asin
 
 
 def parse_float(value):
@@ -161,12 +162,11 @@ def import_oa_sourcing_csv(csv_file_path, db_session):
                 sourcer=row.get('Sourcer', '').strip() or None
             )
             
-            # Set ASIN references
+            # Link ASINs (lead_asin, mirrored to the asinN_id columns)
             for i in range(1, 16):
                 if i in asin_refs:
-                    setattr(oa_sourcing, f'asin{i}_id', asin_refs[i])
                     qty_col = f'ASIN {i} Recommended Quantity'
-                    setattr(oa_sourcing, f'asin{i}_recommended_quantity', parse_int(row.get(qty_col, '')))
+                    link_asin(oa_sourcing, asin_refs[i], parse_int(row.get(qty_col, '')), position=i)
             
             db_session.add(oa_sourcing)
             count += 1
@@ -10,8 +10,8 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from app.config.database import SessionLocal
-from app.models.database import AsinBank, OASourcing, PurchaseTracker
-from sqlalchemy.orm import joinedload
+from app.models.database import AsinBank, LeadAsin, OASourcing, PurchaseTracker
+from sqlalchemy.orm import selectinload
 
 
 def example_1_query_lead_with_asins():
@@ -23,13 +23,9 @@ def example_1_query_lead_with_asins():
     db = SessionLocal()
     
     try:
-        # Get lead with eager loading of ASIN references
+        # Get lead with eager loading of its linked ASINs
         lead = db.query(OASourcing)\
-            .options(
-                joinedload(OASourcing.asin1_ref),
-                joinedload(OASourcing.asin2_ref),
-                joinedload(OASourcing.asin3_ref)
-            )\
+            .options(selectinload(OASourcing.asin_links).joinedload(LeadAsin.asin))\
             .first()
         
         if lead:
@@ -40,11 +36,8 @@ def example_1_query_lead_with_asins():
             print(f"RSP: ${lead.rsp}")
             
             print("\nASINs:")
-            for i in range(1, 16):
-                asin_ref = getattr(lead, f'asin{i}_ref', None)
-                if asin_ref:
-                    qty = getattr(lead, f'asin{i}_recommended_quantity', 0)
-                    print(f"  ASIN {i}: {asin_ref.asin} (Size: {asin_ref.size}, Qty: {qty})")
+            for link in lead.asin_links:
+                print(f"  ASIN {link.position}: {link.asin.asin} (Size: {link.asin.size}, Qty: {link.recommended_quantity or 0})")
         else:
             print("No leads found in database")
             
@@ -0,0 +1,148 @@
+"""
+Benchmark for the parse-once email document (EmailData.document)
+
+Runs every email in feed/ through RetailerEmailClassifier.classify() and every
+parse_* method of the retailer's parser (the retailer is taken from the file
+name, e.g. feed/.../hibbett1.txt -> hibbett), and reports CPU time per email:
+
+- before: every EmailData.document access builds a fresh document and
+  whole-document get_text() is not memoized (the old behaviour: one
+  BeautifulSoup parse per parse_* call, one lower() per check)
+- after:  one document per email, shared by the classifier and the parser
+
+Usage (from backend dir):
+    python -m test.benchmark_email_document
+    python -m test.benchmark_email_document --rounds 5 --retailer hibbett
+"""
+
+import argparse
+import logging
+import re
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bs4 import BeautifulSoup
+
+from app.models.email import DocumentSoup, EmailData, EmailDocument
+from app.services.parser_registry import PARSER_CLASSES, get_parser
+from app.services.retailer_email_classifier import RetailerEmailClassifier
+
+FEED_DIR = Path(__file__).parent.parent / "feed"
+
+# Feed file name prefixes that differ from the parser key
+RETAILER_ALIASES = {
+    "bloomingdale": "bloomingdales",
+    "kidsfootlocker": "footlocker",
+}
+
+
+def retailer_for(path: Path):
+    """Parser key for a feed file (file name up to the first digit / '-' / '_')."""
+    prefix = re.split(r"[-_\d.]", path.name, maxsplit=1)[0].lower()
+    key = RETAILER_ALIASES.get(prefix, prefix)
+    return key if key in PARSER_CLASSES else None
+
+
+@contextmanager
+def uncached_documents():
+    """Make every EmailData.document access (and get_text() call) do the work again."""
+    original_document = EmailData.document
+    EmailData.document = property(lambda self: EmailDocument(self))
+    DocumentSoup.get_text = BeautifulSoup.get_text
+    DocumentSoup.text = property(BeautifulSoup.get_text)
+    try:
+        yield
+    finally:
+        EmailData.document = original_document
+        del DocumentSoup.get_text
+        del DocumentSoup.text
+
+
+def load_emails(retailer_filter=None) -> list:
+    """(path, parser key, html, sender) for every feed email with a known retailer."""
+    emails = []
+    for path in sorted(FEED_DIR.rglob("*.txt")):
+        key = retailer_for(path)
+        if key is None or (retailer_filter and key != retailer_filter):
+            continue
+        sender = getattr(get_parser(key), "order_from_email", "") or ""
+        emails.append((path, key, path.read_text(encoding="utf-8", errors="ignore"), sender))
+    return emails
+
+
+def run_email(classifier: RetailerEmailClassifier, key: str, html: str, sender: str, subject: str) -> None:
+    """Classify one email and run every parse_* method of its retailer's parser."""
+    email_data = EmailData(
+        message_id="benchmark",
+        thread_id="benchmark",
+        subject=subject,
+        sender=sender,
+        html_content=html,
+    )
+    classifier.classify(email_data)
+    parser = get_parser(key)
+    for name in dir(parser):
+        if name.startswith("parse_") and callable(getattr(parser, name)):
+            try:
+                getattr(parser, name)(email_data)
+            except TypeError:
+                # parse_* helper with a different signature
+                continue
+
+
+def measure(emails: list, classifier: RetailerEmailClassifier, rounds: int) -> dict:
+    """CPU seconds per feed file (best of `rounds`)."""
+    timings = {}
+    for path, key, html, sender in emails:
+        subject = "Thank you for your order"
+        best = None
+        for _ in range(rounds):
+            started = time.process_time()
+            run_email(classifier, key, html, sender, subject)
+            elapsed = time.process_time() - started
+            best = elapsed if best is None else min(best, elapsed)
+        timings[path] = best
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU time per email before/after the parse-once document")
+    parser.add_argument("--rounds", type=int, default=3, help="Runs per email, best is kept (default: 3)")
+    parser.add_argument("--retailer", help="Only benchmark feed files for this parser key")
+    args = parser.parse_args()
+
+    # Parsers log every extracted field; keep the output to the report
+    logging.disable(logging.CRITICAL)
+
+    emails = load_emails(args.retailer)
+    if not emails:
+        print(f"No feed emails found in {FEED_DIR}")
+        return
+    classifier = RetailerEmailClassifier()
+
+    with uncached_documents():
+        before = measure(emails, classifier, args.rounds)
+    after = measure(emails, classifier, args.rounds)
+
+    print(f"{'Email':<55} {'Parser':<14} {'Before':>10} {'After':>10} {'Speedup':>8}")
+    print("-" * 101)
+    for path, key, _, _ in emails:
+        b, a = before[path] * 1000, after[path] * 1000
+        print(f"{str(path.relative_to(FEED_DIR)):<55} {key:<14} {b:>8.1f}ms {a:>8.1f}ms {b / a if a else 0:>7.2f}x")
+
+    total_before = sum(before.values()) * 1000
+    total_after = sum(after.values()) * 1000
+    print("-" * 101)
+    print(
+        f"{len(emails)} emails: {total_before / len(emails):.1f}ms -> {total_after / len(emails):.1f}ms CPU per email "
+        f"({total_before / total_after if total_after else 0:.2f}x)"
+    )
+
+
+if __name__ == '__main__':
+    main()
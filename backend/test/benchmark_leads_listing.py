@@ -0,0 +1,139 @@
+"""
+SQL statements per page of GET /leads and GET /leads/{lead_id}.
+
+Seeds synthetic leads (lead IDs prefixed BENCHL-, product names
+"Bench Lead N") with 15 linked ASINs each (lead_asin); every 10th lead has
+no links so the lead_id fallback is exercised too.
+Then calls the endpoint functions directly at several page sizes and reports
+the number of SQL statements and p50 latency per call.
+
+ASIN hydration is batched per page, so a listing page takes at most
+MAX_LISTING_STATEMENTS statements whatever its size: the script exits with
+status 1 when a page takes more.
+
+Usage (from backend dir):
+    python -m test.benchmark_leads_listing --seed      # seed 1,000 leads (once), then benchmark
+    python -m test.benchmark_leads_listing --rounds 20
+    python -m test.benchmark_leads_listing --cleanup   # delete the seeded rows
+"""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.api.purchase_tracker_api import get_all_leads, get_lead_by_id
+from app.config.database import SessionLocal
+from test.benchmark_purchases_listing import StatementCounter, percentile, run_statements
+
+LEAD_PREFIX = "BENCHL-"
+PRODUCT_PREFIX = "Bench Lead "
+PAGE_SIZES = (10, 100, 1000)
+# count, page (with retailer), lead_asin links IN, lead_id fallback IN
+MAX_LISTING_STATEMENTS = 4
+
+SEED_STATEMENTS = [
+    """
+    INSERT INTO oa_sourcing (lead_id, timestamp, submitted_by, product_name, unique_id, ppu_including_ship, rsp)
+    SELECT :lead_prefix || n, now(), 'Bench Sourcer', :product_prefix || n, 'BLU' || n, 50 + n % 100, 120 + n % 80
+    FROM generate_series(1, :leads) AS n
+    """,
+    """
+    INSERT INTO asin_bank (lead_id, size, asin, created_at)
+    SELECT :lead_prefix || n, s::text, 'B0BL' || lpad(n::text, 4, '0') || lpad(s::text, 2, '0'), now()
+    FROM generate_series(1, :leads) AS n, generate_series(1, 15) AS s
+    """,
+    """
+    INSERT INTO lead_asin (oa_sourcing_id, asin_bank_id, position, recommended_quantity)
+    SELECT o.id, a.id, a.size::int, a.size::int % 3 + 1
+    FROM oa_sourcing o
+    JOIN asin_bank a ON a.lead_id = o.lead_id
+    WHERE o.lead_id LIKE :lead_prefix || '%' AND substring(o.lead_id FROM '[0-9]+$')::int % 10 <> 0
+    """,
+    "ANALYZE oa_sourcing, asin_bank, lead_asin",
+]
+
+CLEANUP_STATEMENTS = [
+    "DELETE FROM oa_sourcing WHERE lead_id LIKE :lead_prefix || '%'",  # cascades to lead_asin
+    "DELETE FROM asin_bank WHERE lead_id LIKE :lead_prefix || '%'",
+]
+
+
+def list_leads(db, limit: int) -> dict:
+    """Call the endpoint function with every query parameter spelled out (no FastAPI defaults)."""
+    return get_all_leads(skip=0, limit=limit, retailer=None, product_name=PRODUCT_PREFIX, search_mode="contains", db=db)
+
+
+def measure(counter: StatementCounter, rounds: int, call) -> dict:
+    """p50 latency and statements of call(db) (fresh session per call)."""
+    timings = []
+    statements = 0
+    for _ in range(rounds):
+        db = SessionLocal()
+        try:
+            counter.count, counter.active = 0, True
+            started = time.perf_counter()
+            response = call(db)
+            timings.append((time.perf_counter() - started) * 1000)
+            counter.active = False
+            statements = counter.count
+        finally:
+            db.close()
+    data = response["data"] or {}
+    items = data.get("items", [data] if data else [])
+    return {
+        "p50_ms": round(percentile(timings, 50), 2),
+        "statements": statements,
+        "leads": len(items),
+        "asins": sum(len(item["asins"]) for item in items),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check that GET /leads issues a fixed number of SQL statements per page")
+    parser.add_argument("--seed", action="store_true", help="Seed synthetic BENCHL- leads before benchmarking")
+    parser.add_argument("--leads", type=int, default=1000, help="Leads to seed (default: 1,000)")
+    parser.add_argument("--cleanup", action="store_true", help="Delete the seeded BENCHL- rows and exit")
+    parser.add_argument("--rounds", type=int, default=5, help="Timed calls per page size (default: 5)")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    params = {"lead_prefix": LEAD_PREFIX, "product_prefix": PRODUCT_PREFIX, "leads": args.leads}
+
+    if args.cleanup:
+        print("Deleting seeded rows...")
+        run_statements(CLEANUP_STATEMENTS, params)
+        return 0
+    if args.seed:
+        print(f"Seeding {args.leads:,} leads with 15 ASINs each...")
+        run_statements(SEED_STATEMENTS, params)
+
+    counter = StatementCounter()
+    rounds = max(1, args.rounds)
+    # Warm-up: mapper configuration, connection pool
+    measure(counter, 1, lambda db: list_leads(db, 10))
+
+    results = {f"GET /leads limit={size}": measure(counter, rounds, lambda db, size=size: list_leads(db, size)) for size in PAGE_SIZES}
+    results[f"GET /leads/{LEAD_PREFIX}1"] = measure(counter, rounds, lambda db: get_lead_by_id(f"{LEAD_PREFIX}1", db=db))
+
+    print(f"{'Call':<28} {'p50':>10} {'SQL':>5} {'Leads':>6} {'ASINs':>7}")
+    print("-" * 60)
+    for name, stats in results.items():
+        print(f"{name:<28} {stats['p50_ms']:>8.2f}ms {stats['statements']:>5} {stats['leads']:>6} {stats['asins']:>7}")
+
+    if results[f"GET /leads limit={PAGE_SIZES[-1]}"]["leads"] <= PAGE_SIZES[0]:
+        print("\nToo few seeded leads to compare page sizes; run with --seed first")
+        return 1
+    listing_counts = sorted({results[f"GET /leads limit={size}"]["statements"] for size in PAGE_SIZES})
+    if listing_counts[-1] > MAX_LISTING_STATEMENTS:
+        print(f"\n❌ A listing page took {listing_counts[-1]} statements (max {MAX_LISTING_STATEMENTS}): {listing_counts}")
+        return 1
+    print(f"\n✅ At most {listing_counts[-1]} statements per page at every page size")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+"""
+Benchmark for the order-matching indexes (migrations/add_order_matching_indexes.sql and
+migrations/add_asin_bank_size_normalized.sql)
+
+Seeds a scratch schema with a synthetic purchase_tracker (500k rows by default) plus
+matching oa_sourcing / asin_bank rows, then prints EXPLAIN ANALYZE plans for the
+queries run on every confirmation / shipping / cancellation / PrepWorx email:
+once without the new indexes and once after applying the migrations.
+
+Nothing outside the scratch schema is touched; it is dropped at the end unless --keep.
+
+Usage (from backend dir):
+    python -m test.benchmark_order_matching_indexes
+    python -m test.benchmark_order_matching_indexes --rows 100000 --keep
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import text
+
+from app.config.database import engine
+from app.models.database import AsinBank, Base, OASourcing, PurchaseTracker, Retailer
+
+SCHEMA = "bench_order_matching"
+MIGRATIONS_DIR = Path(__file__).parent.parent / "migrations"
+MIGRATION_FILES = [
+    MIGRATIONS_DIR / "add_order_matching_indexes.sql",
+    MIGRATIONS_DIR / "add_asin_bank_size_normalized.sql",
+]
+
+# Indexes created by the models / migration; dropped for the "before" run
+NEW_INDEXES = [
+    "idx_purchase_tracker_order_number",
+    "ix_purchase_tracker_order_number",
+    "idx_oa_sourcing_unique_id",
+    "ix_oa_sourcing_unique_id",
+    "idx_asin_bank_asin_size",
+    "idx_asin_bank_lead_id_size",
+    "idx_asin_bank_asin_size_norm",
+    "idx_asin_bank_lead_id_size_norm",
+    "idx_asin_bank_asin_size_normalized",
+    "idx_asin_bank_lead_id_size_normalized",
+]
+
+# Hot-path queries (same shape as the ORM queries in the processors)
+QUERIES = {
+    "order duplicate check (_is_order_duplicate)": """
+        SELECT id FROM purchase_tracker WHERE order_number = :order_number LIMIT 1
+    """,
+    "confirmation/shipping match (order + unique_id + size)": """
+        SELECT pt.id FROM purchase_tracker pt
+        JOIN oa_sourcing o ON pt.oa_sourcing_id = o.id
+        LEFT JOIN asin_bank a ON pt.asin_bank_id = a.id
+        WHERE pt.order_number = :order_number AND o.unique_id = :unique_id
+          AND (a.size = :size OR a.size = :normalized_size)
+    """,
+    "PurchaseItemMatcher.match_item (order + unique_id + size/size_normalized)": """
+        SELECT pt.id, a.size FROM purchase_tracker pt
+        JOIN oa_sourcing o ON pt.oa_sourcing_id = o.id
+        JOIN asin_bank a ON pt.asin_bank_id = a.id
+        WHERE pt.order_number = :order_number AND o.unique_id = :unique_id
+          AND (a.size IN (:size, :normalized_size) OR a.size_normalized = :normalized_size)
+        ORDER BY pt.id
+    """,
+    "PrepWorx check-in ASIN lookup (asin + size)": """
+        SELECT id FROM asin_bank
+        WHERE asin = :asin
+          AND (size = :size OR size = :normalized_size OR size_normalized = :normalized_size)
+    """,
+    "lead ASIN resolution (lead_id + size_normalized)": """
+        SELECT id FROM asin_bank
+        WHERE lead_id = :lead_id AND size_normalized = :normalized_size
+        LIMIT 1
+    """,
+}
+
+
+def seed(conn, rows: int) -> dict:
+    """Create the scratch tables and fill them with synthetic data."""
+    leads = max(rows // 10, 1)
+    conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    conn.execute(text(f"SET search_path TO {SCHEMA}"))
+    Base.metadata.create_all(
+        bind=conn,
+        tables=[Retailer.__table__, AsinBank.__table__, OASourcing.__table__, PurchaseTracker.__table__],
+    )
+
+    conn.execute(text("""
+        INSERT INTO oa_sourcing (id, lead_id, unique_id, product_name)
+        SELECT g, 'LEAD-' || g, 'UID' || g, 'Product ' || g
+        FROM generate_series(1, :leads) g
+    """), {"leads": leads})
+    # 4 sizes per lead, in the mixed formats seen in production ("9", "9.0", "09", "9.5")
+    conn.execute(text("""
+        INSERT INTO asin_bank (id, lead_id, asin, size, created_at)
+        SELECT (l - 1) * 4 + s, 'LEAD-' || l, 'B0' || lpad(((l - 1) * 4 + s)::text, 8, '0'),
+               (ARRAY['9', '9.0', '09', '9.5'])[s], now()
+        FROM generate_series(1, :leads) l, generate_series(1, 4) s
+    """), {"leads": leads})
+    # ~2 rows per order
+    conn.execute(text("""
+        INSERT INTO purchase_tracker (oa_sourcing_id, asin_bank_id, lead_id, order_number, og_qty, final_qty, date)
+        SELECT ((g - 1) % :leads) + 1,
+               (((g - 1) % :leads) * 4) + ((g - 1) % 4) + 1,
+               'LEAD-' || (((g - 1) % :leads) + 1),
+               'ORD' || ((g + 1) / 2),
+               1, 1, now() - (g || ' minutes')::interval
+        FROM generate_series(1, :rows) g
+    """), {"leads": leads, "rows": rows})
+
+    # Drop the indexes under test so the first run shows the old plans
+    for name in NEW_INDEXES:
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    conn.execute(text("ANALYZE"))
+
+    # Pick a real row so every query returns a match
+    pt_id, order_number, lead_num = conn.execute(text(
+        "SELECT id, order_number, oa_sourcing_id FROM purchase_tracker "
+        "WHERE id = (SELECT max(id) / 2 FROM purchase_tracker)"
+    )).one()
+    asin, size, normalized_size = conn.execute(text(
+        "SELECT a.asin, a.size, normalize_size(a.size) FROM purchase_tracker pt "
+        "JOIN asin_bank a ON pt.asin_bank_id = a.id WHERE pt.id = :id"
+    ), {"id": pt_id}).one()
+    return {
+        "order_number": order_number,
+        "unique_id": f"UID{lead_num}",
+        "lead_id": f"LEAD-{lead_num}",
+        "asin": asin,
+        "size": size,
+        "normalized_size": normalized_size,
+    }
+
+
+def explain_all(conn, params: dict, label: str) -> dict:
+    """Print EXPLAIN ANALYZE for every query; return execution times in ms."""
+    print("\n" + "=" * 70)
+    print(label)
+    print("=" * 70)
+    timings = {}
+    for name, sql in QUERIES.items():
+        bind = {k: v for k, v in params.items() if f":{k}" in sql}
+        plan = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"), bind).scalars().all()
+        match = re.search(r"Execution Time: ([\d.]+) ms", plan[-1])
+        timings[name] = float(match.group(1)) if match else float("nan")
+        print(f"\n--- {name} ({timings[name]:.3f} ms)")
+        for line in plan:
+            print(f"  {line}")
+    return timings
+
+
+def apply_migrations(conn) -> float:
+    """Run the migration files inside the scratch schema; return elapsed seconds."""
+    started = time.monotonic()
+    for migration in MIGRATION_FILES:
+        conn.exec_driver_sql(migration.read_text())
+    return time.monotonic() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN ANALYZE the order-matching queries before/after indexes")
+    parser.add_argument("--rows", type=int, default=500_000, help="purchase_tracker rows to seed (default: 500000)")
+    parser.add_argument("--keep", action="store_true", help=f"Keep the {SCHEMA} schema afterwards")
+    args = parser.parse_args()
+
+    print(f"Database: {engine.url}")
+    print(f"Seeding {args.rows:,} purchase_tracker rows into schema '{SCHEMA}'...")
+
+    with engine.connect() as conn:
+        try:
+            started = time.monotonic()
+            params = seed(conn, args.rows)
+            conn.commit()
+            print(f"Seeded in {time.monotonic() - started:.1f}s; sample lookup: {params}")
+
+            before = explain_all(conn, params, "BEFORE (no order-matching indexes)")
+            elapsed = apply_migrations(conn)
+            conn.commit()
+            print(f"\nApplied {', '.join(m.name for m in MIGRATION_FILES)} in {elapsed:.1f}s")
+            after = explain_all(conn, params, "AFTER (order-matching migrations)")
+
+            print("\n" + "=" * 70)
+            print(f"{'Query':<62} {'Before':>10} {'After':>10}")
+            print("-" * 84)
+            for name in QUERIES:
+                print(f"{name:<62} {before[name]:>8.3f}ms {after[name]:>8.3f}ms")
+        finally:
+            conn.rollback()
+            if not args.keep:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            conn.execute(text("RESET search_path"))
+            conn.commit()
+
+
+if __name__ == '__main__':
+    main()
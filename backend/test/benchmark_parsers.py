@@ -0,0 +1,317 @@
+"""
+Parser throughput / memory benchmark over the feed/ corpus.
+
+Loads every fixture under feed/order-confirmation-emails, order-shipping-emails
+and order-cancellation-emails, and for each one times classification plus the
+matching parse method (parse_email / parse_shipping_email /
+parse_cancellation_email) of the retailer's parser. The retailer is taken from
+the file name (hibbett1.txt, hibbett-cancel-order.txt -> hibbett).
+
+Per retailer and email type the report records emails/sec, p50/p99 latency
+and the peak Python allocation of one pass (tracemalloc, measured separately
+so it does not skew the timings), plus the process peak RSS. The JSON report
+can be compared against a saved baseline; groups whose p50 got slower than
+--threshold are listed and the script exits with status 1.
+
+--parse-pool N also parses every fixture through the parse pool
+(app.services.parse_pool.ParsePool) with 1..N worker processes and reports
+emails/sec for each, next to the in-process rate, to check how parsing
+scales with cores.
+
+Usage (from backend dir):
+    python -m test.benchmark_parsers
+    python -m test.benchmark_parsers --rounds 20 --retailer hibbett
+    python -m test.benchmark_parsers --save-baseline            # after a known-good run
+    python -m test.benchmark_parsers --baseline test/parser_benchmark_baseline.json
+    python -m test.benchmark_parsers --parse-pool 4                # parse pool scaling, 1-4 workers
+"""
+
+import argparse
+import json
+import logging
+import platform
+import re
+import resource
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path for direct execution
+if __name__ == "__main__" and __package__ is None:
+    backend_dir = Path(__file__).parent.parent
+    sys.path.insert(0, str(backend_dir))
+
+from app.models.email import EmailData
+from app.services.parse_pool import ParsePool
+from app.services.parser_registry import PARSER_CLASSES, get_parser
+from app.services.retailer_email_classifier import RetailerEmailClassifier
+
+TEST_DIR = Path(__file__).parent
+FEED_DIR = TEST_DIR.parent / "feed"
+DEFAULT_OUTPUT = TEST_DIR / "parser_benchmark.json"
+DEFAULT_BASELINE = TEST_DIR / "parser_benchmark_baseline.json"
+
+# Fixture directory -> (email type, parse method, representative subject)
+EMAIL_TYPES = {
+    "order-confirmation-emails": ("confirmation", "parse_email", "Thank you for your order"),
+    "order-shipping-emails": ("shipping", "parse_shipping_email", "Your order has shipped"),
+    "order-cancellation-emails": ("cancellation", "parse_cancellation_email", "Your order has been canceled"),
+}
+
+# Fixture name prefixes that differ from the parser key
+RETAILER_ALIASES = {
+    "bloomingdale": "bloomingdales",
+    "kidsfootlocker": "footlocker",
+}
+
+# Parser attributes tried (in order) for the sender of each email type
+SENDER_ATTRIBUTES = {
+    "confirmation": ["order_from_email"],
+    "shipping": ["shipping_from_email", "update_from_email", "order_from_email"],
+    "cancellation": ["cancellation_from_email", "update_from_email", "order_from_email"],
+}
+
+
+def parser_key_for(path: Path):
+    """Parser key for a fixture file (name up to the first digit, '-', '_' or '.')."""
+    prefix = re.split(r"[-_\d.]", path.name, maxsplit=1)[0].lower()
+    key = RETAILER_ALIASES.get(prefix, prefix)
+    return key if key in PARSER_CLASSES else None
+
+
+def load_fixtures(retailer_filter=None) -> list:
+    """Every fixture with a known retailer and parse method, as dicts."""
+    fixtures = []
+    for dir_name, (email_type, method, subject) in EMAIL_TYPES.items():
+        for path in sorted((FEED_DIR / dir_name).glob("*.txt")):
+            key = parser_key_for(path)
+            if key is None or (retailer_filter and key != retailer_filter):
+                continue
+            parser = get_parser(key)
+            if not hasattr(parser, method):
+                continue
+            sender = next(
+                (getattr(parser, attr) for attr in SENDER_ATTRIBUTES[email_type] if getattr(parser, attr, None)),
+                "",
+            )
+            fixtures.append({
+                "path": path,
+                "group": f"{key}/{email_type}",
+                "retailer": key,
+                "email_type": email_type,
+                "parser": parser,
+                "method": method,
+                "sender": sender,
+                "subject": subject,
+                "html": path.read_text(encoding="utf-8", errors="ignore"),
+            })
+    return fixtures
+
+
+def make_email(fixture: dict) -> EmailData:
+    """Fresh EmailData for a fixture (no cached document)."""
+    return EmailData(
+        message_id=fixture["path"].name,
+        thread_id="benchmark",
+        subject=fixture["subject"],
+        sender=fixture["sender"],
+        html_content=fixture["html"],
+    )
+
+
+def run_fixture(classifier: RetailerEmailClassifier, fixture: dict) -> None:
+    """Classify and parse one fixture with a fresh EmailData (as the webhook does)."""
+    email_data = make_email(fixture)
+    classifier.classify(email_data)
+    getattr(fixture["parser"], fixture["method"])(email_data)
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def peak_rss_mb() -> float:
+    """Process peak RSS in MB (ru_maxrss is KB on Linux, bytes on macOS)."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def benchmark(fixtures: list, classifier: RetailerEmailClassifier, rounds: int) -> dict:
+    """Time every fixture `rounds` times, then measure one pass per group under tracemalloc."""
+    # Warm-up: lazy parser imports, regex compilation, classifier caches
+    for fixture in fixtures:
+        run_fixture(classifier, fixture)
+
+    latencies = {}
+    for _ in range(rounds):
+        for fixture in fixtures:
+            started = time.perf_counter()
+            run_fixture(classifier, fixture)
+            latencies.setdefault(fixture["group"], []).append(time.perf_counter() - started)
+
+    peak_alloc = {}
+    for fixture in fixtures:
+        tracemalloc.start()
+        run_fixture(classifier, fixture)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak_alloc[fixture["group"]] = max(peak_alloc.get(fixture["group"], 0), peak)
+
+    groups = {}
+    for group, samples in sorted(latencies.items()):
+        groups[group] = {
+            "emails": len(samples) // rounds,
+            "samples": len(samples),
+            "emails_per_sec": round(len(samples) / sum(samples), 2),
+            "p50_ms": round(percentile(samples, 50) * 1000, 3),
+            "p99_ms": round(percentile(samples, 99) * 1000, 3),
+            "peak_alloc_kb": round(peak_alloc[group] / 1024, 1),
+        }
+
+    all_samples = [sample for samples in latencies.values() for sample in samples]
+    return {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "rounds": rounds,
+        "totals": {
+            "emails": len(fixtures),
+            "emails_per_sec": round(len(all_samples) / sum(all_samples), 2),
+            "p50_ms": round(percentile(all_samples, 50) * 1000, 3),
+            "p99_ms": round(percentile(all_samples, 99) * 1000, 3),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        },
+        "groups": groups,
+    }
+
+
+def run_pool_pass(pool: ParsePool, fixtures: list) -> None:
+    """Parse every fixture through the pool at once (as a burst of emails would be)."""
+    jobs = []
+    for fixture in fixtures:
+        email_data = make_email(fixture)
+        jobs.append((email_data, pool.submit(email_data, fixture["retailer"], fixture["email_type"])))
+    for email_data, job in jobs:
+        pool.collect(email_data, job)
+
+
+def benchmark_parse_pool(fixtures: list, rounds: int, max_workers: int) -> dict:
+    """Parse-only emails/sec in-process and through a ParsePool of 1..max_workers processes."""
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for fixture in fixtures:
+            getattr(fixture["parser"], fixture["method"])(make_email(fixture))
+    in_process = len(fixtures) * rounds / (time.perf_counter() - started)
+
+    workers_rate = {}
+    for workers in range(1, max_workers + 1):
+        pool = ParsePool(workers, timeout=300)
+        try:
+            # Warm-up: worker start, parser imports
+            run_pool_pass(pool, fixtures)
+            started = time.perf_counter()
+            for _ in range(rounds):
+                run_pool_pass(pool, fixtures)
+            elapsed = time.perf_counter() - started
+        finally:
+            pool.shutdown()
+        workers_rate[str(workers)] = round(len(fixtures) * rounds / elapsed, 2)
+    return {"in_process_emails_per_sec": round(in_process, 2), "workers_emails_per_sec": workers_rate}
+
+
+def print_parse_pool_report(scaling: dict) -> None:
+    """Print parse pool emails/sec and speedup over one worker per worker count."""
+    rates = scaling["workers_emails_per_sec"]
+    print(f"\nParse pool (parse only, in-process {scaling['in_process_emails_per_sec']:.1f} emails/s)")
+    print(f"{'Workers':>7} {'Emails/s':>10} {'vs 1 worker':>12}")
+    for workers, rate in rates.items():
+        print(f"{workers:>7} {rate:>10.1f} {rate / rates['1']:>11.2f}x")
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list:
+    """Groups whose p50 latency regressed by more than `threshold` (fraction) vs the baseline."""
+    regressions = []
+    for group, current in report["groups"].items():
+        previous = baseline.get("groups", {}).get(group)
+        if not previous or not previous.get("p50_ms"):
+            continue
+        change = current["p50_ms"] / previous["p50_ms"] - 1
+        if change > threshold:
+            regressions.append((group, previous["p50_ms"], current["p50_ms"], change))
+    return regressions
+
+
+def print_report(report: dict, baseline: dict = None) -> None:
+    """Print the per-group table (with baseline p50 when available)."""
+    print(f"{'Group':<30} {'Emails':>6} {'Emails/s':>10} {'p50':>10} {'p99':>10} {'Peak alloc':>12} {'Base p50':>10}")
+    print("-" * 94)
+    for group, stats in report["groups"].items():
+        base = (baseline or {}).get("groups", {}).get(group, {}).get("p50_ms")
+        base_text = f"{base:>8.2f}ms" if base else f"{'-':>10}"
+        print(
+            f"{group:<30} {stats['emails']:>6} {stats['emails_per_sec']:>10.1f} {stats['p50_ms']:>8.2f}ms "
+            f"{stats['p99_ms']:>8.2f}ms {stats['peak_alloc_kb']:>9.0f} KB {base_text}"
+        )
+    totals = report["totals"]
+    print("-" * 94)
+    print(
+        f"{totals['emails']} emails: {totals['emails_per_sec']:.1f} emails/s, p50 {totals['p50_ms']:.2f}ms, "
+        f"p99 {totals['p99_ms']:.2f}ms, peak RSS {totals['peak_rss_mb']:.0f} MB"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark classification + parsing over the feed/ corpus")
+    parser.add_argument("--rounds", type=int, default=10, help="Timed passes over every fixture (default: 10)")
+    parser.add_argument("--retailer", help="Only benchmark fixtures for this parser key")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help=f"JSON report path (default: {DEFAULT_OUTPUT.name})")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="Baseline report to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Also write this report as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="p50 slowdown that counts as a regression (default: 0.2 = 20%%)")
+    parser.add_argument("--parse-pool", type=int, default=0, metavar="N", help="Also measure the parse pool with 1..N worker processes")
+    args = parser.parse_args()
+
+    # Parsers log every extracted field; keep the output to the report
+    logging.disable(logging.CRITICAL)
+
+    fixtures = load_fixtures(args.retailer)
+    if not fixtures:
+        print(f"No fixtures found under {FEED_DIR}")
+        return 1
+
+    report = benchmark(fixtures, RetailerEmailClassifier(), max(1, args.rounds))
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else None
+
+    print_report(report, baseline)
+    if args.parse_pool > 0:
+        report["parse_pool"] = benchmark_parse_pool(fixtures, max(1, args.rounds), args.parse_pool)
+        print_parse_pool_report(report["parse_pool"])
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"\nReport written to {args.output}")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2))
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print(f"No baseline at {args.baseline} (run with --save-baseline to create one)")
+        return 0
+
+    regressions = compare(report, baseline, args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} group(s) slower than baseline by more than {args.threshold:.0%}:")
+        for group, before, after, change in regressions:
+            print(f"   {group}: p50 {before:.2f}ms -> {after:.2f}ms (+{change:.0%})")
+        return 1
+    print(f"\n✅ No p50 regressions above {args.threshold:.0%} vs baseline ({baseline.get('generated_at')})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,256 @@
+"""
+GET /purchases latency benchmark at 1M purchase_tracker rows.
+
+Seeds synthetic purchases (lead IDs prefixed BENCH-, retailers named
+"Bench Retailer N") into the database from DATABASE_URL, then calls the
+get_all_purchases endpoint function directly and reports, per page depth,
+p50/p99 latency and the number of SQL statements one page issues for:
+
+- offset: skip=<depth>, the way the dashboard pages today
+- keyset: cursor=<id at that depth>, the same page by next_cursor
+- each with total=exact / estimated / none
+
+and, for search-as-you-type, the first page (total=none) for growing
+prefixes of a product name, order number and ASIN typed into the filters
+(budget: SEARCH_BUDGET_MS at p99).
+
+Point DATABASE_URL at a scratch database: seeding 1M rows takes a few
+minutes and --cleanup deletes only the BENCH- rows.
+
+Usage (from backend dir):
+    python -m test.benchmark_purchases_listing --seed               # seed 1M rows (once), then benchmark
+    python -m test.benchmark_purchases_listing --rounds 20 --limit 1000
+    python -m test.benchmark_purchases_listing --cleanup            # delete the seeded rows
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import event, text
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.api.purchase_tracker_api import get_all_purchases
+from app.config.database import SessionLocal, engine
+
+DEFAULT_OUTPUT = Path(__file__).parent / "purchases_listing_benchmark.json"
+LEAD_PREFIX = "BENCH-"
+RETAILER_PREFIX = "Bench Retailer "
+DEPTHS = (0, 10_000, 100_000, 500_000, 900_000)
+SEARCH_BUDGET_MS = 50
+# filter -> what the user types, one keystroke batch at a time
+SEARCHES = {
+    "product_name": ("Ben", "Bench Prod", "Bench Product 42", "Bench Product 4217"),
+    "order_number": ("BEN", "BENCH-ORD", "BENCH-ORDER-5531", "BENCH-ORDER-553187"),
+    "asin": ("B0B", "B0BENCH", "B0BENCH042", "B0BENCH04217"),
+}
+
+SEED_STATEMENTS = [
+    """
+    INSERT INTO retailers (name, created_at, updated_at)
+    SELECT :retailer_prefix || n, now(), now() FROM generate_series(1, 50) AS n
+    ON CONFLICT (name) DO NOTHING
+    """,
+    """
+    INSERT INTO oa_sourcing (lead_id, timestamp, submitted_by, product_name, unique_id, retailer_id, ppu_including_ship, rsp)
+    SELECT :lead_prefix || n, now(), 'Bench Sourcer', 'Bench Product ' || n, 'BU' || n,
+           (SELECT id FROM retailers WHERE name = :retailer_prefix || (n % 50 + 1)), 50 + n % 100, 120 + n % 80
+    FROM generate_series(1, :leads) AS n
+    """,
+    """
+    INSERT INTO asin_bank (lead_id, size, asin, created_at)
+    SELECT :lead_prefix || n, (7 + n % 8)::text, 'B0BENCH' || lpad(n::text, 5, '0'), now()
+    FROM generate_series(1, :leads) AS n
+    """,
+    """
+    INSERT INTO purchase_tracker (oa_sourcing_id, asin_bank_id, lead_id, date, platform, order_number,
+                                  og_qty, final_qty, status, shipped_to_pw, arrived, checked_in, shipped_out,
+                                  audited, created_at, updated_at)
+    SELECT o.id, a.id, o.lead_id, now() - (n || ' minutes')::interval, 'Bench', 'BENCH-ORDER-' || n,
+           1 + n % 3, 1 + n % 3, 'Purchased', 0, 0, 0, 0, false, now(), now()
+    FROM generate_series(1, :purchases) AS n
+    JOIN oa_sourcing o ON o.lead_id = :lead_prefix || (n % :leads + 1)
+    JOIN asin_bank a ON a.lead_id = o.lead_id
+    """,
+    "ANALYZE retailers, oa_sourcing, asin_bank, purchase_tracker",
+]
+
+CLEANUP_STATEMENTS = [
+    "DELETE FROM purchase_tracker WHERE lead_id LIKE :lead_prefix || '%'",
+    "DELETE FROM asin_bank WHERE lead_id LIKE :lead_prefix || '%'",
+    "DELETE FROM oa_sourcing WHERE lead_id LIKE :lead_prefix || '%'",
+    "DELETE FROM retailers WHERE name LIKE :retailer_prefix || '%'",
+]
+
+
+class StatementCounter:
+    """Counts SQL statements sent through the engine while active."""
+
+    def __init__(self):
+        self.count = 0
+        self.active = False
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        if self.active:
+            self.count += 1
+
+
+def run_statements(statements: list, params: dict) -> None:
+    with engine.begin() as connection:
+        for statement in statements:
+            started = time.perf_counter()
+            connection.execute(text(statement), params)
+            print(f"  {time.perf_counter() - started:6.1f}s  {' '.join(statement.split())[:70]}")
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def list_purchases(db, limit: int, skip: int = 0, cursor=None, total: str = "exact", **filters) -> dict:
+    """Call the endpoint function with every query parameter spelled out (no FastAPI defaults)."""
+    params = {"product_name": None, "asin": None, "order_number": None, **filters}
+    return get_all_purchases(
+        skip=skip, limit=limit, cursor=cursor, total=total,
+        platform=None, status=None, start_date=None, end_date=None, supplier=None,
+        search_mode="contains", db=db, **params,
+    )
+
+
+def measure(counter: StatementCounter, rounds: int, **kwargs) -> dict:
+    """p50/p99 latency and statements per page of one listing call shape (fresh session per call)."""
+    timings = []
+    statements = 0
+    for _ in range(rounds):
+        db = SessionLocal()
+        try:
+            counter.count, counter.active = 0, True
+            started = time.perf_counter()
+            response = list_purchases(db, **kwargs)
+            timings.append((time.perf_counter() - started) * 1000)
+            counter.active = False
+            statements = counter.count
+        finally:
+            db.close()
+    return {
+        "p50_ms": round(percentile(timings, 50), 2),
+        "p99_ms": round(percentile(timings, 99), 2),
+        "statements": statements,
+        "rows": len(response["data"]["items"]),
+        "total": response["data"]["total"],
+    }
+
+
+def cursor_at_depth(depth: int):
+    """Keyset cursor that starts the page at `depth` rows (id of the row just before it)."""
+    if depth == 0:
+        return None
+    with engine.connect() as connection:
+        return connection.execute(
+            text("SELECT id FROM purchase_tracker ORDER BY id DESC OFFSET :offset LIMIT 1"),
+            {"offset": depth - 1}
+        ).scalar()
+
+
+def benchmark(rounds: int, limit: int) -> dict:
+    counter = StatementCounter()
+    # Warm-up: mapper configuration, connection pool, plan cache
+    measure(counter, 2, limit=limit)
+
+    results = {}
+    for depth in DEPTHS:
+        cursor = cursor_at_depth(depth)
+        results[str(depth)] = {
+            "offset/exact": measure(counter, rounds, limit=limit, skip=depth, total="exact"),
+            "keyset/exact": measure(counter, rounds, limit=limit, cursor=cursor, total="exact"),
+            "keyset/estimated": measure(counter, rounds, limit=limit, cursor=cursor, total="estimated"),
+            "keyset/none": measure(counter, rounds, limit=limit, cursor=cursor, total="none"),
+        }
+    return results
+
+
+def benchmark_search(counter: StatementCounter, rounds: int, limit: int) -> dict:
+    """First page (no count) per typed prefix of each search filter."""
+    return {
+        f"{field}={term}": measure(counter, rounds, limit=limit, total="none", **{field: term})
+        for field, terms in SEARCHES.items()
+        for term in terms
+    }
+
+
+def print_search_report(results: dict) -> int:
+    """Print the search timings; returns how many exceed SEARCH_BUDGET_MS at p99."""
+    print(f"\n{'Search':<36} {'p50':>10} {'p99':>10} {'Rows':>6}")
+    print("-" * 66)
+    over_budget = 0
+    for name, stats in results.items():
+        flag = ""
+        if stats["p99_ms"] > SEARCH_BUDGET_MS:
+            over_budget += 1
+            flag = f"  > {SEARCH_BUDGET_MS}ms"
+        print(f"{name:<36} {stats['p50_ms']:>8.2f}ms {stats['p99_ms']:>8.2f}ms {stats['rows']:>6}{flag}")
+    return over_budget
+
+
+def print_report(results: dict) -> None:
+    print(f"{'Depth':>8} {'Mode':<18} {'p50':>10} {'p99':>10} {'SQL':>5} {'Rows':>6} {'Total':>10}")
+    print("-" * 72)
+    for depth, modes in results.items():
+        for mode, stats in modes.items():
+            total = stats["total"] if stats["total"] is not None else "-"
+            print(
+                f"{depth:>8} {mode:<18} {stats['p50_ms']:>8.2f}ms {stats['p99_ms']:>8.2f}ms "
+                f"{stats['statements']:>5} {stats['rows']:>6} {total:>10}"
+            )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark GET /purchases offset vs keyset pagination at 1M rows")
+    parser.add_argument("--seed", action="store_true", help="Seed synthetic BENCH- rows before benchmarking")
+    parser.add_argument("--purchases", type=int, default=1_000_000, help="Purchases to seed (default: 1,000,000)")
+    parser.add_argument("--leads", type=int, default=10_000, help="Leads/ASINs to seed (default: 10,000)")
+    parser.add_argument("--cleanup", action="store_true", help="Delete the seeded BENCH- rows and exit")
+    parser.add_argument("--rounds", type=int, default=10, help="Timed calls per depth and mode (default: 10)")
+    parser.add_argument("--limit", type=int, default=1000, help="Page size (default: 1000)")
+    parser.add_argument("--search-limit", type=int, default=50, help="Page size of the search timings (default: 50)")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help=f"JSON report path (default: {DEFAULT_OUTPUT.name})")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    params = {"lead_prefix": LEAD_PREFIX, "retailer_prefix": RETAILER_PREFIX, "leads": args.leads, "purchases": args.purchases}
+
+    if args.cleanup:
+        print("Deleting seeded rows...")
+        run_statements(CLEANUP_STATEMENTS, params)
+        return 0
+    if args.seed:
+        print(f"Seeding {args.purchases:,} purchases over {args.leads:,} leads...")
+        run_statements(SEED_STATEMENTS, params)
+
+    results = benchmark(max(1, args.rounds), args.limit)
+    print_report(results)
+    search_results = benchmark_search(StatementCounter(), max(1, args.rounds), args.search_limit)
+    over_budget = print_search_report(search_results)
+    report = {
+        "generated_at": datetime.now().isoformat(), "limit": args.limit, "rounds": args.rounds,
+        "depths": results, "search": search_results,
+    }
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"\nReport written to {args.output}")
+    if over_budget:
+        print(f"❌ {over_budget} search(es) over {SEARCH_BUDGET_MS}ms at p99")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
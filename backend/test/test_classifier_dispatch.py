@@ -0,0 +1,154 @@
+"""
+Parity test for RetailerEmailClassifier's sender dispatch index.
+
+Runs every email in feed/ through the classifier twice - with the precompiled
+SenderDispatchIndex and with every is_<retailer>_email check evaluated in order
+(use_sender_index=False) - for each known retailer sender and a set of
+representative subjects, and fails on the first differing classification.
+
+Retailers whose parser module does not import are left out of both classifiers
+(and listed); the parity check covers every retailer that does.
+
+Run with ENVIRONMENT=development as well to cover the dev forwarding checks.
+
+Usage:
+    python -m test.test_classifier_dispatch     # from backend dir
+    python test/test_classifier_dispatch.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for direct execution
+if __name__ == "__main__" and __package__ is None:
+    backend_dir = Path(__file__).parent.parent
+    sys.path.insert(0, str(backend_dir))
+
+from app.models.email import EmailData
+from app.services import retailer_email_classifier
+from app.services.parser_registry import get_parser
+from app.services.retailer_email_classifier import RetailerEmailClassifier, SenderDispatchIndex
+
+FEED_DIR = Path(__file__).parent.parent / "feed"
+
+# Subjects seen across retailers (confirmation, shipping, cancellation and the early-match cases)
+SUBJECTS = [
+    "",
+    "Thank you for your order",
+    "Order Confirmation",
+    "Your Order is Official!",
+    "Thank you for your Urban Outfitters order!",
+    "Confirmation of Your SNIPES Order #SNP123456",
+    "Your END. order confirmation",
+    "Order #1361825686 was received!",
+    "Order #SP834718 confirmed",
+    "Your order's on its way!",
+    "Your order has shipped",
+    "Get Hyped! Your Order Has Shipped",
+    "Your shipment is on the way",
+    "Part of Order #123456 has shipped",
+    "We've got the scoop on your order",
+    "Your order has been canceled",
+    "Your recent order has been cancelled",
+    "Cancelation Update",
+    "Sorry, your item is out of stock",
+    "Order #1361825686 has been canceled",
+]
+
+# Senders that no retailer check should claim by address alone
+EXTRA_SENDERS = [
+    "someone@example.com",
+    "Foot Locker <accountservices@example.com>",
+    "Shoe Palace <orders@example.com>",
+]
+
+
+def build_classifiers() -> tuple:
+    """
+    Indexed and unindexed classifiers over every parser that imports.
+
+    A parser whose module fails to import is passed to the classifier as None,
+    so neither classifier matches that retailer.
+
+    Returns:
+        (indexed, unindexed, {parser key: import error} of the parsers left out)
+    """
+    unavailable = {}
+
+    def available_parser(key):
+        try:
+            return get_parser(key)
+        except ImportError as e:
+            unavailable[key] = str(e)
+            return None
+
+    original = retailer_email_classifier.get_parser
+    retailer_email_classifier.get_parser = available_parser
+    try:
+        indexed = RetailerEmailClassifier()
+        unindexed = RetailerEmailClassifier(use_sender_index=False)
+    finally:
+        retailer_email_classifier.get_parser = original
+    return indexed, unindexed, unavailable
+
+
+def collect_senders(classifier: RetailerEmailClassifier) -> list:
+    """Every sender address / name constant declared by the classifier's parsers."""
+    senders = set(EXTRA_SENDERS)
+    for parser in vars(classifier).values():
+        parser_cls = type(parser)
+        for name in dir(parser_cls):
+            value = getattr(parser_cls, name, None)
+            if name.isupper() and isinstance(value, str) and (name.endswith("FROM_EMAIL") or name.endswith("_FROM")):
+                senders.add(value)
+    return sorted(senders)
+
+
+def test_classifier_dispatch_parity():
+    """Indexed and unindexed classification agree on the whole feed/ corpus."""
+    indexed, unindexed, unavailable = build_classifiers()
+    assert isinstance(indexed._sender_index, SenderDispatchIndex)
+    loaded = [parser for parser in vars(unindexed).values() if parser is not None]
+    assert len(loaded) > len(unavailable), f"Most retailer parsers failed to import: {unavailable}"
+    for key, error in sorted(unavailable.items()):
+        print(f"Left out {key} (parser not importable: {error})")
+
+    feed_files = sorted(FEED_DIR.rglob("*.txt"))
+    assert feed_files, f"No emails found in {FEED_DIR}"
+    senders = collect_senders(unindexed)
+
+    checked = 0
+    timings = {"indexed": 0.0, "unindexed": 0.0}
+    for path in feed_files:
+        html = path.read_text(encoding="utf-8", errors="ignore")
+        for sender in senders:
+            for subject in SUBJECTS:
+                email_data = EmailData(
+                    message_id=f"{path.name}:{sender}:{subject}",
+                    thread_id="parity",
+                    subject=subject,
+                    sender=sender,
+                    html_content=html,
+                )
+                started = time.perf_counter()
+                expected = unindexed.classify(email_data)
+                timings["unindexed"] += time.perf_counter() - started
+                started = time.perf_counter()
+                actual = indexed.classify(email_data)
+                timings["indexed"] += time.perf_counter() - started
+
+                assert actual == expected, (
+                    f"{path.relative_to(FEED_DIR)} sender={sender!r} subject={subject!r}: "
+                    f"indexed={actual} unindexed={expected}"
+                )
+                checked += 1
+
+    print(
+        f"{checked} classifications match ({len(feed_files)} emails x {len(senders)} senders x "
+        f"{len(SUBJECTS)} subjects); unindexed {timings['unindexed']:.2f}s, indexed {timings['indexed']:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    test_classifier_dispatch_parity()